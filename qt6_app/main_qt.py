@@ -4,13 +4,17 @@ BLITZ CNC - Main Application Entry Point
 Qt6-based control software for dual-head CNC saw.
 """
 
+import time
+_T0 = time.perf_counter()  # riferimento per il report tempi di avvio
+
 import sys
 import os
 from pathlib import Path
 import logging
 from typing import Dict, Tuple
 from PySide6.QtWidgets import QApplication, QMainWindow, QWidget, QStackedWidget, QMessageBox
-from PySide6.QtCore import QTimer
+from PySide6.QtCore import QTimer, Qt
+from PySide6.QtGui import QKeySequence, QShortcut
 
 # Add project root to Python path
 project_root = Path(__file__).parent.parent.resolve()
@@ -35,12 +39,37 @@ except ImportError:
 
 from qt6_app.ui_qt.widgets.size_ignorer import SizeIgnorer
 from qt6_app.ui_qt.widgets.toast import Toast
+from qt6_app.ui_qt.utils.startup_timing import StartupTimer
 
 logger = logging.getLogger("blitz")
 
+STARTUP = StartupTimer(_T0)
+STARTUP.mark("main_qt imported")
+
 USE_SIMULATION = os.environ.get("SIMULATION", "1") == "1"
+# Registrazione/replay sessioni MachineIO (analisi prestazioni offline)
+RECORD_SESSION = os.environ.get("BLITZ_RECORD_SESSION", "")
+REPLAY_SESSION = os.environ.get("BLITZ_REPLAY_SESSION", "")
+REPLAY_SPEED = float(os.environ.get("BLITZ_REPLAY_SPEED", "1") or 1)
+# Profiler a campionamento dall'avvio per N secondi (output in ~/.blitz/profiles)
+PROFILE_STARTUP_S = float(os.environ.get("BLITZ_PROFILE_SECONDS", "0") or 0)
+# BLITZ_NO_WARMUP=1: niente warm-up in background dopo la comparsa della finestra
+WARMUP_ENABLED = os.environ.get("BLITZ_NO_WARMUP", "0") != "1"
 APP_VERSION = "1.0.0"
 
+# Pagine: (key, modulo, classe). Costruite alla prima show_page, tranne EAGER_PAGES.
+PAGE_SPECS = [
+    ("home", "qt6_app.ui_qt.pages.home_page", "HomePage"),
+    ("semi_auto", "qt6_app.ui_qt.pages.semi_auto_page", "SemiAutoPage"),
+    ("automatico", "qt6_app.ui_qt.pages.automatico_page", "AutomaticoPage"),
+    ("manuale", "qt6_app.ui_qt.pages.manuale_page", "ManualePage"),
+    ("utility", "qt6_app.ui_qt.pages.utility_page", "UtilityPage"),
+    ("label_editor", "qt6_app.ui_qt.pages.label_editor_page", "LabelEditorPage"),
+]
+EAGER_PAGES = ("home",)
+# BLITZ_EAGER_PAGES=1: costruisce tutte le pagine all'avvio (comportamento precedente)
+BUILD_ALL_PAGES = os.environ.get("BLITZ_EAGER_PAGES", "0") == "1"
+
 # Synonyms and legacy keys for navigation
 PAGE_ALIASES = {
     "semi": "semi_auto",
@@ -62,11 +91,15 @@ class BlitzMainWindow(QMainWindow):
 
         # Page registry: {key: (wrapper, index, page_widget)}
         self._pages: Dict[str, Tuple[QWidget, int, QWidget]] = {}
+        # Pages not built yet: {key: (module, class)}
+        self._page_specs: Dict[str, Tuple[str, str]] = {}
+        self.startup_timer = STARTUP
 
         # Initialize machine
         self.machine = None
         self.machine_adapter = None
-        self._init_machine()
+        with STARTUP.phase("machine init"):
+            self._init_machine()
 
         # Toast handling
         self._toast_instances = []
@@ -78,8 +111,28 @@ class BlitzMainWindow(QMainWindow):
         self._load_pages()
         self.show_page("home")
 
+        # Ctrl+Alt+P: avvia/ferma il profiler a campionamento
+        QShortcut(QKeySequence("Ctrl+Alt+P"), self, activated=self.toggle_profiler,
+                  context=Qt.ApplicationShortcut)
+
         logger.info(f"BLITZ CNC v{APP_VERSION} started (simulation={USE_SIMULATION})")
 
+    def toggle_profiler(self):
+        """Start or stop the sampling profiler (all threads)."""
+        try:
+            from ui_qt.utils.sampling_profiler import get_profiler
+        except Exception as e:
+            logger.warning(f"Profiler not available: {e}")
+            return
+        prof = get_profiler()
+        if prof.running:
+            prof.stop(save=True)
+            if prof.last_paths:
+                self.show_toast(f"Profilo salvato: {prof.last_paths[0].name}", "success", 5000)
+        else:
+            prof.start()
+            self.show_toast("Profiler avviato (Ctrl+Alt+P per fermare)", "info")
+
     def show_toast(self, message: str, toast_type: str = "info", duration_ms: int = 3000):
         try:
             colors = {
@@ -106,6 +159,10 @@ class BlitzMainWindow(QMainWindow):
 
     def _init_machine(self):
         try:
+            if REPLAY_SESSION:
+                self.machine, self.machine_adapter = self._create_replay_machine()
+                logger.info(f"Machine initialized: REPLAY {REPLAY_SESSION} (x{REPLAY_SPEED:g})")
+                return
             if USE_SIMULATION:
                 self.machine, self.machine_adapter = self._create_simulation_machine()
                 logger.info("Machine initialized: SIMULATION mode")
@@ -116,6 +173,25 @@ class BlitzMainWindow(QMainWindow):
             logger.exception(f"Error initializing machine: {e}")
             self.machine, self.machine_adapter = self._create_fallback_machine()
             logger.warning("Using fallback machine")
+            return
+        if RECORD_SESSION:
+            self._start_session_recording()
+
+    def _create_replay_machine(self):
+        from qt6_app.ui_qt.machine.session_recorder import ReplayMachine
+        from qt6_app.ui_qt.machine.machine_adapter import MachineAdapter
+        raw = ReplayMachine(REPLAY_SESSION, speed=REPLAY_SPEED)
+        return raw, MachineAdapter(raw)
+
+    def _start_session_recording(self):
+        try:
+            from qt6_app.ui_qt.machine.session_recorder import RecordingMachine
+            from qt6_app.ui_qt.machine.machine_adapter import MachineAdapter
+            self.machine = RecordingMachine(self.machine, RECORD_SESSION)
+            self.machine_adapter = MachineAdapter(self.machine)
+            logger.info(f"Recording machine session to {RECORD_SESSION}")
+        except Exception as e:
+            logger.error(f"Cannot record machine session: {e}")
 
     def _create_simulation_machine(self):
         try:
@@ -278,16 +354,20 @@ class BlitzMainWindow(QMainWindow):
         return raw, _FallbackAdapter(raw)
 
     def _load_pages(self):
-        pages_to_load = [
-            ("home", "qt6_app.ui_qt.pages.home_page", "HomePage"),
-            ("semi_auto", "qt6_app.ui_qt.pages.semi_auto_page", "SemiAutoPage"),
-            ("automatico", "qt6_app.ui_qt.pages.automatico_page", "AutomaticoPage"),
-            ("manuale", "qt6_app.ui_qt.pages.manuale_page", "ManualePage"),
-            ("utility", "qt6_app.ui_qt.pages.utility_page", "UtilityPage"),
-            ("label_editor", "qt6_app.ui_qt.pages.label_editor_page", "LabelEditorPage"),
-        ]
-        for key, mod_name, cls_name in pages_to_load:
-            self._try_add_page(key, mod_name, cls_name)
+        self._page_specs = {key: (mod_name, cls_name) for key, mod_name, cls_name in PAGE_SPECS}
+        for key, _mod, _cls in PAGE_SPECS:
+            if BUILD_ALL_PAGES or key in EAGER_PAGES:
+                self._ensure_page(key)
+
+    def _ensure_page(self, key: str) -> bool:
+        """Build a registered page on first use; True if it is available."""
+        if key in self._pages:
+            return True
+        spec = self._page_specs.pop(key, None)
+        if spec is None:
+            return False
+        self._try_add_page(key, *spec)
+        return key in self._pages
 
     def add_page(self, key: str, widget: QWidget):
         wrapper = SizeIgnorer(widget)
@@ -297,24 +377,29 @@ class BlitzMainWindow(QMainWindow):
     def _try_add_page(self, key: str, mod_name: str, cls_name: str):
         try:
             import importlib
-            mod = importlib.import_module(mod_name)
-            cls = getattr(mod, cls_name)
-            self.add_page(key, cls(self))
-            logger.info(f"Page loaded: {key} ({mod_name}.{cls_name})")
+            with STARTUP.phase(f"import {key}") as imp:
+                mod = importlib.import_module(mod_name)
+                cls = getattr(mod, cls_name)
+            with STARTUP.phase(f"build {key}") as build:
+                self.add_page(key, cls(self))
+            logger.info(f"Page loaded: {key} ({mod_name}.{cls_name}) "
+                        f"import={imp['duration_s'] * 1000:.0f}ms build={build['duration_s'] * 1000:.0f}ms")
         except Exception as e:
             logger.error(f"Error loading page '{key}': {e}")
 
     def resolve_page_key(self, key: str) -> str:
-        if key in self._pages:
+        if key in self._pages or key in self._page_specs:
             return key
         if key in PAGE_ALIASES:
             alias = PAGE_ALIASES[key]
-            if alias in self._pages:
+            if alias in self._pages or alias in self._page_specs:
                 return alias
         return ""
 
     def show_page(self, key: str):
         resolved = self.resolve_page_key(key)
+        if resolved and not self._ensure_page(resolved):
+            resolved = ""
         if not resolved:
             logger.warning(f"Attempted to open non-existent page: {key}")
             # Fallback to home if available
@@ -370,9 +455,37 @@ class BlitzMainWindow(QMainWindow):
         event.accept()
 
 
+def _report_startup():
+    """Log the startup timing report once the event loop is running."""
+    STARTUP.mark("interactive")
+    logger.info(STARTUP.format_report())
+    try:
+        STARTUP.write_json(Path.home() / ".blitz" / "logs" / "startup_timing.json")
+    except Exception as e:
+        logger.debug(f"Startup timing not written: {e}")
+
+
+def _start_warmup(window):
+    """Warm-up in background (solver, DB, font etichette, hardware) mentre si fa l'azzeramento."""
+    if not WARMUP_ENABLED:
+        return
+    def _done(results):
+        try:
+            STARTUP.write_json(Path.home() / ".blitz" / "logs" / "startup_timing.json")
+        except Exception as e:
+            logger.debug(f"Startup timing not written: {e}")
+    try:
+        # Import via ui_qt.*: stesso runner letto da StatusPanel
+        from ui_qt.utils.warmup import start_warmup
+        start_warmup(window.machine, timer=STARTUP, on_done=_done)
+    except Exception as e:
+        logger.warning(f"Warm-up not started: {e}")
+
+
 def main():
     try:
-        setup_logging()
+        with STARTUP.phase("logging"):
+            setup_logging()
     except Exception as e:
         print(f"Warning: Could not setup logging: {e}")
         logging.basicConfig(level=logging.INFO)
@@ -383,9 +496,17 @@ def main():
     logger.info(f"Simulation mode: {USE_SIMULATION}")
     logger.info("=" * 60)
 
-    app = QApplication.instance()
-    if app is None:
-        app = QApplication(sys.argv)
+    if PROFILE_STARTUP_S > 0:
+        try:
+            from ui_qt.utils.sampling_profiler import get_profiler
+            get_profiler().start(duration_s=PROFILE_STARTUP_S)
+        except Exception as e:
+            logger.warning(f"Startup profiling not started: {e}")
+
+    with STARTUP.phase("qapplication"):
+        app = QApplication.instance()
+        if app is None:
+            app = QApplication(sys.argv)
 
     app.setApplicationName("BLITZ CNC")
     app.setApplicationVersion(APP_VERSION)
@@ -397,10 +518,30 @@ def main():
     except Exception as e:
         logger.warning(f"Could not load theme module: {e}")
 
-    window = BlitzMainWindow()
+    with STARTUP.phase("main window"):
+        window = BlitzMainWindow()
     window.showMaximized()  # open maximized
+    STARTUP.mark("window shown")
+    QTimer.singleShot(0, _report_startup)
+    QTimer.singleShot(0, lambda: _start_warmup(window))
+
+    # Metriche di produzione (HTTP /metrics + JSON periodico), fuori dalla GUI.
+    # Import via ui_qt.*: stesso registry usato da macchina, ottimizzatore e pagine.
+    metrics_exporter = None
+    try:
+        from ui_qt.utils.metrics import start_metrics_export
+        metrics_exporter = start_metrics_export(read_settings())
+    except Exception as e:
+        logger.warning(f"Metrics export not started: {e}")
 
     exit_code = app.exec()
+    if metrics_exporter:
+        metrics_exporter.stop()
+    try:
+        from ui_qt.utils.db_pool import close_all_pools
+        close_all_pools()
+    except Exception as e:
+        logger.warning(f"Database connections not closed: {e}")
     logger.info(f"Application exited with code: {exit_code}")
     return exit_code
 
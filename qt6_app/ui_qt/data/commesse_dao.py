@@ -1,15 +1,15 @@
 from __future__ import annotations
 from typing import Dict, Any, List, Optional
-from .db import get_conn
+from .db import get_conn, query
 
 def list_all() -> List[Dict[str, Any]]:
     with get_conn() as cx:
-        cur = cx.execute("SELECT * FROM commesse ORDER BY id DESC")
+        cur = query(cx, "SELECT * FROM commesse ORDER BY id DESC")
         return [dict(r) for r in cur.fetchall()]
 
 def get_by_id(cid: int) -> Optional[Dict[str, Any]]:
     with get_conn() as cx:
-        cur = cx.execute("SELECT * FROM commesse WHERE id = ?", (cid,))
+        cur = query(cx, "SELECT * FROM commesse WHERE id = ?", (cid,))
         r = cur.fetchone()
         return dict(r) if r else None
 
@@ -29,7 +29,7 @@ def items_for_commessa(cid: int) -> List[Dict[str, Any]]:
              WHERE ci.commessa_id = ?
              ORDER BY ci.id"""
     with get_conn() as cx:
-        cur = cx.execute(sql, (cid,))
+        cur = query(cx, sql, (cid,))
         return [dict(r) for r in cur.fetchall()]
 
 def add_item(cid: int, tipologia_id: int | None, len_mm: float, qty: int) -> int:
@@ -1,54 +1,32 @@
 from __future__ import annotations
-import os
 import sqlite3
+from typing import Any, Optional, Tuple
 
-DB_PATH = os.path.join("data", "app.db")
+from ui_qt.services import database
+
+# None = database unico predefinito (services/database.py): le tabelle
+# tipologie/commesse/commessa_items/stock_bars fanno parte dello schema
+DB_PATH = None
+
+# pool già aperto (migrazioni e import fatti) per il DB_PATH corrente
+_pool: Optional[Tuple[Any, database.ConnectionPool]] = None
 
 def get_conn() -> sqlite3.Connection:
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    # Connessione del thread corrente dal pool (non chiuderla): "with get_conn() as cx"
+    # fa commit/rollback come prima
+    global _pool
+    if _pool is None or _pool[0] != DB_PATH:
+        _pool = (DB_PATH, database.open_database(DB_PATH))
+    return _pool[1].connection()
+
+def query(cx: sqlite3.Connection, sql: str, params: Any = ()) -> sqlite3.Cursor:
+    # righe sqlite3.Row (accesso per nome) senza cambiare la row_factory
+    # della connessione, condivisa con gli store
+    cur = cx.cursor()
+    cur.row_factory = sqlite3.Row
+    return cur.execute(sql, params)
 
 def init_db():
     from .seed import seed_if_empty  # import locale per evitare cicli
-    with get_conn() as cx:
-        cx.executescript(SCHEMA_SQL)
+    get_conn()  # schema: migrazioni in open_database
     seed_if_empty()
-
-SCHEMA_SQL = """
-PRAGMA journal_mode = WAL;
-
-CREATE TABLE IF NOT EXISTS tipologie (
-  id INTEGER PRIMARY KEY AUTOINCREMENT,
-  nome TEXT NOT NULL,
-  categoria TEXT DEFAULT '',
-  materiale TEXT DEFAULT '',
-  rif TEXT DEFAULT '',
-  extra TEXT DEFAULT '',
-  attiva INTEGER NOT NULL DEFAULT 1,
-  comp INTEGER NOT NULL DEFAULT 0
-);
-
-CREATE TABLE IF NOT EXISTS commesse (
-  id INTEGER PRIMARY KEY AUTOINCREMENT,
-  cliente TEXT DEFAULT '',
-  note TEXT DEFAULT '',
-  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
-
-CREATE TABLE IF NOT EXISTS commessa_items (
-  id INTEGER PRIMARY KEY AUTOINCREMENT,
-  commessa_id INTEGER NOT NULL REFERENCES commesse(id) ON DELETE CASCADE,
-  tipologia_id INTEGER REFERENCES tipologie(id),
-  len_mm REAL NOT NULL DEFAULT 0,
-  qty INTEGER NOT NULL DEFAULT 1
-);
-
-CREATE TABLE IF NOT EXISTS stock_bars (
-  id INTEGER PRIMARY KEY AUTOINCREMENT,
-  material TEXT DEFAULT '',
-  length_mm REAL NOT NULL,
-  available_qty INTEGER NOT NULL DEFAULT 0
-);
-"""
@@ -9,6 +9,8 @@ from PySide6.QtWidgets import (
 
 from ui_qt.services.typologies_store import TypologiesStore
 from ui_qt.services.legacy_formula import sanitize_name
+from ui_qt.services.formula_graph import FormulaGraph, effective_formulas, norm_label
+from ui_qt.services.rule_intervals import check_rule_intervals
 
 class MultiFormulasEditorDialog(QDialog):
     """
@@ -190,7 +192,26 @@ class MultiFormulasEditorDialog(QDialog):
         r = self.tbl.currentRow()
         if r >= 0: self.tbl.removeRow(r)
 
+    def _group_cycles(self) -> List[str]:
+        """Cicli C_<id> per gruppo, con le formule del gruppo al posto di quelle dei componenti."""
+        overrides: Dict[str, Dict[str, str]] = {}
+        for r in range(self.tbl.rowCount()):
+            grp = (self.tbl.item(r, 0).text() if self.tbl.item(r, 0) else "").strip()
+            lab = (self.tbl.item(r, 1).text() if self.tbl.item(r, 1) else "").strip()
+            frm = (self.tbl.item(r, 2).text() if self.tbl.item(r, 2) else "").strip()
+            if grp and lab and frm:
+                overrides.setdefault(grp, {})[norm_label(lab)] = frm
+        out: List[str] = []
+        for grp, ov in sorted(overrides.items()):
+            graph = FormulaGraph(self.components, effective_formulas(self.components, ov))
+            out.extend(f"{grp}: {c}" for c in graph.describe_cycles())
+        return out
+
     def _save_all_formulas(self):
+        cycles = self._group_cycles()
+        if cycles:
+            QMessageBox.critical(self, "Dipendenze circolari",
+                                 "Le formule si richiamano a vicenda:\n" + "\n".join(cycles)); return
         n = self.tbl.rowCount()
         for r in range(n):
             grp = (self.tbl.item(r, 0).text() if self.tbl.item(r, 0) else "").strip()
@@ -246,6 +267,12 @@ class MultiFormulasEditorDialog(QDialog):
                 })
             except Exception:
                 QMessageBox.critical(self, "Regole", f"Valori non validi nella riga {r+1}."); return
+        issues = check_rule_intervals(rules)
+        if issues:
+            ans = QMessageBox.question(
+                self, "Regole", "Intervalli L da verificare:\n" + "\n".join(issues) + "\n\nSalvare comunque?",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            if ans != QMessageBox.Yes: return
         try:
             self.store.replace_multi_var_rules(self.typology_id, grp, rules)
             QMessageBox.information(self, "Regole", "Regole variabili salvate.")
@@ -17,10 +17,12 @@ except Exception:
     QPrinter = None
 
 try:
-    from ui_qt.utils.settings import read_settings, write_settings
+    from ui_qt.utils.settings import read_settings, write_settings, get_float, get_int
 except Exception:
     def read_settings(): return {}
     def write_settings(_): pass
+    def get_float(_k, default=0.0): return default
+    def get_int(_k, default=0): return default
 
 from ui_qt.widgets.plan_visualizer import PlanVisualizerWidget
 from ui_qt.logic.refiner import (
@@ -342,13 +344,13 @@ class OptimizationRunDialog(QDialog):
             stock=self._stock,
             kerf_base=self._kerf_base,
             ripasso_mm=self._ripasso,
-            conservative_angle_deg=float(read_settings().get("opt_knap_conservative_angle_deg", 45.0)),
+            conservative_angle_deg=get_float("opt_knap_conservative_angle_deg", 45.0),
             max_angle=self._max_angle,
             max_factor=self._max_factor,
             reversible=self._reversible,
             thickness_mm=self._thickness,
             angle_tol=self._angle_tol,
-            per_bar_time_s=int(read_settings().get("opt_time_limit_s", 15))
+            per_bar_time_s=get_int("opt_time_limit_s", 15)
         )
         if not bars:
             bars, rem = self._pack_bfd(pieces)
@@ -356,8 +358,8 @@ class OptimizationRunDialog(QDialog):
             bars_ref, rem2 = refine_tail_ilp(
                 bars, self._stock, self._kerf_base,
                 self._ripasso, self._reversible, self._thickness,
-                self._angle_tol, tail_bars=int(read_settings().get("opt_refine_tail_bars", 6)),
-                time_limit_s=int(read_settings().get("opt_refine_time_s", 25)),
+                self._angle_tol, tail_bars=get_int("opt_refine_tail_bars", 6),
+                time_limit_s=get_int("opt_refine_time_s", 25),
                 max_angle=self._max_angle, max_factor=self._max_factor
             )
             # Preservare ordine originale se lunghezza identica
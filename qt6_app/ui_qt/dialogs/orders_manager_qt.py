@@ -1,14 +1,19 @@
 from __future__ import annotations
-from typing import Optional
+from datetime import datetime, time as dtime
+from typing import Any, Dict, Optional
 
+from PySide6.QtCore import QDate, QTimer
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QLabel, QTableWidget, QTableWidgetItem, QHeaderView,
-    QHBoxLayout, QPushButton, QInputDialog, QMessageBox
+    QHBoxLayout, QPushButton, QInputDialog, QMessageBox, QLineEdit, QComboBox,
+    QCheckBox, QDateEdit
 )
 
 class OrdersManagerDialog(QDialog):
     """
     Lista ordini (commesse o cutlist) con Apri / Rinomina / Elimina.
+    Ricerca full-text (prefissi su nome, cliente, profili, elementi) e
+    filtri cliente / profilo / periodo: store.search, indice FTS5.
     """
     def __init__(self, parent, store):
         super().__init__(parent)
@@ -21,14 +26,42 @@ class OrdersManagerDialog(QDialog):
     def _build(self):
         root = QVBoxLayout(self)
         root.addWidget(QLabel("Ordini salvati"))
-        self.tbl = QTableWidget(0, 4)
-        self.tbl.setHorizontalHeaderLabels(["ID", "Nome", "Cliente", "Aggiornato"])
+
+        flt = QHBoxLayout()
+        self.ed_search = QLineEdit(); self.ed_search.setPlaceholderText("Cerca: nome, cliente, profilo, elemento…")
+        self.cmb_customer = QComboBox(); self.cmb_customer.setMinimumWidth(160)
+        self.cmb_profile = QComboBox(); self.cmb_profile.setEditable(True); self.cmb_profile.setMinimumWidth(120)
+        self.chk_dates = QCheckBox("Dal")
+        today = QDate.currentDate()
+        self.dt_from = QDateEdit(today.addMonths(-3)); self.dt_from.setCalendarPopup(True)
+        self.dt_to = QDateEdit(today); self.dt_to.setCalendarPopup(True)
+        flt.addWidget(self.ed_search, 1)
+        flt.addWidget(QLabel("Cliente:")); flt.addWidget(self.cmb_customer)
+        flt.addWidget(QLabel("Profilo:")); flt.addWidget(self.cmb_profile)
+        flt.addWidget(self.chk_dates); flt.addWidget(self.dt_from); flt.addWidget(QLabel("al")); flt.addWidget(self.dt_to)
+        root.addLayout(flt)
+        self._fill_filters()
+
+        # ricerca a ogni modifica, con un breve ritardo mentre si digita
+        self._search_timer = QTimer(self); self._search_timer.setSingleShot(True); self._search_timer.setInterval(150)
+        self._search_timer.timeout.connect(self._reload)
+        self.ed_search.textChanged.connect(self._search_timer.start)
+        self.cmb_profile.editTextChanged.connect(self._search_timer.start)
+        self.cmb_customer.currentIndexChanged.connect(self._reload)
+        self.chk_dates.toggled.connect(self._reload)
+        self.dt_from.dateChanged.connect(self._reload); self.dt_to.dateChanged.connect(self._reload)
+
+        self.tbl = QTableWidget(0, 5)
+        self.tbl.setHorizontalHeaderLabels(["ID", "Nome", "Cliente", "Stato", "Aggiornato"])
         hdr = self.tbl.horizontalHeader()
         hdr.setSectionResizeMode(0, QHeaderView.ResizeToContents)
         hdr.setSectionResizeMode(1, QHeaderView.Stretch)
         hdr.setSectionResizeMode(2, QHeaderView.Stretch)
         hdr.setSectionResizeMode(3, QHeaderView.ResizeToContents)
+        hdr.setSectionResizeMode(4, QHeaderView.ResizeToContents)
         root.addWidget(self.tbl, 1)
+        self.lbl_count = QLabel(""); self.lbl_count.setStyleSheet("color:#7f8c8d;")
+        root.addWidget(self.lbl_count)
 
         row = QHBoxLayout()
         btn_open = QPushButton("Apri"); btn_open.clicked.connect(self._open)
@@ -39,14 +72,51 @@ class OrdersManagerDialog(QDialog):
         row.addWidget(btn_open); row.addWidget(btn_rename); row.addWidget(btn_delete); row.addWidget(btn_refresh); row.addStretch(1); row.addWidget(btn_close)
         root.addLayout(row)
 
+    def _fill_filters(self):
+        # clienti dalla faccetta (con numero di ordini), profili noti dall'anagrafica
+        self.cmb_customer.addItem("(tutti)", None)
+        try:
+            for name, n in self.store.facets(fields=("customer",), top=500)["customer"]:
+                self.cmb_customer.addItem(f"{name} ({n})", name)
+        except Exception:
+            pass
+        self.cmb_profile.addItem("")
+        try:
+            from ui_qt.services.profiles_store import ProfilesStore
+            # stesso database degli ordini (connessione condivisa del pool: non chiuderla)
+            for p in ProfilesStore(getattr(self.store, "db_path", None)).list_profiles():
+                self.cmb_profile.addItem(p["name"])
+        except Exception:
+            pass
+
+    def _filters(self) -> Dict[str, Any]:
+        f: Dict[str, Any] = {"customer": self.cmb_customer.currentData(),
+                             "profile": (self.cmb_profile.currentText() or "").strip() or None}
+        if self.chk_dates.isChecked():
+            d0 = self.dt_from.date().toPython(); d1 = self.dt_to.date().toPython()
+            f["date_from"] = int(datetime.combine(d0, dtime.min).timestamp())
+            f["date_to"] = int(datetime.combine(d1, dtime.max).timestamp())
+        return f
+
     def _reload(self):
         self.tbl.setRowCount(0)
-        for o in self.store.list_orders(limit=500):
+        text = (self.ed_search.text() or "").strip()
+        filters = self._filters()
+        if hasattr(self.store, "search"):
+            # ultimo modificato in cima, come list_orders (anche con il testo)
+            orders = self.store.search(text or None, limit=500, **filters)
+        else:
+            orders = self.store.list_orders(limit=500)
+        for o in orders:
             r = self.tbl.rowCount(); self.tbl.insertRow(r)
             self.tbl.setItem(r, 0, QTableWidgetItem(str(o["id"])))
             self.tbl.setItem(r, 1, QTableWidgetItem(o["name"]))
             self.tbl.setItem(r, 2, QTableWidgetItem(o.get("customer") or ""))
-            self.tbl.setItem(r, 3, QTableWidgetItem(str(o.get("updated_at") or "")))
+            self.tbl.setItem(r, 3, QTableWidgetItem(o.get("status") or ""))
+            upd = o.get("updated_at")
+            self.tbl.setItem(r, 4, QTableWidgetItem(datetime.fromtimestamp(upd).strftime("%Y-%m-%d %H:%M") if upd else ""))
+        more = " (primi 500)" if len(orders) >= 500 else ""
+        self.lbl_count.setText(f"{len(orders)} ordini{more}")
 
     def _selected_id(self) -> Optional[int]:
         r = self.tbl.currentRow()
@@ -71,7 +141,7 @@ class OrdersManagerDialog(QDialog):
         newname, ok = QInputDialog.getText(self, "Rinomina", "Nuovo nome:", text=cur.get("name") or "")
         if not ok or not (newname or "").strip(): return
         try:
-            self.store.update_order(oid, newname.strip(), cur.get("customer") or "", cur.get("data") or {})
+            self.store.rename_order(oid, newname.strip())
             self._reload()
             QMessageBox.information(self, "Rinomina", "Nome aggiornato.")
         except Exception as e:
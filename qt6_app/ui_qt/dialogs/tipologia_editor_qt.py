@@ -10,6 +10,7 @@ from PySide6.QtWidgets import (
 )
 
 from ui_qt.services.legacy_formula import scan_variables, eval_formula, sanitize_name
+from ui_qt.services.formula_graph import FormulaGraph, FormulaPreview
 from ui_qt.services.typologies_store import TypologiesStore, default_db_path
 
 try:
@@ -322,7 +323,8 @@ class TipologiaEditorDialog(QDialog):
     """
     Editor tipologia (senza override ferramenta):
     - Variabili locali
-    - Componenti
+    - Componenti, con anteprima lunghezze per una misura H x L
+      (ricalcolo incrementale: solo i componenti a valle della modifica)
     - Editor 'Formule multiple' accessibile dal prompt al primo focus o dal pulsante
     """
     def __init__(self, parent, base: Optional[Dict[str, Any]] = None, is_new: bool = False):
@@ -335,9 +337,12 @@ class TipologiaEditorDialog(QDialog):
         self.is_new = is_new
         self.profiles = _profiles_map()
         self._store = TypologiesStore(str(default_db_path()))
+        self._preview: Optional[FormulaPreview] = None
+        self._preview_busy = False
 
         self._build()
         self._load_base()
+        self._preview_rebuild()
 
     def _build(self):
         root = QVBoxLayout(self)
@@ -379,8 +384,17 @@ class TipologiaEditorDialog(QDialog):
 
         # Componenti
         root.addWidget(QLabel("Componenti (doppio click per modificare)"))
-        self.tbl_comp = QTableWidget(0, 9)
-        self.tbl_comp.setHorizontalHeaderLabels(["ID","Nome","Profilo","Spess.","Q.tà","Ang SX","Ang DX","Formula","Offset"])
+        prev = QHBoxLayout()
+        prev.addWidget(QLabel("Anteprima per H:"))
+        self.sp_prev_h = QDoubleSpinBox(); self.sp_prev_h.setRange(0, 1e6); self.sp_prev_h.setDecimals(1); self.sp_prev_h.setValue(1000.0)
+        prev.addWidget(self.sp_prev_h)
+        prev.addWidget(QLabel("L:"))
+        self.sp_prev_l = QDoubleSpinBox(); self.sp_prev_l.setRange(0, 1e6); self.sp_prev_l.setDecimals(1); self.sp_prev_l.setValue(1000.0)
+        prev.addWidget(self.sp_prev_l); prev.addStretch(1)
+        root.addLayout(prev)
+
+        self.tbl_comp = QTableWidget(0, 10)
+        self.tbl_comp.setHorizontalHeaderLabels(["ID","Nome","Profilo","Spess.","Q.tà","Ang SX","Ang DX","Formula","Offset","Lunghezza"])
         hdr = self.tbl_comp.horizontalHeader()
         hdr.setSectionResizeMode(0, QHeaderView.ResizeToContents)
         hdr.setSectionResizeMode(1, QHeaderView.Stretch)
@@ -391,6 +405,7 @@ class TipologiaEditorDialog(QDialog):
         hdr.setSectionResizeMode(6, QHeaderView.ResizeToContents)
         hdr.setSectionResizeMode(7, QHeaderView.Stretch)
         hdr.setSectionResizeMode(8, QHeaderView.ResizeToContents)
+        hdr.setSectionResizeMode(9, QHeaderView.ResizeToContents)
         self.tbl_comp.cellDoubleClicked.connect(self._edit_comp_row)
         root.addWidget(self.tbl_comp)
 
@@ -402,6 +417,11 @@ class TipologiaEditorDialog(QDialog):
         rowc.addWidget(btn_add_c); rowc.addWidget(btn_edit_c); rowc.addWidget(btn_dup_c); rowc.addWidget(btn_del_c); rowc.addStretch(1)
         root.addLayout(rowc)
 
+        self.tbl_vars.itemChanged.connect(lambda _it: self._preview_update())
+        self.tbl_comp.itemChanged.connect(self._on_comp_item_changed)
+        self.sp_prev_h.valueChanged.connect(lambda _v: self._preview_update())
+        self.sp_prev_l.valueChanged.connect(lambda _v: self._preview_update())
+
         acts = QHBoxLayout()
         btn_cancel = QPushButton("Annulla"); btn_cancel.clicked.connect(self.reject)
         btn_save = QPushButton("Salva tipologia"); btn_save.clicked.connect(self._save)
@@ -438,6 +458,53 @@ class TipologiaEditorDialog(QDialog):
             except Exception: out[k] = 0.0
         return out
 
+    # --- anteprima incrementale ---
+    def _preview_env(self) -> Dict[str, Any]:
+        env: Dict[str, Any] = {sanitize_name(p): float(th) for p, th in self.profiles.items() if p}
+        env.update(self._collect_vars_map())
+        env["H"] = float(self.sp_prev_h.value()); env["L"] = float(self.sp_prev_l.value())
+        return env
+
+    def _preview_rebuild(self):
+        """Componenti cambiati: ricostruisce il grafo e ricalcola ciò che ne dipende."""
+        if self._preview_busy: return
+        comps = self._collect_components_list()
+        if self._preview is None:
+            self._preview = FormulaPreview(comps, self._preview_env())
+            rows = range(len(comps))
+        else:
+            rows = self._preview.set_components(comps)
+        self._preview_show(rows)
+
+    def _preview_update(self):
+        """Variabili o misura cambiate: ricalcola solo i componenti a valle."""
+        if self._preview is None or self._preview_busy: return
+        env = self._preview_env()
+        rows = self._preview.remove([k for k in self._preview.env if k not in env])
+        rows += self._preview.update(env)
+        self._preview_show(rows)
+
+    def _preview_show(self, rows):
+        pv = self._preview
+        self._preview_busy = True
+        try:
+            for r in rows:
+                if r >= self.tbl_comp.rowCount(): continue
+                if r in pv.values:
+                    it = QTableWidgetItem(f"{pv.values[r]:.1f}")
+                    if r in pv.errors:
+                        it.setForeground(Qt.red); it.setToolTip(pv.errors[r])
+                else:
+                    it = QTableWidgetItem("—")
+                it.setFlags(it.flags() & ~Qt.ItemIsEditable)
+                self.tbl_comp.setItem(r, 9, it)
+        finally:
+            self._preview_busy = False
+
+    def _on_comp_item_changed(self, item: QTableWidgetItem):
+        if item.column() != 9:
+            self._preview_rebuild()
+
     def _add_var(self):
         r = self.tbl_vars.rowCount(); self.tbl_vars.insertRow(r)
         self.tbl_vars.setItem(r, 0, QTableWidgetItem(""))
@@ -486,8 +553,12 @@ class TipologiaEditorDialog(QDialog):
                 str(c.get("quantita",0)), f"{float(c.get('ang_sx',0.0)):.2f}",
                 f"{float(c.get('ang_dx',0.0)):.2f}", c.get("formula_lunghezza",""),
                 f"{float(c.get('offset_mm',0.0)):.3f}"]
-        for i, v in enumerate(vals):
-            self.tbl_comp.setItem(r, i, QTableWidgetItem(v))
+        blocked = self.tbl_comp.blockSignals(True)  # l'anteprima si aggiorna una volta sola
+        try:
+            for i, v in enumerate(vals):
+                self.tbl_comp.setItem(r, i, QTableWidgetItem(v))
+        finally:
+            self.tbl_comp.blockSignals(blocked)
 
     def _new_component_dialog(self, base_comp: Dict[str, Any], row_to_replace: Optional[int] = None):
         comps_before = self._collect_components_list() if row_to_replace is None else self._collect_components_list()[:row_to_replace]
@@ -508,6 +579,7 @@ class TipologiaEditorDialog(QDialog):
                 self._comp_insert_row(dlg.result_component())
             else:
                 self._comp_insert_row(dlg.result_component(), row=row_to_replace)
+            self._preview_rebuild()
 
     def _add_comp(self):
         rid = self._next_component_id()
@@ -531,10 +603,13 @@ class TipologiaEditorDialog(QDialog):
         comp["id_riga"] = self._next_component_id()
         comp["nome"] = (comp.get("nome") or "") + " (copia)"
         self._comp_insert_row(comp)
+        self._preview_rebuild()
 
     def _del_comp(self):
         row = self.tbl_comp.currentRow()
-        if row >= 0: self.tbl_comp.removeRow(row)
+        if row >= 0:
+            self.tbl_comp.removeRow(row)
+            self._preview_rebuild()
 
     def _save(self):
         name = (self.ed_name.text() or "").strip()
@@ -542,6 +617,11 @@ class TipologiaEditorDialog(QDialog):
             QMessageBox.warning(self, "Dati", "Inserisci un nome tipologia."); return
         vars_map = self._collect_vars_map()
         comps = self._collect_components_list()
+        cycles = FormulaGraph(comps).describe_cycles()
+        if cycles:
+            QMessageBox.warning(self, "Dipendenze circolari",
+                                "Le formule dei componenti si richiamano a vicenda:\n" + "\n".join(cycles)
+                                + "\n\nCorreggi i riferimenti C_<id> prima di salvare."); return
 
         self.base = {
             "id": self.base.get("id"),
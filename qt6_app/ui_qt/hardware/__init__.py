@@ -4,15 +4,24 @@ Hardware abstraction layer for BLITZ CNC control system.
 This package provides hardware drivers for the motion control stack:
 - MD25HVDriver: Cytron MD25HV motor driver control
 - EncoderReader8ALZARD: ELTRA encoder reader via 8AL-ZARD optocoupler
-- MotionController: PID-based closed-loop motion control
+- MotionController: trajectory-tracking closed-loop motion control
+- QuadratureDecoder: table-driven x4 decoder used by the encoder readers
+- LoopTelemetry: timing statistics for the periodic control loops
 """
 
 from .md25hv_driver import MD25HVDriver
 from .encoder_reader_8alzard import EncoderReader8ALZARD
 from .motion_controller import MotionController
+from .quadrature_decoder import QuadratureDecoder
+from .trajectory import Trajectory, plan_trajectory
+from .loop_telemetry import LoopTelemetry
 
 __all__ = [
     "MD25HVDriver",
     "EncoderReader8ALZARD",
     "MotionController",
+    "QuadratureDecoder",
+    "Trajectory",
+    "plan_trajectory",
+    "LoopTelemetry",
 ]
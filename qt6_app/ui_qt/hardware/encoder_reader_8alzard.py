@@ -24,13 +24,16 @@ except ImportError:
     pigpio = None
     PIGPIO_AVAILABLE = False
 
+from .quadrature_decoder import QuadratureDecoder, NotifyEdgePump
+
 
 class EncoderReader8ALZARD:
     """
     Encoder reader for ELTRA EH63D via 8AL-ZARD optocoupler.
     
     Features:
-    - Interrupt-driven quadrature x4 decoding
+    - Interrupt-driven quadrature x4 decoding (table lookup, no GPIO reads)
+    - Optional notification-pipe batching for high edge rates
     - Index pulse (Z) detection for homing
     - Thread-safe position tracking
     - Galvanic isolation via optocoupler
@@ -43,7 +46,8 @@ class EncoderReader8ALZARD:
         gpio_b: int = 27,
         gpio_z: int = 22,
         pulses_per_mm: float = 84.880,
-        enable_index: bool = True
+        enable_index: bool = True,
+        use_notify_pipe: bool = False
     ):
         """
         Initialize encoder reader.
@@ -55,21 +59,23 @@ class EncoderReader8ALZARD:
             pulses_per_mm: Encoder pulses per millimeter (default: 84.880)
                           Calculated as: (1000 PPR × 4) / (π × 60mm) = 84.880
             enable_index: Enable index pulse detection (default: True)
+            use_notify_pipe: Decode A/B from the pigpio notification pipe in
+                          batches instead of per-edge callbacks (default: False)
         """
         self.gpio_a = gpio_a
         self.gpio_b = gpio_b
         self.gpio_z = gpio_z
         self.pulses_per_mm = pulses_per_mm
         self.enable_index = enable_index
+        self.use_notify_pipe = use_notify_pipe
         
         self._pi: Optional[object] = None
         self._connected = False
         
         # Position tracking (thread-safe)
         self._lock = threading.Lock()
-        self._pulse_count = 0
-        self._last_a = 0
-        self._last_b = 0
+        self._decoder = QuadratureDecoder(gpio_a, gpio_b)
+        self._notify_pump: Optional[NotifyEdgePump] = None
         
         # Index pulse tracking
         self._index_detected = False
@@ -100,22 +106,31 @@ class EncoderReader8ALZARD:
             self._pi.set_pull_up_down(self.gpio_a, pigpio.PUD_UP)
             self._pi.set_pull_up_down(self.gpio_b, pigpio.PUD_UP)
             
-            # Read initial states
-            self._last_a = self._pi.read(self.gpio_a)
-            self._last_b = self._pi.read(self.gpio_b)
-            
-            # Setup interrupt callbacks for quadrature decoding
-            self._cb_a = self._pi.callback(
-                self.gpio_a, 
-                pigpio.EITHER_EDGE, 
-                self._quadrature_callback
-            )
-            self._cb_b = self._pi.callback(
-                self.gpio_b, 
-                pigpio.EITHER_EDGE, 
-                self._quadrature_callback
+            # Read initial states (only time the decoder reads the GPIOs)
+            self._decoder.set_levels(
+                self._pi.read(self.gpio_a),
+                self._pi.read(self.gpio_b)
             )
             
+            if self.use_notify_pipe:
+                self._notify_pump = NotifyEdgePump(self._pi, self._decoder, lock=self._lock)
+                if not self._notify_pump.start():
+                    self.logger.warning("Notification pipe unavailable - using edge callbacks")
+                    self._notify_pump = None
+            
+            if self._notify_pump is None:
+                # Setup interrupt callbacks for quadrature decoding
+                self._cb_a = self._pi.callback(
+                    self.gpio_a, 
+                    pigpio.EITHER_EDGE, 
+                    self._quadrature_callback
+                )
+                self._cb_b = self._pi.callback(
+                    self.gpio_b, 
+                    pigpio.EITHER_EDGE, 
+                    self._quadrature_callback
+                )
+            
             # Setup index pulse if enabled
             if self.enable_index:
                 self._pi.set_mode(self.gpio_z, pigpio.INPUT)
@@ -140,44 +155,19 @@ class EncoderReader8ALZARD:
         """
         Hardware interrupt callback for quadrature x4 decoding.
         
-        This implements the standard quadrature decoder state machine:
+        Uses the level delivered by pigpio and a state-table lookup
+        (see QuadratureDecoder); no GPIO reads on the edge path:
         - Channel A leading B = forward (increment)
         - Channel B leading A = reverse (decrement)
         """
-        if not self._pi:
-            return
-        
-        try:
-            # Read both channels atomically
-            level_a = self._pi.read(self.gpio_a)
-            level_b = self._pi.read(self.gpio_b)
-            
-            with self._lock:
-                # Detect which channel changed and determine direction
-                if gpio == self.gpio_a and level_a != self._last_a:
-                    # A changed - check relative phase with B
-                    if level_a != level_b:
-                        self._pulse_count += 1  # Forward
-                    else:
-                        self._pulse_count -= 1  # Reverse
-                    self._last_a = level_a
-                    
-                elif gpio == self.gpio_b and level_b != self._last_b:
-                    # B changed - check relative phase with A
-                    if level_a == level_b:
-                        self._pulse_count += 1  # Forward
-                    else:
-                        self._pulse_count -= 1  # Reverse
-                    self._last_b = level_b
-                    
-        except Exception as e:
-            self.logger.error(f"Quadrature callback error: {e}")
+        with self._lock:
+            self._decoder.edge(gpio, level, tick)
     
     def _index_callback_internal(self, gpio, level, tick):
         """Internal callback for index pulse detection."""
         with self._lock:
             self._index_detected = True
-            self._index_position = self._pulse_count
+            self._index_position = self._decoder.count
             
         self.logger.info(f"Index pulse detected at position {self._index_position}")
         
@@ -200,7 +190,7 @@ class EncoderReader8ALZARD:
             Position in mm
         """
         with self._lock:
-            return self._pulse_count / self.pulses_per_mm
+            return self._decoder.count / self.pulses_per_mm
     
     def get_pulse_count(self) -> int:
         """
@@ -210,7 +200,7 @@ class EncoderReader8ALZARD:
             Raw encoder pulse count
         """
         with self._lock:
-            return self._pulse_count
+            return self._decoder.count
     
     def set_position(self, position_mm: float):
         """
@@ -220,13 +210,13 @@ class EncoderReader8ALZARD:
             position_mm: New position in mm
         """
         with self._lock:
-            self._pulse_count = round(position_mm * self.pulses_per_mm)
+            self._decoder.count = round(position_mm * self.pulses_per_mm)
             self.logger.info(f"Position set to {position_mm:.3f} mm")
     
     def reset(self):
         """Reset position counter to zero (homing)."""
         with self._lock:
-            self._pulse_count = 0
+            self._decoder.count = 0
             self._index_detected = False
             self._index_position = 0
             self.logger.info("Encoder position reset to zero")
@@ -284,8 +274,10 @@ class EncoderReader8ALZARD:
         with self._lock:
             return {
                 "connected": self._connected,
-                "position_mm": self._pulse_count / self.pulses_per_mm,
-                "pulse_count": self._pulse_count,
+                "position_mm": self._decoder.count / self.pulses_per_mm,
+                "pulse_count": self._decoder.count,
+                "missed_edges": self._decoder.missed,
+                "notify_pipe": self._notify_pump is not None,
                 "index_detected": self._index_detected,
                 "index_position": self._index_position,
                 "pulses_per_mm": self.pulses_per_mm,
@@ -301,6 +293,9 @@ class EncoderReader8ALZARD:
         if self._pi:
             try:
                 # Cancel callbacks
+                if self._notify_pump:
+                    self._notify_pump.stop()
+                    self._notify_pump = None
                 if self._cb_a:
                     self._cb_a.cancel()
                     self._cb_a = None
@@ -0,0 +1,182 @@
+"""
+Real-time loop telemetry.
+
+Records timing of periodic control loops with ``time.perf_counter_ns``:
+iteration period histogram, worst-case jitter, wake-up lateness, work time,
+lock hold time and missed deadlines. Used to verify that a loop configured
+at N Hz really runs at N Hz on the target (e.g. the Pi under GUI load).
+
+Features:
+- Fixed-bucket period histogram (relative to the nominal period)
+- Worst/mean jitter and lateness
+- Lock hold time statistics
+- Missed-deadline counter
+- JSON export
+"""
+
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+# Histogram bucket upper bounds as a fraction of the nominal period
+PERIOD_BUCKETS = (0.5, 0.9, 0.95, 0.99, 1.01, 1.05, 1.1, 1.5, 2.0)
+
+
+class LoopTelemetry:
+    """
+    Timing statistics for one periodic loop.
+
+    The owning loop calls ``record()`` once per iteration; ``snapshot()``
+    can be called from any thread.
+    """
+
+    def __init__(self, name: str, nominal_hz: float):
+        """
+        Initialize telemetry.
+
+        Args:
+            name: Loop name (used in exports)
+            nominal_hz: Configured loop frequency
+        """
+        self.name = name
+        self._lock = threading.Lock()
+        self.set_rate(nominal_hz)
+        self.reset()
+
+    def set_rate(self, nominal_hz: float):
+        """Update the nominal frequency (histogram buckets follow)."""
+        with self._lock:
+            self.nominal_hz = float(nominal_hz)
+            self.period_ns = int(1e9 / nominal_hz) if nominal_hz > 0 else 0
+
+    def reset(self):
+        """Clear all statistics."""
+        with self._lock:
+            self.iterations = 0
+            self.missed_deadlines = 0
+            self._last_start_ns: Optional[int] = None
+            self._histogram = [0] * (len(PERIOD_BUCKETS) + 1)
+            self._period_min_ns: Optional[int] = None
+            self._period_max_ns = 0
+            self._period_sum_ns = 0
+            self._periods = 0
+            self._jitter_max_ns = 0
+            self._jitter_sum_ns = 0
+            self._late_max_ns = 0
+            self._work_max_ns = 0
+            self._work_sum_ns = 0
+            self._lock_max_ns = 0
+            self._lock_sum_ns = 0
+
+    def record(self, start_ns: int, work_ns: int, lock_ns: int = 0,
+               scheduled_ns: Optional[int] = None):
+        """
+        Record one loop iteration.
+
+        Args:
+            start_ns: perf_counter_ns() at iteration start
+            work_ns: Time spent in the iteration body
+            lock_ns: Time the iteration held the shared lock
+            scheduled_ns: Scheduled start time (for lateness), if known
+        """
+        period_ns = self.period_ns
+        with self._lock:
+            self.iterations += 1
+            self._work_sum_ns += work_ns
+            if work_ns > self._work_max_ns:
+                self._work_max_ns = work_ns
+            self._lock_sum_ns += lock_ns
+            if lock_ns > self._lock_max_ns:
+                self._lock_max_ns = lock_ns
+
+            late_ns = start_ns - scheduled_ns if scheduled_ns is not None else 0
+            if late_ns > self._late_max_ns:
+                self._late_max_ns = late_ns
+            if period_ns and (work_ns > period_ns or late_ns > period_ns):
+                self.missed_deadlines += 1
+
+            last = self._last_start_ns
+            self._last_start_ns = start_ns
+            if last is None or not period_ns:
+                return
+
+            actual = start_ns - last
+            self._periods += 1
+            self._period_sum_ns += actual
+            if self._period_min_ns is None or actual < self._period_min_ns:
+                self._period_min_ns = actual
+            if actual > self._period_max_ns:
+                self._period_max_ns = actual
+            jitter = abs(actual - period_ns)
+            self._jitter_sum_ns += jitter
+            if jitter > self._jitter_max_ns:
+                self._jitter_max_ns = jitter
+
+            ratio = actual / period_ns
+            for i, bound in enumerate(PERIOD_BUCKETS):
+                if ratio <= bound:
+                    self._histogram[i] += 1
+                    break
+            else:
+                self._histogram[-1] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Current statistics (times in milliseconds).
+
+        Returns:
+            Dictionary suitable for get_state() / JSON export
+        """
+        with self._lock:
+            periods = self._periods
+            iterations = self.iterations
+            nominal_ms = self.period_ns / 1e6
+            mean_period_ms = (self._period_sum_ns / periods / 1e6) if periods else None
+            return {
+                "name": self.name,
+                "nominal_hz": self.nominal_hz,
+                "iterations": iterations,
+                "missed_deadlines": self.missed_deadlines,
+                "actual_hz": (1000.0 / mean_period_ms) if mean_period_ms else None,
+                "period_ms": {
+                    "min": self._period_min_ns / 1e6 if self._period_min_ns is not None else None,
+                    "mean": mean_period_ms,
+                    "max": self._period_max_ns / 1e6 if periods else None,
+                },
+                "jitter_ms": {
+                    "mean": self._jitter_sum_ns / periods / 1e6 if periods else None,
+                    "max": self._jitter_max_ns / 1e6,
+                },
+                "late_max_ms": self._late_max_ns / 1e6,
+                "work_ms": {
+                    "mean": self._work_sum_ns / iterations / 1e6 if iterations else None,
+                    "max": self._work_max_ns / 1e6,
+                },
+                "lock_hold_ms": {
+                    "mean": self._lock_sum_ns / iterations / 1e6 if iterations else None,
+                    "max": self._lock_max_ns / 1e6,
+                },
+                "period_histogram": [
+                    {"le_ms": round(bound * nominal_ms, 3), "count": count}
+                    for bound, count in zip(PERIOD_BUCKETS, self._histogram)
+                ] + [{"le_ms": None, "count": self._histogram[-1]}],
+            }
+
+    def export_json(self, path: Union[str, Path]) -> Path:
+        """
+        Write the snapshot to a JSON file.
+
+        Args:
+            path: Destination file
+
+        Returns:
+            Path written
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.snapshot(), indent=2), encoding="utf-8")
+        return path
+
+
+__all__ = ["LoopTelemetry", "PERIOD_BUCKETS"]
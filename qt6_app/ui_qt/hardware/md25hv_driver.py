@@ -15,6 +15,8 @@ import threading
 from typing import Optional
 import logging
 
+from .loop_telemetry import LoopTelemetry
+
 try:
     import pigpio
     PIGPIO_AVAILABLE = True
@@ -33,8 +35,11 @@ class MD25HVDriver:
     - Enable/brake control
     - Smooth speed ramping to prevent mechanical shock
     - Safety limits and emergency stop
+    - Ramp loop telemetry (jitter, lock hold, missed deadlines)
     """
     
+    RAMP_PERIOD_S = 0.05  # 50ms ramp update
+    
     def __init__(
         self,
         pwm_gpio: int = 12,
@@ -70,9 +75,11 @@ class MD25HVDriver:
         self._enabled = False
         self._emergency_stop = False
         
-        self._lock = threading.Lock()
+        # Re-entrant: set_speed() calls set_direction() with the lock held
+        self._lock = threading.RLock()
         self._ramp_thread: Optional[threading.Thread] = None
         self._ramp_active = False
+        self._ramp_telemetry = LoopTelemetry("md25hv_ramp", 1.0 / self.RAMP_PERIOD_S)
         
         self.logger = logging.getLogger("blitz.md25hv")
         
@@ -212,26 +219,44 @@ class MD25HVDriver:
     
     def _ramp_speed(self):
         """Internal thread for smooth speed ramping."""
+        period_ns = int(self.RAMP_PERIOD_S * 1e9)
+        next_start_ns = time.perf_counter_ns()
         while self._ramp_active:
+            start_ns = time.perf_counter_ns()
             with self._lock:
-                if abs(self._current_speed - self._target_speed) < 1.0:
-                    # Close enough - set to target and stop ramping
-                    self._apply_speed(self._target_speed)
-                    self._ramp_active = False
-                    break
-                
-                # Calculate ramp step
-                speed_diff = self._target_speed - self._current_speed
-                ramp_step = (self.max_speed_percent / self.ramp_time_s) * 0.05  # 50ms steps
-                
-                if abs(speed_diff) < ramp_step:
-                    new_speed = self._target_speed
-                else:
-                    new_speed = self._current_speed + (ramp_step if speed_diff > 0 else -ramp_step)
-                
-                self._apply_speed(new_speed)
+                locked_ns = time.perf_counter_ns()
+                done = self._ramp_step()
+                lock_ns = time.perf_counter_ns() - locked_ns
+            end_ns = time.perf_counter_ns()
+            self._ramp_telemetry.record(start_ns, end_ns - start_ns, lock_ns, next_start_ns)
+            if done:
+                break
             
-            time.sleep(0.05)  # 50ms update rate
+            next_start_ns += period_ns
+            if end_ns >= next_start_ns:
+                next_start_ns = end_ns
+            else:
+                time.sleep((next_start_ns - end_ns) / 1e9)
+    
+    def _ramp_step(self) -> bool:
+        """One ramp update (must be called with lock held). Returns True when done."""
+        if abs(self._current_speed - self._target_speed) < 1.0:
+            # Close enough - set to target and stop ramping
+            self._apply_speed(self._target_speed)
+            self._ramp_active = False
+            return True
+        
+        # Calculate ramp step
+        speed_diff = self._target_speed - self._current_speed
+        ramp_step = (self.max_speed_percent / self.ramp_time_s) * self.RAMP_PERIOD_S
+        
+        if abs(speed_diff) < ramp_step:
+            new_speed = self._target_speed
+        else:
+            new_speed = self._current_speed + (ramp_step if speed_diff > 0 else -ramp_step)
+        
+        self._apply_speed(new_speed)
+        return False
     
     def _apply_speed(self, speed_percent: float):
         """Apply speed to PWM output (must be called with lock held)."""
@@ -296,9 +321,14 @@ class MD25HVDriver:
             "target_speed": self._target_speed,
             "direction": "reverse" if self._current_direction else "forward",
             "emergency_stop": self._emergency_stop,
-            "ramping": self._ramp_active
+            "ramping": self._ramp_active,
+            "ramp_telemetry": self._ramp_telemetry.snapshot()
         }
     
+    def get_ramp_telemetry(self) -> dict:
+        """Timing statistics of the speed ramp loop."""
+        return self._ramp_telemetry.snapshot()
+    
     def close(self):
         """Close connection and cleanup resources."""
         self.logger.info("Closing MD25HV driver")
@@ -1,20 +1,27 @@
 """
-Motion Controller with PID closed-loop control.
+Motion Controller with trajectory tracking and PID closed-loop control.
 
-Manages precise positioning using PID feedback control with encoder position
-feedback and motor driver output. Includes safety features and soft limits.
+Manages precise positioning by following a planned trajectory (trapezoidal
+or jerk-limited) with velocity feed-forward plus PID on the tracking error,
+using encoder position feedback and motor driver output. Includes safety
+features and soft limits.
 
 Features:
-- PID control for ±0.5mm accuracy
+- Trajectory planning from configured speed/acceleration/jerk limits
+- Velocity feed-forward + PID on tracking error for ±0.5mm accuracy
+- Move time prediction
+- Configurable control loop rate
+- Loop telemetry (period histogram, jitter, lock hold, missed deadlines)
 - Soft limit enforcement
 - Emergency stop handling
-- Smooth motion profiles
 - Homing sequences
 """
 
+import json
 import time
 import threading
-from typing import Optional, Callable
+from pathlib import Path
+from typing import Optional, Callable, Union
 import logging
 
 try:
@@ -26,14 +33,17 @@ except ImportError:
 
 from .md25hv_driver import MD25HVDriver
 from .encoder_reader_8alzard import EncoderReader8ALZARD
+from .trajectory import Trajectory, plan_trajectory
+from .loop_telemetry import LoopTelemetry
 
 
 class MotionController:
     """
-    PID-based motion controller for precise positioning.
+    Trajectory-tracking motion controller for precise positioning.
     
-    Combines motor driver output with encoder feedback to achieve
-    accurate position control with software safety limits.
+    Each move is planned as a time-parametrized trajectory; the control loop
+    commands feed-forward speed from the reference velocity and corrects the
+    tracking error (reference - encoder) with PID, with software safety limits.
     """
     
     def __init__(
@@ -47,7 +57,12 @@ class MotionController:
         pid_kd: float = 0.1,
         position_tolerance_mm: float = 0.5,
         max_speed_percent: float = 80.0,
-        control_loop_hz: float = 50.0
+        control_loop_hz: float = 50.0,
+        max_speed_mm_s: float = 2500.0,
+        acceleration_mm_s2: float = 5000.0,
+        jerk_mm_s3: Optional[float] = None,
+        homing_speed_mm_s: float = 500.0,
+        velocity_ff_percent_per_mm_s: Optional[float] = None
     ):
         """
         Initialize motion controller.
@@ -63,6 +78,12 @@ class MotionController:
             position_tolerance_mm: Position accuracy tolerance
             max_speed_percent: Maximum speed for PID output
             control_loop_hz: PID control loop frequency
+            max_speed_mm_s: Trajectory velocity limit (limits.max_speed_mm_s)
+            acceleration_mm_s2: Trajectory acceleration limit (limits.acceleration_mm_s2)
+            jerk_mm_s3: Trajectory jerk limit (None/0 = trapezoidal profile)
+            homing_speed_mm_s: Velocity limit for homing moves
+            velocity_ff_percent_per_mm_s: Feed-forward gain (motor % per mm/s);
+                default assumes max_speed_percent drives max_speed_mm_s
         """
         self.motor = motor
         self.encoder = encoder
@@ -71,6 +92,15 @@ class MotionController:
         self.position_tolerance_mm = position_tolerance_mm
         self.max_speed_percent = max_speed_percent
         self.control_loop_hz = control_loop_hz
+        self.max_speed_mm_s = max_speed_mm_s
+        self.acceleration_mm_s2 = acceleration_mm_s2
+        self.jerk_mm_s3 = jerk_mm_s3
+        self.homing_speed_mm_s = homing_speed_mm_s
+        if velocity_ff_percent_per_mm_s is None:
+            velocity_ff_percent_per_mm_s = (
+                max_speed_percent / max_speed_mm_s if max_speed_mm_s > 0 else 0.0
+            )
+        self.velocity_ff_gain = velocity_ff_percent_per_mm_s
         
         self.logger = logging.getLogger("blitz.motion_controller")
         
@@ -91,6 +121,9 @@ class MotionController:
         # State
         self._lock = threading.Lock()
         self._target_position_mm: Optional[float] = None
+        self._trajectory: Optional[Trajectory] = None
+        self._trajectory_t0 = 0.0
+        self._reference_mm: Optional[float] = None
         self._moving = False
         self._homing = False
         self._emergency_stop = False
@@ -99,6 +132,7 @@ class MotionController:
         # Control loop thread
         self._control_thread: Optional[threading.Thread] = None
         self._control_running = False
+        self._telemetry = LoopTelemetry("motion_control", control_loop_hz)
         
         # Callbacks
         self._move_complete_callback: Optional[Callable[[bool, str], None]] = None
@@ -107,7 +141,9 @@ class MotionController:
         self.logger.info(
             f"Motion controller initialized: "
             f"range {min_position_mm}-{max_position_mm}mm, "
-            f"PID(Kp={pid_kp}, Ki={pid_ki}, Kd={pid_kd})"
+            f"PID(Kp={pid_kp}, Ki={pid_ki}, Kd={pid_kd}), "
+            f"limits {max_speed_mm_s}mm/s {acceleration_mm_s2}mm/s² jerk={jerk_mm_s3}, "
+            f"{control_loop_hz}Hz"
         )
     
     def start(self) -> bool:
@@ -147,87 +183,185 @@ class MotionController:
         self.logger.info("Motion control loop stopped")
     
     def _control_loop(self):
-        """Main PID control loop (runs in separate thread)."""
-        loop_period = 1.0 / self.control_loop_hz
+        """
+        Main trajectory-tracking control loop (runs in separate thread).
         
+        Iterations are scheduled on an absolute perf_counter_ns timeline so
+        the loop does not drift; a slot overrun resynchronizes the schedule
+        and counts as a missed deadline in the loop telemetry.
+        """
+        next_start_ns = time.perf_counter_ns()
         while self._control_running:
-            start_time = time.time()
+            period_ns = int(1e9 / self.control_loop_hz)
+            start_ns = time.perf_counter_ns()
+            lock_ns = 0
             
             try:
                 with self._lock:
-                    if self._emergency_stop:
-                        # Emergency stop - halt immediately
-                        self.motor.emergency_stop()
-                        self._moving = False
-                        self._homing = False
-                        continue
-                    
-                    if not self._moving and not self._homing:
-                        # Idle - ensure motor is stopped
-                        if self.motor.get_state()["current_speed"] > 0:
-                            self.motor.stop()
-                        continue
-                    
-                    # Get current position from encoder
-                    current_position = self.encoder.get_position_mm()
-                    
-                    if current_position is None:
-                        self.logger.error("Cannot read encoder position")
-                        self._moving = False
-                        self._homing = False
-                        continue
-                    
-                    # Check soft limits
-                    if current_position < self.min_position_mm:
-                        self.logger.error(f"Soft limit violation: {current_position:.2f} < {self.min_position_mm}")
-                        self._emergency_stop = True
-                        self._call_move_complete_callback(False, "Soft limit (min)")
-                        continue
-                    
-                    if current_position > self.max_position_mm:
-                        self.logger.error(f"Soft limit violation: {current_position:.2f} > {self.max_position_mm}")
-                        self._emergency_stop = True
-                        self._call_move_complete_callback(False, "Soft limit (max)")
-                        continue
-                    
-                    if self._target_position_mm is None:
-                        continue
-                    
-                    # Calculate position error
-                    error = self._target_position_mm - current_position
-                    
-                    # Check if at target
-                    if abs(error) < self.position_tolerance_mm:
-                        if self._moving:
-                            self.motor.stop()
-                            self._moving = False
-                            self.logger.info(f"Target reached: {current_position:.3f}mm")
-                            self._call_move_complete_callback(True, "Target reached")
-                        
-                        if self._homing:
-                            self._homing = False
-                            self.logger.info("Homing complete")
-                            self._call_homing_complete_callback(True, "Homing complete")
-                        
-                        continue
-                    
-                    # Update PID setpoint and get output
-                    self._pid.setpoint = self._target_position_mm
-                    speed_output = self._pid(current_position)
-                    
-                    # Apply speed to motor
-                    if not self.motor.get_state()["enabled"]:
-                        self.motor.enable()
-                    
-                    self.motor.set_speed(speed_output, smooth=False)
-                    
+                    locked_ns = time.perf_counter_ns()
+                    self._control_step(locked_ns / 1e9)
+                    lock_ns = time.perf_counter_ns() - locked_ns
             except Exception as e:
                 self.logger.error(f"Control loop error: {e}")
             
+            end_ns = time.perf_counter_ns()
+            self._telemetry.record(start_ns, end_ns - start_ns, lock_ns, next_start_ns)
+            
             # Maintain loop rate
-            elapsed = time.time() - start_time
-            sleep_time = max(0, loop_period - elapsed)
-            time.sleep(sleep_time)
+            next_start_ns += period_ns
+            if end_ns >= next_start_ns:
+                next_start_ns = end_ns
+            else:
+                time.sleep((next_start_ns - end_ns) / 1e9)
+    
+    def _control_step(self, now: float):
+        """One control iteration (must be called with lock held)."""
+        if self._emergency_stop:
+            # Emergency stop - halt immediately
+            self.motor.emergency_stop()
+            self._moving = False
+            self._homing = False
+            self._trajectory = None
+            return
+        
+        if not self._moving and not self._homing:
+            # Idle - ensure motor is stopped
+            if self.motor.get_state()["current_speed"] > 0:
+                self.motor.stop()
+            return
+        
+        # Get current position from encoder
+        current_position = self.encoder.get_position_mm()
+        
+        if current_position is None:
+            self.logger.error("Cannot read encoder position")
+            self._moving = False
+            self._homing = False
+            return
+        
+        # Check soft limits
+        if current_position < self.min_position_mm:
+            self.logger.error(f"Soft limit violation: {current_position:.2f} < {self.min_position_mm}")
+            self._emergency_stop = True
+            self._call_move_complete_callback(False, "Soft limit (min)")
+            return
+        
+        if current_position > self.max_position_mm:
+            self.logger.error(f"Soft limit violation: {current_position:.2f} > {self.max_position_mm}")
+            self._emergency_stop = True
+            self._call_move_complete_callback(False, "Soft limit (max)")
+            return
+        
+        if self._target_position_mm is None:
+            return
+        
+        # Reference from trajectory (target itself once finished)
+        if self._trajectory is not None:
+            elapsed = now - self._trajectory_t0
+            reference, velocity_ff = self._trajectory.sample(elapsed)
+            trajectory_done = elapsed >= self._trajectory.duration_s
+        else:
+            reference, velocity_ff = self._target_position_mm, 0.0
+            trajectory_done = True
+        self._reference_mm = reference
+        
+        # Check if at target (only once the reference has arrived)
+        error = self._target_position_mm - current_position
+        if trajectory_done and abs(error) < self.position_tolerance_mm:
+            if self._moving:
+                self.motor.stop()
+                self._moving = False
+                self._trajectory = None
+                self.logger.info(f"Target reached: {current_position:.3f}mm")
+                self._call_move_complete_callback(True, "Target reached")
+        
+            if self._homing:
+                self._homing = False
+                self._trajectory = None
+                self.logger.info("Homing complete")
+                self._call_homing_complete_callback(True, "Homing complete")
+        
+            return
+        
+        # Feed-forward on reference velocity + PID on tracking error
+        self._pid.setpoint = reference
+        speed_output = self.velocity_ff_gain * velocity_ff + self._pid(current_position)
+        speed_output = max(-self.max_speed_percent, min(self.max_speed_percent, speed_output))
+        
+        # Apply speed to motor
+        if not self.motor.get_state()["enabled"]:
+            self.motor.enable()
+        
+        self.motor.set_speed(speed_output, smooth=False)
+    
+    def _plan_to(self, position_mm: float, max_speed_mm_s: Optional[float] = None):
+        """Plan a trajectory from the current position (must be called with lock held)."""
+        start = self.encoder.get_position_mm()
+        if start is None:
+            start = position_mm
+        self._trajectory = plan_trajectory(
+            start,
+            position_mm,
+            max_speed_mm_s or self.max_speed_mm_s,
+            self.acceleration_mm_s2,
+            self.jerk_mm_s3
+        )
+        self._trajectory_t0 = time.perf_counter()
+        self._target_position_mm = position_mm
+        if self._pid:
+            self._pid.reset()
+    
+    def predict_move_time(self, position_mm: float, from_mm: Optional[float] = None) -> float:
+        """
+        Predict the duration of a move (trajectory time, excluding settling).
+        
+        Args:
+            position_mm: Target position in mm
+            from_mm: Start position (default: current encoder position)
+            
+        Returns:
+            Move time in seconds
+        """
+        if from_mm is None:
+            from_mm = self.encoder.get_position_mm()
+            if from_mm is None:
+                from_mm = position_mm
+        return plan_trajectory(
+            from_mm, position_mm, self.max_speed_mm_s, self.acceleration_mm_s2, self.jerk_mm_s3
+        ).duration_s
+    
+    def set_loop_rate(self, control_loop_hz: float):
+        """
+        Change the control loop frequency (applies from the next iteration).
+        
+        Args:
+            control_loop_hz: Loop frequency in Hz
+        """
+        if control_loop_hz <= 0:
+            raise ValueError("control_loop_hz must be > 0")
+        self.control_loop_hz = control_loop_hz
+        self._telemetry.set_rate(control_loop_hz)
+        if self._pid:
+            self._pid.sample_time = 1.0 / control_loop_hz
+        self.logger.info(f"Control loop rate set to {control_loop_hz}Hz")
+    
+    def set_motion_limits(
+        self,
+        max_speed_mm_s: Optional[float] = None,
+        acceleration_mm_s2: Optional[float] = None,
+        jerk_mm_s3: Optional[float] = None
+    ):
+        """Update trajectory limits (applies to the next move)."""
+        if max_speed_mm_s is not None:
+            self.max_speed_mm_s = max_speed_mm_s
+        if acceleration_mm_s2 is not None:
+            self.acceleration_mm_s2 = acceleration_mm_s2
+        if jerk_mm_s3 is not None:
+            self.jerk_mm_s3 = jerk_mm_s3
+        self.logger.info(
+            f"Motion limits updated: {self.max_speed_mm_s}mm/s "
+            f"{self.acceleration_mm_s2}mm/s² jerk={self.jerk_mm_s3}"
+        )
     
     def move_to(
         self, 
@@ -261,15 +395,12 @@ class MotionController:
             return False
         
         with self._lock:
-            self._target_position_mm = position_mm
+            self._plan_to(position_mm)
             self._moving = True
             self._move_complete_callback = callback
-            
-            # Reset PID
-            if self._pid:
-                self._pid.reset()
+            duration = self._trajectory.duration_s
         
-        self.logger.info(f"Moving to {position_mm:.3f}mm")
+        self.logger.info(f"Moving to {position_mm:.3f}mm (planned {duration:.3f}s)")
         return True
     
     def stop_motion(self, immediate: bool = True):
@@ -283,6 +414,7 @@ class MotionController:
             self._moving = False
             self._homing = False
             self._target_position_mm = None
+            self._trajectory = None
         
         self.motor.stop(immediate=immediate)
         self.logger.info("Motion stopped")
@@ -326,17 +458,17 @@ class MotionController:
                 # Set this as home position
                 self.encoder.set_position(self.min_position_mm)
                 with self._lock:
-                    self._target_position_mm = self.min_position_mm
+                    self._plan_to(self.min_position_mm, self.homing_speed_mm_s)
             
             self.encoder.set_index_callback(index_detected)
             
             # Move slowly backward to find index
             with self._lock:
-                self._target_position_mm = self.min_position_mm - 10.0  # Move back slightly
+                self._plan_to(self.min_position_mm - 10.0, self.homing_speed_mm_s)  # Move back slightly
         else:
             # Simple homing - move to min position
             with self._lock:
-                self._target_position_mm = self.min_position_mm
+                self._plan_to(self.min_position_mm, self.homing_speed_mm_s)
         
         return True
     
@@ -421,15 +553,53 @@ class MotionController:
                 "emergency_stop": self._emergency_stop,
                 "current_position": self.encoder.get_position_mm(),
                 "target_position": self._target_position_mm,
+                "reference_position": self._reference_mm,
+                "trajectory_duration": (
+                    self._trajectory.duration_s if self._trajectory is not None else None
+                ),
+                "control_loop_hz": self.control_loop_hz,
                 "position_error": (
                     abs(self._target_position_mm - self.encoder.get_position_mm())
                     if self._target_position_mm is not None
                     else None
                 ),
                 "motor_state": self.motor.get_state(),
-                "encoder_state": self.encoder.get_state()
+                "encoder_state": self.encoder.get_state(),
+                "loop_telemetry": self._telemetry.snapshot()
             }
     
+    def get_loop_telemetry(self) -> dict:
+        """
+        Timing statistics of the control loop and the motor ramp loop.
+        
+        Returns:
+            Dictionary with "control_loop" and (if available) "motor_ramp"
+        """
+        data = {"control_loop": self._telemetry.snapshot()}
+        if hasattr(self.motor, "get_ramp_telemetry"):
+            data["motor_ramp"] = self.motor.get_ramp_telemetry()
+        return data
+    
+    def reset_loop_telemetry(self):
+        """Clear control loop statistics (e.g. before a measurement run)."""
+        self._telemetry.reset()
+    
+    def export_loop_telemetry(self, path: Union[str, Path]) -> Path:
+        """
+        Write loop telemetry to a JSON file.
+        
+        Args:
+            path: Destination file
+            
+        Returns:
+            Path written
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.get_loop_telemetry(), indent=2), encoding="utf-8")
+        self.logger.info(f"Loop telemetry exported to {path}")
+        return path
+    
     def close(self):
         """Close controller and cleanup resources."""
         self.logger.info("Closing motion controller")
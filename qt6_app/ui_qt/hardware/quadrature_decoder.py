@@ -0,0 +1,250 @@
+"""
+Table-driven quadrature x4 decoder.
+
+Decodes encoder edges using only the data pigpio already delivers to the
+callback (gpio, level, tick), so no extra ``pi.read()`` socket round-trip is
+needed per edge. The decoder keeps the last known A/B state and resolves the
+count delta with a 16-entry transition table lookup.
+
+Features:
+- Zero GPIO reads in the edge path (level comes from the callback)
+- Missed-edge detection (repeated level / double transition)
+- Batch decoding of pigpio notification level words
+- Optional notification pipe pump (``/dev/pigpioN``) to batch edges
+"""
+
+import os
+import struct
+import threading
+import logging
+from typing import Iterable, Optional, Sequence, Tuple
+
+# State encoding: (A << 1) | B.
+# Forward sequence (A leading B): 00 -> 10 -> 11 -> 01 -> 00
+_FORWARD = ((0, 2), (2, 3), (3, 1), (1, 0))
+
+# TRANSITIONS[(prev << 2) | new] -> count delta (0 for no-move / invalid)
+TRANSITIONS: Tuple[int, ...] = tuple(
+    1 if (p, n) in _FORWARD else -1 if (n, p) in _FORWARD else 0
+    for p in range(4) for n in range(4)
+)
+
+# pigpio notification report: seqno (H), flags (H), tick (I), level (I)
+_REPORT = struct.Struct("HHII")
+
+
+class QuadratureDecoder:
+    """
+    Quadrature x4 decoder driven by callback levels.
+
+    ``edge`` has the pigpio callback signature and can be registered directly
+    with ``pi.callback(gpio, pigpio.EITHER_EDGE, decoder.edge)``.
+    """
+
+    __slots__ = ("gpio_a", "gpio_b", "count", "missed", "last_tick", "_state")
+
+    def __init__(self, gpio_a: int, gpio_b: int, level_a: int = 0, level_b: int = 0):
+        """
+        Initialize decoder.
+
+        Args:
+            gpio_a: GPIO number of channel A
+            gpio_b: GPIO number of channel B
+            level_a: Initial level of channel A
+            level_b: Initial level of channel B
+        """
+        self.gpio_a = gpio_a
+        self.gpio_b = gpio_b
+        self.count = 0
+        self.missed = 0
+        self.last_tick = 0
+        self._state = ((level_a & 1) << 1) | (level_b & 1)
+
+    def edge(self, gpio: int, level: int, tick: int):
+        """
+        Decode a single edge.
+
+        Args:
+            gpio: GPIO that changed
+            level: New level (0/1; 2 = watchdog timeout, ignored)
+            tick: pigpio tick in microseconds
+        """
+        if level > 1:
+            return
+        state = self._state
+        if gpio == self.gpio_a:
+            new = (level << 1) | (state & 1)
+        else:
+            new = (state & 2) | level
+        if new == state:
+            # Same channel reported the same level twice: an edge was lost
+            self.missed += 1
+            return
+        self.count += TRANSITIONS[(state << 2) | new]
+        self._state = new
+        self.last_tick = tick
+
+    def feed_levels(self, levels: Iterable[int]) -> int:
+        """
+        Decode a batch of GPIO level words (bit N = level of GPIO N).
+
+        Used with pigpio notifications, where each report carries the full
+        level word rather than a single gpio/level pair.
+
+        Args:
+            levels: Iterable of 32-bit level words in time order
+
+        Returns:
+            Count delta produced by the batch
+        """
+        sa = self.gpio_a
+        sb = self.gpio_b
+        table = TRANSITIONS
+        state = self._state
+        delta = 0
+        missed = 0
+        for word in levels:
+            new = (((word >> sa) & 1) << 1) | ((word >> sb) & 1)
+            if new == state:
+                continue
+            step = table[(state << 2) | new]
+            if step == 0:
+                # Both channels changed between samples: direction unknown
+                missed += 1
+            delta += step
+            state = new
+        self._state = state
+        self.count += delta
+        self.missed += missed
+        return delta
+
+    def replay(self, edges: Sequence[Tuple[int, int, int]]) -> int:
+        """
+        Replay recorded (gpio, level, tick) edges through the decoder.
+
+        Args:
+            edges: Recorded edge stream
+
+        Returns:
+            Count after replay
+        """
+        edge = self.edge
+        for gpio, level, tick in edges:
+            edge(gpio, level, tick)
+        return self.count
+
+    def set_levels(self, level_a: int, level_b: int):
+        """Resynchronize the A/B state (e.g. after reconnect)."""
+        self._state = ((level_a & 1) << 1) | (level_b & 1)
+
+
+class NotifyEdgePump:
+    """
+    Batches edges from a pigpio notification pipe into a decoder.
+
+    pigpiod writes a 12-byte report per level change to ``/dev/pigpioN``;
+    reading them in blocks replaces one Python callback per edge with one
+    ``feed_levels`` call per block. Only usable when running on the same
+    host as pigpiod.
+    """
+
+    def __init__(self, pi, decoder: QuadratureDecoder, lock: Optional[threading.Lock] = None,
+                 batch_reports: int = 512):
+        """
+        Initialize pump.
+
+        Args:
+            pi: Connected pigpio.pi instance
+            decoder: Decoder to feed
+            lock: Optional lock held while updating the decoder
+            batch_reports: Maximum reports read per block
+        """
+        self._pi = pi
+        self._decoder = decoder
+        self._lock = lock
+        self._batch_bytes = _REPORT.size * max(1, int(batch_reports))
+        self._handle: Optional[int] = None
+        self._fd: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self.logger = logging.getLogger("blitz.encoder_notify")
+
+    def start(self) -> bool:
+        """
+        Open the notification pipe and start the reader thread.
+
+        Returns:
+            True if started
+        """
+        try:
+            self._handle = self._pi.notify_open()
+            if self._handle is None or self._handle < 0:
+                self.logger.error(f"notify_open failed: {self._handle}")
+                self._handle = None
+                return False
+            self._fd = os.open(f"/dev/pigpio{self._handle}", os.O_RDONLY)
+            mask = (1 << self._decoder.gpio_a) | (1 << self._decoder.gpio_b)
+            self._pi.notify_begin(self._handle, mask)
+        except Exception as e:
+            self.logger.error(f"Notification pipe unavailable: {e}")
+            self.stop()
+            return False
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self.logger.info(f"Notification pump started (handle {self._handle})")
+        return True
+
+    def _run(self):
+        """Reader thread: decode whole reports, keep partial tail for next read."""
+        pending = b""
+        size = _REPORT.size
+        while self._running:
+            try:
+                chunk = os.read(self._fd, self._batch_bytes)
+            except OSError:
+                break
+            if not chunk:
+                # EOF: pigpio closed the pipe (daemon gone), os.read would
+                # keep returning b"" at once
+                if self._running:
+                    self.logger.error("Notification pipe closed by pigpio, encoder pump stopped")
+                break
+            data = pending + chunk
+            usable = len(data) - (len(data) % size)
+            pending = data[usable:]
+            # flags != 0 are watchdog/keep-alive/event reports, not level changes
+            levels = [lvl for _seq, flags, _tick, lvl in _REPORT.iter_unpack(data[:usable]) if not flags]
+            if not levels:
+                continue
+            if self._lock is not None:
+                with self._lock:
+                    self._decoder.feed_levels(levels)
+            else:
+                self._decoder.feed_levels(levels)
+        self._running = False
+
+    @property
+    def running(self) -> bool:
+        """True while the reader thread is consuming the pipe."""
+        return self._running
+
+    def stop(self):
+        """Stop the reader thread and close the notification handle."""
+        self._running = False
+        if self._handle is not None:
+            try:
+                self._pi.notify_close(self._handle)
+            except Exception:
+                pass
+            self._handle = None
+        if self._fd is not None:
+            try:
+                os.close(self._fd)
+            except Exception:
+                pass
+            self._fd = None
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._thread = None
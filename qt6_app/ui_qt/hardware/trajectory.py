@@ -0,0 +1,148 @@
+"""
+Point-to-point trajectory generator.
+
+Plans rest-to-rest moves with velocity, acceleration and (optionally) jerk
+limits, and samples the reference position/velocity over time for the
+motion controller's feed-forward + PID tracking loop.
+
+Features:
+- Trapezoidal velocity profile (jerk_mm_s3 = 0/None)
+- Jerk-limited double-S profile (7 phases)
+- Short moves automatically reduce peak velocity/acceleration
+- Closed-form move time prediction
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+
+@dataclass(frozen=True)
+class Trajectory:
+    """
+    Planned rest-to-rest move.
+
+    Times are in seconds from the start of the move. The profile is
+    symmetric: the deceleration phase mirrors the acceleration phase.
+    """
+    start_mm: float
+    end_mm: float
+    accel_time_s: float      # Ta: duration of the acceleration phase
+    cruise_time_s: float     # Tv: duration of the constant-velocity phase
+    jerk_time_s: float       # Tj: duration of each jerk phase (0 = trapezoidal)
+    peak_velocity_mm_s: float
+    peak_accel_mm_s2: float
+    jerk_mm_s3: float
+
+    @property
+    def duration_s(self) -> float:
+        return 2.0 * self.accel_time_s + self.cruise_time_s
+
+    @property
+    def distance_mm(self) -> float:
+        return abs(self.end_mm - self.start_mm)
+
+    def _accel_phase(self, t: float) -> Tuple[float, float]:
+        """Distance and speed (both >= 0) after t seconds of acceleration."""
+        ta = self.accel_time_s
+        tj = self.jerk_time_s
+        a = self.peak_accel_mm_s2
+        v = self.peak_velocity_mm_s
+        j = self.jerk_mm_s3
+        if tj > 0 and t < tj:
+            return j * t ** 3 / 6.0, j * t ** 2 / 2.0
+        if t <= ta - tj:
+            return a / 6.0 * (3.0 * t ** 2 - 3.0 * tj * t + tj ** 2), a * (t - tj / 2.0)
+        r = ta - t
+        return v * ta / 2.0 - v * r + j * r ** 3 / 6.0, v - j * r ** 2 / 2.0
+
+    def sample(self, t: float) -> Tuple[float, float]:
+        """
+        Reference position and velocity at time t.
+
+        Args:
+            t: Seconds since the start of the move
+
+        Returns:
+            (position_mm, velocity_mm_s), velocity signed with the move direction
+        """
+        sign = 1.0 if self.end_mm >= self.start_mm else -1.0
+        ta = self.accel_time_s
+        if t <= 0:
+            return self.start_mm, 0.0
+        if t >= self.duration_s:
+            return self.end_mm, 0.0
+        if t < ta:
+            dist, vel = self._accel_phase(t)
+        elif t <= ta + self.cruise_time_s:
+            dist = self.peak_velocity_mm_s * (ta / 2.0 + (t - ta))
+            vel = self.peak_velocity_mm_s
+        else:
+            back, vel = self._accel_phase(self.duration_s - t)
+            dist = self.distance_mm - back
+        return self.start_mm + sign * dist, sign * vel
+
+
+def plan_trajectory(
+    start_mm: float,
+    end_mm: float,
+    max_speed_mm_s: float,
+    acceleration_mm_s2: float,
+    jerk_mm_s3: Optional[float] = None
+) -> Trajectory:
+    """
+    Plan a rest-to-rest move.
+
+    Args:
+        start_mm: Current position
+        end_mm: Target position
+        max_speed_mm_s: Velocity limit
+        acceleration_mm_s2: Acceleration limit
+        jerk_mm_s3: Jerk limit (None/0 for a trapezoidal profile)
+
+    Returns:
+        Trajectory (zero-length moves return a zero-duration trajectory)
+    """
+    d = abs(end_mm - start_mm)
+    vmax = float(max_speed_mm_s)
+    amax = float(acceleration_mm_s2)
+    jmax = float(jerk_mm_s3 or 0.0)
+
+    if d <= 0 or vmax <= 0 or amax <= 0:
+        return Trajectory(start_mm, end_mm, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+    if jmax <= 0:
+        ta = vmax / amax
+        if d < vmax * ta:
+            # Triangular profile
+            ta = math.sqrt(d / amax)
+            vmax = amax * ta
+        tv = d / vmax - ta
+        return Trajectory(start_mm, end_mm, ta, max(tv, 0.0), 0.0, vmax, amax, 0.0)
+
+    # Double-S, v0 = v1 = 0 (Biagiotti & Melchiorri)
+    if vmax * jmax < amax ** 2:
+        tj = math.sqrt(vmax / jmax)
+        ta = 2.0 * tj
+    else:
+        tj = amax / jmax
+        ta = tj + vmax / amax
+    tv = d / vmax - ta
+
+    if tv < 0:
+        # Peak velocity not reached
+        tv = 0.0
+        tj = amax / jmax
+        delta = amax ** 4 / jmax ** 2 + 4.0 * d * amax
+        ta = (amax ** 2 / jmax + math.sqrt(delta)) / (2.0 * amax)
+        if ta < 2.0 * tj:
+            # Peak acceleration not reached either
+            tj = (d / (2.0 * jmax)) ** (1.0 / 3.0)
+            ta = 2.0 * tj
+
+    alim = jmax * tj
+    vlim = (ta - tj) * alim
+    return Trajectory(start_mm, end_mm, ta, tv, tj, vlim, alim, jmax)
+
+
+__all__ = ["Trajectory", "plan_trajectory"]
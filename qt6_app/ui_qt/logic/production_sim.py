@@ -0,0 +1,450 @@
+"""
+Simulatore headless di produzione (analisi what-if dei tempi)
+File: qt6_app/ui_qt/logic/production_sim.py
+
+Esegue un ordine (cutlist da OrdersStore o da file JSON) senza GUI:
+- ottimizzazione per profilo con gli stessi algoritmi di Automatico
+  (pack_bars_knapsack_ilp / BFD + refine_tail_ilp)
+- esecuzione pezzo per pezzo con ModeDetector e gli handler
+  (OutOfQuotaHandler, UltraShortHandler, ExtraLongHandler)
+  su SimulationMachine con orologio manuale
+- report: tempo totale, barre, sfrido, ripartizione per fase e per modalità
+
+Supporta sweep di parametri (stock, kerf, solver...) su più processi.
+"""
+from __future__ import annotations
+
+import itertools
+import json
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
+from math import radians, tan
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ui_qt.logic.refiner import (
+    bar_used_length,
+    joint_consumption,
+    pack_bars_knapsack_ilp,
+    refine_tail_ilp,
+    residuals,
+)
+from ui_qt.logic.modes import (
+    ExtraLongHandler,
+    ModeConfig,
+    ModeDetector,
+    OutOfQuotaHandler,
+    UltraShortHandler,
+)
+from ui_qt.logic.modes.extra_long_handler import ExtraLongConfig
+from ui_qt.logic.modes.out_of_quota_handler import OutOfQuotaConfig
+from ui_qt.logic.modes.ultra_short_handler import UltraShortConfig
+from ui_qt.machine.sim_dynamics import ManualClock, SimDynamics
+from ui_qt.machine.simulation_machine import SimulationMachine
+
+logger = logging.getLogger(__name__)
+
+# Fasi del report (secondi simulati, tranne "optimize" che è tempo CPU reale)
+PHASES = ("optimize", "bar_load", "positioning", "brake", "step_pause", "cut", "unload")
+
+# Passi per modalità speciale (l'ultimo è il taglio finale)
+_MODE_STEPS = {"out_of_quota": 2, "ultra_short": 3, "extra_long": 3}
+
+
+@dataclass
+class RunParams:
+    """Parametri di una simulazione (ottimizzatore, macchina, tempi operatore)."""
+    # Ottimizzazione (stesse chiavi opt_* dei settings)
+    stock_mm: float = 6500.0
+    kerf_mm: float = 3.0
+    ripasso_mm: float = 0.0
+    solver: str = "ILP_KNAP"
+    per_bar_time_s: int = 15
+    tail_refine: bool = True
+    tail_bars: int = 6
+    tail_time_s: int = 25
+    kerf_max_angle_deg: float = 60.0
+    kerf_max_factor: float = 2.0
+    conservative_angle_deg: float = 45.0
+    reversible: bool = False
+    thickness_mm: float = 0.0
+    angle_tol_deg: float = 0.5
+    # Macchina
+    machine_zero_homing_mm: float = 250.0
+    machine_offset_battuta_mm: float = 120.0
+    machine_max_travel_mm: float = 4000.0
+    max_speed_mm_s: float = 2000.0
+    acceleration_mm_s2: float = 5000.0
+    # Tempi operatore/ciclo
+    cut_time_s: float = 4.0
+    unload_time_s: float = 2.0
+    bar_load_time_s: float = 25.0
+    step_pause_s: float = 0.3           # auto_after_cut_pause_ms tra i passi delle modalità speciali
+
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any], **overrides) -> "RunParams":
+        """Costruisce i parametri dai settings (opt_*, machine_*, auto_*)."""
+        stock_use = float(settings.get("opt_stock_usable_mm", 0.0) or 0.0)
+        params = cls(
+            stock_mm=stock_use if stock_use > 0 else float(settings.get("opt_stock_mm", 6500.0)),
+            kerf_mm=float(settings.get("opt_kerf_mm", 3.0)),
+            ripasso_mm=float(settings.get("opt_ripasso_mm", 0.0)),
+            solver=str(settings.get("opt_solver", "ILP_KNAP")).upper(),
+            per_bar_time_s=int(float(settings.get("opt_time_limit_s", 15))),
+            tail_refine=bool(settings.get("opt_enable_tail_refine", True)),
+            tail_bars=int(float(settings.get("opt_refine_tail_bars", 6))),
+            tail_time_s=int(float(settings.get("opt_refine_time_s", 25))),
+            kerf_max_angle_deg=float(settings.get("opt_kerf_max_angle_deg", 60.0)),
+            kerf_max_factor=float(settings.get("opt_kerf_max_factor", 2.0)),
+            conservative_angle_deg=float(settings.get("opt_knap_conservative_angle_deg", 45.0)),
+            reversible=bool(settings.get("opt_current_profile_reversible", False)),
+            thickness_mm=float(settings.get("opt_current_profile_thickness_mm", 0.0)),
+            angle_tol_deg=float(settings.get("opt_reversible_angle_tol_deg", 0.5)),
+            machine_zero_homing_mm=float(settings.get("machine_zero_homing_mm", 250.0)),
+            machine_offset_battuta_mm=float(settings.get("machine_offset_battuta_mm", 120.0)),
+            machine_max_travel_mm=float(settings.get("machine_max_travel_mm", 4000.0)),
+            step_pause_s=float(settings.get("auto_after_cut_pause_ms", 300)) / 1000.0,
+        )
+        return replace(params, **overrides)
+
+
+@dataclass
+class RunReport:
+    """Risultato di una simulazione."""
+    params: Dict[str, Any]
+    total_time_s: float = 0.0
+    bars: int = 0
+    pieces: int = 0
+    scrap_mm: float = 0.0
+    scrap_pct: float = 0.0
+    phases_s: Dict[str, float] = field(default_factory=lambda: {p: 0.0 for p in PHASES})
+    modes: Dict[str, int] = field(default_factory=dict)
+    failed_pieces: int = 0
+    profiles: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+# ---------------------------------------------------------------------------
+# Caricamento ordini
+# ---------------------------------------------------------------------------
+def _cuts_from_data(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    if not isinstance(data, dict) or (data.get("type") or "").strip().lower() != "cutlist":
+        raise ValueError("Ordine non di tipo cutlist (salvare la lista di taglio da Quote Vani)")
+    return list(data.get("cuts") or [])
+
+
+def load_cutlist_json(path: str) -> List[Dict[str, Any]]:
+    """Legge una cutlist JSON ({"type": "cutlist", "cuts": [...]}) o una lista di cuts."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        return data
+    return _cuts_from_data(data)
+
+
+def load_order_cuts(order_id: int, db_path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Legge i cuts di un ordine di tipo cutlist da OrdersStore."""
+    from ui_qt.services.orders_store import OrdersStore
+    store = OrdersStore(db_path)
+    try:
+        order = store.get_order(int(order_id))
+    finally:
+        store.close()
+    if not order:
+        raise ValueError(f"Ordine {order_id} non trovato")
+    return _cuts_from_data(order.get("data") or {})
+
+
+def cuts_to_pieces(cuts: Sequence[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Espande i cuts (qty) in pezzi per profilo, nel formato usato dall'ottimizzatore."""
+    by_profile: Dict[str, List[Dict[str, Any]]] = {}
+    for c in cuts:
+        prof = str(c.get("profile", "")).strip()
+        length = round(float(c.get("length_mm", c.get("len", 0.0))), 2)
+        if length <= 0:
+            continue
+        piece = {
+            "len": length,
+            "ax": float(c.get("ang_sx", c.get("ax", 0.0))),
+            "ad": float(c.get("ang_dx", c.get("ad", 0.0))),
+            "profile": prof,
+            "element": str(c.get("element", "")),
+        }
+        for _ in range(max(0, int(c.get("qty", 1)))):
+            by_profile.setdefault(prof, []).append(dict(piece))
+    return by_profile
+
+
+# ---------------------------------------------------------------------------
+# Ottimizzazione
+# ---------------------------------------------------------------------------
+def _pack_bfd(pieces: List[Dict[str, Any]], p: RunParams) -> Tuple[List[List[Dict[str, Any]]], List[float]]:
+    """Best-fit come AutomaticoPage._pack_bfd."""
+    args = (p.kerf_mm, p.ripasso_mm, p.reversible, p.thickness_mm, p.angle_tol_deg,
+            p.kerf_max_angle_deg, p.kerf_max_factor)
+    bars: List[List[Dict[str, Any]]] = []
+    for piece in pieces:
+        placed = False
+        for b in bars:
+            used = bar_used_length(b, *args)
+            extra = joint_consumption(b[-1], *args)[0] if b else 0.0
+            if used + piece["len"] + extra <= p.stock_mm + 1e-6:
+                b.append(piece)
+                placed = True
+                break
+        if not placed:
+            bars.append([piece])
+    return bars, residuals(bars, p.stock_mm, *args)
+
+
+def optimize_pieces(pieces: List[Dict[str, Any]], p: RunParams) -> Tuple[List[List[Dict[str, Any]]], List[float]]:
+    """Packing in barre con la stessa catena di AutomaticoPage._optimize_profile."""
+    if not pieces:
+        return [], []
+    if p.solver in ("ILP_KNAP", "ILP"):
+        bars, rem = pack_bars_knapsack_ilp(
+            pieces=pieces, stock=p.stock_mm, kerf_base=p.kerf_mm, ripasso_mm=p.ripasso_mm,
+            conservative_angle_deg=p.conservative_angle_deg, max_angle=p.kerf_max_angle_deg,
+            max_factor=p.kerf_max_factor, reversible=p.reversible, thickness_mm=p.thickness_mm,
+            angle_tol=p.angle_tol_deg, per_bar_time_s=p.per_bar_time_s
+        )
+        if not bars:
+            bars, rem = _pack_bfd(pieces, p)
+    else:
+        bars, rem = _pack_bfd(pieces, p)
+
+    if p.tail_refine:
+        try:
+            bars_ref, rem2 = refine_tail_ilp(
+                bars, p.stock_mm, p.kerf_mm, p.ripasso_mm, p.reversible, p.thickness_mm,
+                p.angle_tol_deg, tail_bars=p.tail_bars, time_limit_s=p.tail_time_s,
+                max_angle=p.kerf_max_angle_deg, max_factor=p.kerf_max_factor
+            )
+            if bars_ref and len(bars_ref) == len(bars):
+                bars, rem = bars_ref, rem2
+        except Exception as e:
+            logger.warning(f"Raffinamento tail fallito: {e}")
+    return bars, rem
+
+
+# ---------------------------------------------------------------------------
+# Esecuzione simulata
+# ---------------------------------------------------------------------------
+class ProductionRun:
+    """Esegue il piano barra per barra sulla macchina simulata e misura le fasi."""
+
+    def __init__(self, params: RunParams):
+        self.p = params
+        self.mode_config = ModeConfig(
+            machine_zero_homing_mm=params.machine_zero_homing_mm,
+            machine_offset_battuta_mm=params.machine_offset_battuta_mm,
+            machine_max_travel_mm=params.machine_max_travel_mm,
+            stock_length_mm=params.stock_mm,
+        )
+        self.detector = ModeDetector(self.mode_config)
+        self.clock = ManualClock()
+        self.machine = SimulationMachine(
+            min_distance=params.machine_zero_homing_mm,
+            max_cut_length=params.machine_max_travel_mm,
+            dynamics=SimDynamics(max_speed_mm_s=params.max_speed_mm_s,
+                                 acceleration_mm_s2=params.acceleration_mm_s2),
+            clock=self.clock,
+        )
+        self.handlers = {
+            "out_of_quota": OutOfQuotaHandler(self.machine, OutOfQuotaConfig(
+                zero_homing_mm=params.machine_zero_homing_mm,
+                offset_battuta_mm=params.machine_offset_battuta_mm)),
+            "ultra_short": UltraShortHandler(self.machine, UltraShortConfig(
+                zero_homing_mm=params.machine_zero_homing_mm,
+                offset_battuta_mm=params.machine_offset_battuta_mm)),
+            "extra_long": ExtraLongHandler(self.machine, ExtraLongConfig(
+                max_travel_mm=params.machine_max_travel_mm,
+                stock_length_mm=params.stock_mm)),
+        }
+        self.phases = {ph: 0.0 for ph in PHASES}
+        self.modes: Dict[str, int] = {}
+        self.failed = 0
+
+    def _wait(self, phase: str, seconds: float):
+        self.machine.advance(seconds, step_s=max(seconds, 1e-3))
+        self.phases[phase] += seconds
+
+    def _wait_motion(self) -> bool:
+        t0 = self.clock.now()
+        ok = self.machine.run_until_idle(timeout_s=60.0, step_s=0.01)
+        self.phases["positioning"] += self.clock.now() - t0
+        return ok
+
+    def _lock_brake(self):
+        self.machine.command_lock_brake()
+        self._wait("brake", self.machine.dynamics.brake_engage_s)
+
+    def _effective_length(self, piece: Dict[str, Any]) -> float:
+        th = max(0.0, self.p.thickness_mm)
+        if th <= 0.0:
+            return piece["len"]
+        return max(0.0, piece["len"] - th * tan(radians(abs(piece["ax"])))
+                   - th * tan(radians(abs(piece["ad"]))))
+
+    def home(self):
+        self.machine.do_homing()
+        self.machine.run_until_idle(timeout_s=10.0)
+
+    def run_piece(self, piece: Dict[str, Any]) -> bool:
+        info = self.detector.detect(piece["len"])
+        if not info.is_valid:
+            self.failed += 1
+            return False
+        mode = info.mode_name
+        self.modes[mode] = self.modes.get(mode, 0) + 1
+        self.machine.set_mode_context(mode, piece_length_mm=piece["len"],
+                                      bar_length_mm=self.mode_config.stock_length_mm)
+
+        if mode == "normal":
+            self.machine.command_set_blade_inhibit(left=(piece["ax"] == 0), right=(piece["ad"] == 0))
+            ok = self.machine.command_move(self._effective_length(piece), piece["ax"], piece["ad"],
+                                           profile=piece["profile"], element=piece["element"])
+            ok = ok and self._wait_motion()
+        else:
+            handler = self.handlers[mode]
+            handler.start_sequence(target_length_mm=piece["len"], angle_sx=piece["ax"], angle_dx=piece["ad"])
+            ok = True
+            steps = _MODE_STEPS[mode]
+            for n in range(1, steps + 1):
+                if not getattr(handler, f"execute_step_{n}")() or not self._wait_motion():
+                    ok = False
+                    break
+                if n < steps:
+                    # Come AutomaticoPage: freno, pausa, rilascio e passo successivo
+                    self._lock_brake()
+                    self._wait("step_pause", self.p.step_pause_s)
+                    self.machine.command_release_brake()
+            handler.reset()
+        if not ok:
+            self.failed += 1
+            return False
+
+        self._lock_brake()
+        self._wait("cut", self.p.cut_time_s)
+        self._wait("unload", self.p.unload_time_s)
+        self.machine.command_release_brake()
+        return True
+
+    def run_bars(self, bars: List[List[Dict[str, Any]]]):
+        for bar in bars:
+            self._wait("bar_load", self.p.bar_load_time_s)
+            for piece in bar:
+                self.run_piece(piece)
+
+
+def simulate_order(cuts: Sequence[Dict[str, Any]], params: RunParams) -> RunReport:
+    """
+    Simula un ordine completo.
+
+    Args:
+        cuts: Cuts della cutlist (profile, element, length_mm, ang_sx, ang_dx, qty)
+        params: Parametri di simulazione
+
+    Returns:
+        RunReport con tempo totale, barre, sfrido e ripartizione per fase
+    """
+    report = RunReport(params=asdict(params))
+    run = ProductionRun(params)
+    run.home()
+    stock_total = 0.0
+    for profile, pieces in cuts_to_pieces(cuts).items():
+        t0 = time.perf_counter()
+        bars, rem = optimize_pieces(pieces, params)
+        opt_s = time.perf_counter() - t0
+        run.phases["optimize"] += opt_s
+        sim_t0 = run.clock.now()
+        run.run_bars(bars)
+        report.profiles[profile] = {
+            "bars": len(bars),
+            "pieces": len(pieces),
+            "scrap_mm": round(sum(rem), 2),
+            "optimize_s": round(opt_s, 3),
+            "machine_time_s": round(run.clock.now() - sim_t0, 2),
+        }
+        report.bars += len(bars)
+        report.pieces += len(pieces)
+        report.scrap_mm += sum(rem)
+        stock_total += len(bars) * params.stock_mm
+
+    report.phases_s = {ph: round(v, 3) for ph, v in run.phases.items()}
+    report.total_time_s = round(sum(run.phases.values()), 2)
+    report.scrap_mm = round(report.scrap_mm, 2)
+    report.scrap_pct = round(100.0 * report.scrap_mm / stock_total, 2) if stock_total else 0.0
+    report.modes = dict(run.modes)
+    report.failed_pieces = run.failed
+    return report
+
+
+# ---------------------------------------------------------------------------
+# Sweep parametri
+# ---------------------------------------------------------------------------
+def expand_grid(base: RunParams, grid: Dict[str, Sequence[Any]]) -> List[RunParams]:
+    """Prodotto cartesiano dei valori in grid applicato a base."""
+    keys = [k for k, values in grid.items() if values]
+    if not keys:
+        return [base]
+    return [replace(base, **dict(zip(keys, combo)))
+            for combo in itertools.product(*(grid[k] for k in keys))]
+
+
+def _simulate_job(job: Tuple[List[Dict[str, Any]], RunParams]) -> Dict[str, Any]:
+    cuts, params = job
+    return simulate_order(cuts, params).to_dict()
+
+
+def run_sweep(cuts: Sequence[Dict[str, Any]], variants: Sequence[RunParams],
+              processes: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Simula ogni variante, in parallelo su più processi.
+
+    Args:
+        cuts: Cuts dell'ordine
+        variants: Parametri da confrontare
+        processes: Numero di processi (None = CPU disponibili, 1 = in-process)
+
+    Returns:
+        Report (dict) nello stesso ordine di variants
+    """
+    jobs = [(list(cuts), v) for v in variants]
+    if processes == 1 or len(jobs) <= 1:
+        return [_simulate_job(j) for j in jobs]
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        return list(pool.map(_simulate_job, jobs))
+
+
+def format_report(reports: Sequence[Dict[str, Any]], sweep_keys: Sequence[str] = ()) -> str:
+    """Tabella testuale dei report (una riga per variante)."""
+    cols = list(sweep_keys) + ["total", "bars", "pieces", "scrap_mm", "scrap_%"] + list(PHASES)
+    rows = []
+    for r in reports:
+        row = [str(r["params"].get(k)) for k in sweep_keys]
+        row += [_fmt_duration(r["total_time_s"]), str(r["bars"]), str(r["pieces"]),
+                f"{r['scrap_mm']:.0f}", f"{r['scrap_pct']:.1f}"]
+        row += [f"{r['phases_s'].get(ph, 0.0):.1f}" for ph in PHASES]
+        rows.append(row)
+    widths = [max(len(c), *(len(row[i]) for row in rows)) if rows else len(c) for i, c in enumerate(cols)]
+    lines = ["  ".join(c.rjust(w) for c, w in zip(cols, widths))]
+    lines += ["  ".join(v.rjust(w) for v, w in zip(row, widths)) for row in rows]
+    return "\n".join(lines)
+
+
+def _fmt_duration(seconds: float) -> str:
+    m, s = divmod(int(round(seconds)), 60)
+    h, m = divmod(m, 60)
+    return f"{h}:{m:02d}:{s:02d}"
+
+
+__all__ = [
+    "PHASES", "RunParams", "RunReport", "ProductionRun",
+    "load_cutlist_json", "load_order_cuts", "cuts_to_pieces", "optimize_pieces",
+    "simulate_order", "expand_grid", "run_sweep", "format_report",
+]
@@ -22,8 +22,15 @@ import math
 import time
 from typing import Dict, List, Tuple, Any, Optional
 
+from ui_qt.utils import metrics
+
 logger = logging.getLogger(__name__)
 
+_OPT_RUNS = metrics.counter("optimizer_runs_total", "Packing runs by solver (ilp, greedy)")
+_OPT_SECONDS = metrics.histogram("optimizer_seconds", "Duration of pack_bars_knapsack_ilp by solver")
+_OPT_BARS = metrics.counter("optimizer_bars_total", "Bars produced by the optimizer")
+_OPT_SCRAP = metrics.gauge("optimizer_scrap_ratio", "Scrap / stock of the last packing run")
+
 # ---------------------------------------------------------------------------
 # Parametri di default (possono essere sovrascritti dai settings esterni)
 # ---------------------------------------------------------------------------
@@ -232,6 +239,7 @@ def pack_bars_knapsack_ilp(pieces: List[Dict[str, Any]],
     remaining_indices = list(range(len(pieces)))
     bars: List[List[Dict[str, Any]]] = []
     start_time_global = time.time()
+    t_start = time.perf_counter()
 
     while remaining_indices:
         if use_ilp:
@@ -308,6 +316,14 @@ def pack_bars_knapsack_ilp(pieces: List[Dict[str, Any]],
             break
 
     res = residuals(bars, stock, kerf_base, ripasso_mm, reversible, thickness_mm, angle_tol, max_angle, max_factor)
+
+    # Metriche: tempo ottimizzatore e sfrido
+    solver_name = "ilp" if use_ilp else "greedy"
+    _OPT_RUNS.inc(solver=solver_name)
+    _OPT_SECONDS.observe(time.perf_counter() - t_start, solver=solver_name)
+    _OPT_BARS.inc(len(bars))
+    if bars and stock > 0:
+        _OPT_SCRAP.set(sum(max(0.0, r) for r in res) / (len(bars) * stock))
     return bars, res
 
 
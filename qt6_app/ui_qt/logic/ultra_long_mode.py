@@ -89,7 +89,7 @@ def calculate_ultra_long_sequence(
         return None  # Pezzo normale
     
     if target_length_mm > config.stock_length_mm:
-        logger.error(f"❌ Pezzo {target_length_mm:. 0f}mm > stock {config.stock_length_mm:.0f}mm")
+        logger.error(f"❌ Pezzo {target_length_mm:.0f}mm > stock {config.stock_length_mm:.0f}mm")
         return None
     
     # Calcola parametri
@@ -124,7 +124,7 @@ def calculate_ultra_long_sequence(
         # Step 2: Arretramento
         offset_mm=offset,
         pos_after_retract_dx=pos_dopo_arretramento_dx,
-        morse_switch_delay_ms=100,
+        presser_switch_delay_ms=100,
         
         # Step 3: Taglio finale con TESTA SX
         pos_final_cut_dx=pos_finale_dx,
@@ -141,9 +141,9 @@ def get_step_description(seq: UltraLongSequence) -> str:
     
     steps = {
         0: "IDLE - Pronto per intestatura",
-        1: f"STEP 1/3: Intestatura TESTA DX @ {seq. pos_head_cut_dx:. 0f}mm (angolo {seq.angle_head_cut_dx:.1f}°)",
-        2: f"STEP 2/3: Arretramento TESTA DX -{seq. offset_mm:.0f}mm → {seq.pos_after_retract_dx:.0f}mm",
-        3: f"STEP 3/3: Taglio finale TESTA SX @ DX_pos={seq.pos_final_cut_dx:.0f}mm (totale {seq.target_length_mm:. 0f}mm)"
+        1: f"STEP 1/3: Intestatura TESTA DX @ {seq.pos_head_cut_dx:.0f}mm (angolo {seq.angle_head_cut_dx:.1f}°)",
+        2: f"STEP 2/3: Arretramento TESTA DX -{seq.offset_mm:.0f}mm → {seq.pos_after_retract_dx:.0f}mm",
+        3: f"STEP 3/3: Taglio finale TESTA SX @ DX_pos={seq.pos_final_cut_dx:.0f}mm (totale {seq.target_length_mm:.0f}mm)"
     }
     
     return steps.get(seq.current_step, "Step sconosciuto")
@@ -1,6 +1,7 @@
 """
 Encoder Reader for GPIO-based position feedback.
 Supports quadrature x4 decoding with hardware interrupts via pigpio.
+Edges are decoded from the callback level with a state-table lookup.
 """
 import logging
 from typing import Optional
@@ -12,6 +13,8 @@ except ImportError:
     pigpio = None
     PIGPIO_AVAILABLE = False
 
+from ui_qt.hardware.quadrature_decoder import QuadratureDecoder
+
 
 class EncoderReader:
     """Reads incremental encoder via GPIO with quadrature x4 decoding."""
@@ -29,9 +32,7 @@ class EncoderReader:
         self.gpio_b = gpio_b
         self.mm_per_pulse = mm_per_pulse
         
-        self._pulse_count = 0
-        self._last_a = 0
-        self._last_b = 0
+        self._decoder = QuadratureDecoder(gpio_a, gpio_b)
         self._pi = None
         self._connected = False
         self._cb_a = None
@@ -55,11 +56,11 @@ class EncoderReader:
             self._pi.set_pull_up_down(self.gpio_a, pigpio.PUD_UP)
             self._pi.set_pull_up_down(self.gpio_b, pigpio.PUD_UP)
             
-            self._last_a = self._pi.read(self.gpio_a)
-            self._last_b = self._pi.read(self.gpio_b)
+            self._decoder.set_levels(self._pi.read(self.gpio_a), self._pi.read(self.gpio_b))
             
-            self._cb_a = self._pi.callback(self.gpio_a, pigpio.EITHER_EDGE, self._pulse_callback)
-            self._cb_b = self._pi.callback(self.gpio_b, pigpio.EITHER_EDGE, self._pulse_callback)
+            # Decoder.edge has the pigpio callback signature: no per-edge GPIO reads
+            self._cb_a = self._pi.callback(self.gpio_a, pigpio.EITHER_EDGE, self._decoder.edge)
+            self._cb_b = self._pi.callback(self.gpio_b, pigpio.EITHER_EDGE, self._decoder.edge)
             
             self._connected = True
             self.logger.info(f"Encoder initialized on GPIO{gpio_a}/{gpio_b}")
@@ -70,21 +71,7 @@ class EncoderReader:
     
     def _pulse_callback(self, gpio, level, tick):
         """Hardware interrupt callback for quadrature decoding."""
-        if not self._pi:
-            return
-        
-        try:
-            level_a = self._pi.read(self.gpio_a)
-            level_b = self._pi.read(self.gpio_b)
-            
-            if gpio == self.gpio_a and level_a != self._last_a:
-                self._pulse_count += 1 if level_a != level_b else -1
-                self._last_a = level_a
-            elif gpio == self.gpio_b and level_b != self._last_b:
-                self._pulse_count += 1 if level_a == level_b else -1
-                self._last_b = level_b
-        except Exception:
-            pass
+        self._decoder.edge(gpio, level, tick)
     
     def is_connected(self) -> bool:
         """Check if encoder is connected."""
@@ -94,20 +81,20 @@ class EncoderReader:
         """Get current position in mm."""
         if not self.is_connected():
             return None
-        return self._pulse_count * self.mm_per_pulse
+        return self._decoder.count * self.mm_per_pulse
     
     def get_pulse_count(self) -> int:
         """Get raw pulse count."""
-        return self._pulse_count
+        return self._decoder.count
     
     def reset(self):
         """Reset position counter (homing)."""
-        self._pulse_count = 0
+        self._decoder.count = 0
         self.logger.info("Encoder reset")
     
     def set_position(self, position_mm: float):
         """Set current position (calibration)."""
-        self._pulse_count = round(position_mm / self.mm_per_pulse)
+        self._decoder.count = round(position_mm / self.mm_per_pulse)
     
     def close(self):
         """Close connection and free resources."""
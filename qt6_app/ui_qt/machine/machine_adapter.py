@@ -1,16 +1,28 @@
 from __future__ import annotations
+import time
 from typing import Optional, Dict, Any
 from ui_qt.machine.interfaces import MachineIO
+from ui_qt.utils import metrics
+
+_MOVES = metrics.counter("moves_total", "Move commands by result (ok, rejected, error)")
+_MOVE_COMMAND_S = metrics.histogram("move_command_seconds", "Latency of the command_move call")
+_POSITIONING_S = metrics.histogram("positioning_seconds", "Time from move command to positioning complete",
+                                   buckets=(0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 8.0, 13.0, 20.0))
 
 class MachineAdapter: 
     def __init__(self, raw_machine: MachineIO):
         self._raw = raw_machine
+        self._move_started: Optional[float] = None
 
     def get_position(self) -> Optional[float]: 
         return self._raw.get_position()
 
     def is_positioning_active(self) -> bool:
-        return self._raw.is_positioning_active()
+        active = self._raw.is_positioning_active()
+        if not active and self._move_started is not None:
+            _POSITIONING_S.observe(time.perf_counter() - self._move_started)
+            self._move_started = None
+        return active
 
     def get_input(self, name: str) -> bool:
         try:
@@ -20,7 +32,16 @@ class MachineAdapter:
 
     def command_move(self, length_mm: float, ang_sx: float = 0.0, ang_dx: float = 0.0,
                      profile: str = "", element: str = "") -> bool:
-        return self._raw.command_move(length_mm, ang_sx, ang_dx, profile, element)
+        t0 = time.perf_counter()
+        try:
+            ok = self._raw.command_move(length_mm, ang_sx, ang_dx, profile, element)
+        except Exception:
+            _MOVES.inc(result="error")
+            raise
+        _MOVE_COMMAND_S.observe(time.perf_counter() - t0)
+        _MOVES.inc(result="ok" if ok else "rejected")
+        self._move_started = t0 if ok else None
+        return ok
 
     def command_lock_brake(self) -> bool:
         return self._raw.command_lock_brake()
@@ -5,13 +5,16 @@ Features:
 - Hardware pulse generation via pigpio
 - Direction control (DIR signal)  
 - Velocity profile with acceleration/deceleration support
+- Hardware-timed pulse trains (pigpio waveforms chained with wave_chain)
+- Trapezoidal or S-curve ramps, exact pulse count
 - Immediate stop capability
 - Automatic pulse calculation from mm
 """
+import math
 import time
 import logging
 import threading
-from typing import Optional
+from typing import Optional, List, Dict, Any
 from dataclasses import dataclass
 
 try:
@@ -31,6 +34,114 @@ class MotionProfile:
     deceleration_mm_s2: float = 5000.0
 
 
+@dataclass
+class PulseSegment:
+    """Constant-frequency run of step pulses inside a pulse train."""
+    freq_hz: float
+    pulses: int
+
+    @property
+    def duration_s(self) -> float:
+        return self.pulses / self.freq_hz if self.freq_hz > 0 else 0.0
+
+
+def _ramp_levels(max_freq_hz: float, accel_hz_s: float, shape: str, levels: int) -> List[PulseSegment]:
+    """
+    Discretize an acceleration ramp from standstill to max_freq_hz.
+
+    The ramp time is split into equal slices; each slice becomes one
+    constant-frequency segment sampled at the slice midpoint.
+    - trapezoidal: constant acceleration, T = v / a
+    - s_curve: cosine velocity (jerk-limited), peak acceleration = a,
+      T = π·v / (2a)
+    """
+    if max_freq_hz <= 0 or accel_hz_s <= 0:
+        return []
+    if shape == "s_curve":
+        ramp_s = math.pi * max_freq_hz / (2.0 * accel_hz_s)
+    else:
+        ramp_s = max_freq_hz / accel_hz_s
+    slice_s = ramp_s / levels
+    out: List[PulseSegment] = []
+    for k in range(levels):
+        x = (k + 0.5) / levels
+        if shape == "s_curve":
+            freq = max_freq_hz * 0.5 * (1.0 - math.cos(math.pi * x))
+        else:
+            freq = max_freq_hz * x
+        n = int(round(freq * slice_s))
+        if n > 0:
+            out.append(PulseSegment(freq_hz=freq, pulses=n))
+    return out
+
+
+def _ramp_pulses(max_freq_hz: float, accel_hz_s: float, shape: str) -> float:
+    """Pulses needed to reach max_freq_hz (continuous, before discretization)."""
+    if shape == "s_curve":
+        return math.pi * max_freq_hz ** 2 / (4.0 * accel_hz_s)
+    return max_freq_hz ** 2 / (2.0 * accel_hz_s)
+
+
+def plan_pulse_train(
+    pulses: int,
+    max_freq_hz: float,
+    accel_hz_s: float,
+    decel_hz_s: Optional[float] = None,
+    shape: str = "trapezoidal",
+    ramp_levels: int = 32
+) -> List[PulseSegment]:
+    """
+    Plan a trapezoidal / S-curve step pulse train.
+
+    Short moves become triangular profiles (peak frequency reduced so the
+    ramps fit). The sum of segment pulses is always exactly ``pulses``.
+
+    Args:
+        pulses: Total step pulses
+        max_freq_hz: Cruise frequency (pulses/s)
+        accel_hz_s: Acceleration (pulses/s²)
+        decel_hz_s: Deceleration (pulses/s², default = accel)
+        shape: "trapezoidal" or "s_curve"
+        ramp_levels: Constant-frequency steps per ramp
+
+    Returns:
+        Ordered list of segments (accel, cruise, decel)
+    """
+    pulses = int(pulses)
+    if pulses <= 0 or max_freq_hz <= 0:
+        return []
+    decel_hz_s = decel_hz_s or accel_hz_s
+    if accel_hz_s <= 0 or decel_hz_s <= 0:
+        return [PulseSegment(freq_hz=max_freq_hz, pulses=pulses)]
+
+    peak = float(max_freq_hz)
+    ramps = _ramp_pulses(peak, accel_hz_s, shape) + _ramp_pulses(peak, decel_hz_s, shape)
+    if ramps > pulses:
+        # Triangular profile: ramp distance scales with peak²
+        peak *= math.sqrt(pulses / ramps)
+
+    up = _ramp_levels(peak, accel_hz_s, shape, ramp_levels)
+    down = list(reversed(_ramp_levels(peak, decel_hz_s, shape, ramp_levels)))
+
+    # Rounding may overshoot the move: trim the slowest ramp steps first
+    excess = sum(seg.pulses for seg in up + down) - pulses
+    while excess > 0 and (up or down):
+        ramp = up if (up and (not down or up[0].pulses >= down[-1].pulses)) else down
+        idx = 0 if ramp is up else -1
+        take = min(excess, ramp[idx].pulses)
+        ramp[idx].pulses -= take
+        excess -= take
+        if ramp[idx].pulses == 0:
+            ramp.pop(idx)
+
+    cruise = pulses - sum(seg.pulses for seg in up + down)
+    segments = list(up)
+    if cruise > 0:
+        segments.append(PulseSegment(freq_hz=peak, pulses=cruise))
+    segments.extend(down)
+    return segments
+
+
 class PulseGenerator:
     """
     Generates PUL/DIR signals via GPIO for DCS810 motor control. 
@@ -43,7 +154,14 @@ class PulseGenerator:
     MIN_PULSE_WIDTH_US = 1.0    # 1μs min
     DIR_SETUP_TIME_MS = 5.0     # 5ms min DIR before PUL
     
-    def __init__(self, gpio_pul: int = 27, gpio_dir: int = 22, mm_per_pulse: float = 0.047125):
+    # pigpio wave_chain limits
+    MAX_CHAIN_LOOP = 65535      # Max repeat count of one chain loop
+    CRUISE_BLOCK_PULSES = 64    # Pulses per cruise wave (fractional period spread)
+    WAVE_POLL_S = 0.005         # wave_tx_busy polling interval
+    
+    def __init__(self, gpio_pul: int = 27, gpio_dir: int = 22, mm_per_pulse: float = 0.047125,
+                 max_speed_mm_s: float = 1000.0, acceleration_mm_s2: float = 5000.0,
+                 use_waveforms: bool = True, profile_shape: str = "trapezoidal"):
         """
         Initialize pulse generator.
         
@@ -51,10 +169,24 @@ class PulseGenerator:
             gpio_pul:  GPIO pin for PUL signal (default: GPIO27)
             gpio_dir:  GPIO pin for DIR signal (default:  GPIO22)
             mm_per_pulse: Millimeters per pulse (from transmission config)
+            max_speed_mm_s: Default cruise speed (limits.max_speed_mm_s)
+            acceleration_mm_s2: Default acceleration (limits.acceleration_mm_s2)
+            use_waveforms: Play pulse trains as pigpio waveforms (hardware timed);
+                           False = legacy write/sleep bit-banging
+            profile_shape: "trapezoidal" or "s_curve"
         """
         self. gpio_pul = gpio_pul
         self.gpio_dir = gpio_dir
         self. mm_per_pulse = mm_per_pulse
+        self.max_speed_mm_s = max_speed_mm_s
+        self.acceleration_mm_s2 = acceleration_mm_s2
+        self.use_waveforms = use_waveforms
+        self.profile_shape = profile_shape
+        
+        self._wave_ids: List[int] = []
+        self._plan: List[PulseSegment] = []
+        self._plan_started: Optional[float] = None
+        self._pulses_sent = 0
         
         self._pi: Optional[object] = None
         self._connected = False
@@ -89,6 +221,30 @@ class PulseGenerator:
             self._pi = None
             self._connected = False
     
+    @classmethod
+    def from_hardware_config(cls, config: Dict[str, Any], gpio_pul: int = 27,
+                             gpio_dir: int = 22, **kwargs) -> "PulseGenerator":
+        """
+        Build a generator from hardware_config.json (transmission + limits).
+        
+        Args:
+            config: Parsed hardware_config.json
+            gpio_pul: GPIO pin for PUL signal
+            gpio_dir: GPIO pin for DIR signal
+        """
+        transmission = config.get("transmission", {})
+        limits = config.get("limits", {})
+        mm_per_pulse = float(transmission.get("mm_per_pulse_calculated", 0.047125)) * \
+            float(transmission.get("correction_factor", 1.0))
+        return cls(
+            gpio_pul=gpio_pul,
+            gpio_dir=gpio_dir,
+            mm_per_pulse=mm_per_pulse,
+            max_speed_mm_s=float(limits.get("max_speed_mm_s", 1000.0)),
+            acceleration_mm_s2=float(limits.get("acceleration_mm_s2", 5000.0)),
+            **kwargs
+        )
+    
     def is_connected(self) -> bool:
         return self._connected and self._pi is not None and self._pi.connected
     
@@ -99,13 +255,59 @@ class PulseGenerator:
     def _mm_to_pulses(self, distance_mm: float) -> int:
         return int(abs(distance_mm) / self.mm_per_pulse)
     
-    def move_to(self, target_mm: float, current_mm: float, speed_mm_s: float = 1000.0,
-                acceleration_mm_s2: float = 5000.0) -> bool:
+    def plan(self, distance_mm: float, speed_mm_s: Optional[float] = None,
+             acceleration_mm_s2: Optional[float] = None) -> List[PulseSegment]:
+        """
+        Plan the pulse train for a relative move (no hardware access).
+        
+        Returns:
+            Segments whose pulse counts sum to the move's pulse count
+        """
+        speed = speed_mm_s if speed_mm_s is not None else self.max_speed_mm_s
+        accel = acceleration_mm_s2 if acceleration_mm_s2 is not None else self.acceleration_mm_s2
+        max_freq_hz = min(speed / self.mm_per_pulse, self.MAX_PULSE_FREQ_HZ)
+        return plan_pulse_train(
+            self._mm_to_pulses(distance_mm),
+            max_freq_hz,
+            accel / self.mm_per_pulse,
+            shape=self.profile_shape
+        )
+    
+    def estimate_move_time_s(self, distance_mm: float, speed_mm_s: Optional[float] = None,
+                             acceleration_mm_s2: Optional[float] = None) -> float:
+        """Estimate move duration from the planned pulse train."""
+        return sum(seg.duration_s for seg in self.plan(distance_mm, speed_mm_s, acceleration_mm_s2))
+    
+    def get_pulses_sent(self) -> int:
+        """Pulses emitted by the current/last move (estimated while a wave is playing)."""
+        with self._lock:
+            if self._plan_started is None:
+                return self._pulses_sent
+            return self._pulses_at(time.perf_counter() - self._plan_started)
+    
+    def _pulses_at(self, elapsed_s: float) -> int:
+        """Pulses emitted by the hardware-timed plan after elapsed_s."""
+        done = 0
+        for seg in self._plan:
+            if elapsed_s >= seg.duration_s:
+                done += seg.pulses
+                elapsed_s -= seg.duration_s
+            else:
+                done += int(elapsed_s * seg.freq_hz)
+                break
+        return done
+    
+    def move_to(self, target_mm: float, current_mm: float, speed_mm_s: Optional[float] = None,
+                acceleration_mm_s2: Optional[float] = None) -> bool:
         distance_mm = target_mm - current_mm
         return self. move_relative(distance_mm, speed_mm_s, acceleration_mm_s2)
     
-    def move_relative(self, distance_mm: float, speed_mm_s: float = 1000.0,
-                     acceleration_mm_s2: float = 5000.0) -> bool:
+    def move_relative(self, distance_mm: float, speed_mm_s: Optional[float] = None,
+                     acceleration_mm_s2: Optional[float] = None) -> bool:
+        if speed_mm_s is None:
+            speed_mm_s = self.max_speed_mm_s
+        if acceleration_mm_s2 is None:
+            acceleration_mm_s2 = self.acceleration_mm_s2
         if not self.is_connected():
             self.logger.warning("⚠️ Pulse generator not connected")
             return False
@@ -124,8 +326,9 @@ class PulseGenerator:
             deceleration_mm_s2=acceleration_mm_s2
         )
         
+        target = self._execute_waveform_motion if self.use_waveforms else self._execute_motion
         self._motion_thread = threading.Thread(
-            target=self._execute_motion,
+            target=target,
             args=(profile,),
             daemon=True
         )
@@ -175,6 +378,133 @@ class PulseGenerator:
                 self._moving = False
                 self._stop_requested = False
     
+    def _execute_waveform_motion(self, profile: MotionProfile):
+        """Play the whole move as chained pigpio waveforms (hardware timed)."""
+        try:
+            direction = 0 if profile.distance_mm >= 0 else 1
+            self._pi.write(self.gpio_dir, direction)
+            time.sleep(self.DIR_SETUP_TIME_MS / 1000.0)
+            
+            segments = self.plan(profile.distance_mm, profile.speed_mm_s, profile.acceleration_mm_s2)
+            if not segments:
+                self.logger.info("📍 Movement 0mm, already at destination")
+                return
+            
+            pulses = sum(seg.pulses for seg in segments)
+            peak_hz = max(seg.freq_hz for seg in segments)
+            direction_str = "→" if direction == 0 else "←"
+            self.logger.info(
+                f"{direction_str} Movement:  {profile.distance_mm:+.2f}mm "
+                f"({pulses} pulses, peak {peak_hz:.0f}Hz, {len(segments)} segments, wave)"
+            )
+            
+            chain = self._build_wave_chain(segments)
+            with self._lock:
+                if self._stop_requested:
+                    return
+                self._plan = segments
+                self._plan_started = time.perf_counter()
+                self._pi.wave_chain(chain)
+            
+            stopped_at = None
+            while self._pi.wave_tx_busy():
+                if self._stop_requested:
+                    stopped_at = time.perf_counter()
+                    self._pi.wave_tx_stop()
+                    self.logger.warning("🛑 Movement interrupted")
+                    break
+                time.sleep(self.WAVE_POLL_S)
+            
+            with self._lock:
+                if stopped_at is None:
+                    self._pulses_sent = pulses
+                else:
+                    self._pulses_sent = self._pulses_at(stopped_at - self._plan_started)
+                self._plan_started = None
+            
+            if not self._stop_requested:
+                self.logger.info(f"✅ Movement completed: {profile.distance_mm:+.2f}mm")
+            
+        except Exception as e:
+            self.logger.error(f"❌ Error during movement: {e}")
+            try:
+                self._pi.wave_tx_stop()
+            except Exception:
+                pass
+        finally:
+            self._delete_waves()
+            with self._lock:
+                self._plan_started = None
+                self._moving = False
+                self._stop_requested = False
+    
+    def _create_wave(self, periods_us: List[int]) -> int:
+        """Create a wave with one PUL pulse per period (50% duty)."""
+        mask = 1 << self.gpio_pul
+        pulses = []
+        for period in periods_us:
+            high = max(int(period // 2), int(self.MIN_PULSE_WIDTH_US))
+            pulses.append(pigpio.pulse(mask, 0, high))
+            pulses.append(pigpio.pulse(0, mask, max(period - high, 1)))
+        self._pi.wave_add_new()
+        self._pi.wave_add_generic(pulses)
+        wid = self._pi.wave_create()
+        if wid < 0:
+            raise RuntimeError(f"wave_create failed ({wid})")
+        self._wave_ids.append(wid)
+        return wid
+    
+    def _chain_repeat(self, chain: List[int], wid: int, count: int):
+        """Append wid repeated count times (split into 16-bit chain loops)."""
+        while count > 0:
+            n = min(count, self.MAX_CHAIN_LOOP)
+            if n == 1:
+                chain.append(wid)
+            else:
+                chain.extend([255, 0, wid, 255, 1, n & 0xFF, n >> 8])
+            count -= n
+    
+    def _build_wave_chain(self, segments: List[PulseSegment]) -> List[int]:
+        """
+        Build the wave_chain script for a planned pulse train.
+        
+        Ramp steps use a one-pulse wave looped N times (waves are shared
+        between accel and decel levels with the same period). The cruise
+        segment uses a block of CRUISE_BLOCK_PULSES pulses whose periods
+        spread the fractional microsecond, so the average rate is exact.
+        """
+        chain: List[int] = []
+        by_period: Dict[int, int] = {}
+        for seg in segments:
+            exact_us = 1_000_000.0 / seg.freq_hz
+            if seg.pulses > self.CRUISE_BLOCK_PULSES and exact_us != int(exact_us):
+                block = self.CRUISE_BLOCK_PULSES
+                edges = [round(i * exact_us) for i in range(block + 1)]
+                wid = self._create_wave([edges[i + 1] - edges[i] for i in range(block)])
+                self._chain_repeat(chain, wid, seg.pulses // block)
+                rest = seg.pulses % block
+                if rest:
+                    self._chain_repeat(chain, self._create_wave([edges[i + 1] - edges[i] for i in range(rest)]), 1)
+            else:
+                period = max(int(round(exact_us)), 2)
+                wid = by_period.get(period)
+                if wid is None:
+                    wid = by_period[period] = self._create_wave([period])
+                self._chain_repeat(chain, wid, seg.pulses)
+        return chain
+    
+    def _delete_waves(self):
+        """Free the waves created for the last move."""
+        if not self._pi:
+            self._wave_ids = []
+            return
+        for wid in self._wave_ids:
+            try:
+                self._pi.wave_delete(wid)
+            except Exception:
+                pass
+        self._wave_ids = []
+    
     def stop(self, wait: bool = True, timeout: float = 1.0) -> bool:
         if not self.is_connected():
             return False
@@ -192,6 +522,7 @@ class PulseGenerator:
         return True
     
     def get_max_speed_mm_s(self) -> float:
+        """Max speed allowed by the driver pulse frequency."""
         return self.MAX_PULSE_FREQ_HZ * self.mm_per_pulse
     
     def close(self):
@@ -6,6 +6,13 @@ import os
 from typing import Dict, Any, Optional, List, Callable
 from ui_qt.machine.interfaces import MachineIO
 from ui_qt.machine.rs485_modbus import ModbusRTUClient
+from ui_qt.machine.sim_dynamics import CarriageModel, RealTimeClock, SimDynamics
+from ui_qt.utils import metrics
+
+_MODBUS_READS = metrics.counter("modbus_reads_total", "Modbus discrete-input reads by board")
+_MODBUS_ERRORS = metrics.counter("modbus_errors_total", "Failed Modbus reads by board")
+_MODBUS_POLL_S = metrics.histogram("modbus_poll_seconds", "Duration of one Modbus input poll (both boards)",
+                                   buckets=(0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25, 0.5, 1.0))
 
 # Import new hardware stack
 try:
@@ -117,6 +124,7 @@ class RealMachine(MachineIO):
             encoder_cal = motion_config.get("encoder_calibration", {})
             pid_params = motion_config.get("pid_parameters", {})
             motion_limits = motion_config.get("motion_limits", {})
+            limits = config.get("limits", {})
             
             # Initialize motor driver
             self._motor_driver = MD25HVDriver(
@@ -148,7 +156,12 @@ class RealMachine(MachineIO):
                 pid_kd=pid_params.get("kd", 0.1),
                 position_tolerance_mm=pid_params.get("position_tolerance_mm", 0.5),
                 max_speed_percent=motion_limits.get("max_speed_percent", 80.0),
-                control_loop_hz=pid_params.get("control_loop_hz", 50.0)
+                control_loop_hz=pid_params.get("control_loop_hz", 50.0),
+                max_speed_mm_s=limits.get("max_speed_mm_s", 2500.0),
+                acceleration_mm_s2=limits.get("acceleration_mm_s2", 5000.0),
+                jerk_mm_s3=limits.get("jerk_mm_s3"),
+                homing_speed_mm_s=limits.get("homing_speed_mm_s", 500.0),
+                velocity_ff_percent_per_mm_s=pid_params.get("velocity_ff_percent_per_mm_s")
             )
             
             # Start motion control loop
@@ -168,6 +181,9 @@ class RealMachine(MachineIO):
     
     def _init_legacy_motion(self):
         """Initialize legacy GPIO-based motion (fallback)."""
+        # Senza encoder la posizione è stimata col modello dinamico del carro
+        self._legacy_clock = RealTimeClock()
+        self._legacy_carriage = CarriageModel(SimDynamics(), self._position_mm, self._legacy_clock.now())
         self.pi = None
         if pigpio:
             try:
@@ -190,6 +206,13 @@ class RealMachine(MachineIO):
             return self._motion_controller.get_position()
         return self._position_mm
 
+    def predict_move_time(self, length_mm: float) -> Optional[float]:
+        """Predicted positioning time in seconds (new motion stack only)."""
+        if self.use_new_motion_stack and self._motion_controller:
+            target_mm = max(self.min_distance, min(float(length_mm), self.max_cut_length))
+            return self._motion_controller.predict_move_time(target_mm)
+        return None
+
     def is_positioning_active(self) -> bool:
         """Check if machine is currently moving."""
         if self.use_new_motion_stack and self._motion_controller:
@@ -237,14 +260,19 @@ class RealMachine(MachineIO):
                 self._target_mm = target_mm
                 self._moving = True
                 self._write_coil_a(0, False)
+                self._legacy_carriage.command_move(target_mm, self._legacy_clock.now())
                 return True
 
     def command_lock_brake(self) -> bool:
         self._write_coil_a(0, True)
+        if not self.use_new_motion_stack:
+            self._legacy_carriage.set_brake(True, self._legacy_clock.now())
         return True
 
     def command_release_brake(self) -> bool:
         self._write_coil_a(0, False)
+        if not self.use_new_motion_stack:
+            self._legacy_carriage.set_brake(False, self._legacy_clock.now())
         return True
 
     def command_set_clutch(self, active: bool) -> bool:
@@ -376,6 +404,7 @@ class RealMachine(MachineIO):
                     self._position_mm = self.min_distance
                     self._target_mm = self.min_distance
                     self._moving = False
+                    self._legacy_carriage.reset_position(self.min_distance, self._legacy_clock.now())
                     self.machine_homed = True
                     self.homing_in_progress = False
                     self._write_coil_a(0, False)
@@ -389,7 +418,9 @@ class RealMachine(MachineIO):
             return
         self._last_poll = now
         
-        # Poll Modbus inputs (unchanged)
+        # Poll Modbus inputs
+        t0 = time.perf_counter()
+        inp_a = inp_b = None
         try:
             inp_a = self._client.read_discrete_inputs(self.addr_a, 0, 8)
             if inp_a: self._inputs_a = inp_a
@@ -400,21 +431,19 @@ class RealMachine(MachineIO):
             if inp_b: self._inputs_b = inp_b
         except Exception:
             pass
+        _MODBUS_POLL_S.observe(time.perf_counter() - t0)
+        _MODBUS_READS.inc(board="a")
+        _MODBUS_READS.inc(board="b")
+        if not inp_a: _MODBUS_ERRORS.inc(board="a")
+        if not inp_b: _MODBUS_ERRORS.inc(board="b")
         
         # Update position for legacy motion only (new stack manages position automatically)
         if not self.use_new_motion_stack:
             with self._lock:
-                if self._moving and self._target_mm is not None:
-                    dist = abs(self._target_mm - self._position_mm)
-                    step = 0.01 * 100  # mm_per_pulse * speed_factor
-                    if dist < step:
-                        self._position_mm = self._target_mm
-                        self._moving = False
-                    else:
-                        if self._position_mm < self._target_mm:
-                            self._position_mm += step
-                        else:
-                            self._position_mm -= step
+                carriage = self._legacy_carriage
+                carriage.advance(self._legacy_clock.now())
+                self._position_mm = carriage.encoder_position_mm()
+                self._moving = carriage.moving
         else:
             # Update internal position from motion controller
             if self._motion_controller:
@@ -423,6 +452,24 @@ class RealMachine(MachineIO):
                     self._position_mm = pos
                 self._moving = self._motion_controller.is_moving()
 
+    def probe_hardware(self) -> Dict[str, Any]:
+        """Diagnostica hardware per il warm-up: {nome: (ok, dettaglio)}."""
+        checks: Dict[str, Any] = {}
+        if not self._client.is_connected():
+            checks["modbus"] = (False, f"{self._client.port} non aperta")
+        else:
+            for board, addr in (("modbus_a", self.addr_a), ("modbus_b", self.addr_b)):
+                ok = self._client.probe(addr)
+                checks[board] = (ok, f"addr {addr} " + ("ok" if ok else "non risponde"))
+        if self.use_new_motion_stack:
+            enc = self._encoder_reader
+            ok = bool(enc and enc.is_connected())
+            checks["encoder"] = (ok, f"{enc.get_position_mm():.1f} mm" if ok else "non connesso")
+        else:
+            ok = self.pi is not None
+            checks["gpio"] = (ok, "pigpio" if ok else "pigpio non disponibile (posizione stimata)")
+        return checks
+
     def get_state(self) -> Dict[str, Any]:
         """Get current machine state."""
         state = {
@@ -1,3 +1,4 @@
+import threading
 from typing import Dict, Any, List, Optional
 
 try:
@@ -9,11 +10,14 @@ except ImportError:
 class ModbusRTUClient:
     """
     Client Modbus RTU semplificato per comunicazione RS485.
+    Le transazioni sono serializzate: il bus è usato dal polling GUI e
+    dalla diagnostica di avvio (warm-up) su thread diversi.
     """
     def __init__(self, port: str, baudrate: int = 115200):
         self.port = port
         self.baudrate = baudrate
         self._client = None
+        self._io_lock = threading.Lock()
         if ModbusSerialClient:
             try:
                 self._client = ModbusSerialClient(
@@ -29,7 +33,8 @@ class ModbusRTUClient:
         if self._client is None:
             return [False] * count
         try:
-            result = self._client.read_coils(start, count, slave=address)
+            with self._io_lock:
+                result = self._client.read_coils(start, count, slave=address)
             if result.isError():
                 return [False] * count
             return list(result.bits[:count])
@@ -40,7 +45,8 @@ class ModbusRTUClient:
         if self._client is None:
             return [False] * count
         try:
-            result = self._client.read_discrete_inputs(start, count, slave=address)
+            with self._io_lock:
+                result = self._client.read_discrete_inputs(start, count, slave=address)
             if result.isError():
                 return [False] * count
             return list(result.bits[:count])
@@ -51,7 +57,22 @@ class ModbusRTUClient:
         if self._client is None:
             return False
         try:
-            result = self._client.write_coil(coil, value, slave=address)
+            with self._io_lock:
+                result = self._client.write_coil(coil, value, slave=address)
+            return not result.isError()
+        except Exception:
+            return False
+
+    def is_connected(self) -> bool:
+        return self._client is not None
+
+    def probe(self, address: int) -> bool:
+        """True se la scheda all'indirizzo risponde (lettura di un ingresso)."""
+        if self._client is None:
+            return False
+        try:
+            with self._io_lock:
+                result = self._client.read_discrete_inputs(0, 1, slave=address)
             return not result.isError()
         except Exception:
             return False
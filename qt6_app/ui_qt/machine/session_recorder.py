@@ -0,0 +1,596 @@
+"""
+Registrazione e riproduzione delle sessioni MachineIO.
+
+- RecordingMachine: wrapper di un MachineIO che registra comandi, ingressi,
+  posizione, stato e homing con timestamp monotonici su file binario compatto
+- ReplayMachine: MachineIO che riproduce una registrazione a velocità reale
+  o accelerata (o con orologio manuale per test deterministici)
+- read_session / reaction_latencies / session_summary: analisi offline
+  (latenza della macchina a stati tra un evento e il comando successivo)
+
+Formato file: intestazione MAGIC + tempo di inizio (epoch), poi record
+"<dB" (t relativo in secondi, tipo) seguiti dal payload del tipo. I nomi
+(comandi, ingressi) sono definiti una volta sola con un record NAME e poi
+referenziati con un id di un byte. Posizione, movimento e ingressi sono
+registrati solo quando cambiano; lo stato come differenza di chiavi.
+"""
+from __future__ import annotations
+
+import bisect
+import json
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from ui_qt.machine.sim_dynamics import RealTimeClock
+
+MAGIC = b"BLZSES1\n"
+
+K_NAME = 0
+K_POSITION = 1
+K_MOVING = 2
+K_INPUT = 3
+K_COMMAND = 4
+K_STATE = 5
+K_HOMING = 6
+K_MARK = 7
+
+KIND_NAMES = {
+    K_POSITION: "position", K_MOVING: "moving", K_INPUT: "input",
+    K_COMMAND: "command", K_STATE: "state", K_HOMING: "homing", K_MARK: "mark",
+}
+
+_REC = struct.Struct("<dB")
+_F64 = struct.Struct("<d")
+_I64 = struct.Struct("<q")
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+
+# ---------------------------------------------------------------------------
+# Codifica valori
+# ---------------------------------------------------------------------------
+def _pack_str(s: str) -> bytes:
+    b = s.encode("utf-8")[:0xFFFF]
+    return _U16.pack(len(b)) + b
+
+
+def _pack_value(v: Any) -> bytes:
+    if v is None:
+        return b"n"
+    if v is True:
+        return b"t"
+    if v is False:
+        return b"f"
+    if isinstance(v, int):
+        return b"i" + _I64.pack(v)
+    if isinstance(v, float):
+        return b"d" + _F64.pack(v)
+    return b"s" + _pack_str(str(v))
+
+
+class _Buf:
+    """Cursore di lettura su bytes."""
+    __slots__ = ("data", "pos")
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+
+    def take(self, st: struct.Struct) -> tuple:
+        out = st.unpack_from(self.data, self.pos)
+        self.pos += st.size
+        return out
+
+    def str(self) -> str:
+        (n,) = self.take(_U16)
+        s = self.data[self.pos:self.pos + n].decode("utf-8")
+        self.pos += n
+        return s
+
+    def value(self) -> Any:
+        tag = self.data[self.pos:self.pos + 1]
+        self.pos += 1
+        if tag == b"n":
+            return None
+        if tag == b"t":
+            return True
+        if tag == b"f":
+            return False
+        if tag == b"i":
+            return self.take(_I64)[0]
+        if tag == b"d":
+            return self.take(_F64)[0]
+        return self.str()
+
+
+@dataclass(frozen=True)
+class SessionEvent:
+    """Evento registrato: t in secondi dall'inizio della sessione."""
+    t: float
+    kind: str
+    name: str = ""
+    value: Any = None
+
+
+# ---------------------------------------------------------------------------
+# Registrazione
+# ---------------------------------------------------------------------------
+class SessionWriter:
+    """Scrittore del file di sessione (thread-safe)."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._f = open(self.path, "wb", buffering=1 << 16)
+        self._lock = threading.Lock()
+        self._names: Dict[str, int] = {}
+        self._t0 = time.monotonic()
+        self._f.write(MAGIC + _F64.pack(time.time()))
+        self.records = 0
+
+    def now(self) -> float:
+        return time.monotonic() - self._t0
+
+    def _name_id(self, name: str, t: float) -> int:
+        nid = self._names.get(name)
+        if nid is None:
+            nid = len(self._names)
+            if nid > 0xFF:
+                raise ValueError("Troppi nomi distinti nella sessione")
+            self._names[name] = nid
+            self._f.write(_REC.pack(t, K_NAME) + bytes((nid,)) + _pack_str(name))
+        return nid
+
+    def write(self, kind: int, name: str = "", payload: bytes = b""):
+        with self._lock:
+            if self._f.closed:
+                return
+            t = self.now()
+            head = _REC.pack(t, kind)
+            if kind in (K_INPUT, K_COMMAND):
+                head += bytes((self._name_id(name, t),))
+            self._f.write(head + payload)
+            self.records += 1
+
+    def flush(self):
+        with self._lock:
+            if not self._f.closed:
+                self._f.flush()
+
+    def close(self):
+        with self._lock:
+            if not self._f.closed:
+                self._f.close()
+
+
+class RecordingMachine:
+    """
+    Wrapper MachineIO che registra la sessione.
+
+    Inoltra tutto alla macchina reale; gli attributi non previsti
+    dall'interfaccia passano invariati (__getattr__).
+    """
+
+    def __init__(self, raw: Any, path: Union[str, Path]):
+        self._raw = raw
+        self.writer = SessionWriter(path)
+        self._last_pos: Optional[float] = None
+        self._last_moving: Optional[bool] = None
+        self._last_inputs: Dict[str, bool] = {}
+        self._last_state: Dict[str, Any] = {}
+
+    def __getattr__(self, name: str):
+        return getattr(self._raw, name)
+
+    def __setattr__(self, name: str, value: Any):
+        # Flag impostati dalle pagine (es. machine_homed) vanno alla macchina
+        if name.startswith("_") or name == "writer":
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._raw, name, value)
+
+    def _command(self, name: str, args: tuple, result: Any):
+        payload = _pack_value(result) + bytes((len(args),)) + b"".join(_pack_value(a) for a in args)
+        self.writer.write(K_COMMAND, name, payload)
+        return result
+
+    def mark(self, label: str):
+        """Inserisce un marcatore (es. inizio turno, cambio ordine)."""
+        self.writer.write(K_MARK, payload=_pack_str(label))
+
+    # ---- campioni ----
+    def get_position(self) -> Optional[float]:
+        pos = self._raw.get_position()
+        if pos != self._last_pos:
+            self._last_pos = pos
+            self.writer.write(K_POSITION, payload=_F64.pack(float("nan") if pos is None else float(pos)))
+        return pos
+
+    def is_positioning_active(self) -> bool:
+        moving = bool(self._raw.is_positioning_active())
+        if moving != self._last_moving:
+            self._last_moving = moving
+            self.writer.write(K_MOVING, payload=bytes((moving,)))
+        return moving
+
+    def get_input(self, name: str) -> bool:
+        value = bool(self._raw.get_input(name))
+        if self._last_inputs.get(name) != value:
+            self._last_inputs[name] = value
+            self.writer.write(K_INPUT, name, bytes((value,)))
+        return value
+
+    def get_state(self) -> Dict[str, Any]:
+        state = self._raw.get_state()
+        diff = {k: v for k, v in state.items()
+                if self._last_state.get(k, _MISSING) != v and _jsonable(v)}
+        if diff:
+            self._last_state.update(diff)
+            blob = json.dumps(diff, separators=(",", ":"), default=str).encode("utf-8")
+            self.writer.write(K_STATE, payload=_U32.pack(len(blob)) + blob)
+        return state
+
+    # ---- comandi ----
+    def command_move(self, length_mm: float, ang_sx: float = 0.0, ang_dx: float = 0.0,
+                     profile: str = "", element: str = "") -> bool:
+        res = self._raw.command_move(length_mm, ang_sx, ang_dx, profile, element)
+        return self._command("command_move", (float(length_mm), float(ang_sx), float(ang_dx), profile, element), res)
+
+    def command_lock_brake(self) -> bool:
+        return self._command("command_lock_brake", (), self._raw.command_lock_brake())
+
+    def command_release_brake(self) -> bool:
+        return self._command("command_release_brake", (), self._raw.command_release_brake())
+
+    def command_set_clutch(self, active: bool) -> bool:
+        return self._command("command_set_clutch", (bool(active),), self._raw.command_set_clutch(active))
+
+    def command_set_head_angles(self, sx: float, dx: float) -> bool:
+        return self._command("command_set_head_angles", (float(sx), float(dx)),
+                             self._raw.command_set_head_angles(sx, dx))
+
+    def command_set_morse(self, left_locked: bool, right_locked: bool) -> bool:
+        return self._command("command_set_morse", (bool(left_locked), bool(right_locked)),
+                             self._raw.command_set_morse(left_locked, right_locked))
+
+    def command_set_blade_inhibit(self, left: Optional[bool] = None, right: Optional[bool] = None) -> bool:
+        return self._command("command_set_blade_inhibit", (left, right),
+                             self._raw.command_set_blade_inhibit(left, right))
+
+    def command_sim_cut_pulse(self) -> None:
+        self._raw.command_sim_cut_pulse()
+        self._command("command_sim_cut_pulse", (), None)
+
+    def command_sim_start_pulse(self) -> None:
+        self._raw.command_sim_start_pulse()
+        self._command("command_sim_start_pulse", (), None)
+
+    def command_sim_dx_blade_out(self, on: bool) -> None:
+        self._raw.command_sim_dx_blade_out(on)
+        self._command("command_sim_dx_blade_out", (bool(on),), None)
+
+    def set_mode_context(self, mode: str, piece_length_mm: float = 0.0, bar_length_mm: float = 6500.0):
+        if hasattr(self._raw, "set_mode_context"):
+            self._raw.set_mode_context(mode, piece_length_mm, bar_length_mm)
+        self._command("set_mode_context", (str(mode), float(piece_length_mm), float(bar_length_mm)), None)
+
+    def do_homing(self, callback: Optional[Callable[..., None]] = None) -> None:
+        def done(success: bool = False, msg: str = "", **kw):
+            self.writer.write(K_HOMING, payload=bytes((bool(success),)) + _pack_str(str(msg)))
+            if callback:
+                callback(success=success, msg=msg, **kw)
+        self._command("do_homing", (), None)
+        self._raw.do_homing(callback=done)
+
+    def reset(self):
+        if hasattr(self._raw, "reset"):
+            self._raw.reset()
+        self._command("reset", (), None)
+
+    def tick(self) -> None:
+        self._raw.tick()
+
+    def close(self) -> None:
+        try:
+            self._raw.close()
+        finally:
+            self.writer.close()
+
+
+_MISSING = object()
+
+
+def _jsonable(v: Any) -> bool:
+    return isinstance(v, (bool, int, float, str, type(None)))
+
+
+# ---------------------------------------------------------------------------
+# Lettura
+# ---------------------------------------------------------------------------
+def iter_session(path: Union[str, Path]) -> Iterator[SessionEvent]:
+    """Itera gli eventi di un file di sessione (record troncati in coda ignorati)."""
+    data = Path(path).read_bytes()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path}: non è un file di sessione")
+    buf = _Buf(data)
+    buf.pos = len(MAGIC) + _F64.size
+    names: Dict[int, str] = {}
+    try:
+        while buf.pos < len(data):
+            t, kind = buf.take(_REC)
+            if kind == K_NAME:
+                nid = buf.data[buf.pos]
+                buf.pos += 1
+                names[nid] = buf.str()
+            elif kind == K_POSITION:
+                (v,) = buf.take(_F64)
+                yield SessionEvent(t, "position", value=None if v != v else v)
+            elif kind == K_MOVING:
+                v = bool(buf.data[buf.pos])
+                buf.pos += 1
+                yield SessionEvent(t, "moving", value=v)
+            elif kind == K_INPUT:
+                nid, v = buf.data[buf.pos], bool(buf.data[buf.pos + 1])
+                buf.pos += 2
+                yield SessionEvent(t, "input", names.get(nid, str(nid)), v)
+            elif kind == K_COMMAND:
+                nid = buf.data[buf.pos]
+                buf.pos += 1
+                result = buf.value()
+                nargs = buf.data[buf.pos]
+                buf.pos += 1
+                args = tuple(buf.value() for _ in range(nargs))
+                yield SessionEvent(t, "command", names.get(nid, str(nid)), (args, result))
+            elif kind == K_STATE:
+                (n,) = buf.take(_U32)
+                blob = buf.data[buf.pos:buf.pos + n]
+                if len(blob) < n:
+                    return
+                buf.pos += n
+                yield SessionEvent(t, "state", value=json.loads(blob.decode("utf-8")))
+            elif kind == K_HOMING:
+                success = bool(buf.data[buf.pos])
+                buf.pos += 1
+                yield SessionEvent(t, "homing", value=(success, buf.str()))
+            elif kind == K_MARK:
+                yield SessionEvent(t, "mark", value=buf.str())
+            else:
+                raise ValueError(f"Tipo record sconosciuto {kind} @ {buf.pos}")
+    except (struct.error, IndexError, UnicodeDecodeError):
+        return  # sessione interrotta a metà record
+
+
+def read_session(path: Union[str, Path]) -> List[SessionEvent]:
+    """Legge tutti gli eventi di un file di sessione."""
+    return list(iter_session(path))
+
+
+# ---------------------------------------------------------------------------
+# Riproduzione
+# ---------------------------------------------------------------------------
+class _Channel:
+    """Serie temporale a gradini (ultimo valore con t <= now)."""
+    __slots__ = ("times", "values", "default")
+
+    def __init__(self, default: Any = None):
+        self.times: List[float] = []
+        self.values: List[Any] = []
+        self.default = default
+
+    def add(self, t: float, v: Any):
+        self.times.append(t)
+        self.values.append(v)
+
+    def at(self, t: float) -> Any:
+        i = bisect.bisect_right(self.times, t)
+        return self.values[i - 1] if i else self.default
+
+
+class ReplayMachine:
+    """
+    MachineIO che riproduce una sessione registrata.
+
+    Le letture (posizione, movimento, ingressi, stato) restituiscono i valori
+    registrati al tempo di replay; i comandi ricevuti sono raccolti in
+    `issued` con il loro timestamp, per misurare le latenze della logica.
+    """
+
+    def __init__(self, path: Union[str, Path], speed: float = 1.0, clock=None):
+        self.events = read_session(path)
+        self.clock = clock or RealTimeClock(speed)
+        self._t0 = self.clock.now()
+        self.duration_s = self.events[-1].t if self.events else 0.0
+        self.issued: List[Tuple[float, str, tuple]] = []
+
+        self._position = _Channel()
+        self._moving = _Channel(False)
+        self._inputs: Dict[str, _Channel] = {}
+        self._states: List[Tuple[float, Dict[str, Any]]] = []
+        self._homings: List[Tuple[float, bool, str]] = []
+        for ev in self.events:
+            if ev.kind == "position":
+                self._position.add(ev.t, ev.value)
+            elif ev.kind == "moving":
+                self._moving.add(ev.t, ev.value)
+            elif ev.kind == "input":
+                self._inputs.setdefault(ev.name, _Channel(False)).add(ev.t, ev.value)
+            elif ev.kind == "state":
+                self._states.append((ev.t, ev.value))
+            elif ev.kind == "homing":
+                self._homings.append((ev.t, ev.value[0], ev.value[1]))
+
+        self._state: Dict[str, Any] = {}
+        self._state_idx = 0
+        self._homing_callback: Optional[Callable[..., None]] = None
+        self._homing_idx = 0
+
+    def now(self) -> float:
+        """Tempo di replay (secondi dall'inizio della registrazione)."""
+        return self.clock.now() - self._t0
+
+    @property
+    def finished(self) -> bool:
+        return self.now() >= self.duration_s
+
+    def _issue(self, name: str, *args) -> bool:
+        self.issued.append((self.now(), name, args))
+        return True
+
+    # ---- letture ----
+    def get_position(self) -> Optional[float]:
+        return self._position.at(self.now())
+
+    def is_positioning_active(self) -> bool:
+        return bool(self._moving.at(self.now()))
+
+    def get_input(self, name: str) -> bool:
+        ch = self._inputs.get(name)
+        return bool(ch.at(self.now())) if ch else False
+
+    def get_state(self) -> Dict[str, Any]:
+        now = self.now()
+        while self._state_idx < len(self._states) and self._states[self._state_idx][0] <= now:
+            self._state.update(self._states[self._state_idx][1])
+            self._state_idx += 1
+        return dict(self._state)
+
+    # ---- comandi ----
+    def command_move(self, length_mm: float, ang_sx: float = 0.0, ang_dx: float = 0.0,
+                     profile: str = "", element: str = "") -> bool:
+        return self._issue("command_move", float(length_mm), float(ang_sx), float(ang_dx), profile, element)
+
+    def command_lock_brake(self) -> bool:
+        return self._issue("command_lock_brake")
+
+    def command_release_brake(self) -> bool:
+        return self._issue("command_release_brake")
+
+    def command_set_clutch(self, active: bool) -> bool:
+        return self._issue("command_set_clutch", bool(active))
+
+    def command_set_head_angles(self, sx: float, dx: float) -> bool:
+        return self._issue("command_set_head_angles", float(sx), float(dx))
+
+    def command_set_morse(self, left_locked: bool, right_locked: bool) -> bool:
+        return self._issue("command_set_morse", bool(left_locked), bool(right_locked))
+
+    def command_set_blade_inhibit(self, left: Optional[bool] = None, right: Optional[bool] = None) -> bool:
+        return self._issue("command_set_blade_inhibit", left, right)
+
+    def command_sim_cut_pulse(self) -> None:
+        self._issue("command_sim_cut_pulse")
+
+    def command_sim_start_pulse(self) -> None:
+        self._issue("command_sim_start_pulse")
+
+    def command_sim_dx_blade_out(self, on: bool) -> None:
+        self._issue("command_sim_dx_blade_out", bool(on))
+
+    def set_mode_context(self, mode: str, piece_length_mm: float = 0.0, bar_length_mm: float = 6500.0):
+        self._issue("set_mode_context", str(mode), float(piece_length_mm), float(bar_length_mm))
+
+    def do_homing(self, callback: Optional[Callable[..., None]] = None) -> None:
+        self._issue("do_homing")
+        self._homing_callback = callback
+        now = self.now()
+        # Esito: il primo homing registrato dopo l'istante attuale
+        while self._homing_idx < len(self._homings) and self._homings[self._homing_idx][0] < now:
+            self._homing_idx += 1
+
+    def reset(self):
+        self._issue("reset")
+
+    def tick(self) -> None:
+        cb = self._homing_callback
+        if cb and self._homing_idx < len(self._homings):
+            t, success, msg = self._homings[self._homing_idx]
+            if t <= self.now():
+                self._homing_callback = None
+                self._homing_idx += 1
+                cb(success=success, msg=msg)
+
+    def close(self) -> None:
+        self._homing_callback = None
+
+    # ---- analisi ----
+    def latency_report(self, triggers: Optional[Sequence[Tuple[float, str]]] = None) -> Dict[str, Any]:
+        """
+        Latenze tra gli eventi registrati e i comandi emessi durante il replay.
+
+        Args:
+            triggers: (t, etichetta) dei trigger; default: fronti registrati
+        """
+        if triggers is None:
+            triggers = session_triggers(self.events)
+        return reaction_latencies(triggers, [(t, name) for t, name, _a in self.issued])
+
+
+def session_triggers(events: Sequence[SessionEvent]) -> List[Tuple[float, str]]:
+    """
+    Eventi a cui la logica di ciclo deve reagire: fronti di salita degli
+    ingressi e fine posizionamento.
+    """
+    out = []
+    for ev in events:
+        if ev.kind == "input" and ev.value:
+            out.append((ev.t, f"{ev.name}↑"))
+        elif ev.kind == "moving" and not ev.value:
+            out.append((ev.t, "move_done"))
+    return out
+
+
+def reaction_latencies(triggers: Sequence[Tuple[float, str]],
+                       commands: Sequence[Tuple[float, str]]) -> Dict[str, Any]:
+    """
+    Per ogni trigger, tempo fino al primo comando successivo.
+
+    Returns:
+        {etichetta: {"count", "mean_ms", "p50_ms", "p95_ms", "max_ms", "first_command"}}
+    """
+    cmd_times = [t for t, _n in commands]
+    per_label: Dict[str, List[Tuple[float, str]]] = {}
+    for t, label in triggers:
+        i = bisect.bisect_left(cmd_times, t)
+        if i < len(commands):
+            per_label.setdefault(label, []).append((cmd_times[i] - t, commands[i][1]))
+    report = {}
+    for label, items in per_label.items():
+        lat = sorted(d for d, _c in items)
+        first = {}
+        for _d, c in items:
+            first[c] = first.get(c, 0) + 1
+        report[label] = {
+            "count": len(lat),
+            "mean_ms": 1000.0 * sum(lat) / len(lat),
+            "p50_ms": 1000.0 * lat[len(lat) // 2],
+            "p95_ms": 1000.0 * lat[min(len(lat) - 1, int(0.95 * len(lat)))],
+            "max_ms": 1000.0 * lat[-1],
+            "first_command": first,
+        }
+    return report
+
+
+def session_summary(events: Sequence[SessionEvent]) -> Dict[str, Any]:
+    """Riepilogo di una sessione: durata, conteggi e latenze registrate."""
+    counts: Dict[str, int] = {}
+    commands: List[Tuple[float, str]] = []
+    for ev in events:
+        key = f"{ev.kind}:{ev.name}" if ev.name else ev.kind
+        counts[key] = counts.get(key, 0) + 1
+        if ev.kind == "command":
+            commands.append((ev.t, ev.name))
+    return {
+        "duration_s": events[-1].t if events else 0.0,
+        "events": len(events),
+        "counts": counts,
+        "latency": reaction_latencies(session_triggers(events), commands),
+    }
+
+
+__all__ = [
+    "RecordingMachine", "ReplayMachine", "SessionWriter", "SessionEvent",
+    "read_session", "iter_session", "session_triggers", "reaction_latencies", "session_summary",
+]
@@ -0,0 +1,242 @@
+"""
+Modello dinamico del carro per la simulazione.
+
+Fornisce:
+- SimDynamics: parametri fisici (massa, attriti, motore, ritardi freno/frizione, encoder)
+- CarriageModel: integrazione a passo fisso del carro con servo di posizione
+  (traiettoria + feed-forward + PD), freno e frizione con ritardi di inserzione,
+  encoder quantizzato a mm_per_pulse
+- RealTimeClock / ManualClock: orologi iniettabili (tempo reale, accelerato o manuale)
+
+Il modello integra solo mentre qualcosa si muove o un attuatore sta commutando:
+le fasi ferme vengono saltate, così un ordine intero si simula in pochi secondi.
+"""
+from __future__ import annotations
+import math
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from ui_qt.hardware.trajectory import Trajectory, plan_trajectory
+
+
+class RealTimeClock:
+    """Orologio reale, eventualmente accelerato (speedup=100 → 100× il tempo reale)."""
+    realtime = True
+
+    def __init__(self, speedup: float = 1.0):
+        self.speedup = float(speedup)
+        self._t0 = time.monotonic()
+
+    def now(self) -> float:
+        return (time.monotonic() - self._t0) * self.speedup
+
+
+class ManualClock:
+    """Orologio avanzato esplicitamente (test e simulazioni headless)."""
+    realtime = False
+
+    def __init__(self, start_s: float = 0.0):
+        self._t = float(start_s)
+
+    def now(self) -> float:
+        return self._t
+
+    def advance(self, dt_s: float) -> float:
+        self._t += max(0.0, float(dt_s))
+        return self._t
+
+
+@dataclass
+class SimDynamics:
+    """Parametri fisici del carro simulato."""
+    mass_kg: float = 25.0
+    viscous_friction_n_s_m: float = 40.0      # attrito viscoso (N per m/s)
+    coulomb_friction_n: float = 30.0          # attrito radente/statico
+    motor_force_max_n: float = 600.0          # forza massima motore alla cinghia
+    max_speed_mm_s: float = 2000.0
+    acceleration_mm_s2: float = 5000.0
+    jerk_mm_s3: Optional[float] = None        # None = profilo trapezoidale
+    servo_bandwidth_hz: float = 10.0          # banda servo di posizione
+    servo_damping: float = 1.0
+    brake_engage_s: float = 0.08
+    brake_release_s: float = 0.12
+    clutch_engage_s: float = 0.10
+    clutch_release_s: float = 0.08
+    mm_per_pulse: float = 0.047125            # quantizzazione encoder
+    position_tolerance_mm: float = 0.5
+    settle_speed_mm_s: float = 5.0
+    homing_time_s: float = 0.6
+    timestep_s: float = 0.001
+
+
+class CarriageModel:
+    """
+    Carro con massa, attrito, motore con servo di posizione, freno e frizione.
+
+    Tutti i metodi ricevono il tempo simulato `now` (secondi) dall'orologio
+    del chiamante; le transizioni di freno/frizione hanno effetto dopo i
+    ritardi configurati.
+    """
+
+    def __init__(self, dynamics: SimDynamics, position_mm: float, now: float = 0.0):
+        self.dyn = dynamics
+        self.position_mm = float(position_mm)
+        self.velocity_mm_s = 0.0
+        self.brake_engaged = False
+        self.clutch_engaged = True
+        self._brake_cmd = False
+        self._clutch_cmd = True
+        self._brake_switch_at: Optional[float] = None
+        self._clutch_switch_at: Optional[float] = None
+        self._t = float(now)
+        self._trajectory: Optional[Trajectory] = None
+        self._traj_t0 = 0.0
+        self.target_mm: Optional[float] = None
+        self.moving = False
+        self.move_started_at: Optional[float] = None
+        self.last_move_time_s: Optional[float] = None
+
+    # ---------- comandi ----------
+    def set_brake(self, engaged: bool, now: float):
+        self.advance(now)
+        engaged = bool(engaged)
+        if engaged == self._brake_cmd:
+            return
+        self._brake_cmd = engaged
+        delay = self.dyn.brake_engage_s if engaged else self.dyn.brake_release_s
+        self._brake_switch_at = now + delay
+
+    def set_clutch(self, engaged: bool, now: float):
+        self.advance(now)
+        engaged = bool(engaged)
+        if engaged == self._clutch_cmd:
+            return
+        self._clutch_cmd = engaged
+        delay = self.dyn.clutch_engage_s if engaged else self.dyn.clutch_release_s
+        self._clutch_switch_at = now + delay
+
+    def command_move(self, target_mm: float, now: float):
+        """
+        Avvia un posizionamento: rilascia il freno, inserisce la frizione e
+        parte con la traiettoria quando entrambi hanno commutato.
+        """
+        self.set_brake(False, now)
+        self.set_clutch(True, now)
+        start_at = max(now, self._brake_switch_at or now, self._clutch_switch_at or now)
+        self._trajectory = plan_trajectory(
+            self.position_mm, float(target_mm),
+            self.dyn.max_speed_mm_s, self.dyn.acceleration_mm_s2, self.dyn.jerk_mm_s3
+        )
+        self._traj_t0 = start_at
+        self.target_mm = float(target_mm)
+        self.moving = True
+        self.move_started_at = now
+
+    def stop(self, now: float):
+        self.advance(now)
+        self._trajectory = None
+        self.moving = False
+
+    def reset_position(self, position_mm: float, now: float):
+        """Homing: azzera posizione e velocità."""
+        self.advance(now)
+        self.position_mm = float(position_mm)
+        self.velocity_mm_s = 0.0
+        self._trajectory = None
+        self.target_mm = float(position_mm)
+        self.moving = False
+
+    # ---------- lettura ----------
+    def encoder_position_mm(self) -> float:
+        q = self.dyn.mm_per_pulse
+        if q <= 0:
+            return self.position_mm
+        return round(self.position_mm / q) * q
+
+    def predict_move_time(self, target_mm: float) -> float:
+        """Durata prevista di un posizionamento (traiettoria + commutazione freno)."""
+        traj = plan_trajectory(self.position_mm, float(target_mm), self.dyn.max_speed_mm_s,
+                               self.dyn.acceleration_mm_s2, self.dyn.jerk_mm_s3)
+        return traj.duration_s + (self.dyn.brake_release_s if self._brake_cmd else 0.0)
+
+    # ---------- integrazione ----------
+    def _is_active(self) -> bool:
+        return (
+            self.moving
+            or abs(self.velocity_mm_s) > 1e-9
+            or self._brake_switch_at is not None
+            or self._clutch_switch_at is not None
+        )
+
+    def advance(self, now: float):
+        """Integra il modello fino al tempo simulato `now`."""
+        if now <= self._t:
+            return
+        if not self._is_active():
+            self._t = now
+            return
+        h_max = self.dyn.timestep_s
+        while self._t < now:
+            if not self._is_active():
+                self._t = now
+                break
+            h = min(h_max, now - self._t)
+            self._step(self._t, h)
+            self._t += h
+
+    def _step(self, t: float, h: float):
+        dyn = self.dyn
+        # Attuatori con ritardo
+        if self._brake_switch_at is not None and t >= self._brake_switch_at:
+            self.brake_engaged = self._brake_cmd
+            self._brake_switch_at = None
+        if self._clutch_switch_at is not None and t >= self._clutch_switch_at:
+            self.clutch_engaged = self._clutch_cmd
+            self._clutch_switch_at = None
+
+        if self.brake_engaged:
+            self.velocity_mm_s = 0.0
+        else:
+            force = 0.0
+            traj = self._trajectory
+            if traj is not None and self.clutch_engaged and t >= self._traj_t0:
+                tr = t - self._traj_t0
+                p_ref, v_ref = traj.sample(tr)
+                _p2, v_next = traj.sample(tr + h)
+                a_ref = (v_next - v_ref) / h
+                w = 2.0 * math.pi * dyn.servo_bandwidth_hz
+                a_cmd = (a_ref + w * w * (p_ref - self.position_mm)
+                         + 2.0 * dyn.servo_damping * w * (v_ref - self.velocity_mm_s))
+                # Forza in N (mm → m), con compensazione attriti sul riferimento
+                force = (dyn.mass_kg * a_cmd / 1000.0
+                         + dyn.viscous_friction_n_s_m * v_ref / 1000.0
+                         + math.copysign(dyn.coulomb_friction_n, v_ref) * (v_ref != 0.0))
+                force = max(-dyn.motor_force_max_n, min(dyn.motor_force_max_n, force))
+
+            v = self.velocity_mm_s
+            if v == 0.0 and abs(force) <= dyn.coulomb_friction_n:
+                net = 0.0  # attrito statico trattiene il carro
+            else:
+                direction = v if v != 0.0 else force
+                net = (force - dyn.viscous_friction_n_s_m * v / 1000.0
+                       - math.copysign(dyn.coulomb_friction_n, direction))
+            v_new = v + 1000.0 * net / dyn.mass_kg * h
+            if v != 0.0 and (v_new > 0) != (v > 0) and abs(force) <= dyn.coulomb_friction_n:
+                v_new = 0.0  # l'attrito ferma il carro, non lo inverte
+            self.velocity_mm_s = v_new
+            self.position_mm += v_new * h
+
+        # Arrivo in quota
+        if self.moving and self._trajectory is not None:
+            done_at = self._traj_t0 + self._trajectory.duration_s
+            if (t + h >= done_at
+                    and abs(self.target_mm - self.position_mm) <= dyn.position_tolerance_mm
+                    and abs(self.velocity_mm_s) <= dyn.settle_speed_mm_s):
+                self.moving = False
+                self._trajectory = None
+                if self.move_started_at is not None:
+                    self.last_move_time_s = t + h - self.move_started_at
+
+
+__all__ = ["SimDynamics", "CarriageModel", "RealTimeClock", "ManualClock"]
@@ -1,34 +1,48 @@
 from __future__ import annotations
+import threading
 import time
 from typing import Optional, Dict, Any, Callable
 
 from ui_qt.machine.interfaces import MachineIO
+from ui_qt.machine.sim_dynamics import CarriageModel, ManualClock, RealTimeClock, SimDynamics
+
+# Ingressi impulsivi: restano attivi fino al tick successivo alla lettura.
+# dx_blade_out è un livello (lama DX fuori) e resta finché non viene cambiato.
+_PULSE_INPUTS = ("blade_pulse", "start_pressed")
 
 
 class SimulationMachine(MachineIO):
     """
     Macchina simulata per test senza hardware reale.
+
+    Il carro segue un modello fisico (massa, attriti, motore con servo di
+    posizione, ritardi di freno e frizione, encoder quantizzato). Il tempo
+    viene da un orologio iniettabile: RealTimeClock (anche accelerato,
+    es. speedup=100) per la GUI, ManualClock per test e simulazioni headless.
     """
 
     def __init__(
         self,
         min_distance: float = 250.0,
         max_cut_length: float = 4000.0,
-        speed_mm_s: float = 2000.0
+        speed_mm_s: float = 2000.0,
+        dynamics: Optional[SimDynamics] = None,
+        clock=None
     ):
         self.min_distance = min_distance
         self.max_cut_length = max_cut_length
         self.speed_mm_s = speed_mm_s
 
-        self. encoder_position = min_distance
+        self.dynamics = dynamics or SimDynamics(max_speed_mm_s=speed_mm_s)
+        self.clock = clock or RealTimeClock()
+        self._lock = threading.RLock()
+        self._carriage = CarriageModel(self.dynamics, min_distance, self.clock.now())
+
         self._target:  Optional[float] = None
-        self._moving = False
 
         self.left_head_angle = 0.0
         self.right_head_angle = 0.0
 
-        self. brake_active = False
-        self. clutch_active = True
         self.left_morse_locked = False
         self.right_morse_locked = False
         self.left_blade_inhibit = False
@@ -37,6 +51,8 @@ class SimulationMachine(MachineIO):
         self.machine_homed = False
         self.emergency_active = False
         self.homing_in_progress = False
+        self._homing_done_at: Optional[float] = None
+        self._homing_callback: Optional[Callable[..., None]] = None
 
         # Tracking modalità per controllo morse
         self._software_morse_control_enabled = False
@@ -49,17 +65,73 @@ class SimulationMachine(MachineIO):
             "start_pressed":  False,
             "dx_blade_out": False
         }
-
-        self._last_tick = time.time()
+        self._pulses_seen: set = set()
+
+    # ---------- stato comandato / effettivo ----------
+    @property
+    def brake_active(self) -> bool:
+        """Freno comandato (lo stato effettivo segue dopo il ritardo)."""
+        return self._carriage._brake_cmd
+
+    @brake_active.setter
+    def brake_active(self, value: bool):
+        self._carriage.set_brake(bool(value), self.clock.now())
+
+    @property
+    def clutch_active(self) -> bool:
+        """Frizione comandata (lo stato effettivo segue dopo il ritardo)."""
+        return self._carriage._clutch_cmd
+
+    @clutch_active.setter
+    def clutch_active(self, value: bool):
+        self._carriage.set_clutch(bool(value), self.clock.now())
+
+    @property
+    def encoder_position(self) -> float:
+        """Posizione letta dall'encoder (quantizzata a mm_per_pulse)."""
+        return self._carriage.encoder_position_mm()
+
+    @property
+    def _moving(self) -> bool:
+        return self._carriage.moving
+
+    def _advance(self):
+        """Porta il modello al tempo corrente dell'orologio e completa l'homing."""
+        callback = None
+        with self._lock:
+            now = self.clock.now()
+            self._carriage.advance(now)
+            if self.homing_in_progress and self._homing_done_at is not None and now >= self._homing_done_at:
+                self._carriage.reset_position(self.min_distance, now)
+                self._carriage.set_brake(False, now)
+                self._carriage.set_clutch(True, now)
+                self._target = self.min_distance
+                self.machine_homed = True
+                self.homing_in_progress = False
+                self._homing_done_at = None
+                callback, self._homing_callback = self._homing_callback, None
+        if callback:
+            callback(success=True, msg="HOMING OK")
 
     def get_position(self) -> Optional[float]:
+        self._advance()
         return self.encoder_position
 
     def is_positioning_active(self) -> bool:
+        self._advance()
         return self._moving
 
+    def predict_move_time(self, length_mm: float) -> Optional[float]:
+        """Tempo previsto di posizionamento in secondi."""
+        target = max(self.min_distance, min(float(length_mm), self.max_cut_length))
+        with self._lock:
+            return self._carriage.predict_move_time(target)
+
     def get_input(self, name: str) -> bool:
-        return bool(self._inputs. get(name, False))
+        value = bool(self._inputs.get(name, False))
+        if value and name in _PULSE_INPUTS:
+            self._pulses_seen.add(name)
+        return value
 
     def command_move(
         self,
@@ -71,24 +143,28 @@ class SimulationMachine(MachineIO):
     ) -> bool:
         if self.emergency_active or not self.machine_homed or self.homing_in_progress:
             return False
-        self._target = max(self.min_distance, min(float(length_mm), self.max_cut_length))
-        self._moving = True
-        self. left_head_angle = float(ang_sx)
-        self.right_head_angle = float(ang_dx)
-        self.brake_active = False
+        with self._lock:
+            self._target = max(self.min_distance, min(float(length_mm), self.max_cut_length))
+            self.left_head_angle = float(ang_sx)
+            self.right_head_angle = float(ang_dx)
+            # Il posizionamento rilascia il freno e inserisce la frizione
+            self._carriage.command_move(self._target, self.clock.now())
         return True
 
     def command_lock_brake(self) -> bool:
-        self.brake_active = True
+        with self._lock:
+            self.brake_active = True
         return True
 
     def command_release_brake(self) -> bool:
-        self.brake_active = False
+        with self._lock:
+            self.brake_active = False
         return True
 
     def command_set_clutch(self, active: bool) -> bool:
-        """Controlla frizione (simulata)."""
-        self.clutch_active = bool(active)
+        """Controlla frizione (simulata, con ritardo di inserzione)."""
+        with self._lock:
+            self.clutch_active = bool(active)
         return True
 
     def command_set_head_angles(self, sx:  float, dx: float) -> bool:
@@ -149,52 +225,78 @@ class SimulationMachine(MachineIO):
         self._inputs["dx_blade_out"] = bool(on)
 
     def do_homing(self, callback: Optional[Callable[..., None]] = None) -> None:
-        import threading, time
-        def seq():
-            if self.emergency_active:
-                if callback: callback(success=False, msg="EMERGENZA")
-                return
+        if self.emergency_active:
+            if callback: callback(success=False, msg="EMERGENZA")
+            return
+        with self._lock:
+            now = self.clock.now()
+            self._carriage.stop(now)
             self.homing_in_progress = True
-            self._moving = False
-            time.sleep(0.6)
-            self. encoder_position = self.min_distance
-            self._target = self. min_distance
-            self. brake_active = False
-            self. clutch_active = True
-            self.machine_homed = True
-            self.homing_in_progress = False
-            if callback: callback(success=True, msg="HOMING OK")
-        threading.Thread(target=seq, daemon=True).start()
+            self._homing_done_at = now + self.dynamics.homing_time_s
+            self._homing_callback = callback
+        if getattr(self.clock, "realtime", False):
+            # Con orologio reale l'homing si completa anche se nessuno chiama tick()
+            wait_s = self.dynamics.homing_time_s / max(self.clock.speedup, 1e-6)
+            def seq():
+                time.sleep(wait_s)
+                self._advance()
+            threading.Thread(target=seq, daemon=True).start()
 
     def tick(self) -> None:
-        now = time.time()
-        dt = now - self._last_tick
-        self._last_tick = now
-
-        if self._moving and self._target is not None:
-            dist = self._target - self.encoder_position
-            if abs(dist) < 1.0:
-                self.encoder_position = self._target
-                self._moving = False
+        self._advance()
+        # Gli impulsi già letti si azzerano; quelli non ancora letti restano
+        # disponibili per un tick (nessun impulso perso tra due letture).
+        for key in _PULSE_INPUTS:
+            if key in self._pulses_seen or not self._inputs.get(key):
+                self._inputs[key] = False
             else:
-                step = self.speed_mm_s * dt
-                if dist > 0:
-                    self.encoder_position += min(step, dist)
-                else:
-                    self.encoder_position += max(-step, dist)
-
-        for key in list(self._inputs.keys()):
-            self._inputs[key] = False
+                self._pulses_seen.add(key)
+        self._pulses_seen.difference_update(k for k in _PULSE_INPUTS if not self._inputs[k])
+
+    def advance(self, seconds: float, step_s: float = 0.01) -> None:
+        """
+        Avanza il tempo simulato (solo con ManualClock), chiamando tick()
+        a ogni passo come farebbe il timer della GUI.
+        """
+        if not isinstance(self.clock, ManualClock):
+            raise TypeError("advance() richiede un ManualClock")
+        remaining = max(0.0, float(seconds))
+        while remaining > 1e-12:
+            dt = min(step_s, remaining)
+            self.clock.advance(dt)
+            self.tick()
+            remaining -= dt
+
+    def run_until_idle(self, timeout_s: float = 60.0, step_s: float = 0.01) -> bool:
+        """
+        Avanza il tempo simulato finché posizionamento e homing sono conclusi.
+
+        Returns:
+            True se la macchina è ferma entro timeout_s di tempo simulato
+        """
+        elapsed = 0.0
+        while self._moving or self.homing_in_progress:
+            if elapsed >= timeout_s:
+                return False
+            self.advance(step_s, step_s)
+            elapsed += step_s
+        return True
 
     def get_state(self) -> Dict[str, Any]:
+        self._advance()
         return {
             "homed":  self.machine_homed,
-            "position_mm": self. encoder_position,
+            "position_mm": self.encoder_position,
             "target_mm": self._target,
             "moving": self._moving,
             "homing_in_progress": self.homing_in_progress,
             "brake_active": self.brake_active,
             "clutch_active":  self.clutch_active,
+            "brake_engaged": self._carriage.brake_engaged,
+            "clutch_engaged": self._carriage.clutch_engaged,
+            "velocity_mm_s": self._carriage.velocity_mm_s,
+            "last_move_time_s": self._carriage.last_move_time_s,
+            "sim_time_s": self.clock.now(),
             "left_morse_locked": self.left_morse_locked,
             "right_morse_locked": self.right_morse_locked,
             "left_blade_inhibit": self.left_blade_inhibit,
@@ -205,11 +307,14 @@ class SimulationMachine(MachineIO):
         }
 
     def close(self) -> None:
-        self._moving = False
+        self._carriage.stop(self.clock.now())
 
     def reset(self):
-        self.machine_homed = False
-        self.homing_in_progress = False
-        self.encoder_position = self.min_distance
-        self. brake_active = False
-        self.emergency_active = False
+        with self._lock:
+            now = self.clock.now()
+            self.machine_homed = False
+            self.homing_in_progress = False
+            self._homing_done_at = None
+            self._carriage.reset_position(self.min_distance, now)
+            self._carriage.set_brake(False, now)
+            self.emergency_active = False
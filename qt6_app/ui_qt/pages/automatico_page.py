@@ -1,10 +1,10 @@
 from __future__ import annotations
 from typing import Optional, List, Dict, Any, Tuple
-from collections import defaultdict
+from collections import defaultdict, deque
 import time, contextlib, logging
 from math import tan, radians
 
-from PySide6.QtCore import Qt, QTimer, Signal
+from PySide6.QtCore import Qt, QTimer, Signal, QCoreApplication
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QFrame, QLabel, QPushButton,
     QTableWidget, QTableWidgetItem, QHeaderView,
@@ -32,9 +32,13 @@ from ui_qt.logic.refiner import (
 )
 
 from ui_qt.services.profiles_store import ProfilesStore
+from ui_qt.services.label_spooler import LabelSpooler
+from ui_qt.services.label_renderer import LabelRenderer, KEY_INFO as LABEL_KEY_INFO
 
 # Metro Digitale integration
 from ui_qt.services.metro_digitale_manager import get_metro_manager
+from ui_qt.utils import cycle_trace as trace
+from ui_qt.utils import metrics
 from datetime import datetime
 
 # Mode system imports
@@ -52,10 +56,12 @@ from ui_qt.logic.modes.ultra_short_handler import UltraShortConfig
 from ui_qt.logic.modes.extra_long_handler import ExtraLongConfig
 
 try:
-    from ui_qt.utils.settings import read_settings, write_settings
+    from ui_qt.utils.settings import read_settings, write_settings, get_float, settings_notifier
 except Exception:
     def read_settings() -> Dict[str, Any]: return {}
     def write_settings(_d: Dict[str, Any]) -> None: pass
+    def get_float(_k: str, default: float = 0.0) -> float: return default
+    settings_notifier = None
 
 try:
     from ui_qt.utils.label_templates_store import resolve_templates
@@ -85,6 +91,12 @@ except AttributeError:
 PANEL_W = 420
 DEBUG_LOG = False  # metti True per log transizioni
 
+_PIECES_CUT = metrics.counter("pieces_cut_total", "Pieces cut by mode (plan, manual)")
+_PIECES_PER_HOUR = metrics.gauge("pieces_per_hour", "Pieces cut in the last hour")
+_LABELS = metrics.counter("labels_total", "Label print attempts by result "
+                          "(printed, simulated, error, unavailable, dropped, failed)")
+_LABEL_PRINT_S = metrics.histogram("label_print_seconds", "Duration of LabelPrinter.print_label")
+
 STATE_IDLE = "idle"
 STATE_ARMING = "arming"
 STATE_MOVING = "moving"
@@ -224,13 +236,21 @@ class LabelPrinter:
         self.paper = str(settings.get("label_paper", "DK-11201"))
         self.rotate = int(settings.get("label_rotate", 0))
         self.preview_if_no_printer = True
-        self._ql = None; self._pil = None
+        self._ql = None; self._pil = None; self._renderer = None
+        self._libs_loaded = False
+
+    def _load_libs(self):
+        # brother_ql/PIL importati alla prima stampa: tengono lento l'avvio della pagina
+        if self._libs_loaded: return
+        self._libs_loaded = True
+        with contextlib.suppress(Exception):
+            from PIL import Image, ImageDraw, ImageFont
+            self._pil={"Image":Image,"ImageDraw":ImageDraw,"ImageFont":ImageFont}
+            self._renderer=LabelRenderer(self._pil)
         with contextlib.suppress(Exception):
             from brother_ql.raster import BrotherQLRaster
             from brother_ql.backends import backend_factory
-            from PIL import Image, ImageDraw, ImageFont
             self._ql={"BrotherQLRaster":BrotherQLRaster,"backend_factory":backend_factory}
-            self._pil={"Image":Image,"ImageDraw":ImageDraw,"ImageFont":ImageFont}
 
     def update_settings(self,s:Dict[str,Any]):
         self.enabled=bool(s.get("label_enabled",False))
@@ -244,47 +264,73 @@ class LabelPrinter:
     def print_label(self, lines: List[str], paper: Optional[str]=None,
                     rotate: Optional[int]=None, font_size: Optional[int]=None,
                     cut: Optional[bool]=None) -> bool:
+        """Stampa sincrona (prova etichetta); nel ciclo si passa da LabelSpooler."""
+        t0=time.perf_counter()
+        result=self._print_label(lines, paper, rotate, font_size, cut)
+        _LABEL_PRINT_S.observe(time.perf_counter()-t0)
+        _LABELS.inc(result=result)
+        return result in ("printed","simulated")
+
+    def _print_label(self, lines: List[str], paper: Optional[str],
+                     rotate: Optional[int], font_size: Optional[int],
+                     cut: Optional[bool]) -> str:
+        self._load_libs()
         if self._pil is None:
             if self.toast: self.toast("Pillow non disponibile per etichette.","warn")
-            return False
+            return "unavailable"
         try:
-            Image=self._pil["Image"]; ImageDraw=self._pil["ImageDraw"]; ImageFont=self._pil["ImageFont"]
-            use_paper=paper or self.paper; use_rotate=int(rotate if rotate is not None else self.rotate)
-            paper_map={"DK-11201":(29.0,90.0),"DK-11202":(62.0,100.0),"DK-11209":(62.0,29.0),"DK-22205":(62.0,100.0)}
-            w_mm,h_mm=paper_map.get(use_paper,(29.0,90.0))
-            W=int(round((w_mm/25.4)*300)); H=int(round((h_mm/25.4)*300))
-            img=Image.new("1",(W,H),1); draw=ImageDraw.Draw(img)
-            fs=int(font_size or 32)
-            with contextlib.suppress(Exception): font=ImageFont.truetype("arial.ttf",fs)
-            if 'font' not in locals(): font=ImageFont.load_default()
-            y=8
-            for line in lines:
-                draw.text((8,y),str(line),fill=0,font=font); y+=int(fs*1.2)
-            if use_rotate in (90,180,270):
-                with contextlib.suppress(Exception): img=img.rotate(use_rotate,expand=True)
-            if (not self.enabled) or (self._ql is None) or (not self.printer):
-                if self.preview_if_no_printer and self.toast:
-                    self.toast("Etichetta simulata (stampante non configurata).","info")
-                return True
-            from brother_ql.conversion import convert
-            BrotherQLRaster=self._ql["BrotherQLRaster"]; backend_factory=self._ql["backend_factory"]
+            img=self.render_label(lines, paper, rotate, font_size)
+            result=self.send_labels([img], paper, cut)
+            if result=="simulated" and self.preview_if_no_printer and self.toast:
+                self.toast("Etichetta simulata (stampante non configurata).","info")
+            return result
+        except Exception as e:
+            if self.toast: self.toast(f"Errore stampa: {e}","err")
+            return "error"
+
+    def render_label(self, lines: List[str], paper: Optional[str]=None,
+                     rotate: Optional[int]=None, font_size: Optional[int]=None):
+        """Immagine PIL dell'etichetta (nessun accesso alla stampante), dalla cache del renderer."""
+        self._load_libs()
+        if self._renderer is None:
+            raise RuntimeError("Pillow non disponibile per etichette")
+        use_rotate=int(rotate if rotate is not None else self.rotate)
+        return self._renderer.render(lines, paper or self.paper, use_rotate, int(font_size or 32))
+
+    def send_labels(self, images: List[Any], paper: Optional[str]=None, cut: Optional[bool]=None) -> str:
+        """
+        Invia una o più etichette in un solo lavoro brother_ql.
+        Ritorna "printed" o "simulated" (stampante non configurata); eccezione se fallisce.
+        """
+        self._load_libs()
+        if (not self.enabled) or (self._ql is None) or (not self.printer):
+            return "simulated"
+        from brother_ql.conversion import convert
+        BrotherQLRaster=self._ql["BrotherQLRaster"]; backend_factory=self._ql["backend_factory"]
+        use_paper=paper or self.paper; use_cut=bool(cut if cut is not None else True)
+        def build():
             qlr=BrotherQLRaster(self.model); qlr.exception_on_warning=False
-            instr=convert(qlr=qlr, images=[img], label=use_paper, threshold=70, dither=False,
-                          compress=True, red=False, rotate='0', dpi_600=False, hq=True,
-                          cut=bool(cut if cut is not None else True))
-            backend=backend_factory(self.backend); be=backend(printer_identifier=self.printer)
+            return convert(qlr=qlr, images=list(images), label=use_paper, threshold=70, dither=False,
+                           compress=True, red=False, rotate='0', dpi_600=False, hq=True, cut=use_cut)
+        keys=[getattr(img,"info",{}).get(LABEL_KEY_INFO) for img in images]
+        if self._renderer is not None and all(keys):
+            # stesse etichette già convertite (es. ristampa): istruzioni dalla cache
+            instr=self._renderer.instructions((self.model,use_paper,use_cut,tuple(keys)), build)
+        else:
+            instr=build()
+        backend=backend_factory(self.backend); be=backend(printer_identifier=self.printer)
+        try:
             be.write(instr)
+        finally:
             with contextlib.suppress(Exception):
                 be.dispose()
-            return True
-        except Exception as e:
-            if self.toast: self.toast(f"Errore stampa: {e}","err")
-            return False
+        return "printed"
 
 
 class AutomaticoPage(QWidget):
     activePieceChanged = Signal(dict)
     pieceCut = Signal(dict)
+    labelSpoolEvent = Signal(str, str)  # (livello, messaggio) dal thread dello spooler
 
     def __init__(self, appwin):
         super().__init__()
@@ -332,30 +378,40 @@ class AutomaticoPage(QWidget):
         # Stato dinamico
         self._brake_locked=False
         self._blade_prev=False
+        self._trace=trace.get_cycle_tracer()
+        self._traced_state=None
+        self._cut_times=deque()
+        self._step_pause_pending=False
         self._start_prev=False
 
         self._state=STATE_IDLE
         self._pending_active_piece=None
         self._piece_tagliato=False
 
-        # Config
+        # Config (riapplicata ad ogni cambio impostazioni, vedi _on_settings_changed)
         cfg=read_settings()
-        self._kerf_max_angle_deg=float(cfg.get("opt_kerf_max_angle_deg",60.0))
-        self._kerf_max_factor=float(cfg.get("opt_kerf_max_factor",2.0))
-        self._knap_cons_angle_deg=float(cfg.get("opt_knap_conservative_angle_deg",45.0))
-        self._ripasso_mm=float(cfg.get("opt_ripasso_mm",0.0))
-        self._warn_overflow_mm=float(cfg.get("opt_warn_overflow_mm",0.5))
-        self._auto_continue_enabled=bool(cfg.get("opt_auto_continue_enabled",False))
-        self._auto_continue_across_bars=bool(cfg.get("opt_auto_continue_across_bars",False))
-        self._strict_bar_sequence=bool(cfg.get("opt_strict_bar_sequence",True))
-        self._tail_refine_enabled=bool(cfg.get("opt_enable_tail_refine",True))
-        self._allow_skip_cut=bool(cfg.get("opt_allow_skip_cut",False))
+        self._apply_opt_settings(cfg)
         self._extshort_safe_mm=float(cfg.get("auto_extshort_safe_pos_mm",400.0)) if "auto_extshort_safe_pos_mm" in cfg else 400.0
         self._kerf_base_mm=float(cfg.get("opt_kerf_mm",3.0)) if "opt_kerf_mm" in cfg else 3.0
         self._after_cut_pause_ms=int(float(cfg.get("auto_after_cut_pause_ms",300))) if "auto_after_cut_pause_ms" in cfg else 300
 
         self._label_enabled=bool(cfg.get("label_enabled",False))
         self._label_printer=LabelPrinter(cfg, toast_cb=self._toast)
+        # Stampa nel thread dello spooler: il ciclo di taglio non aspetta la stampante
+        self.labelSpoolEvent.connect(lambda level,msg: self._toast(msg,level))
+        self._label_spooler=LabelSpooler(self._label_printer, self._orders.db_path,
+                                         max_pending=int(cfg.get("label_spool_max_pending",500)),
+                                         batch_max=int(cfg.get("label_spool_batch",10)),
+                                         max_attempts=int(cfg.get("label_spool_retries",5)),
+                                         on_event=self.labelSpoolEvent.emit)
+        # Il thread dello spooler è daemon: in uscita si svuota la coda e lo si
+        # ferma, altrimenti un'etichetta stampata ma non tolta da label_jobs
+        # verrebbe ristampata al riavvio
+        spooler=self._label_spooler
+        shutdown=lambda *_: spooler.shutdown(float(cfg.get("label_spool_shutdown_s",5.0)))
+        app=QCoreApplication.instance()
+        if app is not None: app.aboutToQuit.connect(shutdown)
+        self.destroyed.connect(shutdown)
 
         self._manual_current_piece=None
 
@@ -385,6 +441,10 @@ class AutomaticoPage(QWidget):
         self._poll=None
         self._build()
 
+        if settings_notifier is not None:
+            with contextlib.suppress(Exception):
+                settings_notifier().changed.connect(self._on_settings_changed)
+
     # ---- UI build ----
     def _build(self):
         root=QVBoxLayout(self); root.setContentsMargins(8,8,8,8); root.setSpacing(6)
@@ -835,6 +895,9 @@ class AutomaticoPage(QWidget):
     def _update_cycle_state_label(self):
         if self.lbl_cycle_state:
             self.lbl_cycle_state.setText(f"Stato ciclo: {self._state.upper()}")
+        if self._state!=self._traced_state:
+            self._traced_state=self._state
+            self._trace.emit(trace.STATE, state=self._state)
 
     def _log_state(self,msg:str):
         if DEBUG_LOG: logger.debug(f"[AUTO] {msg}")
@@ -874,6 +937,10 @@ class AutomaticoPage(QWidget):
         self._label_enabled=bool(on)
         cfg=dict(read_settings()); cfg["label_enabled"]=self._label_enabled
         write_settings(cfg); self._label_printer.update_settings(cfg)
+        if self._label_enabled:
+            # stampante sistemata e riattivata: ristampa quanto era fallito
+            n=self._label_spooler.retry_failed()
+            if n: self._toast(f"Ristampa di {n} etichette non stampate.","info")
 
     def _test_label(self):
         piece={"seq_id":999,"profile":"DEMO","element":"Test","len":1234.5,"ax":45.0,"ad":0.0}
@@ -896,11 +963,11 @@ class AutomaticoPage(QWidget):
             for raw in tmpl.get("lines",[]):
                 try: lines.append(str(raw).format(**fmt))
                 except Exception: lines.append(str(raw))
-            self._label_printer.print_label(lines,
-                                            paper=tmpl.get("paper"),
-                                            rotate=int(tmpl.get("rotate",0)),
-                                            font_size=int(tmpl.get("font_size",32)),
-                                            cut=bool(tmpl.get("cut",True)))
+            self._label_spooler.submit(lines,
+                                       paper=tmpl.get("paper"),
+                                       rotate=int(tmpl.get("rotate",0)),
+                                       font_size=int(tmpl.get("font_size",32)),
+                                       cut=bool(tmpl.get("cut",True)))
 
     # ---- Banner ----
     def _show_banner(self,msg:str,level:str="info"):
@@ -921,19 +988,34 @@ class AutomaticoPage(QWidget):
         dlg = OptimizationConfigDialog(self)
         if dlg.exec():
             self._toast("Configurazione aggiornata.","ok")
-            cfg=read_settings()
-            self._kerf_max_angle_deg=float(cfg.get("opt_kerf_max_angle_deg",60.0))
-            self._kerf_max_factor=float(cfg.get("opt_kerf_max_factor",2.0))
-            self._knap_cons_angle_deg=float(cfg.get("opt_knap_conservative_angle_deg",45.0))
-            self._ripasso_mm=float(cfg.get("opt_ripasso_mm",0.0))
-            self._warn_overflow_mm=float(cfg.get("opt_warn_overflow_mm",0.5))
-            # FIX: Reload auto_continue flags
-            self._auto_continue_enabled=bool(cfg.get("opt_auto_continue_enabled",False))
-            self._auto_continue_across_bars=bool(cfg.get("opt_auto_continue_across_bars",False))
-            self._strict_bar_sequence=bool(cfg.get("opt_strict_bar_sequence",True))
-            self._tail_refine_enabled=bool(cfg.get("opt_enable_tail_refine",True))
-            self._allow_skip_cut=bool(cfg.get("opt_allow_skip_cut",False))
+            # Senza notifier (fallback) i valori si rileggono qui
+            if settings_notifier is None: self._apply_opt_settings(read_settings())
+
+    def _apply_opt_settings(self,cfg:Dict[str,Any]):
+        self._kerf_max_angle_deg=float(cfg.get("opt_kerf_max_angle_deg",60.0))
+        self._kerf_max_factor=float(cfg.get("opt_kerf_max_factor",2.0))
+        self._knap_cons_angle_deg=float(cfg.get("opt_knap_conservative_angle_deg",45.0))
+        self._ripasso_mm=float(cfg.get("opt_ripasso_mm",0.0))
+        self._warn_overflow_mm=float(cfg.get("opt_warn_overflow_mm",0.5))
+        self._auto_continue_enabled=bool(cfg.get("opt_auto_continue_enabled",False))
+        self._auto_continue_across_bars=bool(cfg.get("opt_auto_continue_across_bars",False))
+        self._strict_bar_sequence=bool(cfg.get("opt_strict_bar_sequence",True))
+        self._tail_refine_enabled=bool(cfg.get("opt_enable_tail_refine",True))
+        self._allow_skip_cut=bool(cfg.get("opt_allow_skip_cut",False))
+
+    def _on_settings_changed(self,changed:Dict[str,Any]):
+        # Notifica del servizio impostazioni (thread GUI): niente polling del file
+        if any(k.startswith("opt_") for k in changed):
+            self._apply_opt_settings(read_settings())
             logger.info(f"Auto-continue updated: enabled={self._auto_continue_enabled}")
+        if "auto_after_cut_pause_ms" in changed:
+            self._after_cut_pause_ms=int(float(changed["auto_after_cut_pause_ms"] or 300))
+        if any(k.startswith("label_") for k in changed):
+            cfg=read_settings()
+            self._label_enabled=bool(cfg.get("label_enabled",False))
+            self._label_printer.update_settings(cfg)
+            if self.chk_label.isChecked()!=self._label_enabled:
+                self.chk_label.blockSignals(True); self.chk_label.setChecked(self._label_enabled); self.chk_label.blockSignals(False)
 
     # ---- Import cutlist ----
     def _import_cutlist(self):
@@ -1155,6 +1237,8 @@ class AutomaticoPage(QWidget):
             "bar":piece.get("bar"),"idx":piece.get("idx")
         }
         self._piece_tagliato=False
+        self._trace.begin_piece(self._seq_pos, profile=piece["profile"], len=piece["len"],
+                                element=piece["element"], bar=piece.get("bar"), skip_move=skip_move)
         if skip_move:
             self._state=STATE_READY
             self._emit_active_piece()
@@ -1171,6 +1255,7 @@ class AutomaticoPage(QWidget):
         self.activePieceChanged.emit(self._pending_active_piece)
         self._pending_active_piece=None
         self._state=STATE_READY
+        self._trace.emit(trace.PIECE_READY)
         self._update_cycle_state_label()
         self._log_state(f"Emit active piece seq={self._seq_pos}")
 
@@ -1230,6 +1315,8 @@ class AutomaticoPage(QWidget):
         else:  # normal mode
             success = self._execute_normal_move(piece)
         
+        if success:
+            self._trace.emit(trace.MOVE_COMMANDED, mode=self._current_mode, step=1)
         return success
 
     def _execute_normal_move(self, piece: Dict[str, Any]) -> bool:
@@ -1537,6 +1624,9 @@ class AutomaticoPage(QWidget):
             logger.error(f"Error starting normal movement: {e}")
             self._toast(f"Errore movimento: {e}", "error")
         
+        if self._state != STATE_IDLE:
+            self._trace.emit(trace.MOVE_COMMANDED, mode=self._current_mode, step=self._current_mode_step)
+        
         # Update UI state
         self._update_cycle_state_label()
 
@@ -1573,6 +1663,7 @@ class AutomaticoPage(QWidget):
         
         # All conditions met
         logger.info(f"✅ Auto-continue triggered: same_bar={same_bar}")
+        self._trace.emit(trace.AUTO_CONTINUE, same_bar=same_bar)
         self._log_state("Auto-continue: advancing")
         
         if same_bar:
@@ -1593,6 +1684,8 @@ class AutomaticoPage(QWidget):
                 "element":piece["element"],"seq_id":piece["seq_id"],
                 "mode":"plan","bar":piece.get("bar"),"idx":piece.get("idx")
             })
+        self._trace.emit(trace.PIECE_COUNTED)
+        self._count_piece_metric("plan")
         self._piece_tagliato=True
         self._state=STATE_WAIT_BRAKE
         self._update_cycle_state_label()
@@ -1610,6 +1703,8 @@ class AutomaticoPage(QWidget):
         self._dec_row_qty_for_sig(piece["profile"],piece["len"],piece["ax"],piece["ad"])
         self._emit_label(piece)
         self.pieceCut.emit({**piece,"mode":"manual"})
+        self._trace.emit(trace.PIECE_COUNTED, mode="manual")
+        self._count_piece_metric("manual")
         self._piece_tagliato=True
         self._state=STATE_WAIT_BRAKE
         self._update_cycle_state_label()
@@ -1629,9 +1724,18 @@ class AutomaticoPage(QWidget):
             # Allow manual cut in manual, idle, or plan mode
             self._simulate_manual_cut()
 
+    def _count_piece_metric(self, mode: str):
+        _PIECES_CUT.inc(mode=mode)
+        now=time.monotonic()
+        self._cut_times.append(now)
+        while self._cut_times and now-self._cut_times[0]>3600.0:
+            self._cut_times.popleft()
+        _PIECES_PER_HOUR.set(len(self._cut_times))
+
     # ---- Start (F9 / Space) ----
     def _handle_start_trigger(self):
         self._log_state(f"Start trigger state={self._state} mode={self._mode}")
+        self._trace.emit(trace.START_TRIGGER, state=self._state)
         if self._state==STATE_WAIT_BRAKE:
             # freno rilasciato? avanzamento
             if not self._brake_locked:
@@ -1665,6 +1769,7 @@ class AutomaticoPage(QWidget):
         else:
             with contextlib.suppress(Exception): setattr(self.machine,"brake_active",True)
         self._refresh_brake_flag()
+        self._trace.emit(trace.BRAKE_LOCKED)
         self._log_state("Brake locked.")
 
     def _unlock_brake(self,silent:bool=False):
@@ -1673,12 +1778,14 @@ class AutomaticoPage(QWidget):
         else:
             with contextlib.suppress(Exception): setattr(self.machine,"brake_active",False)
         self._refresh_brake_flag()
+        self._trace.emit(trace.BRAKE_RELEASED)
         if self._state==STATE_WAIT_BRAKE and not self._brake_locked:
             self._try_auto_continue()
         self._log_state("Brake unlocked.")
     
     def _unlock_brake_and_continue(self):
         """Unlock brake and continue multi-step sequence."""
+        self._step_pause_pending=False
         self._unlock_brake(silent=True)
         self._continue_multi_step_sequence()
 
@@ -1815,7 +1922,7 @@ class AutomaticoPage(QWidget):
             if prof and float(prof.get("thickness") or 0.0)>0:
                 return float(prof["thickness"])
         with contextlib.suppress(Exception):
-            return float(read_settings().get("opt_current_profile_thickness_mm",0.0))
+            return get_float("opt_current_profile_thickness_mm",0.0)
         return 0.0
 
     def _effective_position_length(self, external_len_mm: float, ang_sx: float, ang_dx: float, thickness_mm: float) -> float:
@@ -1933,7 +2040,8 @@ class AutomaticoPage(QWidget):
         # Aggiorna stato freno e movimento
         self._refresh_brake_flag()
         moving = self.mio.is_positioning_active() if self.mio else bool(getattr(self.machine,"positioning_active",False))
-        if self._state==STATE_MOVING and not moving:
+        if self._state==STATE_MOVING and not moving and not self._step_pause_pending:
+            self._trace.emit(trace.TARGET_REACHED)
             # Arrivo: lock brake se non già
             if not self._brake_locked:
                 self._lock_brake()
@@ -1941,6 +2049,7 @@ class AutomaticoPage(QWidget):
             # Check if we're in a multi-step mode and need to continue
             if self._state==STATE_MOVING and self._should_continue_multi_step():
                 # CRITICAL: Release brake before next step!
+                self._step_pause_pending=True
                 QTimer.singleShot(self._after_cut_pause_ms, self._unlock_brake_and_continue)
             elif self._state==STATE_MOVING:
                 # Normal single-step completion
@@ -1953,6 +2062,7 @@ class AutomaticoPage(QWidget):
         # Simulazione impulsi taglio / start (adapter)
         blade = self.mio.get_input("blade_pulse") if self.mio else False
         if blade and not self._blade_prev:
+            self._trace.emit(trace.BLADE_PULSE)
             if self._mode=="plan": self._simulate_cut_once()
             elif self._mode=="manual": self._simulate_manual_cut()
         self._blade_prev=blade
@@ -4,7 +4,6 @@ from collections import defaultdict
 import json
 from pathlib import Path
 from datetime import datetime
-import re
 
 from PySide6.QtCore import Qt
 from PySide6.QtWidgets import (
@@ -19,6 +18,9 @@ except Exception:
 
 from ui_qt.services.typologies_store import TypologiesStore, default_db_path
 from ui_qt.services.legacy_formula import eval_formula, sanitize_name
+from ui_qt.services.formula_batch import evaluate_typology_batch
+from ui_qt.services.formula_graph import norm_label as _norm_label
+from ui_qt.services.typology_cache import TypologyCache
 from ui_qt.services.orders_store import OrdersStore
 from ui_qt.dialogs.order_row_typology_qt import OrderRowTypologyDialog
 from ui_qt.dialogs.order_row_dims_qt import OrderRowDimsDialog
@@ -32,13 +34,6 @@ except Exception:
     ProfilesStore = None
 
 
-def _norm_label(s: str) -> str:
-    s = (s or "").strip().lower()
-    s = re.sub(r"[\s_]+", "", s)
-    s = re.sub(r"[^a-z0-9]+", "", s)
-    return s
-
-
 def _is_base_formula_valid(expr: Optional[str]) -> bool:
     if not expr:
         return False
@@ -57,6 +52,7 @@ class QuoteVaniPage(QFrame):
         super().__init__()
         self.appwin = appwin
         self._store = TypologiesStore(str(default_db_path()))
+        self._typologies = TypologyCache(self._store)
         self._orders = OrdersStore(str(default_db_path()))
         self._profiles = None
         if ProfilesStore:
@@ -226,9 +222,10 @@ class QuoteVaniPage(QFrame):
 
     def _refresh_rows_table(self):
         self.tbl_rows.setRowCount(0)
+        snaps = self._typologies.get_many(int(r["tid"]) for r in self._rows)
         for i, r in enumerate(self._rows, start=1):
-            tdata = self._store.get_typology_full(int(r["tid"]))
-            name = tdata["nome"] if tdata else str(r["tid"])
+            snap = snaps.get(int(r["tid"]))
+            name = snap.data["nome"] if snap else str(r["tid"])
             gtxt = r.get("formula_group") or "-"
             ri = self.tbl_rows.rowCount(); self.tbl_rows.insertRow(ri)
             self.tbl_rows.setItem(ri, 0, QTableWidgetItem(str(i)))
@@ -248,6 +245,33 @@ class QuoteVaniPage(QFrame):
         if self._last_cuts:
             QMessageBox.information(self, "Lista", f"Lista di taglio calcolata: {len(self._last_cuts)} righe. Clicca 'Visualizza lista…'")
 
+    def _batch_lengths(self, get_typ, prof_tokens: Dict[str, float]) -> Dict[int, Any]:
+        """
+        Lunghezze componenti (formula + offset) per le righe senza gruppo
+        formule, calcolate in blocco per tipologia: {indice riga: array}.
+        """
+        groups: Dict[Tuple[int, Tuple[str, ...]], List[int]] = defaultdict(list)
+        for ri, r in enumerate(self._rows):
+            if r.get("formula_group"):
+                continue
+            groups[(int(r["tid"]), tuple(sorted((r.get("vars") or {}).keys())))].append(ri)
+        out: Dict[int, Any] = {}
+        for (tid, var_names), idx in groups.items():
+            t = get_typ(tid)
+            if not t or not t.get("componenti"):
+                continue
+            rows = [self._rows[i] for i in idx]
+            try:
+                table = evaluate_typology_batch(
+                    t, [float(r["H"]) for r in rows], [float(r["L"]) for r in rows],
+                    row_vars={k: [float(r["vars"][k]) for r in rows] for k in var_names},
+                    env=prof_tokens)
+            except Exception:
+                continue  # es. variabili non numeriche: calcolo riga per riga
+            for j, ri in enumerate(idx):
+                out[ri] = table.lengths[j]
+        return out
+
     def _calc_cutlist(self) -> Optional[List[Dict[str, Any]]]:
         if not self._rows:
             QMessageBox.information(self, "Commessa", "Aggiungi almeno una riga."); return None
@@ -264,10 +288,15 @@ class QuoteVaniPage(QFrame):
         aggregated: Dict[str, Dict[Tuple[str, float, float, float, str], int]] = defaultdict(lambda: defaultdict(int))
         profile_order: List[str] = []
 
-        for r in self._rows:
-            t = self._store.get_typology_full(int(r["tid"]))
-            if not t:
+        # Snapshot per tipologia distinta: il DB si legge solo per quelle nuove o modificate
+        snaps = self._typologies.get_many(int(r["tid"]) for r in self._rows)
+        batch_lengths = self._batch_lengths(lambda tid: snaps[tid].data if tid in snaps else None, prof_tokens)
+
+        for ri, r in enumerate(self._rows):
+            snap = snaps.get(int(r["tid"]))
+            if not snap:
                 continue
+            t = snap.data
             H = float(r["H"]); L = float(r["L"]); qty_row = int(r["qty"])
 
             env_base: Dict[str, Any] = {"H": H, "L": L}
@@ -276,38 +305,23 @@ class QuoteVaniPage(QFrame):
             env_base.update(prof_tokens)
 
             grp = r.get("formula_group")
-            mf_map: Dict[str, Dict[str, Any]] = {}
-            var_rules: List[Dict[str, Any]] = []
-            if grp:
-                try:
-                    for item in self._store.list_multi_formulas(int(r["tid"]), str(grp)):
-                        key = _norm_label(item.get("label") or "")
-                        mf_map[key] = item
-                    var_rules = self._store.list_multi_var_rules(int(r["tid"]), str(grp))
-                except Exception:
-                    mf_map = {}
-                    var_rules = []
-
+            group = snap.group(grp)
+            mf_map = group.formulas if group else {}
             variants_used: Dict[str, str] = {}
-            if var_rules:
-                by_var: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
-                for vr in var_rules: by_var[vr["var_name"]].append(vr)
-                for var_name, rules in by_var.items():
-                    matches = [vr for vr in rules if float(vr["l_min"]) <= L <= float(vr["l_max"])]
-                    if matches:
-                        matches.sort(key=lambda x: (float(x["l_max"]) - float(x["l_min"])))
-                        chosen = matches[0]
-                        env_base[var_name] = float(chosen["value"])
-                        variant = (chosen.get("variant") or "").strip()
-                        if variant:
-                            env_base[f"{var_name}_variant"] = variant
-                            variants_used[var_name] = variant
+            if group and group.rules:
+                rule_vars, variants_used = group.resolve_vars(L)
+                env_base.update(rule_vars)
 
             comps = t.get("componenti") or []
             used_labels: set[str] = set()
             c_values: Dict[str, float] = {}
+            # env unico per riga: i C_<id_riga> vengono aggiunti man mano
+            env = dict(env_base)
 
-            for c in comps:
+            # Ordine topologico dei riferimenti C_<id_riga> (stabile), sulle formule effettive
+            pre = batch_lengths.get(ri)
+            for ci in snap.graph(grp).order:
+                c = comps[ci]
                 elemento = (c.get("nome") or "").strip() or "-"
                 elemento_key = _norm_label(elemento)
                 prof = (c.get("profilo_nome", "") or "").strip() or "—"
@@ -317,8 +331,6 @@ class QuoteVaniPage(QFrame):
                 base_expr_raw = c.get("formula_lunghezza", None)
                 offs = float(c.get("offset_mm", 0.0) or 0.0)
 
-                env = dict(env_base); env.update(c_values)
-
                 expr_to_use: Optional[str] = None
                 note_str_parts: List[str] = []
 
@@ -336,10 +348,13 @@ class QuoteVaniPage(QFrame):
                         expr_to_use = (base_expr_raw or "").strip()
 
                 if expr_to_use and qty > 0:
-                    try:
-                        length = float(eval_formula(expr_to_use, env)) + offs
-                    except Exception:
-                        length = 0.0
+                    if pre is not None:
+                        length = float(pre[ci])
+                    else:
+                        try:
+                            length = float(eval_formula(expr_to_use, env)) + offs
+                        except Exception:
+                            length = 0.0
                     note_str = " | ".join(note_str_parts) if note_str_parts else ""
                     key = (elemento, round(length, 2), angsx, angdx, note_str)
                     aggregated[prof][key] += qty
@@ -348,6 +363,7 @@ class QuoteVaniPage(QFrame):
                     rid = c.get("id_riga", "")
                     if rid:
                         c_values[f"C_{rid}"] = length
+                        env[f"C_{rid}"] = length
 
             if grp and mf_map:
                 for lbl_key, itm in mf_map.items():
@@ -37,7 +37,7 @@ class TipologiePage(QFrame):
         btn_home = QPushButton("Home"); btn_home.clicked.connect(self._go_home); top.addWidget(btn_home)
         top.addSpacing(8)
         top.addWidget(QLabel("Cerca:"))
-        self.ed_search = QLineEdit(); self.ed_search.setPlaceholderText("Filtra per nome o categoria")
+        self.ed_search = QLineEdit(); self.ed_search.setPlaceholderText("Filtra per nome, categoria, materiale, profilo o componente")
         self.ed_search.textChanged.connect(self._reload)
         top.addWidget(self.ed_search, 1)
 
@@ -68,16 +68,12 @@ class TipologiePage(QFrame):
 
     def _reload(self):
         self.tree.clear()
-        rows = self._store.list_typologies()
-        q = (self.ed_search.text() or "").lower().strip()
+        q = (self.ed_search.text() or "").strip()
+        # ricerca full-text (prefissi su nome, categoria, materiale, profili, componenti)
+        rows = self._store.search_typologies(q, limit=1000) if q else self._store.list_typologies()
         # group by category
         groups: Dict[str, List[Dict[str, Any]]] = {}
         for r in rows:
-            if q:
-                name = (r["name"] or "").lower()
-                cat = (r["category"] or "").lower()
-                if q not in name and q not in cat:
-                    continue
             cat = r["category"] or "(senza categoria)"
             groups.setdefault(cat, []).append(r)
         # build tree
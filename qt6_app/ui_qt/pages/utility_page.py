@@ -23,6 +23,12 @@ try:
 except Exception:
     ProfilesStore = None  # type: ignore
 
+try:
+    from ui_qt.utils.sampling_profiler import get_profiler, DEFAULT_PROFILE_DIR
+except Exception:
+    get_profiler = None  # type: ignore
+    DEFAULT_PROFILE_DIR = Path.home() / ".blitz" / "profiles"
+
 try:
     from ui_qt.widgets.section_preview_popup import SectionPreviewPopup
 except Exception:
@@ -471,7 +477,7 @@ class UtilityPage(QWidget):
         menu_layout.setSpacing(6)
         self.lst_menu = QListWidget()
         self.lst_menu.setSelectionMode(QAbstractItemView.SingleSelection)
-        for label in ("Hardware", "Profili", "QCAD", "Backup", "Configurazione", "Temi", "Etichette"):
+        for label in ("Hardware", "Profili", "QCAD", "Backup", "Configurazione", "Temi", "Etichette", "Diagnostica"):
             self.lst_menu.addItem(QListWidgetItem(label))
         self.lst_menu.setCurrentRow(0)
         menu_layout.addWidget(QLabel("Sottomenu"))
@@ -486,6 +492,7 @@ class UtilityPage(QWidget):
         self.page_config = ConfigSubPage(self.appwin)
         self.page_themes = ThemesSubPage(self.appwin)
         self.page_labels = LabelsSubPage(self.appwin, self.profiles_store)
+        self.page_diagnostics = DiagnosticsSubPage(self.appwin)
 
         self.stack.addWidget(self.page_hardware)  # 0
         self.stack.addWidget(self.page_profiles)  # 1
@@ -494,6 +501,7 @@ class UtilityPage(QWidget):
         self.stack.addWidget(self.page_config)    # 4
         self.stack.addWidget(self.page_themes)    # 5
         self.stack.addWidget(self.page_labels)    # 6
+        self.stack.addWidget(self.page_diagnostics)  # 7
 
         right = QFrame()
         right.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Expanding)
@@ -720,6 +728,10 @@ class ProfilesSubPage(QFrame):
         if self.profiles and hasattr(self.profiles, "delete_profile"):
             try:
                 self.profiles.delete_profile(name)
+            except ValueError as e:
+                # profilo ancora usato da tipologie (FK)
+                QMessageBox.warning(self, "Profilo in uso", str(e))
+                return
             except Exception:
                 pass
         if name in self._profiles_index:
@@ -1273,6 +1285,104 @@ class ConfigSubPage(QFrame):
             except Exception: pass
 
 
+class DiagnosticsSubPage(QFrame):
+    """Profiler a campionamento: cattura hot spot su tutti i thread in produzione."""
+
+    profileFinished = Signal(object, object)  # (ProfileResult, paths) dal thread del profiler
+
+    def __init__(self, appwin):
+        super().__init__()
+        self.appwin = appwin
+        self._timer: Optional[QTimer] = None
+        self._build()
+        self.profileFinished.connect(self._on_finished)
+
+    def _build(self):
+        self.setStyleSheet("QFrame { border: 1px solid #3b4b5a; border-radius: 6px; }")
+        root = QVBoxLayout(self)
+        root.setContentsMargins(8, 8, 8, 8)
+        root.setSpacing(8)
+        root.addWidget(QLabel("Diagnostica — Profiler a campionamento"), 0)
+
+        row = QHBoxLayout()
+        row.addWidget(QLabel("Durata (s):"))
+        self.spin_duration = QSpinBox(); self.spin_duration.setRange(1, 600); self.spin_duration.setValue(30)
+        row.addWidget(self.spin_duration)
+        row.addWidget(QLabel("Intervallo (ms):"))
+        self.spin_interval = QDoubleSpinBox(); self.spin_interval.setRange(1.0, 100.0)
+        self.spin_interval.setDecimals(1); self.spin_interval.setValue(5.0)
+        row.addWidget(self.spin_interval)
+        self.chk_skip_idle = QCheckBox("Escludi thread inattivi"); self.chk_skip_idle.setChecked(True)
+        row.addWidget(self.chk_skip_idle)
+        self.btn_start = QPushButton("▶ Avvia")
+        self.btn_start.clicked.connect(self._start)
+        row.addWidget(self.btn_start)
+        self.btn_stop = QPushButton("■ Ferma")
+        self.btn_stop.clicked.connect(self._stop)
+        self.btn_stop.setEnabled(False)
+        row.addWidget(self.btn_stop)
+        row.addStretch(1)
+        root.addLayout(row)
+
+        self.lbl_status = QLabel(f"Output: {DEFAULT_PROFILE_DIR}")
+        self.lbl_status.setStyleSheet("color:#7f8c8d;")
+        root.addWidget(self.lbl_status, 0)
+        self.txt_report = QTextEdit(); self.txt_report.setReadOnly(True)
+        self.txt_report.setStyleSheet("font-family: monospace;")
+        root.addWidget(self.txt_report, 1)
+
+    def _start(self):
+        if get_profiler is None:
+            self.lbl_status.setText("Profiler non disponibile.")
+            return
+        prof = get_profiler()
+        prof.interval_s = float(self.spin_interval.value()) / 1000.0
+        prof.skip_idle = self.chk_skip_idle.isChecked()
+        try:
+            started = prof.start(duration_s=float(self.spin_duration.value()),
+                                 on_finished=lambda res, paths: self.profileFinished.emit(res, paths))
+        except Exception as e:
+            self.lbl_status.setText(f"Profiler non avviato: {e}")
+            return
+        if not started:
+            self.lbl_status.setText("Profiler già in esecuzione.")
+            return
+        self._set_running(True)
+
+    def _stop(self):
+        if get_profiler is None:
+            return
+        res = get_profiler().stop(save=True)
+        self._on_finished(res, get_profiler().last_paths)
+
+    def _set_running(self, running: bool):
+        self.btn_start.setEnabled(not running)
+        self.btn_stop.setEnabled(running)
+        if running:
+            if self._timer is None:
+                self._timer = QTimer(self)
+                self._timer.setInterval(500)
+                self._timer.timeout.connect(self._update_elapsed)
+            self._timer.start()
+        elif self._timer:
+            self._timer.stop()
+
+    def _update_elapsed(self):
+        prof = get_profiler() if get_profiler else None
+        if prof is None or not prof.running:
+            self._set_running(False)
+            return
+        self.lbl_status.setText(f"Campionamento in corso… {prof.elapsed_s():.0f} s")
+
+    def _on_finished(self, result, paths):
+        self._set_running(False)
+        if result is None:
+            return
+        if paths:
+            self.lbl_status.setText(f"Salvato: {paths[0]}  |  {paths[1].name}")
+        self.txt_report.setPlainText(result.format_top())
+
+
 class ThemesSubPage(QFrame):
     def __init__(self, appwin):
         super().__init__()
@@ -26,14 +26,27 @@ import logging
 if TYPE_CHECKING:
     from bleak import BleakClient, BleakScanner
 
-try:
-    from bleak import BleakClient, BleakScanner
-    HAS_BLEAK = True
-except ImportError:
-    HAS_BLEAK = False
+# bleak is imported on first use: it is slow to import and only needed
+# once the caliper is scanned/connected.
+HAS_BLEAK: Optional[bool] = None
+BleakClient = None
+BleakScanner = None
 
 logger = logging.getLogger("bluetooth_caliper")
 
+
+def _load_bleak() -> bool:
+    """Import bleak once; returns availability."""
+    global HAS_BLEAK, BleakClient, BleakScanner
+    if HAS_BLEAK is None:
+        try:
+            from bleak import BleakClient as _Client, BleakScanner as _Scanner
+            BleakClient, BleakScanner = _Client, _Scanner
+            HAS_BLEAK = True
+        except ImportError:
+            HAS_BLEAK = False
+    return HAS_BLEAK
+
 # BLE UUIDs (Standard Environmental Sensing Service)
 CALIPER_SERVICE_UUID = "0000181a-0000-1000-8000-00805f9b34fb"
 CALIPER_MEASURE_CHAR_UUID = "00002a58-0000-1000-8000-00805f9b34fb"
@@ -70,7 +83,7 @@ class BluetoothCaliper:
         Returns:
             List of devices: [{"name": "ESP32_CALIBRO", "address": "AA:BB:CC:..."}]
         """
-        if not HAS_BLEAK:
+        if not _load_bleak():
             logger.error("Bleak library not installed. Run: pip install bleak")
             return []
         
@@ -108,7 +121,7 @@ class BluetoothCaliper:
         Returns:
             True if connected successfully
         """
-        if not HAS_BLEAK:
+        if not _load_bleak():
             logger.error("Bleak library not installed")
             return False
         
@@ -262,7 +275,7 @@ class BluetoothCaliperQt:
         Returns:
             List of devices found
         """
-        if not HAS_BLEAK:
+        if not _load_bleak():
             logger.error("Bleak not installed. Install with: pip install bleak")
             return []
         
@@ -287,7 +300,7 @@ class BluetoothCaliperQt:
         Returns:
             True if connected
         """
-        if not HAS_BLEAK:
+        if not _load_bleak():
             return False
         
         try:
@@ -349,7 +362,7 @@ class BluetoothCaliperQt:
 # Check if Bleak is available
 def check_bleak_available() -> bool:
     """Check if Bleak library is installed."""
-    return HAS_BLEAK
+    return _load_bleak()
 
 
 def get_install_instructions() -> str:
@@ -0,0 +1,509 @@
+"""
+Database unico dell'applicazione (profili, tipologie, ordini, commesse,
+coda etichette).
+
+Prima i dati erano divisi in tre file, ognuno con il proprio CREATE IF NOT
+EXISTS: data/profiles.db (ProfilesStore), typologies.db (TypologiesStore,
+OrdersStore) e data/app.db (data/db.py). Le query tra entità diverse
+(es. spessore del profilo di ogni pezzo) richiedevano più connessioni.
+
+Lo schema ora è uno solo e cresce per migrazioni numerate:
+- la versione applicata è PRAGMA user_version, con lo storico in
+  schema_migrations
+- ogni migrazione gira in una transazione (BEGIN IMMEDIATE): o passa
+  tutta o il file resta alla versione precedente
+- i file vecchi aperti direttamente (es. un typologies.db passato a
+  TypologiesStore) vengono portati all'ultima versione allo stesso modo
+
+Il database predefinito riceve i dati dei tre file precedenti
+(import_legacy), mantenendo gli id. L'import riuscito è registrato in
+meta ('legacy_import'): se si interrompe viene ripetuto all'apertura
+successiva.
+"""
+from __future__ import annotations
+import json
+import logging
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple, Union
+
+from ui_qt.services import search_index
+from ui_qt.utils.db_pool import ConnectionPool, get_pool
+
+logger = logging.getLogger(__name__)
+
+DB_NAME = "blitz.db"
+
+DEFAULT_DB_CANDIDATES = [
+    Path(__file__).resolve().parents[2] / "data" / DB_NAME,
+    Path.cwd() / "data" / DB_NAME,
+    Path.home() / "blitz" / DB_NAME,
+]
+
+# Database separati usati prima dello schema unico (sorgenti di import_legacy)
+LEGACY_DB_FILES = [
+    Path(__file__).resolve().parents[3] / "data" / "profiles.db",
+    Path(__file__).resolve().parents[2] / "data" / "typologies.db",
+    Path.cwd() / "data" / "typologies.db",
+    Path.home() / "blitz" / "typologies.db",
+    Path.cwd() / "data" / "app.db",
+]
+
+
+def default_db_path() -> Path:
+    for p in DEFAULT_DB_CANDIDATES:
+        try:
+            p.parent.mkdir(parents=True, exist_ok=True)
+            return p
+        except Exception:
+            continue
+    p = Path.cwd() / DB_NAME
+    p.parent.mkdir(parents=True, exist_ok=True)
+    return p
+
+
+# ---------------- Migrazioni ----------------
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    apply: Union[Sequence[str], Callable[[sqlite3.Connection], None]]
+
+
+# v1: le tabelle dei tre database separati, così come erano
+_BASELINE = (
+    """CREATE TABLE IF NOT EXISTS profiles (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE NOT NULL,
+        thickness REAL NOT NULL DEFAULT 0
+    )""",
+    """CREATE TABLE IF NOT EXISTS profile_shapes (
+        profile_id INTEGER UNIQUE NOT NULL,
+        dxf_path TEXT,
+        bbox_w REAL,
+        bbox_h REAL,
+        meta_json TEXT,
+        FOREIGN KEY(profile_id) REFERENCES profiles(id) ON DELETE CASCADE
+    )""",
+    """CREATE TABLE IF NOT EXISTS typology (
+        id               INTEGER PRIMARY KEY AUTOINCREMENT,
+        name             TEXT NOT NULL UNIQUE,
+        category         TEXT,
+        material         TEXT,
+        ref_quota        TEXT CHECK (ref_quota IN ('esterna','interna')) DEFAULT 'esterna',
+        extra_detrazione REAL DEFAULT 0.0,
+        pezzi_totali     INTEGER DEFAULT 1,
+        note             TEXT,
+        created_at       INTEGER,
+        updated_at       INTEGER
+    )""",
+    """CREATE TABLE IF NOT EXISTS typology_var (
+        id           INTEGER PRIMARY KEY AUTOINCREMENT,
+        typology_id  INTEGER NOT NULL REFERENCES typology(id) ON DELETE CASCADE,
+        name         TEXT NOT NULL,
+        value        REAL NOT NULL DEFAULT 0.0
+    )""",
+    """CREATE TABLE IF NOT EXISTS typology_component (
+        id           INTEGER PRIMARY KEY AUTOINCREMENT,
+        typology_id  INTEGER NOT NULL REFERENCES typology(id) ON DELETE CASCADE,
+        ord          INTEGER NOT NULL DEFAULT 0,
+        row_id       TEXT,
+        name         TEXT,
+        profile_name TEXT,
+        quantity     INTEGER DEFAULT 0,
+        ang_sx       REAL DEFAULT 0.0,
+        ang_dx       REAL DEFAULT 0.0,
+        formula      TEXT,
+        offset       REAL DEFAULT 0.0,
+        note         TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS typology_multi_formula (
+        id           INTEGER PRIMARY KEY AUTOINCREMENT,
+        typology_id  INTEGER NOT NULL REFERENCES typology(id) ON DELETE CASCADE,
+        group_name   TEXT NOT NULL,
+        label        TEXT NOT NULL,
+        formula      TEXT NOT NULL,
+        profile_name TEXT,
+        qty          INTEGER DEFAULT 1,
+        ang_sx       REAL DEFAULT 0.0,
+        ang_dx       REAL DEFAULT 0.0,
+        offset       REAL DEFAULT 0.0,
+        note         TEXT,
+        UNIQUE(typology_id, group_name, label)
+    )""",
+    """CREATE TABLE IF NOT EXISTS typology_multi_var_rule (
+        id           INTEGER PRIMARY KEY AUTOINCREMENT,
+        typology_id  INTEGER NOT NULL REFERENCES typology(id) ON DELETE CASCADE,
+        group_name   TEXT NOT NULL,
+        var_name     TEXT NOT NULL,
+        l_min        REAL NOT NULL,
+        l_max        REAL NOT NULL,
+        value        REAL NOT NULL,
+        variant      TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_typology_comp_typ ON typology_component(typology_id, ord)",
+    "CREATE INDEX IF NOT EXISTS idx_typology_var_typ  ON typology_var(typology_id)",
+    "CREATE INDEX IF NOT EXISTS idx_tmf_typ_group ON typology_multi_formula(typology_id, group_name)",
+    "CREATE INDEX IF NOT EXISTS idx_tmr_typ_group ON typology_multi_var_rule(typology_id, group_name)",
+    """CREATE TABLE IF NOT EXISTS orders (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        customer TEXT,
+        data_json TEXT NOT NULL,        -- JSON serializzato della commessa (rows + meta)
+        created_at INTEGER,
+        updated_at INTEGER
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_orders_customer ON orders(customer)",
+    """CREATE TABLE IF NOT EXISTS tipologie (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nome TEXT NOT NULL,
+        categoria TEXT DEFAULT '',
+        materiale TEXT DEFAULT '',
+        rif TEXT DEFAULT '',
+        extra TEXT DEFAULT '',
+        attiva INTEGER NOT NULL DEFAULT 1,
+        comp INTEGER NOT NULL DEFAULT 0
+    )""",
+    """CREATE TABLE IF NOT EXISTS commesse (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        cliente TEXT DEFAULT '',
+        note TEXT DEFAULT '',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE IF NOT EXISTS commessa_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        commessa_id INTEGER NOT NULL REFERENCES commesse(id) ON DELETE CASCADE,
+        tipologia_id INTEGER REFERENCES tipologie(id),
+        len_mm REAL NOT NULL DEFAULT 0,
+        qty INTEGER NOT NULL DEFAULT 1
+    )""",
+    """CREATE TABLE IF NOT EXISTS stock_bars (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        material TEXT DEFAULT '',
+        length_mm REAL NOT NULL,
+        available_qty INTEGER NOT NULL DEFAULT 0
+    )""",
+)
+
+# colonne aggiunte nel tempo ai file typologies.db (prima con ALTER "a tentativi")
+_LEGACY_COLUMNS = (
+    ("typology_multi_formula", "profile_name", "TEXT"),
+    ("typology_multi_formula", "qty", "INTEGER DEFAULT 1"),
+    ("typology_multi_formula", "ang_sx", "REAL DEFAULT 0.0"),
+    ("typology_multi_formula", "ang_dx", "REAL DEFAULT 0.0"),
+    ("typology_multi_formula", "offset", "REAL DEFAULT 0.0"),
+    ("typology_multi_var_rule", "variant", "TEXT"),
+)
+
+
+def table_columns(con: sqlite3.Connection, table: str, schema: str = "main") -> List[str]:
+    return [r[1] for r in con.execute(f"PRAGMA {schema}.table_info({table})").fetchall()]
+
+
+def _v1_baseline(con: sqlite3.Connection) -> None:
+    for sql in _BASELINE:
+        con.execute(sql)
+    for table, col, decl in _LEGACY_COLUMNS:
+        if col not in table_columns(con, table):
+            con.execute(f"ALTER TABLE {table} ADD COLUMN {col} {decl}")
+
+
+# Tabelle che riferiscono un profilo per nome
+PROFILE_REF_TABLES = ("typology_component", "typology_multi_formula")
+
+_V2_TABLES = {
+    "typology_component": (
+        """CREATE TABLE typology_component_v2 (
+            id           INTEGER PRIMARY KEY AUTOINCREMENT,
+            typology_id  INTEGER NOT NULL REFERENCES typology(id) ON DELETE CASCADE,
+            ord          INTEGER NOT NULL DEFAULT 0,
+            row_id       TEXT,
+            name         TEXT,
+            profile_name TEXT REFERENCES profiles(name) ON UPDATE CASCADE ON DELETE RESTRICT,
+            quantity     INTEGER DEFAULT 0,
+            ang_sx       REAL DEFAULT 0.0,
+            ang_dx       REAL DEFAULT 0.0,
+            formula      TEXT,
+            offset       REAL DEFAULT 0.0,
+            note         TEXT
+        )""",
+        "id, typology_id, ord, row_id, name, profile_name, quantity, ang_sx, ang_dx, formula, offset, note",
+        ("CREATE INDEX IF NOT EXISTS idx_typology_comp_typ ON typology_component(typology_id, ord)",),
+    ),
+    "typology_multi_formula": (
+        """CREATE TABLE typology_multi_formula_v2 (
+            id           INTEGER PRIMARY KEY AUTOINCREMENT,
+            typology_id  INTEGER NOT NULL REFERENCES typology(id) ON DELETE CASCADE,
+            group_name   TEXT NOT NULL,
+            label        TEXT NOT NULL,
+            formula      TEXT NOT NULL,
+            profile_name TEXT REFERENCES profiles(name) ON UPDATE CASCADE ON DELETE RESTRICT,
+            qty          INTEGER DEFAULT 1,
+            ang_sx       REAL DEFAULT 0.0,
+            ang_dx       REAL DEFAULT 0.0,
+            offset       REAL DEFAULT 0.0,
+            note         TEXT,
+            UNIQUE(typology_id, group_name, label)
+        )""",
+        "id, typology_id, group_name, label, formula, profile_name, qty, ang_sx, ang_dx, offset, note",
+        ("CREATE INDEX IF NOT EXISTS idx_tmf_typ_group ON typology_multi_formula(typology_id, group_name)",),
+    ),
+}
+
+
+def _v2_profile_fk(con: sqlite3.Connection) -> None:
+    # SQLite non aggiunge FK con ALTER: ricostruzione delle tabelle.
+    # Nome vuoto -> NULL; i profili citati ma assenti nascono con spessore 0
+    # (come in upsert_profile_shape), così nessun riferimento si perde.
+    for table, (create_sql, cols, indexes) in _V2_TABLES.items():
+        con.execute(f"UPDATE {table} SET profile_name=NULL WHERE TRIM(profile_name)=''")
+        con.execute(
+            f"INSERT OR IGNORE INTO profiles(name, thickness) "
+            f"SELECT DISTINCT profile_name, 0 FROM {table} WHERE profile_name IS NOT NULL")
+        con.execute(create_sql)
+        con.execute(f"INSERT INTO {table}_v2({cols}) SELECT {cols} FROM {table}")
+        con.execute(f"DROP TABLE {table}")
+        con.execute(f"ALTER TABLE {table}_v2 RENAME TO {table}")
+        for sql in indexes:
+            con.execute(sql)
+
+
+_ORDERS_V4 = (
+    """CREATE TABLE orders_v4 (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        customer TEXT,
+        kind TEXT NOT NULL DEFAULT 'commessa',      -- 'commessa' (rows) | 'cutlist' (cuts)
+        status TEXT NOT NULL DEFAULT 'pending'
+            CHECK (status IN ('pending','in_progress','done','cancelled')),
+        meta_json TEXT,                             -- chiavi del dict ordine diverse da rows/cuts
+        created_at INTEGER,
+        updated_at INTEGER
+    )""",
+    "INSERT INTO orders_v4(id, name, customer, created_at, updated_at) "
+    "SELECT id, name, customer, created_at, updated_at FROM orders",
+    "DROP TABLE orders",
+    "ALTER TABLE orders_v4 RENAME TO orders",
+    "CREATE INDEX IF NOT EXISTS idx_orders_updated ON orders(updated_at)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_customer_upd ON orders(customer, updated_at)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_status ON orders(status, updated_at)",
+    """CREATE TABLE IF NOT EXISTS order_rows (
+        id            INTEGER PRIMARY KEY AUTOINCREMENT,
+        order_id      INTEGER NOT NULL REFERENCES orders(id) ON DELETE CASCADE,
+        ord           INTEGER NOT NULL DEFAULT 0,
+        typology_id   INTEGER,
+        qty           INTEGER,
+        h_mm          REAL,
+        l_mm          REAL,
+        vars_json     TEXT,
+        formula_group TEXT,
+        extra_json    TEXT
+    )""",
+    # profile_name senza FK: i tagli sono lo storico di ciò che è stato
+    # ordinato e non devono impedire di eliminare un profilo
+    """CREATE TABLE IF NOT EXISTS order_cuts (
+        id           INTEGER PRIMARY KEY AUTOINCREMENT,
+        order_id     INTEGER NOT NULL REFERENCES orders(id) ON DELETE CASCADE,
+        ord          INTEGER NOT NULL DEFAULT 0,
+        profile_name TEXT,
+        element      TEXT,
+        length_mm    REAL,
+        ang_sx       REAL,
+        ang_dx       REAL,
+        qty          INTEGER,
+        note         TEXT,
+        extra_json   TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_order_rows_order ON order_rows(order_id, ord)",
+    "CREATE INDEX IF NOT EXISTS idx_order_rows_typology ON order_rows(typology_id)",
+    "CREATE INDEX IF NOT EXISTS idx_order_cuts_order ON order_cuts(order_id, ord)",
+    "CREATE INDEX IF NOT EXISTS idx_order_cuts_profile ON order_cuts(profile_name, order_id)",
+)
+
+
+def _write_orders_json(con: sqlite3.Connection, items: Iterable[Tuple[int, Optional[str]]]) -> None:
+    # import locale: orders_store usa questo modulo
+    from ui_qt.services.orders_store import write_order_data
+    for oid, data_json in items:
+        try:
+            data = json.loads(data_json) if data_json else {}
+        except ValueError:
+            data = {"data_json": data_json}  # illeggibile: conservato così com'era
+        write_order_data(con, int(oid), data)
+
+
+def _v4_order_lines(con: sqlite3.Connection) -> None:
+    # data_json -> order_rows / order_cuts / meta_json
+    old = con.execute("SELECT id, data_json FROM orders").fetchall()
+    for sql in _ORDERS_V4:
+        con.execute(sql)
+    _write_orders_json(con, old)
+
+
+def _v5_search(con: sqlite3.Connection) -> None:
+    for sql in search_index.SCHEMA:
+        con.execute(sql)
+    search_index.rebuild(con)
+
+
+def _v7_meta(con: sqlite3.Connection) -> None:
+    con.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    # database creati prima del flag: l'import è già avvenuto se ci sono dati
+    tables = {r[0] for r in con.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    if any(con.execute(f"SELECT 1 FROM {t} LIMIT 1").fetchone() for t in IMPORT_TABLES if t in tables):
+        set_meta(con, LEGACY_IMPORT_KEY, "done")
+
+
+MIGRATIONS: Tuple[Migration, ...] = (
+    Migration(1, "schema iniziale (profili, tipologie, ordini, commesse)", _v1_baseline),
+    Migration(2, "chiave esterna componenti/formule multiple -> profiles(name)", _v2_profile_fk),
+    Migration(3, "indici per le query frequenti", (
+        # figli delle FK sui profili: controlli ON DELETE/UPDATE e "dove è usato"
+        "CREATE INDEX IF NOT EXISTS idx_typology_comp_profile ON typology_component(profile_name)",
+        "CREATE INDEX IF NOT EXISTS idx_tmf_profile ON typology_multi_formula(profile_name)",
+        # regole per gruppo già ordinate per l_min (list_multi_var_rules[_all])
+        "DROP INDEX IF EXISTS idx_tmr_typ_group",
+        "CREATE INDEX IF NOT EXISTS idx_tmr_typ_group_l ON typology_multi_var_rule(typology_id, group_name, l_min)",
+        # elenco ordini più recenti, anche per cliente
+        "DROP INDEX IF EXISTS idx_orders_customer",
+        "CREATE INDEX IF NOT EXISTS idx_orders_updated ON orders(updated_at)",
+        "CREATE INDEX IF NOT EXISTS idx_orders_customer_upd ON orders(customer, updated_at)",
+        "CREATE INDEX IF NOT EXISTS idx_commessa_items_commessa ON commessa_items(commessa_id)",
+        "CREATE INDEX IF NOT EXISTS idx_commessa_items_tipologia ON commessa_items(tipologia_id)",
+    )),
+    Migration(4, "ordini normalizzati: order_rows, order_cuts, stato", _v4_order_lines),
+    Migration(5, "ricerca full-text (FTS5) su ordini, tipologie e profili", _v5_search),
+    Migration(6, "coda di stampa etichette persistente", (
+        # lavori in attesa dello spooler (label_spooler): sopravvivono al riavvio
+        "CREATE TABLE IF NOT EXISTS label_jobs ("
+        "id INTEGER PRIMARY KEY AUTOINCREMENT, lines_json TEXT NOT NULL, paper TEXT, rotate INTEGER NOT NULL DEFAULT 0, "
+        "font_size INTEGER NOT NULL DEFAULT 32, cut INTEGER NOT NULL DEFAULT 1, "
+        "status TEXT NOT NULL DEFAULT 'pending' CHECK(status IN ('pending','failed')), "
+        "attempts INTEGER NOT NULL DEFAULT 0, last_error TEXT, created_at INTEGER)",
+        "CREATE INDEX IF NOT EXISTS idx_label_jobs_status ON label_jobs(status, id)",
+    )),
+    Migration(7, "tabella meta (import dei database separati completato)", _v7_meta),
+)
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+
+def schema_version(con: sqlite3.Connection) -> int:
+    return int(con.execute("PRAGMA user_version").fetchone()[0])
+
+
+def get_meta(con: sqlite3.Connection, key: str) -> Optional[str]:
+    row = con.execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def set_meta(con: sqlite3.Connection, key: str, value: str) -> None:
+    con.execute("INSERT OR REPLACE INTO meta(key, value) VALUES(?, ?)", (key, value))
+
+
+def migrate(pool: ConnectionPool, migrations: Sequence[Migration] = MIGRATIONS) -> int:
+    """Applica le migrazioni mancanti; ritorna la versione finale."""
+    current = schema_version(pool.connection())
+    latest = migrations[-1].version if migrations else 0
+    if current > latest:
+        raise RuntimeError(f"{pool.path}: schema v{current} più recente dell'applicazione (v{latest})")
+    for m in migrations:
+        if m.version <= current:
+            continue
+        with pool.transaction() as con:
+            # un altro processo può aver migrato nel frattempo
+            if schema_version(con) >= m.version:
+                continue
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                "version INTEGER PRIMARY KEY, description TEXT, applied_at INTEGER)")
+            if callable(m.apply):
+                m.apply(con)
+            else:
+                for sql in m.apply:
+                    con.execute(sql)
+            con.execute("INSERT OR REPLACE INTO schema_migrations(version, description, applied_at) VALUES(?,?,?)",
+                        (m.version, m.description, int(time.time())))
+            con.execute(f"PRAGMA user_version={int(m.version)}")
+        current = m.version
+    return current
+
+
+# ---------------- Import dei database separati ----------------
+
+LEGACY_IMPORT_KEY = "legacy_import"
+
+# ordine di copia: i genitori prima dei figli
+IMPORT_TABLES = (
+    "profiles", "profile_shapes",
+    "typology", "typology_var", "typology_component", "typology_multi_formula", "typology_multi_var_rule",
+    "orders",
+    "tipologie", "commesse", "commessa_items", "stock_bars",
+)
+
+
+def import_legacy(pool: ConnectionPool, sources: Iterable[Union[str, Path]]) -> List[str]:
+    """
+    Copia nel database le tabelle dei file indicati (id mantenuti). Una
+    tabella è importata solo se qui è ancora vuota, quindi il primo file
+    che la contiene vince. Ritorna le voci "file:tabella" importate.
+    """
+    imported: List[str] = []
+    target = Path(pool.path).resolve()
+    con = pool.connection()
+    for src in dict.fromkeys(Path(s).resolve() for s in sources):
+        if src == target or not src.is_file():
+            continue
+        pool.commit()  # ATTACH non è ammesso in transazione
+        con.execute("ATTACH DATABASE ? AS legacy", (str(src),))
+        try:
+            with pool.transaction():
+                for table in IMPORT_TABLES:
+                    src_cols = table_columns(con, table, "legacy")
+                    if not src_cols or con.execute(f"SELECT 1 FROM main.{table} LIMIT 1").fetchone():
+                        continue
+                    cols = [c for c in table_columns(con, table) if c in src_cols]
+                    select = ", ".join("CASE WHEN TRIM(profile_name)='' THEN NULL ELSE profile_name END"
+                                       if c == "profile_name" else c for c in cols)
+                    if table in PROFILE_REF_TABLES and "profile_name" in cols:
+                        con.execute(
+                            f"INSERT OR IGNORE INTO main.profiles(name, thickness) SELECT DISTINCT profile_name, 0 "
+                            f"FROM legacy.{table} WHERE TRIM(COALESCE(profile_name, '')) <> ''")
+                    con.execute(f"INSERT OR IGNORE INTO main.{table}({', '.join(cols)}) "
+                                f"SELECT {select} FROM legacy.{table}")
+                    if table == "orders" and "data_json" in src_cols:
+                        _write_orders_json(con, con.execute("SELECT id, data_json FROM legacy.orders").fetchall())
+                    imported.append(f"{src.name}:{table}")
+        finally:
+            con.execute("DETACH DATABASE legacy")
+    if imported:
+        with pool.transaction():
+            search_index.rebuild(con)
+    return imported
+
+
+def open_database(path: Optional[Union[str, Path]] = None) -> ConnectionPool:
+    """
+    Pool del database (predefinito se path è None) con lo schema
+    aggiornato. Il database predefinito riceve i dati dei file separati
+    precedenti finché l'import non è riuscito una volta.
+    """
+    default = default_db_path()
+    p = Path(path) if path else default
+    pool = get_pool(p)
+    migrate(pool)
+    if p.resolve() == default.resolve() and not get_meta(pool.connection(), LEGACY_IMPORT_KEY):
+        try:
+            imported = import_legacy(pool, LEGACY_DB_FILES)
+        except sqlite3.Error as e:
+            # le tabelle già copiate restano; le altre al prossimo tentativo
+            logger.warning("Import dei database precedenti non riuscito (riprovo alla prossima apertura): %s", e)
+        else:
+            with pool.transaction() as con:
+                set_meta(con, LEGACY_IMPORT_KEY, "done")
+            if imported:
+                logger.info("Importati dai database precedenti: %s", ", ".join(imported))
+    return pool
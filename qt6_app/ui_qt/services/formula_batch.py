@@ -0,0 +1,151 @@
+"""
+Valutazione vettoriale delle tipologie su molte misure (H, L).
+
+Per preventivi e listini la stessa tipologia viene calcolata per centinaia
+di misure: qui ogni formula compilata è valutata UNA volta su array NumPy
+(una colonna per riga d'ordine), nell'ordine topologico delle dipendenze
+C_<id_riga> tra componenti (formula_graph). Il risultato è una tabella a colonne.
+"""
+from __future__ import annotations
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from ui_qt.services.formula_compiler import compile_formula
+from ui_qt.services.formula_graph import component_order, is_formula_valid
+
+
+class PartsTable:
+    """
+    Tabella a colonne (array NumPy di pari lunghezza, una riga per pezzo).
+
+    Colonne tipiche: row (indice della misura), component (indice del
+    componente), qty, length, ok (False se la formula non è calcolabile).
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], lengths: Optional[np.ndarray] = None):
+        self.columns = columns
+        self.lengths = lengths  # matrice misure x componenti (NaN = non calcolata)
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def to_rows(self) -> List[Dict[str, Any]]:
+        names = list(self.columns)
+        cols = [self.columns[k].tolist() for k in names]
+        return [dict(zip(names, vals)) for vals in zip(*cols)]
+
+
+def _as_array(value: Any, n: int) -> Any:
+    if isinstance(value, (list, tuple, np.ndarray)):
+        arr = np.asarray(value, dtype=float)
+        if arr.shape != (n,):
+            raise ValueError(f"Attesi {n} valori, trovati {arr.shape}")
+        return arr
+    return value
+
+
+def evaluate_typology_batch(typology: Mapping[str, Any], H: Sequence[float], L: Sequence[float],
+                            row_vars: Optional[Mapping[str, Any]] = None,
+                            env: Optional[Mapping[str, Any]] = None,
+                            qty: Optional[Sequence[int]] = None,
+                            formulas: Optional[Sequence[Optional[str]]] = None) -> PartsTable:
+    """
+    Calcola i componenti di una tipologia (get_typology_full) per n misure.
+
+    Args:
+        typology: dict con "componenti" e "variabili_locali"
+        H, L: array di n misure
+        row_vars: variabili per riga (array di n valori o scalari)
+        env: variabili comuni (es. token profilo -> spessore), sovrascrivono le altre
+        qty: quantità per riga (default 1)
+        formulas: formule alternative per componente (default formula_lunghezza)
+
+    La lunghezza di ogni pezzo è formula + offset_mm; una formula non
+    calcolabile vale 0 (senza offset, come il calcolo riga per riga) e ha
+    ok=False. Come nel calcolo riga per riga, C_<id_riga> è disponibile alle
+    altre formule solo dove il pezzo ha quantità > 0 e i componenti in ciclo
+    sono calcolati nell'ordine del grafo (chi legge un C_ non ancora
+    calcolato vale 0). Le righe in cui una formula legge un C_ assente sono
+    valutate una per una. I componenti senza formula valida non compaiono
+    nella tabella.
+    """
+    H = np.asarray(H, dtype=float)
+    n = len(H)
+    comps = list(typology.get("componenti") or [])
+    exprs = list(formulas) if formulas is not None else [c.get("formula_lunghezza") for c in comps]
+    m = len(comps)
+
+    # Stessa precedenza del calcolo riga per riga: H/L < locali < riga < env
+    scope: Dict[str, Any] = {"H": H, "L": np.asarray(L, dtype=float)}
+    scope.update(typology.get("variabili_locali") or {})
+    for k, v in (row_vars or {}).items():
+        scope[k] = _as_array(v, n)
+    scope.update(env or {})
+
+    row_qty = np.ones(n, dtype=int) if qty is None else np.asarray(qty, dtype=int)
+    lengths = np.full((n, m), np.nan)
+    ok = np.zeros((n, m), dtype=bool)
+    present: Dict[str, np.ndarray] = {}  # C_<id_riga> -> righe in cui il pezzo c'è
+    order, _cyclic = component_order(comps, exprs)
+    for ci in order:
+        expr = exprs[ci]
+        if not is_formula_valid(expr):
+            continue
+        c = comps[ci]
+        offs = float(c.get("offset_mm", 0.0) or 0.0)
+        try:
+            f = compile_formula(expr)
+        except Exception:
+            f = None
+        vals = np.zeros(n)
+        good = np.zeros(n, dtype=bool)
+        if f is not None:
+            # righe in cui manca un C_ letto: valutate una per una, così un ramo
+            # non preso (x if cond else y) non lo richiede, come riga per riga
+            full = np.ones(n, dtype=bool)
+            for name in f.names:
+                if name in present:
+                    full &= present[name]
+            if full.any():
+                try:
+                    v = np.broadcast_to(f.vector(scope), (n,))
+                    vals = np.where(full, v, 0.0)
+                    good = full & np.isfinite(v)
+                except Exception:
+                    full[:] = False  # es. C_ in ciclo non ancora calcolato: riga per riga
+            for j in np.flatnonzero(~full):
+                row = {k: (x[j] if isinstance(x, np.ndarray) else x) for k, x in scope.items()
+                       if not (k in present and not present[k][j])}
+                try:
+                    vals[j] = float(f(row))
+                    good[j] = True
+                except Exception:
+                    pass
+        length = np.where(good, vals + offs, 0.0)
+        lengths[:, ci] = length
+        ok[:, ci] = good
+        rid = str(c.get("id_riga") or "").strip()
+        if rid:
+            scope[f"C_{rid}"] = length
+            present[f"C_{rid}"] = row_qty * int(c.get("quantita", 0) or 0) > 0
+
+    valid = [ci for ci in range(m) if is_formula_valid(exprs[ci])]
+    k = len(valid)
+    comp_qty = np.array([int(comps[ci].get("quantita", 0) or 0) for ci in valid], dtype=int)
+    columns: Dict[str, np.ndarray] = {
+        "row": np.repeat(np.arange(n), k),
+        "component": np.tile(np.array(valid, dtype=int), n),
+        "id_riga": np.tile(np.array([str(comps[ci].get("id_riga") or "") for ci in valid], dtype=object), n),
+        "nome": np.tile(np.array([str(comps[ci].get("nome") or "") for ci in valid], dtype=object), n),
+        "profilo": np.tile(np.array([str(comps[ci].get("profilo_nome") or "") for ci in valid], dtype=object), n),
+        "qty": (row_qty[:, None] * comp_qty[None, :]).reshape(-1),
+        "ang_sx": np.tile(np.array([float(comps[ci].get("ang_sx", 0.0) or 0.0) for ci in valid]), n),
+        "ang_dx": np.tile(np.array([float(comps[ci].get("ang_dx", 0.0) or 0.0) for ci in valid]), n),
+        "length": lengths[:, valid].reshape(-1),
+        "ok": ok[:, valid].reshape(-1),
+    }
+    return PartsTable(columns, lengths)
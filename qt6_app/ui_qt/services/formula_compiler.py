@@ -0,0 +1,249 @@
+"""
+Compilatore di formule (lunghezze, quantità, angoli).
+
+La formula viene analizzata e validata UNA volta (stessa whitelist di
+nodi/funzioni del vecchio valutatore ad albero) e trasformata in bytecode
+Python ristretto, in cache per testo dell'espressione:
+- nessun builtin disponibile, solo le funzioni di _ALLOWED_FUNCS
+- le chiamate sono rinominate (__f_<nome>): una variabile con lo stesso
+  nome nell'env non può sostituire una funzione
+- and/or restituiscono bool come in precedenza
+
+Le valutazioni successive costano un eval() del codice già compilato.
+
+Con NumPy la stessa formula può essere valutata su array (vector()):
+if/else -> where, and/or -> logical_and/or, confronti -> 0.0/1.0, funzioni
+-> equivalenti NumPy. Gli errori per elemento (divisione per zero, dominio)
+diventano NaN/inf invece di eccezioni.
+"""
+from __future__ import annotations
+import ast
+import copy
+import math
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Mapping, Optional, Tuple, Union
+
+_ALLOWED_NODES = {
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Num, ast.Load, ast.Name, ast.Call,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+    ast.USub, ast.UAdd,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Gt, ast.GtE, ast.Lt, ast.LtE,
+    ast.BoolOp, ast.And, ast.Or,
+    ast.IfExp,
+    ast.Constant,
+}
+_ALLOWED_FUNCS = {
+    "abs": abs, "min": min, "max": max, "round": round,
+    "floor": math.floor, "ceil": math.ceil,
+    "sqrt": math.sqrt, "pow": pow,
+    "sin": math.sin, "cos": math.cos, "tan": math.tan,
+    "asin": math.asin, "acos": math.acos, "atan": math.atan,
+    "rad": math.radians, "deg": math.degrees,
+}
+
+_FUNC_PREFIX = "__f_"
+_BOOL = _FUNC_PREFIX + "bool"
+_VEC_PREFIX = "__v_"
+CACHE_SIZE = 4096
+
+
+class _Validator(ast.NodeVisitor):
+    """Controlla la whitelist e raccoglie variabili e funzioni usate."""
+
+    def __init__(self):
+        self.names: Dict[str, None] = {}
+        self.funcs: Dict[str, None] = {}
+
+    def visit(self, node):
+        if type(node) not in _ALLOWED_NODES:
+            raise ValueError(f"Nodo non permesso: {type(node).__name__}")
+        return super().visit(node)
+
+    def visit_Constant(self, node: ast.Constant):
+        if not isinstance(node.value, (int, float, bool)):
+            raise ValueError("Costante non permessa")
+
+    def visit_Name(self, node: ast.Name):
+        self.names[node.id] = None
+
+    def visit_Call(self, node: ast.Call):
+        if not isinstance(node.func, ast.Name):
+            raise ValueError("Funzione non permessa")
+        if node.func.id not in _ALLOWED_FUNCS:
+            raise ValueError(f"Funzione non permessa: {node.func.id}")
+        if node.keywords:
+            raise ValueError("Argomenti con nome non permessi")
+        self.funcs[node.func.id] = None
+        for a in node.args:
+            self.visit(a)
+
+
+class _Rewriter(ast.NodeTransformer):
+    """f(...) -> __f_f(...); a and b -> __f_bool(a and b)."""
+
+    def visit_Call(self, node: ast.Call):
+        self.generic_visit(node)
+        node.func = ast.copy_location(ast.Name(id=_FUNC_PREFIX + node.func.id, ctx=ast.Load()), node.func)
+        return node
+
+    def visit_BoolOp(self, node: ast.BoolOp):
+        self.generic_visit(node)
+        return ast.copy_location(
+            ast.Call(func=ast.Name(id=_BOOL, ctx=ast.Load()), args=[node], keywords=[]), node)
+
+
+_GLOBALS: Dict[str, Any] = {"__builtins__": {}, _BOOL: bool}
+_GLOBALS.update({_FUNC_PREFIX + k: f for k, f in _ALLOWED_FUNCS.items()})
+
+
+def _vcall(name: str, args, node: ast.AST) -> ast.Call:
+    return ast.copy_location(
+        ast.Call(func=ast.Name(id=_VEC_PREFIX + name, ctx=ast.Load()), args=list(args), keywords=[]), node)
+
+
+class _VectorRewriter(ast.NodeTransformer):
+    """Riscrive l'AST validato per la valutazione su array NumPy."""
+
+    def visit_Call(self, node: ast.Call):
+        self.generic_visit(node)
+        return _vcall(node.func.id, node.args, node)
+
+    def visit_IfExp(self, node: ast.IfExp):
+        self.generic_visit(node)
+        return _vcall("where", [node.test, node.body, node.orelse], node)
+
+    def visit_BoolOp(self, node: ast.BoolOp):
+        self.generic_visit(node)
+        return _vcall("and" if isinstance(node.op, ast.And) else "or", node.values, node)
+
+    def visit_Compare(self, node: ast.Compare):
+        self.generic_visit(node)
+        # a < b < c -> and(a < b, b < c); risultato 0.0/1.0 come float
+        pairs = []
+        left = node.left
+        for op, right in zip(node.ops, node.comparators):
+            pairs.append(ast.copy_location(ast.Compare(left=left, ops=[op], comparators=[right]), node))
+            left = right
+        if len(pairs) == 1:
+            return _vcall("float", pairs, node)
+        return _vcall("and", pairs, node)
+
+
+_VGLOBALS: Optional[Dict[str, Any]] = None
+
+
+def _vector_globals() -> Dict[str, Any]:
+    global _VGLOBALS
+    if _VGLOBALS is None:
+        import numpy as np
+
+        def _truth(x):
+            return np.asarray(x) != 0
+
+        def _reduce(fn, name):
+            def f(*args):
+                # come min/max di Python sugli scalari: un solo argomento
+                # (non iterabile) o nessuno è un errore
+                if len(args) < 2:
+                    raise TypeError(f"{name}() richiede almeno 2 argomenti")
+                out = args[0]
+                for a in args[1:]:
+                    out = fn(out, a)
+                return out
+            return f
+
+        def _round(x, nd=0):
+            return np.round(x, int(nd))
+
+        funcs = {
+            "abs": np.abs, "min": _reduce(np.minimum, "min"), "max": _reduce(np.maximum, "max"), "round": _round,
+            "floor": np.floor, "ceil": np.ceil,
+            "sqrt": np.sqrt, "pow": np.power,
+            "sin": np.sin, "cos": np.cos, "tan": np.tan,
+            "asin": np.arcsin, "acos": np.arccos, "atan": np.arctan,
+            "rad": np.radians, "deg": np.degrees,
+        }
+        assert set(funcs) == set(_ALLOWED_FUNCS)
+        g: Dict[str, Any] = {"__builtins__": {}}
+        g.update({_VEC_PREFIX + k: f for k, f in funcs.items()})
+        g[_VEC_PREFIX + "where"] = lambda c, a, b: np.where(_truth(c), a, b)
+        g[_VEC_PREFIX + "and"] = lambda *v: np.logical_and.reduce([_truth(x) for x in v]).astype(float)
+        g[_VEC_PREFIX + "or"] = lambda *v: np.logical_or.reduce([_truth(x) for x in v]).astype(float)
+        g[_VEC_PREFIX + "float"] = lambda x: np.asarray(x, dtype=float)
+        _VGLOBALS = g
+    return _VGLOBALS
+
+
+class CompiledFormula:
+    """Formula validata e compilata; chiamare con l'env delle variabili."""
+
+    __slots__ = ("expr", "names", "funcs", "_code", "_tree", "_vcode")
+
+    def __init__(self, expr: str, tree: ast.Expression, names: Tuple[str, ...], funcs: FrozenSet[str]):
+        self.expr = expr
+        self.names = names      # variabili referenziate, in ordine di comparsa
+        self.funcs = funcs
+        self._tree = tree       # AST validato (per compilazioni alternative)
+        rewritten = ast.fix_missing_locations(_Rewriter().visit(copy.deepcopy(tree)))
+        self._code = compile(rewritten, "<formula>", "eval")
+        self._vcode = None
+
+    def __call__(self, env: Mapping[str, Any]) -> Any:
+        try:
+            return eval(self._code, _GLOBALS, env)
+        except NameError:
+            missing = next((n for n in self.names if n not in env), None)
+            raise ValueError(f"Variabile sconosciuta: {missing}") from None
+
+    def vector(self, env: Mapping[str, Any]):
+        """
+        Valuta la formula su array NumPy (variabili array o scalari).
+
+        Restituisce un array float (o scalare se nessuna variabile è un
+        array); gli errori per elemento diventano NaN/inf.
+        """
+        import numpy as np
+        if self._vcode is None:
+            rewritten = ast.fix_missing_locations(_VectorRewriter().visit(copy.deepcopy(self._tree)))
+            self._vcode = compile(rewritten, "<formula:vector>", "eval")
+        try:
+            with np.errstate(all="ignore"):
+                return np.asarray(eval(self._vcode, _vector_globals(), env), dtype=float)
+        except NameError:
+            missing = next((n for n in self.names if n not in env), None)
+            raise ValueError(f"Variabile sconosciuta: {missing}") from None
+
+    def __repr__(self) -> str:
+        return f"CompiledFormula({self.expr!r})"
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _compile_cached(expr: str) -> Union[CompiledFormula, Exception]:
+    try:
+        tree = ast.parse(expr, mode="eval")
+        v = _Validator()
+        v.visit(tree)
+        return CompiledFormula(expr, tree, tuple(v.names), frozenset(v.funcs))
+    except Exception as e:  # anche gli errori restano in cache
+        return e
+
+
+def compile_formula(expr: str) -> CompiledFormula:
+    """
+    Compila (o recupera dalla cache) una formula.
+
+    Solleva SyntaxError per formule non analizzabili e ValueError per
+    nodi/funzioni fuori whitelist.
+    """
+    res = _compile_cached(expr.strip())
+    if isinstance(res, Exception):
+        raise type(res)(*res.args)  # nuova istanza: niente traceback accumulati
+    return res
+
+
+def clear_cache() -> None:
+    _compile_cached.cache_clear()
+
+
+def cache_info():
+    return _compile_cached.cache_info()
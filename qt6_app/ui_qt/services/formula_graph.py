@@ -0,0 +1,312 @@
+"""
+Grafo delle dipendenze tra formule di una tipologia.
+
+Ogni componente legge variabili (H, L, variabili locali, token profilo)
+e le lunghezze di altri componenti tramite C_<id_riga>. Il grafo è
+costruito con scan_variables e serve a:
+- ordinare il calcolo (ordine topologico stabile)
+- rilevare i cicli (da bloccare al salvataggio)
+- ricalcolare solo i componenti a valle di una variabile o di un
+  componente modificato (FormulaPreview), invece dell'intera tipologia.
+"""
+from __future__ import annotations
+import heapq
+import re
+from collections import deque
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+from ui_qt.services.formula_compiler import compile_formula
+from ui_qt.services.legacy_formula import scan_variables
+
+
+def is_formula_valid(expr: Optional[str]) -> bool:
+    """Formula lunghezza presente (non vuota e diversa da "no"/"-"/"n")."""
+    t = (expr or "").strip().lower()
+    return bool(t) and t not in ("no", "-", "n")
+
+
+def norm_label(s: str) -> str:
+    """Etichetta normalizzata per abbinare formule multiple e componenti."""
+    s = (s or "").strip().lower()
+    s = re.sub(r"[\s_]+", "", s)
+    s = re.sub(r"[^a-z0-9]+", "", s)
+    return s
+
+
+def effective_formulas(components: Sequence[Mapping[str, Any]],
+                       overrides: Optional[Mapping[str, str]] = None) -> List[Optional[str]]:
+    """
+    Formule effettive per componente: la formula del gruppo (formule
+    multiple, chiave = etichetta normalizzata) sostituisce formula_lunghezza
+    del componente con lo stesso nome.
+    """
+    ov = overrides or {}
+    out: List[Optional[str]] = []
+    for c in components:
+        key = norm_label((c.get("nome") or "").strip() or "-")
+        out.append(ov[key] if key in ov else c.get("formula_lunghezza"))
+    return out
+
+
+class FormulaGraph:
+    """
+    Dipendenze tra i componenti di una tipologia.
+
+    Nodi: i componenti (per indice) e le variabili che leggono. Un
+    riferimento di un componente a sé stesso non entra nell'ordinamento
+    ma è riportato da find_cycles().
+    """
+
+    def __init__(self, components: Sequence[Mapping[str, Any]],
+                 formulas: Optional[Sequence[Optional[str]]] = None):
+        n = len(components)
+        self.exprs: List[Optional[str]] = (list(formulas) if formulas is not None
+                                           else [c.get("formula_lunghezza") for c in components])
+        self.ids: List[str] = [str(c.get("id_riga") or "").strip() for c in components]
+        self.token_of: Dict[int, str] = {i: f"C_{rid}" for i, rid in enumerate(self.ids) if rid}
+        self.by_token: Dict[str, int] = {}
+        for i, tok in self.token_of.items():
+            self.by_token.setdefault(tok, i)
+
+        self.names: List[Tuple[str, ...]] = []
+        self.deps: List[Set[int]] = []
+        self.self_refs: Set[int] = set()
+        self.readers: Dict[str, List[int]] = {}
+        for i in range(n):
+            names = tuple(scan_variables(self.exprs[i] or "")) if is_formula_valid(self.exprs[i]) else ()
+            self.names.append(names)
+            d: Set[int] = set()
+            for v in names:
+                self.readers.setdefault(v, []).append(i)
+                j = self.by_token.get(v)
+                if j is None:
+                    continue
+                if j == i:
+                    self.self_refs.add(i)
+                else:
+                    d.add(j)
+            self.deps.append(d)
+        self.dependents: List[List[int]] = [[] for _ in range(n)]
+        for i, d in enumerate(self.deps):
+            for j in sorted(d):
+                self.dependents[j].append(i)
+        self.order, self.cyclic = self._toposort()
+        self._rank = {ci: k for k, ci in enumerate(self.order)}
+
+    def __len__(self) -> int:
+        return len(self.exprs)
+
+    def _toposort(self) -> Tuple[List[int], Set[int]]:
+        n = len(self.exprs)
+        indeg = [len(d) for d in self.deps]
+        ready = [i for i in range(n) if indeg[i] == 0]
+        heapq.heapify(ready)
+        order: List[int] = []
+        while ready:
+            i = heapq.heappop(ready)
+            order.append(i)
+            for k in self.dependents[i]:
+                indeg[k] -= 1
+                if indeg[k] == 0:
+                    heapq.heappush(ready, k)
+        cyclic = {i for i in range(n) if indeg[i] > 0}
+        order.extend(sorted(cyclic))
+        return order, cyclic
+
+    def find_cycles(self) -> List[List[int]]:
+        """
+        Cicli tra componenti, uno per gruppo fortemente connesso:
+        lista di indici con il primo ripetuto in fondo (es. [0, 2, 0]).
+        """
+        cycles: List[List[int]] = [[i, i] for i in sorted(self.self_refs)]
+        seen: Set[int] = set()
+        for start in sorted(self.cyclic):
+            if start in seen:
+                continue
+            path = self._cycle_from(start)
+            if path:
+                seen.update(path)
+                cycles.append(path)
+        return cycles
+
+    def _cycle_from(self, start: int) -> Optional[List[int]]:
+        # BFS sulle dipendenze fino a tornare a start (percorso più corto)
+        prev: Dict[int, int] = {}
+        q = deque([start])
+        while q:
+            i = q.popleft()
+            for j in sorted(self.deps[i]):
+                if j == start:
+                    path = [start]
+                    k = i
+                    while k != start:
+                        path.append(k)
+                        k = prev[k]
+                    path.append(start)
+                    return path[:1] + path[1:-1][::-1] + path[-1:]
+                if j not in prev and j in self.cyclic:
+                    prev[j] = i
+                    q.append(j)
+        return None
+
+    def describe_cycles(self) -> List[str]:
+        """Cicli come testo leggibile: "R1 → R2 → R1"."""
+        return [" → ".join(self.ids[i] or f"#{i + 1}" for i in c) for c in self.find_cycles()]
+
+    def downstream(self, changed: Iterable[str]) -> List[int]:
+        """
+        Componenti da ricalcolare se cambiano i nomi indicati (variabili o
+        token C_<id_riga>), in ordine di calcolo.
+        """
+        todo: Set[int] = set()
+        q = deque()
+        for name in changed:
+            for i in self.readers.get(name, ()):
+                if i not in todo:
+                    todo.add(i); q.append(i)
+        while q:
+            i = q.popleft()
+            for k in self.dependents[i]:
+                if k not in todo:
+                    todo.add(k); q.append(k)
+        return sorted(todo, key=self._rank.__getitem__)
+
+
+def component_order(components: Sequence[Mapping[str, Any]],
+                    formulas: Optional[Sequence[Optional[str]]] = None) -> Tuple[List[int], Set[int]]:
+    """
+    Ordine di calcolo dei componenti secondo i riferimenti C_<id_riga>.
+
+    L'ordinamento è stabile (a parità di dipendenze resta l'ordine
+    originale). Ritorna (indici in ordine, indici coinvolti in cicli);
+    i componenti in ciclo sono accodati in ordine originale.
+    """
+    g = FormulaGraph(components, formulas)
+    return list(g.order), set(g.cyclic)
+
+
+class FormulaPreview:
+    """
+    Valori dei componenti di una tipologia per una misura, ricalcolati in
+    modo incrementale.
+
+    values[i] = formula + offset_mm, oppure 0 (senza offset) se non
+    calcolabile, come nel calcolo della lista di taglio; errors[i] contiene
+    il messaggio.
+    Un componente viene rivalutato solo se cambia un suo ingresso; se il
+    suo valore non cambia, i componenti a valle non vengono toccati.
+    """
+
+    def __init__(self, components: Sequence[Mapping[str, Any]],
+                 env: Optional[Mapping[str, Any]] = None,
+                 formulas: Optional[Sequence[Optional[str]]] = None):
+        self.env: Dict[str, Any] = dict(env or {})
+        self.values: Dict[int, float] = {}
+        self.errors: Dict[int, str] = {}
+        self.components: List[Mapping[str, Any]] = []
+        self.graph = FormulaGraph([], [])
+        self.set_components(components, formulas)
+
+    def _scope(self) -> Dict[str, Any]:
+        scope = dict(self.env)
+        for i, v in self.values.items():
+            tok = self.graph.token_of.get(i)
+            if tok and self.graph.by_token.get(tok) == i:
+                scope[tok] = v
+        return scope
+
+    def _eval(self, i: int, scope: Dict[str, Any]) -> Optional[float]:
+        expr = self.graph.exprs[i]
+        if not is_formula_valid(expr):
+            self.values.pop(i, None); self.errors.pop(i, None)
+            return None
+        offs = float(self.components[i].get("offset_mm", 0.0) or 0.0)
+        try:
+            if i in self.graph.cyclic or i in self.graph.self_refs:
+                raise ValueError("Dipendenza circolare")
+            val = float(compile_formula(expr)(scope)) + offs
+            self.errors.pop(i, None)
+        except Exception as e:
+            val = 0.0
+            self.errors[i] = str(e) or type(e).__name__
+        self.values[i] = val
+        return val
+
+    def _propagate(self, candidates: Sequence[int], dirty: Set[str], forced: Set[int]) -> List[int]:
+        scope = self._scope()
+        done: List[int] = []
+        for i in candidates:
+            if i not in forced and dirty.isdisjoint(self.graph.names[i]):
+                continue
+            old = self.values.get(i)
+            new = self._eval(i, scope)
+            done.append(i)
+            tok = self.graph.token_of.get(i)
+            if tok and self.graph.by_token.get(tok) == i:
+                if new is None:
+                    scope.pop(tok, None)
+                else:
+                    scope[tok] = new
+                if new != old:
+                    dirty.add(tok)
+        return done
+
+    def recompute_all(self) -> List[int]:
+        self.values.clear(); self.errors.clear()
+        order = list(self.graph.order)
+        return self._propagate(order, set(), set(order))
+
+    def update(self, values: Mapping[str, Any]) -> List[int]:
+        """
+        Aggiorna le variabili (H, L, locali, token profilo) e ricalcola solo
+        i componenti a valle di quelle cambiate. Ritorna gli indici
+        ricalcolati. Le variabili assenti da values restano invariate.
+        """
+        changed = {k for k, v in values.items() if k not in self.env or self.env[k] != v}
+        if not changed:
+            return []
+        self.env.update({k: values[k] for k in changed})
+        return self._propagate(self.graph.downstream(changed), set(changed), set())
+
+    def remove(self, names: Iterable[str]) -> List[int]:
+        """Elimina variabili dall'env e ricalcola i componenti che le leggono."""
+        gone = {k for k in names if k in self.env}
+        for k in gone:
+            del self.env[k]
+        return self._propagate(self.graph.downstream(gone), set(gone), set()) if gone else []
+
+    def set_components(self, components: Sequence[Mapping[str, Any]],
+                       formulas: Optional[Sequence[Optional[str]]] = None) -> List[int]:
+        """
+        Sostituisce l'elenco componenti (inserimento, modifica, eliminazione).
+
+        I componenti invariati (stesso id_riga, formula e offset) mantengono
+        il valore; si ricalcolano quelli nuovi o modificati e ciò che ne
+        dipende, compresi i lettori di componenti eliminati.
+        """
+        old_graph, old_comps = self.graph, self.components
+        old_values, old_errors = self.values, self.errors
+        self.components = list(components)
+        self.graph = FormulaGraph(self.components, formulas)
+        g = self.graph
+
+        def _key(graph: FormulaGraph, comps: Sequence[Mapping[str, Any]], i: int):
+            return (graph.exprs[i], float(comps[i].get("offset_mm", 0.0) or 0.0),
+                    i in graph.cyclic or i in graph.self_refs)
+
+        old_by_token = dict(old_graph.by_token)
+        self.values, self.errors = {}, {}
+        forced: Set[int] = set()
+        for i in range(len(g)):
+            tok = g.token_of.get(i)
+            j = old_by_token.get(tok) if tok and g.by_token.get(tok) == i else None
+            if j is not None and j in old_values:
+                self.values[i] = old_values[j]  # anche per il confronto dopo il ricalcolo
+            if j is None or _key(old_graph, old_comps, j) != _key(g, self.components, i):
+                forced.add(i)
+            elif j in old_errors:
+                self.errors[i] = old_errors[j]
+        dirty = {tok for tok in old_by_token if tok not in g.by_token}
+        reach = dirty | {g.token_of[i] for i in forced if i in g.token_of}
+        candidates = forced.union(g.downstream(reach))
+        return self._propagate(sorted(candidates, key=g._rank.__getitem__), dirty, forced)
@@ -0,0 +1,176 @@
+"""
+Rendering delle etichette con cache.
+
+Ogni etichetta veniva disegnata da zero: Image.new, ImageFont.truetype
+(con il fallback al font di default ricercato a ogni stampa), testo,
+rotazione e conversione brother_ql completa. In un piano però le
+etichette della stessa firma (profilo, elemento, lunghezza, angoli)
+differiscono solo nelle righe con seq_id/timestamp.
+
+LabelRenderer tiene in memoria:
+- i font già caricati, per dimensione
+- le righe già rasterizzate (maschere 1 bit per testo e font): le righe
+  fisse del modello vengono solo incollate sulla tela, si disegnano
+  soltanto i campi che cambiano
+- le etichette complete (LRU) per righe, carta, rotazione e font: le
+  etichette interamente statiche non vengono più ridisegnate
+- le istruzioni raster brother_ql dei lavori fatti di sole etichette in
+  cache (instructions), così le ristampe identiche saltano la conversione
+
+Il testo arriva già formattato (lo spooler salva le righe, non il
+modello): lo "strato statico" è quindi l'insieme delle righe in cache e
+non serve sapere quali campi sono variabili.
+
+Le immagini restituite sono condivise con la cache: non vanno modificate.
+"""
+from __future__ import annotations
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+from ui_qt.utils import metrics
+
+_CACHE = metrics.counter("label_render_cache_total", "Label render cache lookups by cache (label, line, instructions) and result")
+
+# Carta -> (larghezza, altezza) in mm
+PAPER_MM = {"DK-11201": (29.0, 90.0), "DK-11202": (62.0, 100.0), "DK-11209": (62.0, 29.0), "DK-22205": (62.0, 100.0)}
+DEFAULT_PAPER = "DK-11201"
+DPI = 300
+MARGIN = 8
+LINE_SPACING = 1.2
+
+KEY_INFO = "label_key"  # chiave di cache in img.info
+
+
+class _LRU:
+    def __init__(self, maxsize: int):
+        self.maxsize = max(1, int(maxsize))
+        self._d: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Any:
+        v = self._d.get(key)
+        if v is not None:
+            self._d.move_to_end(key)
+        return v
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._d[key] = value
+        self._d.move_to_end(key)
+        while len(self._d) > self.maxsize:
+            self._d.popitem(last=False)
+
+    def clear(self) -> None:
+        self._d.clear()
+
+    def __len__(self) -> int:
+        return len(self._d)
+
+
+def label_size(paper: Optional[str]) -> Tuple[int, int]:
+    """Dimensioni in pixel (300 dpi) della carta."""
+    w_mm, h_mm = PAPER_MM.get(paper or DEFAULT_PAPER, PAPER_MM[DEFAULT_PAPER])
+    return int(round((w_mm / 25.4) * DPI)), int(round((h_mm / 25.4) * DPI))
+
+
+class LabelRenderer:
+    """Disegna le etichette riusando font, righe, immagini e istruzioni già calcolati."""
+
+    def __init__(self, pil: Dict[str, Any], font_name: str = "arial.ttf",
+                 max_labels: int = 128, max_lines: int = 2048, max_instructions: int = 64):
+        self._Image = pil["Image"]
+        self._ImageDraw = pil["ImageDraw"]
+        self._ImageFont = pil["ImageFont"]
+        self.font_name = font_name
+        self._lock = threading.RLock()
+        self._fonts: Dict[int, Any] = {}
+        self._blank: Dict[Tuple[int, int], Any] = {}
+        self._lines = _LRU(max_lines)
+        self._labels = _LRU(max_labels)
+        self._instructions = _LRU(max_instructions)
+
+    def font(self, size: int) -> Any:
+        with self._lock:
+            f = self._fonts.get(size)
+            if f is None:
+                try:
+                    f = self._ImageFont.truetype(self.font_name, size)
+                except Exception:
+                    f = self._ImageFont.load_default()
+                self._fonts[size] = f
+            return f
+
+    def _line(self, text: str, size: int) -> Optional[Tuple[Any, int, int]]:
+        # (maschera dell'inchiostro, dx, dy) rispetto al punto di disegno
+        key = (text, size)
+        hit = self._lines.get(key)
+        if hit is not None:
+            _CACHE.inc(cache="line", result="hit")
+            return hit or None
+        _CACHE.inc(cache="line", result="miss")
+        font = self.font(size)
+        left, top, right, bottom = font.getbbox(text) if text else (0, 0, 0, 0)
+        # getbbox può stringere l'ultimo glifo: si disegna con margine e si
+        # ritaglia sull'inchiostro effettivo
+        pad = max(8, size // 2)
+        mask = self._Image.new("1", (max(0, right - left) + 2 * pad, max(0, bottom - top) + 2 * pad), 0)
+        ox, oy = pad - left, pad - top
+        self._ImageDraw.Draw(mask).text((ox, oy), text, fill=1, font=font)
+        ink = mask.getbbox()
+        if ink is None:
+            self._lines.put(key, ())
+            return None
+        entry = (mask.crop(ink), ink[0] - ox, ink[1] - oy)
+        self._lines.put(key, entry)
+        return entry
+
+    def render(self, lines: Sequence[Any], paper: Optional[str] = None, rotate: int = 0,
+               font_size: int = 32) -> Any:
+        """Immagine 1 bit dell'etichetta (condivisa con la cache, da non modificare)."""
+        texts = tuple(str(x) for x in lines)
+        fs = int(font_size or 32)
+        rot = int(rotate or 0)
+        key = (texts, paper or DEFAULT_PAPER, rot, fs)
+        with self._lock:
+            img = self._labels.get(key)
+            if img is not None:
+                _CACHE.inc(cache="label", result="hit")
+                return img
+            _CACHE.inc(cache="label", result="miss")
+            size = label_size(paper)
+            blank = self._blank.get(size)
+            if blank is None:
+                blank = self._blank[size] = self._Image.new("1", size, 1)
+            img = blank.copy()
+            y = MARGIN
+            for text in texts:
+                entry = self._line(text, fs)
+                if entry:
+                    mask, dx, dy = entry
+                    img.paste(0, (MARGIN + dx, y + dy), mask)
+                y += int(fs * LINE_SPACING)
+            if rot in (90, 180, 270):
+                img = img.rotate(rot, expand=True)
+            img.info[KEY_INFO] = key
+            self._labels.put(key, img)
+            return img
+
+    def instructions(self, key: Hashable, build: Callable[[], bytes]) -> bytes:
+        """Istruzioni raster per key, calcolate con build() solo la prima volta."""
+        with self._lock:
+            data = self._instructions.get(key)
+        if data is not None:
+            _CACHE.inc(cache="instructions", result="hit")
+            return data
+        _CACHE.inc(cache="instructions", result="miss")
+        data = build()
+        with self._lock:
+            self._instructions.put(key, data)
+        return data
+
+    def clear(self) -> None:
+        with self._lock:
+            self._fonts.clear()
+            self._blank.clear()
+            self._lines.clear()
+            self._labels.clear()
+            self._instructions.clear()
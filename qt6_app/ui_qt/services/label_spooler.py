@@ -0,0 +1,291 @@
+"""
+Spooler di stampa etichette.
+
+AutomaticoPage._emit_label stampava sul thread della GUI: rendering PIL,
+conversione brother_ql e scrittura sul backend. Una stampante lenta o
+spenta ritardava il posizionamento successivo.
+
+Ora l'etichetta viene solo accodata (riga in label_jobs, pochi ms) e un
+thread dedicato la stampa:
+- le etichette accumulate mentre stampava la precedente (stessa carta e
+  taglio) partono insieme, in un solo lavoro brother_ql
+- in caso di errore il lotto viene ritentato con attesa crescente
+  (backoff esponenziale); i tentativi si contano per etichetta e dopo
+  max_attempts l'etichetta resta in label_jobs come 'failed' finché
+  retry_failed() non la rimette in coda
+- anche le scritture su label_jobs fatte dal thread (database occupato)
+  vengono ritentate con backoff invece di fermare lo spooler
+- i lavori 'pending' rimasti nel database alla chiusura vengono ripresi
+  alla creazione dello spooler successivo; chi lo crea deve chiamare
+  shutdown() in uscita, altrimenti un'etichetta già stampata ma non
+  ancora tolta da label_jobs verrebbe ristampata
+- l'ordine di taglio è rispettato: un lotto in errore blocca i successivi
+
+La coda è limitata (max_pending): oltre, submit rifiuta l'etichetta invece
+di far crescere la memoria. Gli esiti arrivano a on_event(livello,
+messaggio) dal thread dello spooler: chi aggiorna la GUI deve riportarli
+sul thread principale (es. con un Signal).
+
+Il printer passato deve offrire render_label(lines, paper, rotate,
+font_size) -> immagine e send_labels(images, paper, cut) -> "printed" |
+"simulated" (eccezione se la stampa fallisce), vedi LabelPrinter.
+"""
+from __future__ import annotations
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Deque, List, Optional, Sequence, Union
+
+from ui_qt.services import database
+from ui_qt.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+_LABELS = metrics.counter("labels_total", "Label print attempts by result "
+                          "(printed, simulated, error, unavailable, dropped, failed)")
+_QUEUE_DEPTH = metrics.gauge("label_queue_depth", "Labels waiting in the print spooler")
+_BATCH_S = metrics.histogram("label_batch_seconds", "Duration of one spooled print job (render + send)")
+
+EventCallback = Callable[[str, str], None]
+
+
+@dataclass
+class LabelJob:
+    id: int
+    lines: List[str]
+    paper: Optional[str] = None
+    rotate: int = 0
+    font_size: int = 32
+    cut: bool = True
+    attempts: int = 0
+
+    def batch_key(self) -> tuple:
+        # carta e taglio valgono per tutto il lavoro brother_ql
+        return (self.paper, self.cut)
+
+
+class LabelSpooler:
+    """Coda di stampa persistente servita da un thread dedicato."""
+
+    def __init__(self, printer: Any, db_path: Optional[Union[str, Path]] = None, *,
+                 max_pending: int = 500, batch_max: int = 10, max_attempts: int = 5,
+                 backoff_s: float = 0.5, backoff_max_s: float = 30.0,
+                 on_event: Optional[EventCallback] = None, autostart: bool = True):
+        self.printer = printer
+        self.max_pending = max(1, int(max_pending))
+        self.batch_max = max(1, int(batch_max))
+        self.max_attempts = max(1, int(max_attempts))
+        self.backoff_s = float(backoff_s)
+        self.backoff_max_s = float(backoff_max_s)
+        self.on_event = on_event
+        self._db = database.open_database(db_path)
+        self._cond = threading.Condition()
+        self._queue: Deque[LabelJob] = deque()
+        self._stop = False
+        self._busy = False
+        self._thread: Optional[threading.Thread] = None
+        self._load_pending()
+        if autostart:
+            self.start()
+
+    # ---- Coda ----
+    def _load_pending(self) -> None:
+        cur = self._db.execute(
+            "SELECT id, lines_json, paper, rotate, font_size, cut, attempts FROM label_jobs "
+            "WHERE status='pending' ORDER BY id")
+        for r in cur.fetchall():
+            self._queue.append(LabelJob(int(r[0]), json.loads(r[1]), r[2], int(r[3]), int(r[4]), bool(r[5]), int(r[6])))
+        _QUEUE_DEPTH.set(len(self._queue))
+        if self._queue:
+            logger.info("Spooler etichette: %d lavori ripresi dalla coda", len(self._queue))
+
+    def submit(self, lines: Sequence[str], paper: Optional[str] = None, rotate: int = 0,
+               font_size: int = 32, cut: bool = True) -> bool:
+        """Accoda un'etichetta e ritorna subito; False se la coda è piena."""
+        with self._cond:
+            if len(self._queue) >= self.max_pending:
+                _LABELS.inc(result="dropped")
+                self._emit("warn", f"Coda etichette piena ({self.max_pending}): etichetta scartata.")
+                return False
+        lines = [str(x) for x in lines]
+        with self._db.transaction() as con:
+            cur = con.execute(
+                "INSERT INTO label_jobs(lines_json, paper, rotate, font_size, cut, created_at) VALUES(?,?,?,?,?,?)",
+                (json.dumps(lines, ensure_ascii=False), paper, int(rotate), int(font_size), int(bool(cut)),
+                 int(time.time())))
+            job = LabelJob(int(cur.lastrowid), lines, paper, int(rotate), int(font_size), bool(cut))
+        with self._cond:
+            self._queue.append(job)
+            _QUEUE_DEPTH.set(len(self._queue))
+            self._cond.notify_all()
+        return True
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._queue) + (1 if self._busy else 0)
+
+    def failed_count(self) -> int:
+        return int(self._db.execute("SELECT COUNT(*) FROM label_jobs WHERE status='failed'").fetchone()[0])
+
+    def retry_failed(self) -> int:
+        """Rimette in coda (in fondo) i lavori falliti; ritorna quanti."""
+        with self._db.transaction() as con:
+            rows = con.execute(
+                "SELECT id, lines_json, paper, rotate, font_size, cut FROM label_jobs "
+                "WHERE status='failed' ORDER BY id").fetchall()
+            con.execute("UPDATE label_jobs SET status='pending', attempts=0, last_error=NULL WHERE status='failed'")
+        with self._cond:
+            for r in rows:
+                self._queue.append(LabelJob(int(r[0]), json.loads(r[1]), r[2], int(r[3]), int(r[4]), bool(r[5])))
+            _QUEUE_DEPTH.set(len(self._queue))
+            self._cond.notify_all()
+        return len(rows)
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Attende che la coda sia vuota (test, chiusura ordinata)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._queue or self._busy:
+                left = None if deadline is None else deadline - time.monotonic()
+                if left is not None and left <= 0:
+                    return False
+                self._cond.wait(left)
+        return True
+
+    # ---- Thread ----
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, name="label-spooler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """Ferma il thread; i lavori non stampati restano in label_jobs."""
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Chiusura ordinata: attende la coda (al più timeout) e ferma il thread.
+
+        Il lotto in stampa viene comunque completato e tolto da label_jobs.
+        """
+        if not self.wait_idle(timeout):
+            logger.warning("Spooler etichette: %d lavori ancora in coda alla chiusura", self.pending())
+        self.stop(timeout)
+
+    def _next_batch(self) -> List[LabelJob]:
+        # chiamata con self._cond acquisito e coda non vuota
+        key = self._queue[0].batch_key()
+        batch: List[LabelJob] = []
+        while self._queue and len(batch) < self.batch_max and self._queue[0].batch_key() == key:
+            batch.append(self._queue.popleft())
+        return batch
+
+    def _run(self) -> None:
+        try:
+            while True:
+                with self._cond:
+                    while not self._queue and not self._stop:
+                        self._cond.wait()
+                    if self._stop:
+                        return
+                    batch = self._next_batch()
+                    self._busy = True
+                try:
+                    delay = self._print_batch(batch)
+                except Exception:
+                    # es. label_jobs illeggibile: il lotto torna in testa e si riprova
+                    logger.exception("Spooler etichette: errore inatteso, lotto rimesso in coda")
+                    with self._cond:
+                        self._queue.extendleft(reversed(batch))
+                    delay = self.backoff_max_s
+                finally:
+                    with self._cond:
+                        self._busy = False
+                        _QUEUE_DEPTH.set(len(self._queue))
+                        self._cond.notify_all()
+                if delay:
+                    with self._cond:
+                        self._cond.wait_for(lambda: self._stop, delay)
+        finally:
+            self._db.release()
+
+    def _print_batch(self, batch: List[LabelJob]) -> float:
+        """Stampa un lotto; ritorna l'attesa prima del prossimo tentativo (0 se finito)."""
+        t0 = time.perf_counter()
+        try:
+            images = [self.printer.render_label(j.lines, j.paper, j.rotate, j.font_size) for j in batch]
+            result = self.printer.send_labels(images, batch[0].paper, batch[0].cut)
+        except Exception as e:
+            _BATCH_S.observe(time.perf_counter() - t0)
+            _LABELS.inc(len(batch), result="error")
+            return self._retry(batch, e)
+        _BATCH_S.observe(time.perf_counter() - t0)
+        _LABELS.inc(len(batch), result=result)
+        self._write("DELETE FROM label_jobs WHERE id=?", [(j.id,) for j in batch])
+        if result == "simulated":
+            self._emit("info", "Etichetta simulata (stampante non configurata).")
+        return 0.0
+
+    def _retry(self, batch: List[LabelJob], error: Exception) -> float:
+        # tentativi per etichetta: un lotto può unire etichette già ritentate e nuove
+        msg = str(error) or type(error).__name__
+        for j in batch:
+            j.attempts += 1
+        failed = [j for j in batch if j.attempts >= self.max_attempts]
+        again = [j for j in batch if j.attempts < self.max_attempts]
+        if failed:
+            self._write("UPDATE label_jobs SET status='failed', attempts=?, last_error=? WHERE id=?",
+                        [(j.attempts, msg, j.id) for j in failed])
+            _LABELS.inc(len(failed), result="failed")
+            self._emit("err", f"Etichette non stampate ({len(failed)}): {msg}")
+        if not again:
+            return 0.0
+        self._write("UPDATE label_jobs SET attempts=?, last_error=? WHERE id=?",
+                    [(j.attempts, msg, j.id) for j in again])
+        with self._cond:
+            # di nuovo in testa: l'ordine di stampa segue quello di taglio
+            self._queue.extendleft(reversed(again))
+        attempts = max(j.attempts for j in again)
+        delay = min(self.backoff_max_s, self.backoff_s * (2 ** (attempts - 1)))
+        if any(j.attempts == 1 for j in again):
+            self._emit("warn", f"Errore stampa: {msg} (nuovo tentativo)")
+        logger.warning("Stampa etichette fallita (tentativo %d/%d): %s; riprovo tra %.1fs",
+                       attempts, self.max_attempts, msg, delay)
+        return delay
+
+    def _write(self, sql: str, params: List[tuple]) -> bool:
+        """Scrittura su label_jobs dal thread, ritentata se il database è occupato.
+
+        False solo se lo spooler viene fermato prima di riuscire: i lavori
+        restano allora 'pending' e vengono ripresi al prossimo avvio.
+        """
+        delay = self.backoff_s
+        while True:
+            try:
+                with self._db.transaction() as con:
+                    con.executemany(sql, params)
+                return True
+            except sqlite3.OperationalError as e:
+                logger.warning("Spooler etichette: scrittura su label_jobs fallita (%s); riprovo tra %.1fs", e, delay)
+            with self._cond:
+                if self._cond.wait_for(lambda: self._stop, delay):
+                    return False
+            delay = min(self.backoff_max_s, delay * 2)
+
+    def _emit(self, level: str, msg: str) -> None:
+        if self.on_event:
+            try:
+                self.on_event(level, msg)
+            except Exception:
+                logger.debug("on_event fallita", exc_info=True)
@@ -24,16 +24,29 @@ from typing import Optional, Dict, Any, List
 import logging
 import json
 
-try:
-    from bleak import BleakClient, BleakScanner
-    HAS_BLEAK = True
-except ImportError:
-    HAS_BLEAK = False
-    BleakClient = None
-    BleakScanner = None
+# bleak is imported on first use (scan/connect/is_available): importing it
+# pulls in dbus/asyncio backends and slows application startup.
+HAS_BLEAK: Optional[bool] = None
+BleakClient = None
+BleakScanner = None
 
 logger = logging.getLogger("metro_digitale_manager")
 
+
+def _load_bleak() -> bool:
+    """Import bleak once; returns availability."""
+    global HAS_BLEAK, BleakClient, BleakScanner
+    if HAS_BLEAK is None:
+        try:
+            from bleak import BleakClient as _Client, BleakScanner as _Scanner
+            BleakClient, BleakScanner = _Client, _Scanner
+            HAS_BLEAK = True
+        except ImportError:
+            HAS_BLEAK = False
+            logger.error("Bleak library not available for Metro Digitale")
+            logger.error("Install bleak: pip install bleak")
+    return HAS_BLEAK
+
 # Metro Digitale BLE Protocol
 SERVICE_UUID = "12345678-1234-1234-1234-123456789abc"
 CHAR_TX_UUID = "12345678-1234-1234-1234-123456789abd"  # Metro → App
@@ -70,10 +83,6 @@ class MetroDigitaleManager(QObject):
         super().__init__()
         self._initialized = True
         
-        if not HAS_BLEAK:
-            logger.error("Bleak library not available for Metro Digitale")
-            logger.error("Install bleak: pip install bleak")
-        
         self.client: Optional[BleakClient] = None
         self._current_page: Optional[str] = None
         self._connected = False
@@ -84,7 +93,7 @@ class MetroDigitaleManager(QObject):
     
     def is_available(self) -> bool:
         """Check if metro receiver is available."""
-        return HAS_BLEAK
+        return _load_bleak()
     
     def set_current_page(self, page_name: str):
         """
@@ -98,9 +107,6 @@ class MetroDigitaleManager(QObject):
     
     def try_auto_reconnect(self):
         """Attempt auto-reconnect to last device."""
-        if not self.is_available():
-            return
-        
         try:
             from ui_qt.utils.settings import read_settings
             settings = read_settings()
@@ -117,6 +123,10 @@ class MetroDigitaleManager(QObject):
             logger.info("No previous metro device saved")
             return
         
+        # Checked after the settings so bleak is not imported when unused
+        if not self.is_available():
+            return
+        
         logger.info(f"Attempting auto-reconnect to {last_address}...")
         
         # Schedule connection attempt (non-blocking)
@@ -141,7 +151,7 @@ class MetroDigitaleManager(QObject):
     
     async def _scan_async(self, timeout: float = 5.0) -> List[Dict[str, str]]:
         """Async scan for Metro Digitale devices."""
-        if not HAS_BLEAK:
+        if not _load_bleak():
             return []
         
         try:
@@ -184,6 +194,8 @@ class MetroDigitaleManager(QObject):
         """Async connect to metro device."""
         try:
             logger.info(f"Connecting to {address}...")
+            if not _load_bleak():
+                return False
             
             self.client = BleakClient(
                 address,
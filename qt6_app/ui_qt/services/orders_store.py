@@ -3,99 +3,277 @@ import sqlite3
 import json
 import time
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
+from ui_qt.services import database, search_index
 from ui_qt.services.typologies_store import default_db_path
+from ui_qt.utils.db_pool import atomic
 
-SCHEMA = """
-PRAGMA foreign_keys=ON;
-
-CREATE TABLE IF NOT EXISTS orders (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    name TEXT NOT NULL,
-    customer TEXT,
-    data_json TEXT NOT NULL,        -- JSON serializzato della commessa (rows + meta)
-    created_at INTEGER,
-    updated_at INTEGER
-);
-
-CREATE INDEX IF NOT EXISTS idx_orders_customer ON orders(customer);
-"""
+# Stato di lavorazione dell'ordine (colonna orders.status)
+ORDER_STATUSES = ("pending", "in_progress", "done", "cancelled")
 
 def _now_ts() -> int:
     return int(time.time())
 
 def default_orders_db_path() -> Path:
-    # usa lo stesso DB delle tipologie per comodità
+    # database unico, come le tipologie (tabella orders: services/database.py)
     return default_db_path()
 
+# ---- Righe e tagli normalizzati ----
+# L'ordine non è più un unico data_json: le righe commessa ("rows") vanno
+# in order_rows, i tagli delle cutlist ("cuts") in order_cuts, il resto
+# (saved_at, customer, type, ...) in orders.meta_json. Le chiavi note
+# hanno una colonna; quelle sconosciute o non convertibili restano in
+# extra_json, così get_order ricostruisce il dict salvato.
+
+def _dumps(v: Any) -> str:
+    return json.dumps(v, ensure_ascii=False)
+
+# (chiave nel dict, colonna, verso DB, dal DB)
+_Spec = Sequence[Tuple[str, str, Callable[[Any], Any], Callable[[Any], Any]]]
+
+ROW_SPEC: _Spec = (
+    ("tid", "typology_id", int, int),
+    ("qty", "qty", int, int),
+    ("H", "h_mm", float, float),
+    ("L", "l_mm", float, float),
+    ("vars", "vars_json", lambda v: _dumps(dict(v)), json.loads),
+    ("formula_group", "formula_group", str, str),
+)
+
+CUT_SPEC: _Spec = (
+    ("profile", "profile_name", str, str),
+    ("element", "element", str, str),
+    ("length_mm", "length_mm", float, float),
+    ("ang_sx", "ang_sx", float, float),
+    ("ang_dx", "ang_dx", float, float),
+    ("qty", "qty", int, int),
+    ("note", "note", str, str),
+)
+
+def _split_item(item: Dict[str, Any], spec: _Spec) -> List[Any]:
+    extra = dict(item) if isinstance(item, dict) else {}
+    values: List[Any] = []
+    for key, _col, to_db, _from_db in spec:
+        v = extra.pop(key, None)
+        try:
+            values.append(None if v is None else to_db(v))
+        except (TypeError, ValueError):
+            values.append(None); extra[key] = v
+    values.append(_dumps(extra) if extra else None)
+    return values
+
+def _join_item(values: Sequence[Any], spec: _Spec) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for (key, _col, _to_db, from_db), v in zip(spec, values):
+        if v is not None:
+            out[key] = from_db(v)
+    if values[len(spec)]:
+        out.update(json.loads(values[len(spec)]))
+    return out
+
+def _cols(spec: _Spec) -> str:
+    return ", ".join([c for _k, c, _t, _f in spec] + ["extra_json"])
+
+def order_kind(data: Dict[str, Any]) -> str:
+    return "cutlist" if str(data.get("type") or "").strip().lower() == "cutlist" else "commessa"
+
+def write_order_data(con: sqlite3.Connection, order_id: int, data: Dict[str, Any]) -> None:
+    """Scrive righe, tagli e metadati di un ordine (sostituisce quelli presenti)."""
+    data = data if isinstance(data, dict) else {}
+    meta = {k: v for k, v in data.items() if k not in ("rows", "cuts")}
+    oid = int(order_id)
+    con.execute("UPDATE orders SET kind=?, meta_json=? WHERE id=?", (order_kind(data), _dumps(meta), oid))
+    con.execute("DELETE FROM order_rows WHERE order_id=?", (oid,))
+    con.execute("DELETE FROM order_cuts WHERE order_id=?", (oid,))
+    for table, key, spec in (("order_rows", "rows", ROW_SPEC), ("order_cuts", "cuts", CUT_SPEC)):
+        items = data.get(key) or []
+        if not isinstance(items, list):
+            continue
+        marks = ",".join("?" * (len(spec) + 3))
+        con.executemany(
+            f"INSERT INTO {table}(order_id, ord, {_cols(spec)}) VALUES({marks})",
+            ([oid, i] + _split_item(it, spec) for i, it in enumerate(items)))
+
 class OrdersStore:
     def __init__(self, db_path: Optional[str] = None):
         self.db_path = Path(db_path) if db_path else default_orders_db_path()
-        self._conn: Optional[sqlite3.Connection] = None
-        self._open()
-        self._ensure_schema()
-
-    def _open(self):
-        self._conn = sqlite3.connect(str(self.db_path))
-        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._db = database.open_database(self.db_path)
 
-    def _ensure_schema(self):
-        assert self._conn is not None
-        self._conn.executescript(SCHEMA)
-        self._conn.commit()
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        return self._db.connection()
 
     def close(self):
-        if self._conn:
-            try:
-                self._conn.close()
-            except Exception:
-                pass
-        self._conn = None
-
-    def create_order(self, name: str, customer: str, data: Dict[str, Any]) -> int:
+        # la connessione del thread è condivisa con gli altri store sullo
+        # stesso file: la chiude solo close_all_pools() all'uscita
+        pass
+
+    @atomic
+    def create_order(self, name: str, customer: str, data: Dict[str, Any], status: str = "pending") -> int:
         ts = _now_ts()
-        jd = json.dumps(data, ensure_ascii=False)
         cur = self._conn.execute(
-            "INSERT INTO orders(name,customer,data_json,created_at,updated_at) VALUES(?,?,?,?,?)",
-            (name, customer or "", jd, ts, ts)
+            "INSERT INTO orders(name,customer,status,created_at,updated_at) VALUES(?,?,?,?,?)",
+            (name, customer or "", self._check_status(status), ts, ts)
         )
-        self._conn.commit()
-        return int(cur.lastrowid)
+        oid = int(cur.lastrowid)
+        write_order_data(self._conn, oid, data)
+        search_index.index_order(self._conn, oid)
+        self._db.commit()
+        return oid
 
+    @atomic
     def update_order(self, order_id: int, name: str, customer: str, data: Dict[str, Any]) -> None:
         ts = _now_ts()
-        jd = json.dumps(data, ensure_ascii=False)
         self._conn.execute(
-            "UPDATE orders SET name=?, customer=?, data_json=?, updated_at=? WHERE id=?",
-            (name, customer or "", jd, ts, int(order_id))
+            "UPDATE orders SET name=?, customer=?, updated_at=? WHERE id=?",
+            (name, customer or "", ts, int(order_id))
         )
-        self._conn.commit()
+        write_order_data(self._conn, int(order_id), data)
+        search_index.index_order(self._conn, int(order_id))
+        self._db.commit()
 
+    @atomic
+    def rename_order(self, order_id: int, name: str) -> None:
+        self._conn.execute("UPDATE orders SET name=?, updated_at=? WHERE id=?", (name, _now_ts(), int(order_id)))
+        search_index.index_order(self._conn, int(order_id))
+        self._db.commit()
+
+    @staticmethod
+    def _check_status(status: str) -> str:
+        if status not in ORDER_STATUSES:
+            raise ValueError(f"Stato ordine non valido: {status!r} (ammessi: {', '.join(ORDER_STATUSES)})")
+        return status
+
+    def set_status(self, order_id: int, status: str) -> None:
+        self._conn.execute("UPDATE orders SET status=?, updated_at=? WHERE id=?",
+                           (self._check_status(status), _now_ts(), int(order_id)))
+        self._db.commit()
+
+    @atomic
     def delete_order(self, order_id: int) -> None:
+        # righe e tagli: ON DELETE CASCADE
         self._conn.execute("DELETE FROM orders WHERE id=?", (int(order_id),))
-        self._conn.commit()
+        search_index.unindex_order(self._conn, int(order_id))
+        self._db.commit()
 
     def get_order(self, order_id: int) -> Optional[Dict[str, Any]]:
-        r = self._conn.execute("SELECT id,name,customer,data_json,created_at,updated_at FROM orders WHERE id=?", (int(order_id),)).fetchone()
+        oid = int(order_id)
+        r = self._conn.execute(
+            "SELECT id,name,customer,meta_json,created_at,updated_at,kind,status FROM orders WHERE id=?", (oid,)).fetchone()
         if not r:
             return None
         try:
             data = json.loads(r[3]) if r[3] else {}
         except Exception:
             data = {}
-        return {"id": int(r[0]), "name": r[1], "customer": r[2], "data": data, "created_at": int(r[4]), "updated_at": int(r[5])}
+        rows = [_join_item(v, ROW_SPEC) for v in self._conn.execute(
+            f"SELECT {_cols(ROW_SPEC)} FROM order_rows WHERE order_id=? ORDER BY ord", (oid,))]
+        cuts = [_join_item(v, CUT_SPEC) for v in self._conn.execute(
+            f"SELECT {_cols(CUT_SPEC)} FROM order_cuts WHERE order_id=? ORDER BY ord", (oid,))]
+        if rows or r[6] != "cutlist":
+            data["rows"] = rows
+        if cuts or r[6] == "cutlist":
+            data["cuts"] = cuts
+        return {"id": int(r[0]), "name": r[1], "customer": r[2], "data": data, "created_at": int(r[4]), "updated_at": int(r[5]),
+                "kind": r[6], "status": r[7]}
+
+    @staticmethod
+    def _summary(r) -> Dict[str, Any]:
+        return {"id": int(r[0]), "name": r[1], "customer": r[2], "created_at": int(r[3]), "updated_at": int(r[4]),
+                "kind": r[5], "status": r[6]}
 
-    def list_orders(self, limit: int = 200) -> List[Dict[str, Any]]:
-        cur = self._conn.execute("SELECT id,name,customer,created_at,updated_at FROM orders ORDER BY updated_at DESC LIMIT ?", (int(limit),))
-        out = []
-        for r in cur.fetchall():
-            out.append({"id": int(r[0]), "name": r[1], "customer": r[2], "created_at": int(r[3]), "updated_at": int(r[4])})
-        return out
+    def list_orders(self, limit: int = 200, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        if status:
+            cur = self._conn.execute(
+                "SELECT id,name,customer,created_at,updated_at,kind,status FROM orders WHERE status=? "
+                "ORDER BY updated_at DESC LIMIT ?", (status, int(limit)))
+        else:
+            cur = self._conn.execute(
+                "SELECT id,name,customer,created_at,updated_at,kind,status FROM orders ORDER BY updated_at DESC LIMIT ?",
+                (int(limit),))
+        return [self._summary(r) for r in cur.fetchall()]
 
     def list_orders_by_customer(self, customer: str, limit: int = 200) -> List[Dict[str, Any]]:
-        cur = self._conn.execute("SELECT id,name,customer,created_at,updated_at FROM orders WHERE customer=? ORDER BY updated_at DESC LIMIT ?", (customer, int(limit)))
-        out = []
-        for r in cur.fetchall():
-            out.append({"id": int(r[0]), "name": r[1], "customer": r[2], "created_at": int(r[3]), "updated_at": int(r[4])})
-        return out
+        cur = self._conn.execute(
+            "SELECT id,name,customer,created_at,updated_at,kind,status FROM orders WHERE customer=? "
+            "ORDER BY updated_at DESC LIMIT ?", (customer, int(limit)))
+        return [self._summary(r) for r in cur.fetchall()]
+
+    # ---- Ricerca (FTS5, services/search_index.py) ----
+    def search(self, text: Optional[str] = None, **filters: Any) -> List[Dict[str, Any]]:
+        """Ordini per testo (prefissi su nome, cliente, profili, elementi, tipologie) e filtri
+        customer / date_from / date_to / profile / status / limit / offset."""
+        return search_index.search_orders(self._conn, text, **filters)
+
+    def facets(self, text: Optional[str] = None, **filters: Any) -> Dict[str, List[Tuple[str, int]]]:
+        """Conteggi per cliente, profilo e mese degli ordini selezionati."""
+        return search_index.order_facets(self._conn, text, **filters)
+
+    # ---- Letture in streaming e aggregazioni SQL ----
+    def _where_orders(self, order_ids: Optional[Iterable[int]], statuses: Optional[Iterable[str]]) -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        if order_ids is not None:
+            ids = [int(i) for i in order_ids]
+            clauses.append(f"o.id IN ({','.join('?' * len(ids)) or 'NULL'})"); params += ids
+        if statuses is not None:
+            sts = list(statuses)
+            clauses.append(f"o.status IN ({','.join('?' * len(sts)) or 'NULL'})"); params += sts
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def iter_cuts(self, order_ids: Optional[Iterable[int]] = None, statuses: Optional[Iterable[str]] = None,
+                  batch: int = 500) -> Iterator[Dict[str, Any]]:
+        """
+        Tagli degli ordini indicati (o di tutti), a blocchi di `batch` righe:
+        nessun ordine viene caricato per intero. Ogni taglio ha anche
+        order_id e thickness (spessore del profilo, JOIN su profiles).
+        """
+        where, params = self._where_orders(order_ids, statuses)
+        cols = ", ".join(f"c.{c}" for c in _cols(CUT_SPEC).split(", "))
+        cur = self._conn.execute(
+            f"SELECT {cols}, c.order_id, p.thickness FROM orders o "
+            f"JOIN order_cuts c ON c.order_id = o.id "
+            f"LEFT JOIN profiles p ON p.name = c.profile_name{where} "
+            f"ORDER BY c.order_id, c.ord", params)
+        n = len(CUT_SPEC) + 1
+        while True:
+            chunk = cur.fetchmany(batch)
+            if not chunk:
+                return
+            for r in chunk:
+                cut = _join_item(r[:n], CUT_SPEC)
+                cut["order_id"] = int(r[n]); cut["thickness"] = float(r[n + 1] or 0.0)
+                yield cut
+
+    def iter_rows(self, order_ids: Optional[Iterable[int]] = None, statuses: Optional[Iterable[str]] = None,
+                  batch: int = 500) -> Iterator[Dict[str, Any]]:
+        """Righe commessa (tid, qty, H, L, ...) a blocchi, con order_id."""
+        where, params = self._where_orders(order_ids, statuses)
+        cols = ", ".join(f"r.{c}" for c in _cols(ROW_SPEC).split(", "))
+        cur = self._conn.execute(
+            f"SELECT {cols}, r.order_id FROM orders o JOIN order_rows r ON r.order_id = o.id{where} "
+            f"ORDER BY r.order_id, r.ord", params)
+        n = len(ROW_SPEC) + 1
+        while True:
+            chunk = cur.fetchmany(batch)
+            if not chunk:
+                return
+            for r in chunk:
+                row = _join_item(r[:n], ROW_SPEC)
+                row["order_id"] = int(r[n])
+                yield row
+
+    def material_requirements(self, statuses: Sequence[str] = ("pending", "in_progress")) -> List[Dict[str, Any]]:
+        """
+        Fabbisogno per profilo sui tagli degli ordini negli stati indicati
+        (una query): pezzi, metri totali, numero ordini e spessore profilo.
+        Le righe commessa non ancora calcolate in cutlist non contano.
+        """
+        where, params = self._where_orders(None, statuses)
+        cur = self._conn.execute(
+            f"SELECT c.profile_name, SUM(c.qty), SUM(c.qty * c.length_mm), COUNT(DISTINCT c.order_id), "
+            f"MAX(p.thickness) FROM orders o JOIN order_cuts c ON c.order_id = o.id "
+            f"LEFT JOIN profiles p ON p.name = c.profile_name{where} "
+            f"GROUP BY c.profile_name ORDER BY c.profile_name", params)
+        return [{"profile": r[0] or "", "pieces": int(r[1] or 0), "total_mm": float(r[2] or 0.0),
+                 "orders": int(r[3]), "thickness": float(r[4] or 0.0)} for r in cur.fetchall()]
@@ -1,94 +1,12 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional, Tuple
-import ast
-import math
-
-# Valutatore sicuro per formule (solo aritmetica/funzioni whitelisted)
-_ALLOWED_NODES = {
-    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Num, ast.Load, ast.Name, ast.Call,
-    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
-    ast.USub, ast.UAdd,
-    ast.Compare, ast.Eq, ast.NotEq, ast.Gt, ast.GtE, ast.Lt, ast.LtE,
-    ast.BoolOp, ast.And, ast.Or,
-    ast.IfExp,
-    ast.Constant,
-}
-_ALLOWED_FUNCS = {
-    "abs": abs, "min": min, "max": max, "round": round,
-    "floor": math.floor, "ceil": math.ceil,
-    "sqrt": math.sqrt, "pow": pow,
-    "sin": math.sin, "cos": math.cos, "tan": math.tan,
-    "asin": math.asin, "acos": math.acos, "atan": math.atan,
-    "rad": math.radians, "deg": math.degrees,
-}
-
-class _SafeEval(ast.NodeVisitor):
-    def __init__(self, env: Dict[str, Any]):
-        self.env = env
-    def visit(self, node):
-        if type(node) not in _ALLOWED_NODES:
-            raise ValueError(f"Espressione non permessa: {type(node).__name__}")
-        return super().visit(node)
-    def visit_Expression(self, node: ast.Expression):
-        return self.visit(node.body)
-    def visit_Constant(self, node: ast.Constant):
-        if isinstance(node.value, (int, float, bool)): return node.value
-        raise ValueError("Costante non permessa")
-    def visit_Name(self, node: ast.Name):
-        if node.id in self.env: return self.env[node.id]
-        raise ValueError(f"Variabile sconosciuta: {node.id}")
-    def visit_UnaryOp(self, node: ast.UnaryOp):
-        operand = self.visit(node.operand)
-        if isinstance(node.op, ast.UAdd): return +operand
-        if isinstance(node.op, ast.USub): return -operand
-        raise ValueError("Operatore unario non permesso")
-    def visit_BinOp(self, node: ast.BinOp):
-        l = self.visit(node.left); r = self.visit(node.right)
-        if isinstance(node.op, ast.Add): return l + r
-        if isinstance(node.op, ast.Sub): return l - r
-        if isinstance(node.op, ast.Mult): return l * r
-        if isinstance(node.op, ast.Div): return l / r
-        if isinstance(node.op, ast.FloorDiv): return l // r
-        if isinstance(node.op, ast.Mod): return l % r
-        if isinstance(node.op, ast.Pow): return l ** r
-        raise ValueError("Operatore binario non permesso")
-    def visit_Compare(self, node: ast.Compare):
-        left = self.visit(node.left); ok = True
-        for op, comp in zip(node.ops, node.comparators):
-            right = self.visit(comp)
-            if isinstance(op, ast.Eq): ok = ok and (left == right)
-            elif isinstance(op, ast.NotEq): ok = ok and (left != right)
-            elif isinstance(op, ast.Gt): ok = ok and (left > right)
-            elif isinstance(op, ast.GtE): ok = ok and (left >= right)
-            elif isinstance(op, ast.Lt): ok = ok and (left < right)
-            elif isinstance(op, ast.LtE): ok = ok and (left <= right)
-            else: raise ValueError("Operatore di confronto non permesso")
-            left = right
-        return ok
-    def visit_BoolOp(self, node: ast.BoolOp):
-        vals = [self.visit(v) for v in node.values]
-        if isinstance(node.op, ast.And):
-            res = True
-            for v in vals: res = res and bool(v)
-            return res
-        if isinstance(node.op, ast.Or):
-            res = False
-            for v in vals: res = res or bool(v)
-            return res
-        raise ValueError("Operatore booleano non permesso")
-    def visit_IfExp(self, node: ast.IfExp):
-        return self.visit(node.body if self.visit(node.test) else node.orelse)
-    def visit_Call(self, node: ast.Call):
-        if not isinstance(node.func, ast.Name): raise ValueError("Chiamata funzione non permessa")
-        fname = node.func.id
-        if fname not in _ALLOWED_FUNCS: raise ValueError(f"Funzione non permessa: {fname}")
-        args = [self.visit(a) for a in node.args]
-        return _ALLOWED_FUNCS[fname](*args)
+
+# Valutatore sicuro per formule (solo aritmetica/funzioni whitelisted), compilato e in cache
+from ui_qt.services.formula_compiler import _ALLOWED_NODES, _ALLOWED_FUNCS, compile_formula
 
 def safe_eval(expr: str, env: Dict[str, Any]) -> float:
-    tree = ast.parse(expr, mode="eval")
-    return _SafeEval(env).visit(tree)
+    return compile_formula(expr)(env)
 
 from typing import NamedTuple
 
@@ -159,3 +77,54 @@ class ParametricEngine:
                 length=length, angle_a=ang_a, angle_b=ang_b, note=note
             ))
         return parts, env
+
+    def evaluate_batch(self, inputs: Dict[str, Any]):
+        """
+        Valuta la tipologia per n combinazioni di parametri in un colpo solo.
+
+        inputs: {parametro: array di n valori o scalare}; i parametri
+        mancanti prendono il default. Ritorna una PartsTable con le colonne
+        row, id, role, profile, qty, length, angle_a, angle_b (elementi
+        ripetuti per ogni combinazione, riga per riga).
+        """
+        import numpy as np
+        from ui_qt.services.formula_batch import PartsTable
+
+        sizes = {len(v) for v in inputs.values() if isinstance(v, (list, tuple, np.ndarray))}
+        if len(sizes) > 1:
+            raise ValueError(f"Lunghezze input diverse: {sorted(sizes)}")
+        n = sizes.pop() if sizes else 1
+
+        env: Dict[str, Any] = {}
+        for p in self.typ.parameters:
+            v = inputs.get(p.name, p.default)
+            if isinstance(v, (list, tuple, np.ndarray)):
+                arr = np.asarray(v)
+                v = arr.astype(float) if arr.dtype.kind in "biuf" else arr
+            env[p.name] = v
+        for k, expr in self.typ.derived.items():
+            env[k] = compile_formula(expr).vector(env)
+
+        def col(expr: str):
+            return np.broadcast_to(compile_formula(expr).vector(env), (n,))
+
+        rows = np.arange(n)
+        cols: Dict[str, List[Any]] = {k: [] for k in ("row", "id", "role", "profile", "qty",
+                                                       "length", "angle_a", "angle_b")}
+        for e in self.typ.elements:
+            prof = env.get(e.profile_var, "")
+            prof_col = np.broadcast_to(np.asarray(prof if prof is not None else "", dtype=object), (n,))
+            cols["row"].append(rows)
+            cols["id"].append(np.full(n, e.id, dtype=object))
+            cols["role"].append(np.full(n, e.role, dtype=object))
+            cols["profile"].append(np.array([str(x or "") or "—" for x in prof_col], dtype=object))
+            cols["qty"].append(np.rint(np.nan_to_num(col(e.qty_expr))).astype(int))
+            cols["length"].append(col(e.length_expr))
+            cols["angle_a"].append(col(e.angle_a_expr))
+            cols["angle_b"].append(col(e.angle_b_expr))
+        if not self.typ.elements:
+            return PartsTable({k: np.array([]) for k in cols})
+        # Ordine riga per riga (come chiamare evaluate() n volte)
+        order = np.argsort(np.concatenate(cols["row"]), kind="stable")
+        return PartsTable({k: np.concatenate(v)[order] for k, v in cols.items()})
+
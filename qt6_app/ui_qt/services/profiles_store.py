@@ -1,73 +1,73 @@
-import sqlite3
 from pathlib import Path
 import json
 
-# Database condiviso per profili/spessori (interoperabile con Tipologie)
-# Percorso unico: data/profiles.db a livello progetto
-DB_PATH = Path(__file__).resolve().parents[3] / "data" / "profiles.db"
+from ui_qt.services import database, search_index
+
+# Profili/spessori nel database unico (tabelle profiles, profile_shapes),
+# referenziati per nome dai componenti delle tipologie (FK).
+# None = database predefinito (database.default_db_path()).
+DB_PATH = None
 
 class ProfilesStore:
-    def __init__(self):
-        self._ensure_db()
+    def __init__(self, db_path=None):
+        # connessioni per thread condivise (pool sul database, WAL): niente connect() per chiamata
+        self.db_path = Path(db_path or DB_PATH or database.default_db_path())
+        self._db = database.open_database(self.db_path)
 
     def _connect(self):
-        DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-        return sqlite3.connect(DB_PATH)
+        return self._db.connection()
 
-    def _ensure_db(self):
-        with self._connect() as con:
-            con.execute("""
-                CREATE TABLE IF NOT EXISTS profiles (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT UNIQUE NOT NULL,
-                    thickness REAL NOT NULL DEFAULT 0
-                )
-            """)
-            # Tabella opzionale per metadata/shape del profilo (non rompe compatibilità)
-            con.execute("""
-                CREATE TABLE IF NOT EXISTS profile_shapes (
-                    profile_id INTEGER UNIQUE NOT NULL,
-                    dxf_path TEXT,
-                    bbox_w REAL,
-                    bbox_h REAL,
-                    meta_json TEXT,
-                    FOREIGN KEY(profile_id) REFERENCES profiles(id) ON DELETE CASCADE
-                )
-            """)
-            con.commit()
+    def close(self):
+        # la connessione del thread è condivisa con gli altri store sullo
+        # stesso file: la chiude solo close_all_pools() all'uscita
+        pass
 
     # ---- CRUD profili (spessore) ----
     def upsert_profile(self, name: str, thickness: float):
-        with self._connect() as con:
-            con.execute("""
-                INSERT INTO profiles(name, thickness) VALUES(?, ?)
-                ON CONFLICT(name) DO UPDATE SET thickness=excluded.thickness
-            """, (name, float(thickness)))
-            con.commit()
+        self._connect().execute("""
+            INSERT INTO profiles(name, thickness) VALUES(?, ?)
+            ON CONFLICT(name) DO UPDATE SET thickness=excluded.thickness
+        """, (name, float(thickness)))
+        self._db.commit()
 
     def list_profiles(self):
-        with self._connect() as con:
-            cur = con.execute("SELECT id, name, thickness FROM profiles ORDER BY name ASC")
-            cols = [d[0] for d in cur.description]
-            return [dict(zip(cols, row)) for row in cur.fetchall()]
+        cur = self._connect().execute("SELECT id, name, thickness FROM profiles ORDER BY name ASC")
+        cols = [d[0] for d in cur.description]
+        return [dict(zip(cols, row)) for row in cur.fetchall()]
+
+    def search_profiles(self, text: str, limit: int = 200):
+        """Profili per prefisso del nome (FTS5, vedi services/search_index.py)."""
+        return search_index.search_profiles(self._connect(), text, limit)
 
     def get_profile(self, name: str):
-        with self._connect() as con:
-            cur = con.execute("SELECT id, name, thickness FROM profiles WHERE name=?", (name,))
-            row = cur.fetchone()
-            if not row:
-                return None
-            return {"id": row[0], "name": row[1], "thickness": row[2]}
+        row = self._connect().execute("SELECT id, name, thickness FROM profiles WHERE name=?", (name,)).fetchone()
+        if not row:
+            return None
+        return {"id": row[0], "name": row[1], "thickness": row[2]}
+
+    def profile_usage(self, name: str) -> list[str]:
+        """Tipologie che usano il profilo (componenti o formule multiple)."""
+        cur = self._connect().execute("""
+            SELECT t.name FROM typology t JOIN typology_component c ON c.typology_id = t.id WHERE c.profile_name=?
+            UNION
+            SELECT t.name FROM typology t JOIN typology_multi_formula f ON f.typology_id = t.id WHERE f.profile_name=?
+            ORDER BY 1
+        """, (name, name))
+        return [r[0] for r in cur.fetchall()]
 
     def delete_profile(self, name: str) -> bool:
-        with self._connect() as con:
-            cur = con.execute("DELETE FROM profiles WHERE name=?", (name,))
-            con.commit()
-            return cur.rowcount > 0
+        # FK ON DELETE RESTRICT: un profilo usato da tipologie non si elimina
+        used = self.profile_usage(name)
+        if used:
+            more = f" e altre {len(used) - 5}" if len(used) > 5 else ""
+            raise ValueError(f"Profilo '{name}' usato da: {', '.join(used[:5])}{more}")
+        cur = self._connect().execute("DELETE FROM profiles WHERE name=?", (name,))
+        self._db.commit()
+        return cur.rowcount > 0
 
     # ---- Metadata shape DXF (facoltativo) ----
     def upsert_profile_shape(self, name: str, dxf_path: str | None, bbox_w: float | None, bbox_h: float | None, meta: dict | None):
-        with self._connect() as con:
+        with self._db.transaction() as con:
             # Assicura esistenza profilo
             cur = con.execute("SELECT id FROM profiles WHERE name=?", (name,))
             row = cur.fetchone()
@@ -87,22 +87,20 @@ class ProfilesStore:
                     bbox_h=excluded.bbox_h,
                     meta_json=excluded.meta_json
             """, (pid, dxf_path or "", float(bbox_w or 0.0), float(bbox_h or 0.0), payload))
-            con.commit()
 
     def get_profile_shape(self, name: str) -> dict | None:
-        with self._connect() as con:
-            cur = con.execute("""
-                SELECT ps.dxf_path, ps.bbox_w, ps.bbox_h, ps.meta_json
-                FROM profile_shapes ps
-                JOIN profiles p ON p.id = ps.profile_id
-                WHERE p.name=?
-            """, (name,))
-            row = cur.fetchone()
-            if not row:
-                return None
-            dxf_path, w, h, meta_json = row
-            try:
-                meta = json.loads(meta_json or "{}")
-            except Exception:
-                meta = {}
-            return {"dxf_path": dxf_path, "bbox_w": w, "bbox_h": h, "meta": meta}
+        cur = self._connect().execute("""
+            SELECT ps.dxf_path, ps.bbox_w, ps.bbox_h, ps.meta_json
+            FROM profile_shapes ps
+            JOIN profiles p ON p.id = ps.profile_id
+            WHERE p.name=?
+        """, (name,))
+        row = cur.fetchone()
+        if not row:
+            return None
+        dxf_path, w, h, meta_json = row
+        try:
+            meta = json.loads(meta_json or "{}")
+        except Exception:
+            meta = {}
+        return {"dxf_path": dxf_path, "bbox_w": w, "bbox_h": h, "meta": meta}
@@ -0,0 +1,91 @@
+"""
+Indice a intervalli per le regole variabili (typology_multi_var_rule).
+
+Una regola vale quando L è in [l_min, l_max] (estremi inclusi); se più
+regole della stessa variabile coprono L vince l'intervallo più stretto e,
+a parità di ampiezza, la prima in ordine di l_min.
+
+IntervalIndex precalcola il vincitore per ogni confine e per ogni tratto
+tra due confini consecutivi: la ricerca è un bisect, O(log n).
+check_rule_intervals segnala, per il salvataggio, intervalli non validi,
+sovrapposizioni ambigue e tratti scoperti.
+"""
+from __future__ import annotations
+from bisect import bisect_left
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+
+class IntervalIndex:
+    """Ricerca "intervallo più stretto che contiene L" su regole fisse."""
+
+    __slots__ = ("points", "at_point", "in_gap")
+
+    def __init__(self, rules: Sequence[Mapping[str, Any]]):
+        valid = [(float(r["l_max"]) - float(r["l_min"]), k, r) for k, r in enumerate(rules)
+                 if float(r["l_min"]) <= float(r["l_max"])]
+        self.points: List[float] = sorted({float(r["l_min"]) for _, _, r in valid}
+                                          | {float(r["l_max"]) for _, _, r in valid})
+        n = len(self.points)
+        self.at_point: List[Optional[Mapping[str, Any]]] = [None] * n
+        self.in_gap: List[Optional[Mapping[str, Any]]] = [None] * max(n - 1, 0)  # (points[i], points[i+1])
+        # Dal più stretto: ogni tratto prende la prima regola che lo copre
+        for _w, _k, r in sorted(valid, key=lambda x: (x[0], x[1])):
+            lo = bisect_left(self.points, float(r["l_min"]))
+            hi = bisect_left(self.points, float(r["l_max"]))
+            for i in range(lo, hi + 1):
+                if self.at_point[i] is None:
+                    self.at_point[i] = r
+            for i in range(lo, hi):
+                if self.in_gap[i] is None:
+                    self.in_gap[i] = r
+
+    def find(self, L: float) -> Optional[Mapping[str, Any]]:
+        i = bisect_left(self.points, L)
+        if i < len(self.points) and self.points[i] == L:
+            return self.at_point[i]
+        if 0 < i < len(self.points):
+            return self.in_gap[i - 1]
+        return None
+
+
+def _fmt(x: float) -> str:
+    return f"{x:g}"
+
+
+def check_rule_intervals(rules: Sequence[Mapping[str, Any]]) -> List[str]:
+    """
+    Problemi delle regole, per variabile:
+    - intervalli con l_min > l_max
+    - sovrapposizioni ambigue: intervalli che si incrociano senza che uno
+      contenga l'altro, o di pari ampiezza (l'annidamento è invece voluto:
+      vince il più stretto)
+    - tratti scoperti tra il minimo l_min e il massimo l_max
+    """
+    by_var: Dict[str, List[Mapping[str, Any]]] = {}
+    for r in rules:
+        by_var.setdefault(str(r["var_name"]), []).append(r)
+    issues: List[str] = []
+    for var in sorted(by_var):
+        spans = []
+        for r in by_var[var]:
+            lo, hi = float(r["l_min"]), float(r["l_max"])
+            if lo > hi:
+                issues.append(f"{var}: intervallo non valido {_fmt(lo)}–{_fmt(hi)}")
+            else:
+                spans.append((lo, hi))
+        spans.sort()
+        for i, (a_lo, a_hi) in enumerate(spans):
+            for b_lo, b_hi in spans[i + 1:]:
+                if b_lo > a_hi:
+                    break
+                if b_lo == a_hi and b_hi > a_hi:
+                    continue  # intervalli contigui (confine condiviso)
+                nested = (a_lo <= b_lo and b_hi <= a_hi) or (b_lo <= a_lo and a_hi <= b_hi)
+                if not nested or (a_hi - a_lo) == (b_hi - b_lo):
+                    issues.append(f"{var}: sovrapposizione {_fmt(a_lo)}–{_fmt(a_hi)} / {_fmt(b_lo)}–{_fmt(b_hi)}")
+        reach = None
+        for lo, hi in spans:
+            if reach is not None and lo > reach:
+                issues.append(f"{var}: L non coperta tra {_fmt(reach)} e {_fmt(lo)}")
+            reach = hi if reach is None else max(reach, hi)
+    return issues
@@ -1,140 +1,56 @@
 from __future__ import annotations
 import sqlite3
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional
 import time
 import contextlib
 
-DEFAULT_DB_CANDIDATES = [
-    Path(__file__).resolve().parents[2] / "data" / "typologies.db",
-    Path.cwd() / "data" / "typologies.db",
-    Path.home() / "blitz" / "typologies.db",
-]
-
-SCHEMA = """
-PRAGMA foreign_keys=ON;
-
-CREATE TABLE IF NOT EXISTS typology (
-    id               INTEGER PRIMARY KEY AUTOINCREMENT,
-    name             TEXT NOT NULL UNIQUE,
-    category         TEXT,
-    material         TEXT,
-    ref_quota        TEXT CHECK (ref_quota IN ('esterna','interna')) DEFAULT 'esterna',
-    extra_detrazione REAL DEFAULT 0.0,
-    pezzi_totali     INTEGER DEFAULT 1,
-    note             TEXT,
-    created_at       INTEGER,
-    updated_at       INTEGER
-);
-
-CREATE TABLE IF NOT EXISTS typology_var (
-    id           INTEGER PRIMARY KEY AUTOINCREMENT,
-    typology_id  INTEGER NOT NULL REFERENCES typology(id) ON DELETE CASCADE,
-    name         TEXT NOT NULL,
-    value        REAL NOT NULL DEFAULT 0.0
-);
-
-CREATE TABLE IF NOT EXISTS typology_component (
-    id           INTEGER PRIMARY KEY AUTOINCREMENT,
-    typology_id  INTEGER NOT NULL REFERENCES typology(id) ON DELETE CASCADE,
-    ord          INTEGER NOT NULL DEFAULT 0,
-    row_id       TEXT,
-    name         TEXT,
-    profile_name TEXT,
-    quantity     INTEGER DEFAULT 0,
-    ang_sx       REAL DEFAULT 0.0,
-    ang_dx       REAL DEFAULT 0.0,
-    formula      TEXT,
-    offset       REAL DEFAULT 0.0,
-    note         TEXT
-);
-
--- Formule multiple per gruppi (con metadati per eventuali elementi extra)
-CREATE TABLE IF NOT EXISTS typology_multi_formula (
-    id           INTEGER PRIMARY KEY AUTOINCREMENT,
-    typology_id  INTEGER NOT NULL REFERENCES typology(id) ON DELETE CASCADE,
-    group_name   TEXT NOT NULL,
-    label        TEXT NOT NULL,
-    formula      TEXT NOT NULL,
-    profile_name TEXT,
-    qty          INTEGER DEFAULT 1,
-    ang_sx       REAL DEFAULT 0.0,
-    ang_dx       REAL DEFAULT 0.0,
-    offset       REAL DEFAULT 0.0,
-    note         TEXT,
-    UNIQUE(typology_id, group_name, label)
-);
-
--- Regole variabili per gruppo: var_name assume 'value' quando L è in [l_min, l_max]
--- Aggiunta colonna 'variant' per etichetta (tipo0/tipo1/...)
-CREATE TABLE IF NOT EXISTS typology_multi_var_rule (
-    id           INTEGER PRIMARY KEY AUTOINCREMENT,
-    typology_id  INTEGER NOT NULL REFERENCES typology(id) ON DELETE CASCADE,
-    group_name   TEXT NOT NULL,
-    var_name     TEXT NOT NULL,
-    l_min        REAL NOT NULL,
-    l_max        REAL NOT NULL,
-    value        REAL NOT NULL,
-    variant      TEXT
-);
-
-CREATE INDEX IF NOT EXISTS idx_typology_comp_typ ON typology_component(typology_id, ord);
-CREATE INDEX IF NOT EXISTS idx_typology_var_typ  ON typology_var(typology_id);
-CREATE INDEX IF NOT EXISTS idx_tmf_typ_group ON typology_multi_formula(typology_id, group_name);
-CREATE INDEX IF NOT EXISTS idx_tmr_typ_group ON typology_multi_var_rule(typology_id, group_name);
-"""
+from ui_qt.utils.db_pool import atomic
+from ui_qt.services import database, search_index
+
 
 def _now_ts() -> int:
     return int(time.time())
 
 def default_db_path() -> Path:
-    for p in DEFAULT_DB_CANDIDATES:
-        try:
-            p.parent.mkdir(parents=True, exist_ok=True)
-            return p
-        except Exception:
-            continue
-    p = Path.cwd() / "typologies.db"
-    p.parent.mkdir(parents=True, exist_ok=True)
-    return p
+    # database unico (profili, tipologie, ordini): vedi services/database.py
+    return database.default_db_path()
+
+def _profile_ref(name: Any) -> Optional[str]:
+    # riferimento a profiles(name): vuoto -> NULL
+    s = str(name or "")
+    return s if s.strip() else None
 
 class TypologiesStore:
     def __init__(self, db_path: Optional[str] = None):
         self.db_path = Path(db_path) if db_path else default_db_path()
-        self._conn: Optional[sqlite3.Connection] = None
-        self._open()
-        self._ensure_schema()
-        self._migrate_schema()
+        self._db = database.open_database(self.db_path)
 
-    def _open(self):
-        self._conn = sqlite3.connect(str(self.db_path))
-        self._conn.execute("PRAGMA foreign_keys=ON")
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # connessione del thread corrente (pool condiviso per file, WAL)
+        return self._db.connection()
 
-    def _ensure_schema(self):
-        self._conn.executescript(SCHEMA)
-        self._conn.commit()
-
-    def _migrate_schema(self):
-        # aggiunte non distruttive
-        with contextlib.suppress(Exception):
-            self._conn.execute("ALTER TABLE typology_multi_formula ADD COLUMN profile_name TEXT")
-        with contextlib.suppress(Exception):
-            self._conn.execute("ALTER TABLE typology_multi_formula ADD COLUMN qty INTEGER DEFAULT 1")
-        with contextlib.suppress(Exception):
-            self._conn.execute("ALTER TABLE typology_multi_formula ADD COLUMN ang_sx REAL DEFAULT 0.0")
-        with contextlib.suppress(Exception):
-            self._conn.execute("ALTER TABLE typology_multi_formula ADD COLUMN ang_dx REAL DEFAULT 0.0")
-        with contextlib.suppress(Exception):
-            self._conn.execute("ALTER TABLE typology_multi_formula ADD COLUMN offset REAL DEFAULT 0.0")
-        with contextlib.suppress(Exception):
-            self._conn.execute("ALTER TABLE typology_multi_var_rule ADD COLUMN variant TEXT")
-        self._conn.commit()
+    def _ensure_profiles(self, names: Iterable[Any]) -> None:
+        # FK profile_name -> profiles(name): i profili non ancora censiti
+        # nascono con spessore 0 (come in ProfilesStore.upsert_profile_shape)
+        refs = {r for r in (_profile_ref(n) for n in names) if r}
+        if refs:
+            self._conn.executemany("INSERT OR IGNORE INTO profiles(name, thickness) VALUES(?, 0)",
+                                   [(r,) for r in sorted(refs)])
 
     def close(self):
-        if self._conn:
-            with contextlib.suppress(Exception):
-                self._conn.close()
-        self._conn = None
+        # la connessione del thread è condivisa con gli altri store sullo
+        # stesso file: la chiude solo close_all_pools() all'uscita
+        pass
+
+    def _touch(self, typology_id: int) -> None:
+        # updated_at sempre crescente (anche con più modifiche nello stesso secondo):
+        # è la chiave di validità degli snapshot in cache (typology_cache)
+        self._conn.execute(
+            "UPDATE typology SET updated_at=MAX(?, COALESCE(updated_at, 0) + 1) WHERE id=?",
+            (_now_ts(), int(typology_id))
+        )
 
     # -------- Tipologie (CRUD base) --------
     def list_typologies(self) -> List[Dict[str, Any]]:
@@ -143,6 +59,18 @@ class TypologiesStore:
         )
         return [{"id": r[0], "name": r[1], "category": r[2], "material": r[3], "pezzi_totali": r[4], "updated_at": r[5]} for r in cur.fetchall()]
 
+    def search_typologies(self, text: str, limit: int = 200) -> List[Dict[str, Any]]:
+        """Come list_typologies, filtrate per testo (prefissi su nome, categoria, materiale, profili, componenti)."""
+        return search_index.search_typologies(self._conn, text, limit)
+
+    def get_updated_stamps(self, typology_ids: Iterable[int]) -> Dict[int, Any]:
+        """{id: updated_at} per le tipologie indicate (una sola query)."""
+        ids = sorted({int(t) for t in typology_ids})
+        if not ids: return {}
+        cur = self._conn.execute(
+            f"SELECT id, updated_at FROM typology WHERE id IN ({','.join('?' * len(ids))})", ids)
+        return {int(r[0]): r[1] for r in cur.fetchall()}
+
     def get_typology_full(self, typology_id: int) -> Optional[Dict[str, Any]]:
         r = self._conn.execute(
             "SELECT id, name, category, material, ref_quota, extra_detrazione, pezzi_totali, note, created_at, updated_at "
@@ -153,9 +81,11 @@ class TypologiesStore:
             "SELECT name,value FROM typology_var WHERE typology_id=? ORDER BY id", (int(typology_id),)).fetchall()}
         comps = []
         for c in self._conn.execute(
-            "SELECT row_id, name, profile_name, quantity, ang_sx, ang_dx, formula, offset, note "
-            "FROM typology_component WHERE typology_id=? ORDER BY ord, id", (int(typology_id),)).fetchall():
+            "SELECT c.row_id, c.name, c.profile_name, c.quantity, c.ang_sx, c.ang_dx, c.formula, c.offset, c.note, p.thickness "
+            "FROM typology_component c LEFT JOIN profiles p ON p.name = c.profile_name "
+            "WHERE c.typology_id=? ORDER BY c.ord, c.id", (int(typology_id),)).fetchall():
             comps.append({"id_riga": c[0] or "", "nome": c[1] or "", "profilo_nome": c[2] or "",
+                          "profilo_spessore": float(c[9] or 0.0),
                           "quantita": int(c[3] or 0), "ang_sx": float(c[4] or 0.0), "ang_dx": float(c[5] or 0.0),
                           "formula_lunghezza": c[6] or "", "offset_mm": float(c[7] or 0.0), "note": c[8] or ""})
         return {
@@ -166,6 +96,7 @@ class TypologiesStore:
             "created_at": r[8], "updated_at": r[9]
         }
 
+    @atomic
     def create_typology(self, data: Dict[str, Any]) -> int:
         ts = _now_ts()
         cur = self._conn.execute(
@@ -176,30 +107,36 @@ class TypologiesStore:
              int(data.get("pezzi_totali") or 1), data.get("note",""), ts, ts)
         )
         typ_id = int(cur.lastrowid)
+        comps = data.get("componenti") or []
+        self._ensure_profiles(c.get("profilo_nome") for c in comps)
         for k, v in (data.get("variabili_locali") or {}).items():
             try: vv = float(v)
             except Exception: vv = 0.0
             self._conn.execute("INSERT INTO typology_var(typology_id,name,value) VALUES(?,?,?)", (typ_id, k, vv))
-        for idx, c in enumerate(data.get("componenti") or []):
+        for idx, c in enumerate(comps):
             self._conn.execute(
                 "INSERT INTO typology_component(typology_id,ord,row_id,name,profile_name,quantity,ang_sx,ang_dx,formula,offset,note) "
                 "VALUES(?,?,?,?,?,?,?,?,?,?,?)",
-                (typ_id, idx, c.get("id_riga",""), c.get("nome",""), c.get("profilo_nome",""),
+                (typ_id, idx, c.get("id_riga",""), c.get("nome",""), _profile_ref(c.get("profilo_nome")),
                  int(c.get("quantita",0) or 0), float(c.get("ang_sx",0.0) or 0.0), float(c.get("ang_dx",0.0) or 0.0),
                  c.get("formula_lunghezza",""), float(c.get("offset_mm",0.0) or 0.0), c.get("note","")))
-        self._conn.commit()
+        search_index.index_typology(self._conn, typ_id)
+        self._db.commit()
         return typ_id
 
+    @atomic
     def update_typology(self, typology_id: int, data: Dict[str, Any]) -> None:
-        ts = _now_ts()
+        old_name = self._conn.execute("SELECT name FROM typology WHERE id=?", (int(typology_id),)).fetchone()
         self._conn.execute(
-            "UPDATE typology SET name=?, category=?, material=?, ref_quota=?, extra_detrazione=?, pezzi_totali=?, note=?, updated_at=? WHERE id=?",
+            "UPDATE typology SET name=?, category=?, material=?, ref_quota=?, extra_detrazione=?, pezzi_totali=?, note=? WHERE id=?",
             (data.get("nome",""), data.get("categoria",""), data.get("materiale",""),
              (data.get("riferimento_quota") or "esterna"), float(data.get("extra_detrazione_mm") or 0.0),
-             int(data.get("pezzi_totali") or 1), data.get("note",""), ts, int(typology_id))
+             int(data.get("pezzi_totali") or 1), data.get("note",""), int(typology_id))
         )
+        self._touch(typology_id)
         self._conn.execute("DELETE FROM typology_var WHERE typology_id=?", (int(typology_id),))
         self._conn.execute("DELETE FROM typology_component WHERE typology_id=?", (int(typology_id),))
+        self._ensure_profiles(c.get("profilo_nome") for c in (data.get("componenti") or []))
         for k, v in (data.get("variabili_locali") or {}).items():
             try: vv = float(v)
             except Exception: vv = 0.0
@@ -208,15 +145,23 @@ class TypologiesStore:
             self._conn.execute(
                 "INSERT INTO typology_component(typology_id,ord,row_id,name,profile_name,quantity,ang_sx,ang_dx,formula,offset,note) "
                 "VALUES(?,?,?,?,?,?,?,?,?,?,?)",
-                (int(typology_id), idx, c.get("id_riga",""), c.get("nome",""), c.get("profilo_nome",""),
+                (int(typology_id), idx, c.get("id_riga",""), c.get("nome",""), _profile_ref(c.get("profilo_nome")),
                  int(c.get("quantita",0) or 0), float(c.get("ang_sx",0.0) or 0.0), float(c.get("ang_dx",0.0) or 0.0),
                  c.get("formula_lunghezza",""), float(c.get("offset_mm",0.0) or 0.0), c.get("note","")))
-        self._conn.commit()
+        search_index.index_typology(self._conn, typology_id)
+        if old_name and old_name[0] != data.get("nome",""):
+            # il nome della tipologia è nel testo indicizzato degli ordini che la usano
+            search_index.index_orders_of_typology(self._conn, typology_id)
+        self._db.commit()
 
+    @atomic
     def delete_typology(self, typology_id: int) -> None:
         self._conn.execute("DELETE FROM typology WHERE id=?", (int(typology_id),))
-        self._conn.commit()
+        search_index.unindex_typology(self._conn, typology_id)
+        search_index.index_orders_of_typology(self._conn, typology_id)
+        self._db.commit()
 
+    @atomic
     def duplicate_typology(self, typology_id: int, new_name: str) -> int:
         """
         Duplica una tipologia completa (record principale + variabili + componenti + formule multiple + regole variabili).
@@ -286,7 +231,8 @@ class TypologiesStore:
             (new_id, int(typology_id))
         )
 
-        self._conn.commit()
+        search_index.index_typology(self._conn, new_id)
+        self._db.commit()
         return new_id
 
     # -------- Formule multiple (gruppi) --------
@@ -309,9 +255,27 @@ class TypologiesStore:
             })
         return out
 
+    def list_multi_formulas_all(self, typology_id: int) -> Dict[str, List[Dict[str, Any]]]:
+        """Formule multiple di tutti i gruppi della tipologia: {gruppo: righe}."""
+        cur = self._conn.execute(
+            "SELECT group_name, label, formula, profile_name, qty, ang_sx, ang_dx, offset, note "
+            "FROM typology_multi_formula WHERE typology_id=? ORDER BY group_name, label",
+            (int(typology_id),)
+        )
+        out: Dict[str, List[Dict[str, Any]]] = {}
+        for r in cur.fetchall():
+            out.setdefault(r[0], []).append({
+                "label": r[1], "formula": r[2], "profile_name": r[3] or "",
+                "qty": int(r[4] or 1), "ang_sx": float(r[5] or 0.0), "ang_dx": float(r[6] or 0.0),
+                "offset": float(r[7] or 0.0), "note": r[8] or ""
+            })
+        return out
+
+    @atomic
     def upsert_multi_formula(self, typology_id: int, group_name: str, label: str, formula: str,
                              profile_name: Optional[str] = None, qty: int = 1, ang_sx: float = 0.0, ang_dx: float = 0.0,
                              offset: float = 0.0, note: str = "") -> None:
+        self._ensure_profiles([profile_name])
         with contextlib.suppress(Exception):
             self._conn.execute(
                 "DELETE FROM typology_multi_formula WHERE typology_id=? AND group_name=? AND label=?",
@@ -320,16 +284,21 @@ class TypologiesStore:
         self._conn.execute(
             "INSERT INTO typology_multi_formula(typology_id, group_name, label, formula, profile_name, qty, ang_sx, ang_dx, offset, note) "
             "VALUES(?,?,?,?,?,?,?,?,?,?)",
-            (int(typology_id), str(group_name), str(label), str(formula), (profile_name or None), int(qty), float(ang_sx), float(ang_dx), float(offset), str(note or ""))
+            (int(typology_id), str(group_name), str(label), str(formula), _profile_ref(profile_name), int(qty), float(ang_sx), float(ang_dx), float(offset), str(note or ""))
         )
-        self._conn.commit()
+        self._touch(typology_id)
+        search_index.index_typology(self._conn, typology_id)
+        self._db.commit()
 
+    @atomic
     def delete_multi_formula(self, typology_id: int, group_name: str, label: str) -> None:
         self._conn.execute(
             "DELETE FROM typology_multi_formula WHERE typology_id=? AND group_name=? AND label=?",
             (int(typology_id), str(group_name), str(label))
         )
-        self._conn.commit()
+        self._touch(typology_id)
+        search_index.index_typology(self._conn, typology_id)
+        self._db.commit()
 
     # -------- Regole variabili (dipendenti da L, con variante opzionale) --------
     def list_multi_var_rules(self, typology_id: int, group_name: str) -> List[Dict[str, Any]]:
@@ -339,6 +308,20 @@ class TypologiesStore:
         )
         return [{"id": int(r[0]), "var_name": r[1], "l_min": float(r[2]), "l_max": float(r[3]), "value": float(r[4]), "variant": (r[5] or "")} for r in cur.fetchall()]
 
+    def list_multi_var_rules_all(self, typology_id: int) -> Dict[str, List[Dict[str, Any]]]:
+        """Regole variabili di tutti i gruppi della tipologia: {gruppo: regole}."""
+        cur = self._conn.execute(
+            "SELECT group_name, id, var_name, l_min, l_max, value, variant FROM typology_multi_var_rule "
+            "WHERE typology_id=? ORDER BY group_name, l_min, id",
+            (int(typology_id),)
+        )
+        out: Dict[str, List[Dict[str, Any]]] = {}
+        for r in cur.fetchall():
+            out.setdefault(r[0], []).append({"id": int(r[1]), "var_name": r[2], "l_min": float(r[3]), "l_max": float(r[4]),
+                                             "value": float(r[5]), "variant": (r[6] or "")})
+        return out
+
+    @atomic
     def replace_multi_var_rules(self, typology_id: int, group_name: str, rules: List[Dict[str, Any]]) -> None:
         self._conn.execute("DELETE FROM typology_multi_var_rule WHERE typology_id=? AND group_name=?", (int(typology_id), str(group_name)))
         for r in rules:
@@ -346,4 +329,5 @@ class TypologiesStore:
                 "INSERT INTO typology_multi_var_rule(typology_id, group_name, var_name, l_min, l_max, value, variant) VALUES(?,?,?,?,?,?,?)",
                 (int(typology_id), str(group_name), str(r["var_name"]), float(r["l_min"]), float(r["l_max"]), float(r["value"]), (str(r.get("variant","")) or None))
             )
-        self._conn.commit()
+        self._touch(typology_id)
+        self._db.commit()
@@ -0,0 +1,156 @@
+"""
+Cache di snapshot immutabili delle tipologie.
+
+Il calcolo della lista di taglio legge, per ogni riga d'ordine, la
+tipologia completa (componenti, variabili), le formule multiple e le
+regole variabili del gruppo: con molte righe sulle stesse tipologie le
+query si ripetono per gli stessi pochi oggetti.
+
+TypologyCache tiene uno snapshot per tipologia, valido finché non cambia
+updated_at (il TypologiesStore lo incrementa a ogni modifica, anche di
+formule multiple e regole). La validità di tutte le tipologie richieste si
+verifica con UNA query (get_updated_stamps); il DB viene letto solo per le
+tipologie nuove o modificate.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from ui_qt.services.formula_graph import FormulaGraph, effective_formulas, norm_label
+from ui_qt.services.rule_intervals import IntervalIndex
+
+
+def _freeze(d: Mapping[str, Any]) -> Mapping[str, Any]:
+    return MappingProxyType(dict(d))
+
+
+@dataclass(frozen=True)
+class VarRuleSet:
+    """Regole di una variabile (per gruppo), ordinate per l_min, con indice a intervalli."""
+    var_name: str
+    rules: Tuple[Mapping[str, Any], ...]
+    index: IntervalIndex = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "index", IntervalIndex(self.rules))
+
+    def resolve(self, L: float) -> Optional[Mapping[str, Any]]:
+        """Regola con L in [l_min, l_max]; vince l'intervallo più stretto."""
+        return self.index.find(L)
+
+
+@dataclass(frozen=True)
+class FormulaGroup:
+    """Gruppo di formule multiple: formule per etichetta normalizzata e regole per variabile."""
+    name: str
+    formulas: Mapping[str, Mapping[str, Any]]
+    rules: Mapping[str, VarRuleSet]
+
+    def resolve_vars(self, L: float) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """
+        Valori delle variabili per la larghezza L: ({var: valore,
+        var_variant: variante}, {var: variante}).
+        """
+        values: Dict[str, Any] = {}
+        variants: Dict[str, str] = {}
+        for var_name, rs in self.rules.items():
+            chosen = rs.resolve(L)
+            if chosen is None:
+                continue
+            values[var_name] = float(chosen["value"])
+            variant = (chosen.get("variant") or "").strip()
+            if variant:
+                values[f"{var_name}_variant"] = variant
+                variants[var_name] = variant
+        return values, variants
+
+
+@dataclass(frozen=True)
+class TypologySnapshot:
+    """
+    Tipologia completa in sola lettura (come get_typology_full) con i
+    gruppi di formule multiple; il grafo delle dipendenze è calcolato una
+    volta per gruppo.
+    """
+    typology_id: int
+    updated_at: Any
+    data: Mapping[str, Any]
+    groups: Mapping[str, FormulaGroup]
+    _graphs: Dict[str, FormulaGraph] = field(default_factory=dict, repr=False, compare=False)
+
+    @property
+    def components(self) -> Tuple[Mapping[str, Any], ...]:
+        return self.data["componenti"]
+
+    def group(self, name: Optional[str]) -> Optional[FormulaGroup]:
+        return self.groups.get(str(name)) if name else None
+
+    def graph(self, group_name: Optional[str] = None) -> FormulaGraph:
+        """Grafo sulle formule effettive (quelle del gruppo sostituiscono le base)."""
+        key = str(group_name or "")
+        g = self._graphs.get(key)
+        if g is None:
+            grp = self.group(group_name)
+            overrides = {k: (itm.get("formula") or "") for k, itm in grp.formulas.items()} if grp else None
+            g = self._graphs[key] = FormulaGraph(self.components, effective_formulas(self.components, overrides))
+        return g
+
+
+def build_snapshot(typ: Mapping[str, Any],
+                   formulas: Mapping[str, List[Dict[str, Any]]],
+                   rules: Mapping[str, List[Dict[str, Any]]]) -> TypologySnapshot:
+    data = dict(typ)
+    data["componenti"] = tuple(_freeze(c) for c in (typ.get("componenti") or []))
+    data["variabili_locali"] = _freeze(typ.get("variabili_locali") or {})
+    groups: Dict[str, FormulaGroup] = {}
+    for name in sorted(set(formulas) | set(rules)):
+        fmap = {norm_label(it.get("label") or ""): _freeze(it) for it in formulas.get(name, [])}
+        by_var: Dict[str, List[Mapping[str, Any]]] = {}
+        for r in rules.get(name, []):
+            by_var.setdefault(r["var_name"], []).append(_freeze(r))
+        groups[name] = FormulaGroup(
+            name=name, formulas=MappingProxyType(fmap),
+            rules=MappingProxyType({v: VarRuleSet(v, tuple(rs)) for v, rs in by_var.items()}))
+    return TypologySnapshot(int(typ["id"]), typ.get("updated_at"), MappingProxyType(data), MappingProxyType(groups))
+
+
+class TypologyCache:
+    """Snapshot per (typology_id, updated_at) sopra un TypologiesStore."""
+
+    def __init__(self, store):
+        self._store = store
+        self._snaps: Dict[int, TypologySnapshot] = {}
+
+    def _load(self, tid: int) -> Optional[TypologySnapshot]:
+        typ = self._store.get_typology_full(tid)
+        if not typ:
+            return None
+        snap = build_snapshot(typ, self._store.list_multi_formulas_all(tid), self._store.list_multi_var_rules_all(tid))
+        self._snaps[tid] = snap
+        return snap
+
+    def get_many(self, typology_ids: Iterable[int]) -> Dict[int, TypologySnapshot]:
+        """Snapshot validi per le tipologie indicate (quelle inesistenti sono omesse)."""
+        ids = {int(t) for t in typology_ids}
+        stamps = self._store.get_updated_stamps(ids)
+        out: Dict[int, TypologySnapshot] = {}
+        for tid in ids:
+            if tid not in stamps:
+                self._snaps.pop(tid, None)
+                continue
+            snap = self._snaps.get(tid)
+            if snap is None or snap.updated_at != stamps[tid]:
+                snap = self._load(tid)
+            if snap is not None:
+                out[tid] = snap
+        return out
+
+    def get(self, typology_id: int) -> Optional[TypologySnapshot]:
+        return self.get_many([typology_id]).get(int(typology_id))
+
+    def invalidate(self, typology_id: Optional[int] = None) -> None:
+        if typology_id is None:
+            self._snaps.clear()
+        else:
+            self._snaps.pop(int(typology_id), None)
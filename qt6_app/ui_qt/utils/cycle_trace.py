@@ -0,0 +1,335 @@
+"""
+Structured event trace for the automatic cut cycle.
+
+The cycle (ARMING → MOVING → brake lock → READY → WAIT_BRAKE) emits typed
+events with monotonic timestamps into a fixed-size ring buffer. Appending
+is a single deque.append on the caller's thread; a background thread
+periodically flushes new events as JSON lines to a rolling file under
+~/.blitz/traces. The report helpers rebuild per-piece latency breakdowns
+and rank the slowest phases, the basis for tuning auto_after_cut_pause_ms
+and the auto-continue logic.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# Event types
+PIECE_BEGIN = "piece_begin"
+MOVE_COMMANDED = "move_commanded"
+TARGET_REACHED = "target_reached"
+BRAKE_LOCKED = "brake_locked"
+BRAKE_RELEASED = "brake_released"
+PIECE_READY = "piece_ready"
+BLADE_PULSE = "blade_pulse"
+PIECE_COUNTED = "piece_counted"
+START_TRIGGER = "start_trigger"
+AUTO_CONTINUE = "auto_continue"
+STATE = "state"
+
+EVENT_TYPES = (
+    PIECE_BEGIN, MOVE_COMMANDED, TARGET_REACHED, BRAKE_LOCKED, BRAKE_RELEASED,
+    PIECE_READY, BLADE_PULSE, PIECE_COUNTED, START_TRIGGER, AUTO_CONTINUE, STATE,
+)
+
+# (previous event, next event) -> phase name used by the report
+PHASE_NAMES = {
+    (PIECE_BEGIN, MOVE_COMMANDED): "arming",
+    (MOVE_COMMANDED, TARGET_REACHED): "positioning",
+    (TARGET_REACHED, BRAKE_LOCKED): "brake_lock",
+    (BRAKE_LOCKED, BRAKE_RELEASED): "step_pause",
+    (BRAKE_RELEASED, MOVE_COMMANDED): "step_restart",
+    (BRAKE_LOCKED, PIECE_READY): "ready",
+    (PIECE_BEGIN, PIECE_READY): "ready",
+    (PIECE_READY, BLADE_PULSE): "operator_wait",
+    (BLADE_PULSE, PIECE_COUNTED): "cut_handling",
+    (PIECE_COUNTED, BRAKE_RELEASED): "brake_release_wait",
+    (PIECE_COUNTED, START_TRIGGER): "start_wait",
+    (PIECE_COUNTED, AUTO_CONTINUE): "auto_continue",
+    (BRAKE_RELEASED, AUTO_CONTINUE): "auto_continue",
+    (BRAKE_RELEASED, START_TRIGGER): "start_wait",
+}
+
+DEFAULT_TRACE_DIR = Path.home() / ".blitz" / "traces"
+TRACE_FILENAME = "cycle_trace.jsonl"
+
+
+class TraceEvent(NamedTuple):
+    seq: int
+    t_ns: int
+    kind: str
+    piece: Any
+    data: Optional[Dict[str, Any]]
+
+    def to_dict(self, t0_ns: int = 0) -> Dict[str, Any]:
+        d = {"seq": self.seq, "t": (self.t_ns - t0_ns) / 1e9, "ev": self.kind, "piece": self.piece}
+        if self.data:
+            d.update(self.data)
+        return d
+
+
+class CycleTracer:
+    """
+    Ring-buffered event tracer with asynchronous flush to a rolling file.
+
+    Args:
+        capacity: Events kept in memory (oldest are overwritten)
+        path: JSON-lines output file, None to keep events in memory only
+        flush_interval_s: Background flush period
+        max_bytes: Rotate the file when it grows past this size
+        backup_count: Rotated files kept (path.1 ... path.N)
+        clock: Monotonic nanosecond clock
+    """
+
+    def __init__(self, capacity: int = 8192, path: Optional[str] = None,
+                 flush_interval_s: float = 1.0, max_bytes: int = 5 * 1024 * 1024,
+                 backup_count: int = 3, clock=time.perf_counter_ns):
+        self.capacity = int(capacity)
+        self.path = Path(path) if path else None
+        self.flush_interval_s = float(flush_interval_s)
+        self.max_bytes = int(max_bytes)
+        self.backup_count = int(backup_count)
+        self.enabled = True
+        self._clock = clock
+        self._buf: deque = deque(maxlen=self.capacity)
+        self._seq = 0
+        self._piece: Any = None
+        self._t0_ns = clock()
+        self._epoch = time.time()
+        self._flushed_seq = 0
+        self._dropped = 0
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._header_written = False
+
+    # ---- Recording (hot path) ----
+    def emit(self, kind: str, piece: Any = None, **data):
+        """Append an event; piece defaults to the one opened by begin_piece."""
+        if not self.enabled:
+            return
+        self._seq += 1
+        self._buf.append(TraceEvent(self._seq, self._clock(), kind,
+                                    self._piece if piece is None else piece, data or None))
+
+    def begin_piece(self, piece: Any, **meta):
+        """Open a new piece: following events are attributed to it."""
+        self._piece = piece
+        self.emit(PIECE_BEGIN, piece, **meta)
+
+    @property
+    def current_piece(self) -> Any:
+        return self._piece
+
+    @property
+    def dropped(self) -> int:
+        """Events overwritten in the ring before being flushed."""
+        return self._dropped
+
+    def snapshot(self) -> List[TraceEvent]:
+        """Copy of the events currently in the ring buffer."""
+        while True:
+            try:
+                return list(self._buf)
+            except RuntimeError:  # mutated during copy
+                continue
+
+    def clear(self):
+        self._buf.clear()
+        self._flushed_seq = self._seq
+
+    # ---- Flush ----
+    def start(self):
+        """Start the background flush thread (no-op without a path)."""
+        if self.path is None or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._flush_loop, name="CycleTraceFlush", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the flush thread and write pending events."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        self.flush()
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval_s):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.debug(f"Cycle trace flush failed: {e}")
+
+    def flush(self) -> int:
+        """Write events not yet flushed; returns how many were written."""
+        if self.path is None:
+            return 0
+        with self._flush_lock:
+            pending = [ev for ev in self.snapshot() if ev.seq > self._flushed_seq]
+            if not pending:
+                return 0
+            gap = pending[0].seq - self._flushed_seq - 1
+            if gap > 0:
+                self._dropped += gap
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._rotate_if_needed()
+            lines = []
+            if not self._header_written:
+                lines.append(json.dumps({"ev": "session", "t": 0.0, "epoch": self._epoch}))
+                self._header_written = True
+            if gap > 0:
+                lines.append(json.dumps({"ev": "dropped", "t": (pending[0].t_ns - self._t0_ns) / 1e9, "count": gap}))
+            lines.extend(json.dumps(ev.to_dict(self._t0_ns), default=str) for ev in pending)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            self._flushed_seq = pending[-1].seq
+            return len(pending)
+
+    def _rotate_if_needed(self):
+        try:
+            if self.path.stat().st_size < self.max_bytes:
+                return
+        except FileNotFoundError:
+            return
+        for i in range(self.backup_count - 1, 0, -1):
+            src = self.path.with_name(f"{self.path.name}.{i}")
+            if src.exists():
+                os.replace(src, self.path.with_name(f"{self.path.name}.{i + 1}"))
+        if self.backup_count > 0:
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+        self._header_written = False
+
+
+_tracer: Optional[CycleTracer] = None
+
+
+def get_cycle_tracer() -> CycleTracer:
+    """
+    Process-wide tracer writing to ~/.blitz/traces/cycle_trace.jsonl.
+
+    BLITZ_CYCLE_TRACE=0 keeps events in memory only.
+    """
+    global _tracer
+    if _tracer is None:
+        to_file = os.environ.get("BLITZ_CYCLE_TRACE", "1") not in ("0", "false", "no")
+        _tracer = CycleTracer(path=str(DEFAULT_TRACE_DIR / TRACE_FILENAME) if to_file else None)
+        _tracer.start()
+    return _tracer
+
+
+# ---- Report ----
+def load_trace(paths: Iterable[str]) -> List[Dict[str, Any]]:
+    """
+    Read JSON-lines trace files (oldest first). Times of each session are
+    shifted so sessions appended to the same file do not overlap.
+    """
+    events: List[Dict[str, Any]] = []
+    for p in paths:
+        offset = 0.0
+        with open(p, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    ev = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # truncated last line
+                if ev.get("ev") == "session":
+                    offset = float(ev.get("epoch", 0.0))
+                    continue
+                ev["t"] = float(ev.get("t", 0.0)) + offset
+                events.append(ev)
+    return events
+
+
+def _as_dicts(events) -> List[Dict[str, Any]]:
+    out = []
+    for ev in events:
+        out.append(ev.to_dict() if isinstance(ev, TraceEvent) else ev)
+    return out
+
+
+def phase_name(prev_kind: str, kind: str) -> str:
+    return PHASE_NAMES.get((prev_kind, kind), f"{prev_kind}->{kind}")
+
+
+def piece_breakdown(events) -> List[Dict[str, Any]]:
+    """
+    Per-piece latency breakdown.
+
+    Each interval between consecutive events of the same piece is attributed
+    to a phase (see PHASE_NAMES). Returns one dict per piece, in cycle order:
+    {"piece", "meta", "total_s", "phases": {name: seconds}}.
+    """
+    rows: List[Dict[str, Any]] = []
+    current: Optional[Dict[str, Any]] = None
+    prev: Optional[Dict[str, Any]] = None
+    for ev in _as_dicts(events):
+        kind = ev.get("ev")
+        if kind in ("dropped", STATE):
+            continue
+        if kind == PIECE_BEGIN or current is None or ev.get("piece") != current["piece"]:
+            meta = {k: v for k, v in ev.items() if k not in ("seq", "t", "ev", "piece")} if kind == PIECE_BEGIN else {}
+            current = {"piece": ev.get("piece"), "meta": meta, "start": ev["t"], "end": ev["t"], "phases": {}}
+            rows.append(current)
+            prev = ev
+            continue
+        name = phase_name(prev.get("ev"), kind)
+        current["phases"][name] = current["phases"].get(name, 0.0) + max(0.0, ev["t"] - prev["t"])
+        current["end"] = ev["t"]
+        prev = ev
+    for r in rows:
+        r["total_s"] = r.pop("end") - r.pop("start")
+    return rows
+
+
+def slowest_phases(breakdown: List[Dict[str, Any]], top: int = 10) -> List[Dict[str, Any]]:
+    """Aggregate phases over all pieces, sorted by total time spent."""
+    samples: Dict[str, List[float]] = {}
+    for row in breakdown:
+        for name, s in row["phases"].items():
+            samples.setdefault(name, []).append(s)
+    stats = []
+    for name, values in samples.items():
+        values.sort()
+        n = len(values)
+        stats.append({
+            "phase": name,
+            "count": n,
+            "total_s": sum(values),
+            "mean_s": sum(values) / n,
+            "p95_s": values[min(n - 1, int(0.95 * n))],
+            "max_s": values[-1],
+        })
+    stats.sort(key=lambda s: s["total_s"], reverse=True)
+    return stats[:top]
+
+
+def format_trace_report(breakdown: List[Dict[str, Any]], top: int = 10, pieces: bool = False) -> str:
+    """Text report: slowest phases, optionally followed by every piece."""
+    lines = [f"pieces: {len(breakdown)}  cycle time: {sum(r['total_s'] for r in breakdown):.2f} s", ""]
+    lines.append(f"{'phase':<22}{'count':>7}{'total s':>10}{'mean ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for s in slowest_phases(breakdown, top):
+        lines.append(f"{s['phase']:<22}{s['count']:>7}{s['total_s']:>10.2f}"
+                     f"{s['mean_s'] * 1000:>10.1f}{s['p95_s'] * 1000:>10.1f}{s['max_s'] * 1000:>10.1f}")
+    if pieces:
+        lines.append("")
+        for r in breakdown:
+            desc = " ".join(f"{k}={v}" for k, v in r["meta"].items())
+            phases = ", ".join(f"{k} {v * 1000:.0f}ms" for k, v in r["phases"].items())
+            lines.append(f"#{r['piece']} {r['total_s']:.2f}s {desc}".rstrip())
+            if phases:
+                lines.append(f"    {phases}")
+    return "\n".join(lines)
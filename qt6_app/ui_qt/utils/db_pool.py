@@ -0,0 +1,168 @@
+"""
+Shared SQLite access layer.
+
+One ConnectionPool per database file (get_pool) hands out one long-lived
+connection per thread, configured once:
+- WAL journal with synchronous=NORMAL: readers do not block the writer and
+  a commit does not fsync the main file
+- foreign keys, busy timeout, in-memory temp store, larger page cache
+- a bigger per-connection statement cache: repeated queries reuse their
+  prepared statement instead of being compiled again
+
+Multi-statement writes go through transaction() (BEGIN IMMEDIATE ...
+COMMIT, or a SAVEPOINT when nested); commit() is a no-op inside it, so
+store methods that commit on their own compose into a single transaction.
+"""
+
+from __future__ import annotations
+
+import functools
+import itertools
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("foreign_keys", "ON"),
+    ("busy_timeout", "5000"),
+    ("temp_store", "MEMORY"),
+    ("cache_size", "-8000"),  # KiB
+)
+STATEMENT_CACHE = 256
+
+_savepoints = itertools.count(1)
+
+
+class ConnectionPool:
+    """Per-thread connections to one SQLite file."""
+
+    def __init__(self, path: Union[str, Path], row_factory: Optional[Callable] = None):
+        self.path = str(path)
+        self.row_factory = row_factory
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._conns: List[sqlite3.Connection] = []
+
+    def connection(self) -> sqlite3.Connection:
+        """Connection of the calling thread (opened and configured on first use)."""
+        con = getattr(self._local, "con", None)
+        if con is None:
+            parent = os.path.dirname(self.path)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+            con = sqlite3.connect(self.path, cached_statements=STATEMENT_CACHE, check_same_thread=False)
+            for name, value in PRAGMAS:
+                con.execute(f"PRAGMA {name}={value}")
+            if self.row_factory is not None:
+                con.row_factory = self.row_factory
+            self._local.con = con
+            self._local.depth = 0
+            with self._lock:
+                self._conns.append(con)
+        return con
+
+    def execute(self, sql: str, params: Any = ()) -> sqlite3.Cursor:
+        return self.connection().execute(sql, params)
+
+    def in_transaction(self) -> bool:
+        return getattr(self._local, "depth", 0) > 0
+
+    def commit(self) -> None:
+        """Commit pending changes, unless an explicit transaction() is open."""
+        if not self.in_transaction():
+            self.connection().commit()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Atomic block: committed on success, rolled back on exception."""
+        con = self.connection()
+        if self._local.depth == 0 and con.in_transaction:
+            con.commit()  # close an implicit transaction left open
+        nested = self._local.depth > 0
+        sp = f"sp{next(_savepoints)}"
+        con.execute(f"SAVEPOINT {sp}" if nested else "BEGIN IMMEDIATE")
+        self._local.depth += 1
+        try:
+            yield con
+        except BaseException:
+            self._local.depth -= 1
+            if nested:
+                con.execute(f"ROLLBACK TO {sp}")
+                con.execute(f"RELEASE {sp}")
+            else:
+                con.rollback()
+            raise
+        else:
+            self._local.depth -= 1
+            if nested:
+                con.execute(f"RELEASE {sp}")
+            else:
+                con.commit()
+
+    def release(self) -> None:
+        """Close the calling thread's connection (reopened on next use).
+
+        The connection is shared by every store of the thread on this file:
+        only a thread that owns it (a worker about to exit) should release
+        it. Stores' close() do not; close_all_pools() closes all at exit.
+        """
+        con = getattr(self._local, "con", None)
+        if con is None:
+            return
+        self._local.con = None
+        self._local.depth = 0
+        with self._lock:
+            if con in self._conns:
+                self._conns.remove(con)
+        try:
+            con.close()
+        except Exception:
+            pass
+
+    def close_all(self) -> None:
+        """Close every connection (call when no other thread uses the pool)."""
+        with self._lock:
+            conns, self._conns = self._conns, []
+        for con in conns:
+            try:
+                con.close()
+            except Exception:
+                pass
+        self._local = threading.local()
+
+
+def atomic(method: Callable) -> Callable:
+    """Run a store method (with a ``_db`` pool) inside one transaction."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._db.transaction():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+_POOLS: Dict[str, ConnectionPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_pool(path: Union[str, Path], row_factory: Optional[Callable] = None) -> ConnectionPool:
+    """Shared pool for a database file (one per absolute path)."""
+    key = os.path.abspath(str(path))
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = _POOLS[key] = ConnectionPool(key, row_factory=row_factory)
+        return pool
+
+
+def close_all_pools() -> None:
+    """Close every pooled connection (application shutdown)."""
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.close_all()
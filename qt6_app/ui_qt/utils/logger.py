@@ -7,14 +7,34 @@ Features:
 - Rotating file handlers
 - Separate error log
 - Configurable log levels per module
+- Non-blocking: records are queued and written by a background listener
+  in batches, with per-logger rate limiting for hot paths and a drop
+  counter when the queue is full
 """
 
+import atexit
 import logging
 import logging.handlers
 import json
+import queue
+import threading
+import time
 from pathlib import Path
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional, Tuple
+
+# Loggers on hot paths (control loop, per-piece mode detection, metro
+# notifications): (records per second, burst). WARNING and above always pass.
+HOT_PATH_RATE_LIMITS: Dict[str, Tuple[float, int]] = {
+    'blitz.motion_controller': (20.0, 40),
+    'blitz.md25hv': (20.0, 40),
+    'ui_qt.logic.modes.mode_detector': (5.0, 20),
+    'qt6_app.ui_qt.logic.modes.mode_detector': (5.0, 20),
+    'metro_digitale_manager': (5.0, 20),
+}
+
+QUEUE_SIZE = 10000
+BATCH_SIZE = 256
 
 
 class StructuredFormatter(logging.Formatter):
@@ -47,10 +67,193 @@ class StructuredFormatter(logging.Formatter):
         return json.dumps(log_data, ensure_ascii=False)
 
 
+class RateLimitFilter(logging.Filter):
+    """
+    Token-bucket rate limit per logger.
+    
+    Records of loggers listed in `limits` (or their children) below WARNING
+    are dropped once the bucket is empty; suppressed counts are kept per
+    logger.
+    """
+    
+    def __init__(self, limits: Dict[str, Tuple[float, int]], clock=time.monotonic):
+        super().__init__()
+        self.limits = dict(limits)
+        self.suppressed: Dict[str, int] = {}
+        self._clock = clock
+        self._buckets: Dict[str, object] = {}  # logger name -> [tokens, last_t, rate, burst] or False
+        self._lock = threading.Lock()
+    
+    def _limit_for(self, name: str) -> Optional[Tuple[float, int]]:
+        while name:
+            if name in self.limits:
+                return self.limits[name]
+            name = name.rpartition('.')[0]
+        return None
+    
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        bucket = self._buckets.get(record.name)
+        if bucket is None:
+            limit = self._limit_for(record.name)
+            bucket = [float(limit[1]), self._clock(), limit[0], limit[1]] if limit else False
+            bucket = self._buckets.setdefault(record.name, bucket)
+        if not bucket:
+            return True
+        with self._lock:
+            now = self._clock()
+            tokens = min(bucket[3], bucket[0] + (now - bucket[1]) * bucket[2])
+            bucket[1] = now
+            if tokens >= 1.0:
+                bucket[0] = tokens - 1.0
+                return True
+            bucket[0] = tokens
+            self.suppressed[record.name] = self.suppressed.get(record.name, 0) + 1
+            return False
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never blocks the caller.
+    
+    Only the message is rendered on the caller's thread; JSON encoding and
+    file I/O happen on the listener thread. When the queue is full the
+    record is dropped and counted.
+    """
+    
+    def __init__(self, q):
+        super().__init__(q)
+        self.dropped = 0
+        self.enqueued = 0
+    
+    def prepare(self, record):
+        # Same process: exc_info can travel as-is, so StructuredFormatter
+        # still sees the exception type and message.
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+    
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+            self.enqueued += 1
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler that flushes once per listener batch, not per record."""
+    
+    _in_batch = False
+    
+    def flush(self):
+        if not self._in_batch:
+            super().flush()
+    
+    def begin_batch(self):
+        self._in_batch = True
+    
+    def end_batch(self):
+        self._in_batch = False
+        self.flush()
+
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    """QueueListener that drains up to `batch_size` records per wake-up."""
+    
+    def __init__(self, q, *handlers, batch_size: int = BATCH_SIZE):
+        super().__init__(q, *handlers, respect_handler_level=True)
+        self.batch_size = batch_size
+        self.written = 0
+    
+    def _monitor(self):
+        q = self.queue
+        while True:
+            batch = [q.get()]
+            try:
+                while len(batch) < self.batch_size:
+                    batch.append(q.get_nowait())
+            except queue.Empty:
+                pass
+            stop = False
+            for h in self.handlers:
+                if isinstance(h, BatchRotatingFileHandler):
+                    h.begin_batch()
+            for record in batch:
+                if record is self._sentinel:
+                    stop = True
+                    continue
+                try:
+                    self.handle(record)
+                    self.written += 1
+                except Exception:
+                    pass
+            for h in self.handlers:
+                if isinstance(h, BatchRotatingFileHandler):
+                    h.end_batch()
+            for _ in batch:
+                q.task_done()
+            if stop:
+                break
+
+
+_listener: Optional[BatchingQueueListener] = None
+_queue_handler: Optional[NonBlockingQueueHandler] = None
+_rate_filter: Optional[RateLimitFilter] = None
+
+
+def shutdown_logging():
+    """Stop the background writer after writing every queued record."""
+    global _listener, _queue_handler
+    listener, _listener = _listener, None
+    if listener is not None:
+        try:
+            listener.stop()
+        except Exception:
+            pass
+        for h in listener.handlers:
+            try:
+                h.close()
+            except Exception:
+                pass
+    root = logging.getLogger()
+    if _queue_handler is not None and _queue_handler in root.handlers:
+        root.removeHandler(_queue_handler)
+    _queue_handler = None
+
+
+def flush_logging(timeout: float = 2.0) -> bool:
+    """Wait until queued records are written; returns False on timeout."""
+    listener = _listener
+    if listener is None:
+        return True
+    deadline = time.monotonic() + timeout
+    while listener.queue.unfinished_tasks:
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def get_logging_stats() -> dict:
+    """Counters of the asynchronous pipeline."""
+    return {
+        'enqueued': _queue_handler.enqueued if _queue_handler else 0,
+        'dropped': _queue_handler.dropped if _queue_handler else 0,
+        'written': _listener.written if _listener else 0,
+        'queue_depth': _listener.queue.qsize() if _listener else 0,
+        'rate_limited': dict(_rate_filter.suppressed) if _rate_filter else {},
+    }
+
+
 def setup_logging(
     log_dir: Optional[Path] = None,
     console_level=logging.INFO,
-    file_level=logging.DEBUG
+    file_level=logging.DEBUG,
+    rate_limits: Optional[Dict[str, Tuple[float, int]]] = None,
+    queue_size: int = QUEUE_SIZE
 ):
     """
     Setup production-grade logging.
@@ -59,17 +262,27 @@ def setup_logging(
         log_dir: Directory for log files (default: ~/.blitz/logs)
         console_level: Logging level for console output
         file_level: Logging level for file output
+        rate_limits: Per-logger (records/s, burst), default HOT_PATH_RATE_LIMITS
+        queue_size: Records buffered before new ones are dropped
     
     Creates:
         - blitz.log: All logs (rotating, 10MB, 5 backups)
         - errors.log: Error logs only (rotating, 5MB, 3 backups)
         - Console: INFO+ formatted output
+    
+    The root logger only gets a non-blocking queue handler; the handlers
+    above run on a background listener thread (see get_logging_stats,
+    flush_logging, shutdown_logging).
     """
+    global _listener, _queue_handler, _rate_filter
+    
     if log_dir is None:
         log_dir = Path.home() / '.blitz' / 'logs'
     
     log_dir.mkdir(parents=True, exist_ok=True)
     
+    shutdown_logging()
+    
     # Root logger
     root = logging.getLogger()
     root.setLevel(logging.DEBUG)
@@ -84,10 +297,9 @@ def setup_logging(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
         datefmt='%H:%M:%S'
     ))
-    root.addHandler(console)
     
     # Main file handler (DEBUG, structured JSON)
-    file_handler = logging.handlers.RotatingFileHandler(
+    file_handler = BatchRotatingFileHandler(
         log_dir / 'blitz.log',
         maxBytes=10 * 1024 * 1024,  # 10MB
         backupCount=5,
@@ -95,10 +307,9 @@ def setup_logging(
     )
     file_handler.setLevel(file_level)
     file_handler.setFormatter(StructuredFormatter())
-    root.addHandler(file_handler)
     
     # Error file handler (ERROR only)
-    error_handler = logging.handlers.RotatingFileHandler(
+    error_handler = BatchRotatingFileHandler(
         log_dir / 'errors.log',
         maxBytes=5 * 1024 * 1024,  # 5MB
         backupCount=3,
@@ -106,7 +317,16 @@ def setup_logging(
     )
     error_handler.setLevel(logging.ERROR)
     error_handler.setFormatter(StructuredFormatter())
-    root.addHandler(error_handler)
+    
+    # Caller side: rate limit + non-blocking enqueue
+    log_queue = queue.Queue(maxsize=queue_size)
+    _rate_filter = RateLimitFilter(HOT_PATH_RATE_LIMITS if rate_limits is None else rate_limits)
+    _queue_handler = NonBlockingQueueHandler(log_queue)
+    _queue_handler.addFilter(_rate_filter)
+    root.addHandler(_queue_handler)
+    
+    _listener = BatchingQueueListener(log_queue, console, file_handler, error_handler)
+    _listener.start()
     
     # Log startup with a specific logger to avoid handler ordering issues
     startup_logger = logging.getLogger("blitz.logging")
@@ -115,6 +335,9 @@ def setup_logging(
     return log_dir
 
 
+atexit.register(shutdown_logging)
+
+
 def get_logger(name: str) -> logging.Logger:
     """
     Get logger with specified name.
@@ -0,0 +1,401 @@
+"""
+In-process metrics for production monitoring.
+
+Counters, gauges and fixed-bucket histograms kept in a process-wide
+registry and exported, without touching the GUI, via:
+- a local HTTP endpoint (/metrics in Prometheus text format, /metrics.json)
+- a JSON file rewritten periodically (atomic replace)
+
+Instrumented sites: MachineAdapter (moves, positioning time), RealMachine
+(Modbus polling), pack_bars_knapsack_ilp (optimizer time, scrap), the
+Automatico page (pieces cut) and the label printer.
+
+Settings:
+- metrics_http_port: HTTP port, 0 disables (default 9108)
+- metrics_http_host: bind address (default 127.0.0.1)
+- metrics_json_path: JSON file (default ~/.blitz/metrics.json)
+- metrics_json_interval_s: JSON write period, 0 disables (default 30)
+"""
+
+import json
+import logging
+import math
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Default buckets (seconds) for operation durations
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+DEFAULT_HTTP_PORT = 9108
+DEFAULT_JSON_PATH = Path.home() / ".blitz" / "metrics.json"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    esc = [(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in key]
+    return "{" + ",".join(f'{k}="{v}"' for k, v in esc) + "}"
+
+
+def _format_value(v: float) -> str:
+    if math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    if float(v).is_integer():
+        return str(int(v))
+    return repr(float(v))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str = ""):
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+
+    def samples(self) -> List[Tuple[str, LabelKey, float]]:
+        raise NotImplementedError
+
+    def to_dict(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing value, optionally split by labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str = ""):
+        super().__init__(name, help_text)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        if amount < 0:
+            raise ValueError("Counter can only increase")
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, k, v) for k, v in self._values.items()]
+
+    def to_dict(self):
+        with self._lock:
+            return {"type": self.kind, "help": self.help,
+                    "values": [{"labels": dict(k), "value": v} for k, v in self._values.items()]}
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram (cumulative buckets on export, like Prometheus)."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str = "", buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        self._series: Dict[LabelKey, List[float]] = {}  # counts per bucket + [+Inf, sum, count]
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        n = len(self.buckets)
+        idx = n
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                idx = i
+                break
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = [0.0] * (n + 3)
+            s[idx] += 1
+            s[n + 1] += value
+            s[n + 2] += 1
+
+    def time(self, **labels):
+        """Context manager observing the elapsed time of the block."""
+        return _Timer(self, labels)
+
+    def count(self, **labels) -> int:
+        s = self._series.get(_label_key(labels))
+        return int(s[-1]) if s else 0
+
+    def sum(self, **labels) -> float:
+        s = self._series.get(_label_key(labels))
+        return s[-2] if s else 0.0
+
+    def samples(self):
+        out = []
+        n = len(self.buckets)
+        with self._lock:
+            for key, s in self._series.items():
+                cum = 0.0
+                for i, bound in enumerate(self.buckets + (math.inf,)):
+                    cum += s[i]
+                    out.append((self.name + "_bucket", key + (("le", _format_value(bound)),), cum))
+                out.append((self.name + "_sum", key, s[n + 1]))
+                out.append((self.name + "_count", key, s[n + 2]))
+        return out
+
+    def to_dict(self):
+        n = len(self.buckets)
+        with self._lock:
+            values = []
+            for key, s in self._series.items():
+                values.append({
+                    "labels": dict(key),
+                    "buckets": {_format_value(b): int(c) for b, c in zip(self.buckets + (math.inf,), s[:n + 1])},
+                    "sum": s[n + 1],
+                    "count": int(s[n + 2]),
+                    "mean": s[n + 1] / s[n + 2] if s[n + 2] else 0.0,
+                })
+        return {"type": self.kind, "help": self.help, "values": values}
+
+
+class _Timer:
+    __slots__ = ("hist", "labels", "t0")
+
+    def __init__(self, hist: Histogram, labels: Dict[str, Any]):
+        self.hist = hist
+        self.labels = labels
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self.t0, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """Named metrics; get-or-create accessors are safe to call at every use."""
+
+    def __init__(self, prefix: str = "blitz_"):
+        self.prefix = prefix
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def _get(self, cls, name: str, help_text: str, **kwargs):
+        full = self.prefix + name
+        m = self._metrics.get(full)
+        if m is None:
+            with self._lock:
+                m = self._metrics.get(full)
+                if m is None:
+                    m = self._metrics[full] = cls(full, help_text, **kwargs)
+        if not isinstance(m, cls) or (cls is Counter and isinstance(m, Gauge)):
+            raise TypeError(f"Metric {full} already registered as {m.kind}")
+        return m
+
+    def counter(self, name: str, help_text: str = "") -> Counter:
+        return self._get(Counter, name, help_text)
+
+    def gauge(self, name: str, help_text: str = "") -> Gauge:
+        return self._get(Gauge, name, help_text)
+
+    def histogram(self, name: str, help_text: str = "", buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help_text, buckets=buckets)
+
+    def metrics(self) -> List[_Metric]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def clear(self):
+        with self._lock:
+            self._metrics.clear()
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for m in sorted(self.metrics(), key=lambda m: m.name):
+            if m.help:
+                lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            for name, key, value in m.samples():
+                lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "host": socket.gethostname(),
+            "timestamp": time.time(),
+            "uptime_s": time.time() - self.started_at,
+            "metrics": {m.name: m.to_dict() for m in self.metrics()},
+        }
+
+    def write_json(self, path: Path):
+        """Write the JSON snapshot atomically."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=1)
+        os.replace(tmp, path)
+
+
+REGISTRY = MetricsRegistry()
+
+
+def counter(name: str, help_text: str = "") -> Counter:
+    return REGISTRY.counter(name, help_text)
+
+
+def gauge(name: str, help_text: str = "") -> Gauge:
+    return REGISTRY.gauge(name, help_text)
+
+
+def histogram(name: str, help_text: str = "", buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.histogram(name, help_text, buckets)
+
+
+# ---- Export ----
+def _make_request_handler(registry: MetricsRegistry):
+    # http.server imported here: the registry is used at startup, the endpoint later
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path in ("/metrics", "/"):
+                body = registry.to_prometheus().encode("utf-8")
+                ctype = "text/plain; version=0.0.4; charset=utf-8"
+            elif path == "/metrics.json":
+                body = json.dumps(registry.to_dict()).encode("utf-8")
+                ctype = "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt, *args):
+            logger.debug("metrics http: " + fmt, *args)
+
+    return MetricsRequestHandler
+
+
+class MetricsExporter:
+    """
+    Background exporter: HTTP endpoint and/or periodic JSON file.
+
+    Args:
+        registry: Registry to export
+        http_port: Port for /metrics (None disables, 0 picks a free port)
+        http_host: Bind address
+        json_path: JSON file (None disables)
+        json_interval_s: JSON write period
+    """
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY, http_port: Optional[int] = None,
+                 http_host: str = "127.0.0.1", json_path: Optional[str] = None,
+                 json_interval_s: float = 30.0):
+        self.registry = registry
+        self.http_port = http_port
+        self.http_host = http_host
+        self.json_path = Path(json_path) if json_path else None
+        self.json_interval_s = float(json_interval_s)
+        self._server = None
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+
+    @property
+    def server_address(self) -> Optional[Tuple[str, int]]:
+        return self._server.server_address[:2] if self._server else None
+
+    def start(self):
+        self._stop.clear()
+        if self.http_port is not None:
+            from http.server import ThreadingHTTPServer
+            handler = _make_request_handler(self.registry)
+            try:
+                self._server = ThreadingHTTPServer((self.http_host, int(self.http_port)), handler)
+                self._server.daemon_threads = True
+            except OSError as e:
+                logger.warning(f"Metrics HTTP endpoint not started on {self.http_host}:{self.http_port}: {e}")
+                self._server = None
+            if self._server:
+                t = threading.Thread(target=self._server.serve_forever, name="MetricsHTTP", daemon=True)
+                t.start()
+                self._threads.append(t)
+                logger.info(f"Metrics endpoint on http://{self.http_host}:{self.server_address[1]}/metrics")
+        if self.json_path and self.json_interval_s > 0:
+            t = threading.Thread(target=self._json_loop, name="MetricsJSON", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def _json_loop(self):
+        while not self._stop.wait(self.json_interval_s):
+            try:
+                self.registry.write_json(self.json_path)
+            except Exception as e:
+                logger.debug(f"Metrics JSON write failed: {e}")
+
+    def stop(self):
+        self._stop.set()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        for t in self._threads:
+            t.join(timeout=2.0)
+        self._threads.clear()
+        if self.json_path:
+            try:
+                self.registry.write_json(self.json_path)
+            except Exception as e:
+                logger.debug(f"Metrics JSON write failed: {e}")
+
+
+def start_metrics_export(settings: Optional[Dict[str, Any]] = None) -> MetricsExporter:
+    """Start the exporter configured by the metrics_* settings."""
+    s = settings or {}
+    json_path = s.get("metrics_json_path") or str(DEFAULT_JSON_PATH)
+    http_port = int(s.get("metrics_http_port", DEFAULT_HTTP_PORT) or 0)
+    exporter = MetricsExporter(
+        REGISTRY,
+        http_port=http_port or None,
+        http_host=str(s.get("metrics_http_host", "127.0.0.1")),
+        json_path=json_path,
+        json_interval_s=float(s.get("metrics_json_interval_s", 30.0) or 0),
+    )
+    exporter.start()
+    return exporter
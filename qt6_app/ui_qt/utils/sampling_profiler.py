@@ -0,0 +1,232 @@
+"""
+Low-overhead sampling profiler for production diagnostics.
+
+A background thread snapshots the Python stacks of every thread (GUI,
+Modbus polling, control loop, ...) with sys._current_frames() at a fixed
+interval, so hot spots can be captured on the kiosk without py-spy.
+
+Output (in ~/.blitz/profiles):
+- <name>.collapsed: one "thread;outer;...;leaf count" line per stack,
+  the input format of flamegraph.pl, speedscope and inferno
+- <name>_top.txt: top functions by self and inclusive samples
+"""
+
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE_DIR = Path.home() / ".blitz" / "profiles"
+DEFAULT_INTERVAL_S = 0.005
+MAX_DEPTH = 128
+
+# Leaf functions of threads parked on a lock/socket/event loop
+IDLE_FUNCTIONS = frozenset({"wait", "_wait_for_tstate_lock", "select", "poll", "accept", "exec", "exec_"})
+
+Frame = Tuple[str, str, int]  # (file, function, first line)
+
+
+def _frame_label(frame: Frame) -> str:
+    filename, func, line = frame
+    return f"{func} ({Path(filename).name}:{line})"
+
+
+class ProfileResult:
+    """Aggregated stacks of one profiling session."""
+
+    def __init__(self, stacks: Counter, samples: int, duration_s: float, interval_s: float):
+        self.stacks = stacks  # (thread name, frames root→leaf) -> samples
+        self.samples = samples
+        self.duration_s = duration_s
+        self.interval_s = interval_s
+
+    def collapsed(self) -> List[str]:
+        lines = []
+        for (thread, frames), count in self.stacks.most_common():
+            parts = [thread.replace(";", "_").replace(" ", "_")] + [_frame_label(f).replace(";", "_") for f in frames]
+            lines.append(f"{';'.join(parts)} {count}")
+        return lines
+
+    def top_functions(self, limit: int = 30) -> List[Dict[str, object]]:
+        """Functions ranked by self samples (leaf), with inclusive samples."""
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        for (_thread, frames), count in self.stacks.items():
+            if not frames:
+                continue
+            self_counts[frames[-1]] += count
+            for f in set(frames):
+                total_counts[f] += count
+        total = sum(self.stacks.values()) or 1
+        ranked = sorted(total_counts, key=lambda f: (self_counts[f], total_counts[f]), reverse=True)
+        return [{
+            "function": _frame_label(f),
+            "self": self_counts[f],
+            "total": total_counts[f],
+            "self_pct": 100.0 * self_counts[f] / total,
+            "total_pct": 100.0 * total_counts[f] / total,
+        } for f in ranked[:limit]]
+
+    def thread_samples(self) -> Dict[str, int]:
+        out: Counter = Counter()
+        for (thread, _frames), count in self.stacks.items():
+            out[thread] += count
+        return dict(out.most_common())
+
+    def format_top(self, limit: int = 30) -> str:
+        lines = [
+            f"duration: {self.duration_s:.2f} s  interval: {self.interval_s * 1000:.1f} ms  "
+            f"snapshots: {self.samples}  stack samples: {sum(self.stacks.values())}",
+            "",
+            "threads:",
+        ]
+        for thread, count in self.thread_samples().items():
+            lines.append(f"  {count:>8}  {thread}")
+        lines += ["", f"{'self %':>8}{'total %':>9}{'self':>8}{'total':>8}  function"]
+        for row in self.top_functions(limit):
+            lines.append(f"{row['self_pct']:>8.1f}{row['total_pct']:>9.1f}{row['self']:>8}{row['total']:>8}  {row['function']}")
+        return "\n".join(lines)
+
+    def save(self, out_dir: Optional[Path] = None, name: Optional[str] = None) -> Tuple[Path, Path]:
+        """Write <name>.collapsed and <name>_top.txt; returns both paths."""
+        out_dir = Path(out_dir) if out_dir else DEFAULT_PROFILE_DIR
+        out_dir.mkdir(parents=True, exist_ok=True)
+        name = name or datetime.now().strftime("profile_%Y%m%d_%H%M%S")
+        collapsed = out_dir / f"{name}.collapsed"
+        top = out_dir / f"{name}_top.txt"
+        collapsed.write_text("\n".join(self.collapsed()) + "\n", encoding="utf-8")
+        top.write_text(self.format_top() + "\n", encoding="utf-8")
+        return collapsed, top
+
+
+class SamplingProfiler:
+    """
+    Sample all thread stacks periodically.
+
+    Args:
+        interval_s: Sampling period (5 ms keeps overhead around 1-2%)
+        skip_idle: Drop samples of threads parked in IDLE_FUNCTIONS
+    """
+
+    def __init__(self, interval_s: float = DEFAULT_INTERVAL_S, skip_idle: bool = True):
+        self.interval_s = float(interval_s)
+        self.skip_idle = skip_idle
+        self._stacks: Counter = Counter()
+        self._samples = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._t_start = 0.0
+        self._t_end = 0.0
+        self.last_result: Optional[ProfileResult] = None
+        self.last_paths: Optional[Tuple[Path, Path]] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def elapsed_s(self) -> float:
+        return (time.monotonic() - self._t_start) if self.running else (self._t_end - self._t_start)
+
+    def start(self, duration_s: Optional[float] = None, out_dir: Optional[Path] = None,
+              on_finished: Optional[Callable[[ProfileResult, Tuple[Path, Path]], None]] = None) -> bool:
+        """
+        Start sampling; returns False if already running.
+
+        With duration_s the profiler stops by itself, writes the files to
+        out_dir and calls on_finished(result, paths) from its own thread.
+        """
+        with self._lock:
+            if self.running:
+                return False
+            self._stacks = Counter()
+            self._samples = 0
+            self._stop.clear()
+            self._t_start = time.monotonic()
+            self._thread = threading.Thread(
+                target=self._run, args=(duration_s, out_dir, on_finished),
+                name="SamplingProfiler", daemon=True)
+            self._thread.start()
+        logger.info(f"Sampling profiler started (interval={self.interval_s * 1000:.1f}ms, duration={duration_s})")
+        return True
+
+    def stop(self, save: bool = True, out_dir: Optional[Path] = None) -> Optional[ProfileResult]:
+        """Stop sampling and (optionally) write the output files."""
+        thread = self._thread
+        if thread is None:
+            return self.last_result
+        self._stop.set()
+        if thread is not threading.current_thread():
+            thread.join(timeout=5.0)
+        result = self.last_result
+        if save and result is not None and self.last_paths is None:
+            self.last_paths = result.save(out_dir)
+            logger.info(f"Profile written to {self.last_paths[0]}")
+        return result
+
+    def _run(self, duration_s, out_dir, on_finished):
+        self.last_result = None
+        self.last_paths = None
+        own = threading.get_ident()
+        deadline = self._t_start + duration_s if duration_s else None
+        next_t = time.monotonic()
+        while not self._stop.is_set():
+            self._sample(own)
+            next_t += self.interval_s
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                break
+            if next_t < now:  # fell behind: do not burst
+                next_t = now
+            self._stop.wait(next_t - now)
+        self._t_end = time.monotonic()
+        self.last_result = ProfileResult(self._stacks, self._samples, self._t_end - self._t_start, self.interval_s)
+        self._thread = None
+        if deadline is not None and not self._stop.is_set():
+            try:
+                self.last_paths = self.last_result.save(out_dir)
+                logger.info(f"Profile written to {self.last_paths[0]}")
+            except Exception as e:
+                logger.error(f"Profile write failed: {e}")
+            if on_finished:
+                try:
+                    on_finished(self.last_result, self.last_paths)
+                except Exception as e:
+                    logger.error(f"Profiler callback failed: {e}")
+
+    def _sample(self, own_ident: int):
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            stack = []
+            depth = 0
+            while frame is not None and depth < MAX_DEPTH:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_name, code.co_firstlineno))
+                frame = frame.f_back
+                depth += 1
+            if not stack:
+                continue
+            if self.skip_idle and stack[0][1] in IDLE_FUNCTIONS:
+                continue
+            stack.reverse()
+            self._stacks[(names.get(ident, f"thread-{ident}"), tuple(stack))] += 1
+        self._samples += 1
+
+
+_profiler: Optional[SamplingProfiler] = None
+
+
+def get_profiler() -> SamplingProfiler:
+    """Process-wide profiler shared by the Utility page and main_qt."""
+    global _profiler
+    if _profiler is None:
+        _profiler = SamplingProfiler()
+    return _profiler
@@ -19,19 +19,29 @@ Inoltre introdotti i TOP-LEVEL keys usati dal modulo di ottimizzazione:
   opt_auto_continue_across_bars, opt_strict_bar_sequence, opt_enable_tail_refine,
   opt_show_graph, opt_collapse_done_bars, auto_after_cut_pause_ms,
   semi_offset_mm, inpos_tol_mm, label_enabled, label_printer_model,
-  label_backend, label_printer_name, label_paper, label_rotate.
+  label_backend, label_printer_name, label_paper, label_rotate,
+  label_spool_max_pending, label_spool_batch, label_spool_retries.
 
 Questi vengono salvati DIRECTLY a livello root insieme alla struttura originale
 per retro–compatibilità. I wrapper scrivono solo i campi forniti senza perdere
 gli altri (merge).
+
+CACHE:
+Le impostazioni restano in memoria e il file viene riletto solo quando cambia
+(mtime/size). write_settings/set_setting aggiornano subito la cache e scrivono
+il file (atomico) dopo WRITE_DEBOUNCE_S; save_settings scrive subito.
+Accessor tipizzati: get_float/get_int/get_bool/get_str. Cambi notificati con
+subscribe(callback, keys) o con il Signal settings_notifier().changed.
 """
 
+import atexit
 import json
 import os
 import logging
 import contextlib
+import threading
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, Iterable, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -138,6 +148,10 @@ DEFAULT_SETTINGS: Dict[str, Any] = {
     'label_printer_name':      '',
     'label_paper':             'DK-11201',
     'label_rotate':            0,
+    # Spooler etichette (services/label_spooler.py)
+    'label_spool_max_pending': 500,
+    'label_spool_batch':       10,
+    'label_spool_retries':     5,
     # --- Hardware configuration (measured values) ---
     'machine_zero_homing_mm':       250.0,
     'machine_offset_battuta_mm':    120.0,
@@ -151,16 +165,79 @@ MAPPING_FLAT_TO_NESTED = {
     # 'opt_kerf_mm': ('optimization', 'kerf'),  # esempio se vuoi sincronizzare
 }
 
-# Lock semplice
+# Lock semplice (scrittura file)
 _lock = None
 def _get_lock():
     global _lock
     if _lock is None:
-        import threading
         _lock = threading.Lock()
     return _lock
 
 
+# ------------- Cache in memoria -------------
+# read_settings()/get_setting() sono chiamati molte volte per ottimizzazione:
+# il file viene riletto solo se cambia (mtime/size), le scritture sono
+# differite di WRITE_DEBOUNCE_S e i cambi notificati ai sottoscrittori.
+WRITE_DEBOUNCE_S = 0.5
+
+_MISSING = object()
+
+
+class _SettingsCache:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.data: Optional[Dict[str, Any]] = None
+        self.stamp: Optional[tuple] = None
+        self.dirty = False
+        self.timer: Optional[threading.Timer] = None
+        self.listeners: List[Tuple[Callable[[Dict[str, Any]], None], Optional[frozenset]]] = []
+
+
+_cache = _SettingsCache()
+
+
+def _copy(value: Any) -> Any:
+    """Copia dei valori JSON (dict/list annidati), più veloce di deepcopy."""
+    if isinstance(value, dict):
+        return {k: _copy(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy(v) for v in value]
+    return value
+
+
+def _file_stamp() -> tuple:
+    try:
+        st = SETTINGS_FILE.stat()
+        return (str(SETTINGS_FILE), st.st_mtime_ns, st.st_size)
+    except OSError:
+        return (str(SETTINGS_FILE), None, None)
+
+
+def _diff(old: Optional[Dict[str, Any]], new: Dict[str, Any]) -> Dict[str, Any]:
+    if old is None:
+        return {}
+    changed = {k: v for k, v in new.items() if old.get(k, _MISSING) != v}
+    for k in old:
+        if k not in new:
+            changed[k] = None
+    return changed
+
+
+def _notify(changed: Dict[str, Any]) -> None:
+    if not changed:
+        return
+    with _cache.lock:
+        listeners = list(_cache.listeners)
+    for callback, keys in listeners:
+        sub = changed if keys is None else {k: v for k, v in changed.items() if k in keys}
+        if not sub:
+            continue
+        try:
+            callback(_copy(sub))
+        except Exception as e:
+            logger.error(f"Errore callback impostazioni: {e}")
+
+
 def ensure_settings_dir():
     if not SETTINGS_DIR.exists():
         try:
@@ -180,7 +257,7 @@ def merge_settings(defaults: Dict[str, Any], current: Dict[str, Any]) -> Dict[st
     return merged
 
 
-def load_settings() -> Dict[str, Any]:
+def _load_from_disk() -> Dict[str, Any]:
     ensure_settings_dir()
     if SETTINGS_FILE.exists():
         try:
@@ -188,18 +265,35 @@ def load_settings() -> Dict[str, Any]:
                 data = json.load(f)
             if not isinstance(data, dict):
                 raise ValueError("File impostazioni non è un dict valido.")
-            return merge_settings(DEFAULT_SETTINGS, data)
+            return _copy(merge_settings(DEFAULT_SETTINGS, data))
         except Exception as e:
             logger.error(f"Errore caricamento impostazioni: {e}")
-            return DEFAULT_SETTINGS.copy()
-    # file assente
-    return DEFAULT_SETTINGS.copy()
-
-
-def save_settings(settings: Dict[str, Any]) -> bool:
+    # file assente o non valido
+    return _copy(DEFAULT_SETTINGS)
+
+
+def _current() -> Dict[str, Any]:
+    """Dict in cache (da NON modificare); ricarica se il file è cambiato."""
+    changed = None
+    with _cache.lock:
+        # Con una scrittura in attesa la memoria è più recente del disco
+        if _cache.dirty and _cache.data is not None:
+            return _cache.data
+        stamp = _file_stamp()
+        if _cache.data is None or stamp != _cache.stamp:
+            old = _cache.data
+            _cache.data = _load_from_disk()
+            _cache.stamp = stamp
+            changed = _diff(old, _cache.data)
+        data = _cache.data
+    if changed:
+        logger.info(f"Impostazioni ricaricate da disco ({len(changed)} chiavi cambiate)")
+        _notify(changed)
+    return data
+
+
+def _write_file(settings: Dict[str, Any]) -> bool:
     ensure_settings_dir()
-    # merge con defaults prima di scrivere
-    settings = merge_settings(DEFAULT_SETTINGS, settings)
     tmp_path = SETTINGS_FILE.with_suffix(SETTINGS_FILE.suffix + TMP_SUFFIX)
     try:
         with _get_lock():
@@ -215,6 +309,132 @@ def save_settings(settings: Dict[str, Any]) -> bool:
         return False
 
 
+def _store(settings: Dict[str, Any], debounce: bool) -> bool:
+    """Aggiorna la cache, notifica i cambi e scrive (subito o differito)."""
+    settings = _copy(merge_settings(DEFAULT_SETTINGS, settings))
+    _current()  # allinea la cache al disco prima del confronto
+    ok = True
+    with _cache.lock:
+        changed = _diff(_cache.data, settings)
+        if not changed and not _cache.dirty and _cache.stamp == _file_stamp() and _cache.stamp[1] is not None:
+            return True  # niente da scrivere
+        _cache.data = settings
+        if debounce:
+            _cache.dirty = True
+            if _cache.timer is None:
+                _cache.timer = threading.Timer(WRITE_DEBOUNCE_S, flush_settings)
+                _cache.timer.daemon = True
+                _cache.timer.start()
+        else:
+            _cancel_timer()
+            ok = _write_file(settings)
+            _cache.dirty = False
+            _cache.stamp = _file_stamp()
+    _notify(changed)
+    return ok
+
+
+def _cancel_timer():
+    if _cache.timer is not None:
+        _cache.timer.cancel()
+        _cache.timer = None
+
+
+def flush_settings() -> bool:
+    """Scrive subito le modifiche differite (chiamato anche all'uscita)."""
+    with _cache.lock:
+        _cancel_timer()
+        if not _cache.dirty or _cache.data is None:
+            return True
+        ok = _write_file(_cache.data)
+        _cache.dirty = False
+        _cache.stamp = _file_stamp()
+    return ok
+
+
+atexit.register(flush_settings)
+
+
+def invalidate_settings_cache() -> None:
+    """Scarta la cache (la prossima lettura rilegge il file)."""
+    flush_settings()
+    with _cache.lock:
+        _cache.data = None
+        _cache.stamp = None
+
+
+def load_settings() -> Dict[str, Any]:
+    return _copy(_current())
+
+
+def save_settings(settings: Dict[str, Any]) -> bool:
+    # merge con defaults prima di scrivere; scrittura immediata (atomica)
+    return _store(settings, debounce=False)
+
+
+# ------------- Notifiche -------------
+def subscribe(callback: Callable[[Dict[str, Any]], None], keys: Optional[Iterable[str]] = None) -> Callable[[], None]:
+    """
+    Registra callback(changed) per i cambi delle chiavi top-level.
+
+    changed è {chiave: nuovo valore}; con keys solo le chiavi indicate.
+    La callback gira nel thread che ha scritto/riletto le impostazioni
+    (per la GUI usare settings_notifier().changed). Ritorna la funzione
+    per annullare la sottoscrizione.
+    """
+    entry = (callback, frozenset(keys) if keys is not None else None)
+    with _cache.lock:
+        _cache.listeners.append(entry)
+    return lambda: unsubscribe(callback)
+
+
+def unsubscribe(callback: Callable[[Dict[str, Any]], None]) -> None:
+    with _cache.lock:
+        _cache.listeners = [e for e in _cache.listeners if e[0] is not callback]
+
+
+_notifier = None
+
+
+def settings_notifier():
+    """
+    QObject con Signal changed(dict), emesso nel thread GUI per ogni cambio.
+
+    Sorveglia anche il file (QFileSystemWatcher): le modifiche esterne
+    vengono ricaricate e notificate senza interrogare il disco.
+    """
+    global _notifier
+    if _notifier is None:
+        from PySide6.QtCore import QObject, Signal, QFileSystemWatcher
+
+        class SettingsNotifier(QObject):
+            changed = Signal(dict)
+
+            def __init__(self):
+                super().__init__()
+                self._watcher = QFileSystemWatcher(self)
+                self._watcher.fileChanged.connect(self._on_file_changed)
+                # Directory: per accorgersi della creazione del file
+                self._watcher.directoryChanged.connect(self._on_file_changed)
+                ensure_settings_dir()
+                if SETTINGS_DIR.exists():
+                    self._watcher.addPath(str(SETTINGS_DIR))
+                self._watch()
+                subscribe(self.changed.emit)
+
+            def _watch(self):
+                path = str(SETTINGS_FILE)
+                if SETTINGS_FILE.exists() and path not in self._watcher.files():
+                    self._watcher.addPath(path)
+
+            def _on_file_changed(self, _path: str):
+                _current()
+                self._watch()  # os.replace sostituisce il file: va ri-aggiunto
+
+        _notifier = SettingsNotifier()
+    return _notifier
+
+
 # ------------- Wrapper COMPAT richiesti dal codice esistente -------------
 def read_settings() -> Dict[str, Any]:
     """
@@ -225,7 +445,7 @@ def read_settings() -> Dict[str, Any]:
 
 def write_settings(new_data: Dict[str, Any]) -> None:
     """
-    Wrapper compatibile: merge dei dati e salva.
+    Wrapper compatibile: merge dei dati e salva (scrittura differita).
     Non elimina nessuna chiave esistente.
     """
     if not isinstance(new_data, dict):
@@ -244,22 +464,47 @@ def write_settings(new_data: Dict[str, Any]) -> None:
                         level[subkey] = {}
                     level = level[subkey]
                 level[path[-1]] = v
-    save_settings(current)
+    _store(current, debounce=True)
 
 
 # ------------- Funzioni puntate originali -------------
 def get_setting(path: str, default: Any = None) -> Any:
-    settings = load_settings()
-    keys = path.split('.')
-    value: Any = settings
+    value: Any = _current()
     try:
-        for key in keys:
+        for key in path.split('.'):
             value = value[key]
-        return value
+        return _copy(value)
     except (KeyError, TypeError):
         return default
 
 
+# ------------- Accessor tipizzati (dalla cache, senza copie) -------------
+def get_float(path: str, default: float = 0.0) -> float:
+    try:
+        return float(get_setting(path, default))
+    except (TypeError, ValueError):
+        return float(default)
+
+
+def get_int(path: str, default: int = 0) -> int:
+    try:
+        return int(float(get_setting(path, default)))
+    except (TypeError, ValueError):
+        return int(default)
+
+
+def get_bool(path: str, default: bool = False) -> bool:
+    value = get_setting(path, default)
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'on', 'si', 'sì')
+    return bool(value)
+
+
+def get_str(path: str, default: str = '') -> str:
+    value = get_setting(path, default)
+    return default if value is None else str(value)
+
+
 def set_setting(path: str, value: Any) -> bool:
     settings = load_settings()
     keys = path.split('.')
@@ -274,14 +519,14 @@ def set_setting(path: str, value: Any) -> bool:
         top_key = path.replace('.', '_')
         if top_key in DEFAULT_SETTINGS:
             settings[top_key] = value
-        return save_settings(settings)
+        return _store(settings, debounce=True)
     except Exception as e:
         logger.error(f"Errore set_setting({path}): {e}")
         return False
 
 
 def reset_settings() -> bool:
-    return save_settings(DEFAULT_SETTINGS.copy())
+    return save_settings(_copy(DEFAULT_SETTINGS))
 
 
 # ------------- Recent items -------------
@@ -381,6 +626,15 @@ __all__ = [
     'write_settings',
     'get_setting',
     'set_setting',
+    'get_float',
+    'get_int',
+    'get_bool',
+    'get_str',
+    'flush_settings',
+    'invalidate_settings_cache',
+    'subscribe',
+    'unsubscribe',
+    'settings_notifier',
     'reset_settings',
     'add_recent_file',
     'get_recent_files',
@@ -0,0 +1,80 @@
+"""
+Startup timing report.
+
+Records how long each startup phase takes (module imports, logging, Qt
+application, machine init, each page import/build) together with the
+number of modules each phase imported and the new top-level packages, in
+the spirit of ``python -X importtime`` but per phase/page.
+
+Pages built lazily after startup are recorded with the same timer, so the
+report also shows the cost paid on the first visit of each page. The
+background warm-up records its phases from its own thread: the timer is
+guarded by a lock.
+"""
+
+import json
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Phase timer anchored to a reference instant (perf_counter seconds)."""
+
+    def __init__(self, t0: Optional[float] = None):
+        self.t0 = time.perf_counter() if t0 is None else t0
+        self.phases: List[Dict[str, Any]] = []
+        self.marks: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def elapsed_s(self) -> float:
+        return time.perf_counter() - self.t0
+
+    def mark(self, name: str) -> float:
+        """Record a milestone (seconds since t0)."""
+        t = self.elapsed_s()
+        with self._lock:
+            self.marks[name] = t
+        return t
+
+    @contextmanager
+    def phase(self, name: str, **extra):
+        """Time a block and count the modules it imported."""
+        before = set(sys.modules)
+        start = self.elapsed_s()
+        entry: Dict[str, Any] = {"name": name, "start_s": start, **extra}
+        try:
+            yield entry
+        finally:
+            entry["duration_s"] = self.elapsed_s() - start
+            new = set(sys.modules) - before
+            entry["modules"] = len(new)
+            entry["packages"] = sorted({m.split(".")[0] for m in new if not m.startswith(("ui_qt", "qt6_app"))})
+            with self._lock:
+                self.phases.append(entry)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"marks": dict(self.marks), "phases": list(self.phases)}
+
+    def format_report(self) -> str:
+        snap = self.to_dict()
+        lines = ["Startup timing:"]
+        for name, t in sorted(snap["marks"].items(), key=lambda kv: kv[1]):
+            lines.append(f"  @{t * 1000:8.0f} ms  {name}")
+        lines.append(f"  {'phase':<32}{'ms':>9}{'modules':>9}  packages")
+        for p in snap["phases"]:
+            pkgs = ", ".join(p["packages"][:8]) + (" ..." if len(p["packages"]) > 8 else "")
+            lines.append(f"  {p['name']:<32}{p['duration_s'] * 1000:>9.1f}{p['modules']:>9}  {pkgs}")
+        return "\n".join(lines)
+
+    def write_json(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2), encoding="utf-8")
@@ -0,0 +1,252 @@
+"""
+Background warm-up after the main window is shown.
+
+Runs, on a daemon thread while the operator homes the machine, the work
+that would otherwise be paid on first use:
+- solver: import pulp and run a tiny CBC model (subprocess spin-up)
+- db: open the typologies/orders/profiles stores (schema creation and
+  migrations) and run PRAGMA quick_check on each file
+- label: import PIL/brother_ql and render text with the label fonts
+- hardware: probe the Modbus boards and the encoder (probe_hardware())
+
+Each task yields a WarmupResult with status "ok", "warn" or "error"; the
+results are kept by the process-wide runner (get_warmup()) and shown by
+StatusPanel in the SISTEMA row.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+OK = "ok"
+WARN = "warn"
+ERROR = "error"
+
+_SEVERITY = {OK: 0, WARN: 1, ERROR: 2}
+
+LABEL_FONT_SIZES = (14, 18, 24, 32)
+
+
+class WarmupResult(NamedTuple):
+    name: str
+    status: str
+    ms: float
+    detail: str = ""
+
+
+TaskFn = Callable[[], Tuple[str, str]]  # -> (status, detail)
+
+
+# ---------------------------------------------------------------- tasks
+
+def warm_solver() -> Tuple[str, str]:
+    try:
+        import pulp
+    except ImportError:
+        return WARN, "pulp non installato: ottimizzazione greedy"
+    prob = pulp.LpProblem("WARMUP", pulp.LpMaximize)
+    x = pulp.LpVariable("x", lowBound=0, upBound=1, cat=pulp.LpBinary)
+    prob += x
+    prob.solve(pulp.PULP_CBC_CMD(msg=False, timeLimit=5))
+    if pulp.LpStatus.get(prob.status) != "Optimal":
+        return WARN, f"CBC: {pulp.LpStatus.get(prob.status)}"
+    return OK, f"pulp {getattr(pulp, '__version__', '?')} + CBC"
+
+
+def _quick_check(path: Path) -> str:
+    con = sqlite3.connect(str(path))
+    try:
+        return str(con.execute("PRAGMA quick_check").fetchone()[0])
+    finally:
+        con.close()
+
+
+def warm_databases() -> Tuple[str, str]:
+    from ui_qt.services.typologies_store import TypologiesStore
+    from ui_qt.services.orders_store import OrdersStore
+    from ui_qt.services import profiles_store
+
+    paths = []
+    for factory in (TypologiesStore, OrdersStore):
+        store = factory()  # open_database: migrazioni dello schema
+        paths.append(store.db_path)
+        store.close()
+    store = profiles_store.ProfilesStore()
+    paths.append(store.db_path)
+    store.close()
+
+    bad = []
+    for p in dict.fromkeys(Path(p) for p in paths):
+        res = _quick_check(p)
+        if res != "ok":
+            bad.append(f"{p.name}: {res}")
+    if bad:
+        return ERROR, "; ".join(bad)
+    return OK, ", ".join(sorted({Path(p).name for p in paths}))
+
+
+def warm_label_fonts() -> Tuple[str, str]:
+    try:
+        from PIL import Image, ImageDraw, ImageFont
+    except ImportError:
+        return WARN, "PIL non installato: etichette disabilitate"
+    try:
+        import brother_ql.raster  # noqa: F401
+        import brother_ql.backends  # noqa: F401
+        ql = True
+    except Exception:
+        ql = False
+    img = Image.new("L", (400, 120), 255)
+    draw = ImageDraw.Draw(img)
+    fallback = False
+    for size in LABEL_FONT_SIZES:
+        try:
+            font = ImageFont.truetype("arial.ttf", size)
+        except Exception:
+            font = ImageFont.load_default()
+            fallback = True
+        draw.text((4, 4), "0123456789 ABC mm", fill=0, font=font)
+    detail = ("font di default" if fallback else "arial.ttf") + ("" if ql else ", brother_ql assente")
+    return (WARN if not ql else OK), detail
+
+
+def make_hardware_probe(machine: Any) -> TaskFn:
+    def warm_hardware() -> Tuple[str, str]:
+        probe = getattr(machine, "probe_hardware", None)
+        if not callable(probe):
+            return OK, "simulazione"
+        checks: Dict[str, Tuple[bool, str]] = probe()
+        failed = [f"{k}: {d}" for k, (ok, d) in checks.items() if not ok]
+        if failed:
+            return ERROR, "; ".join(failed)
+        return OK, ", ".join(f"{k}: {d}" for k, (_ok, d) in checks.items())
+    return warm_hardware
+
+
+def default_tasks(machine: Any = None) -> List[Tuple[str, TaskFn]]:
+    tasks: List[Tuple[str, TaskFn]] = [
+        ("db", warm_databases),
+        ("label", warm_label_fonts),
+        ("solver", warm_solver),
+    ]
+    if machine is not None:
+        tasks.insert(0, ("hardware", make_hardware_probe(machine)))
+    return tasks
+
+
+# ---------------------------------------------------------------- runner
+
+class WarmupRunner:
+    """Run warm-up tasks sequentially on a background thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._results: Dict[str, WarmupResult] = {}
+        self._pending: List[str] = []
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, tasks: List[Tuple[str, TaskFn]],
+              on_done: Optional[Callable[[List[WarmupResult]], None]] = None,
+              timer: Any = None) -> bool:
+        """
+        Start the tasks; returns False if a warm-up is already running.
+
+        on_done(results) is called from the worker thread; timer, if given,
+        is a StartupTimer whose phase() records each task as "warmup <name>".
+        """
+        with self._lock:
+            if self.running:
+                return False
+            self._results = {}
+            self._pending = [name for name, _fn in tasks]
+            self._thread = threading.Thread(target=self._run, args=(list(tasks), on_done, timer),
+                                            name="Warmup", daemon=True)
+            self._thread.start()
+        return True
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        t = self._thread
+        if t is not None:
+            t.join(timeout)
+        return not self.running
+
+    def _run(self, tasks, on_done, timer):
+        for name, fn in tasks:
+            t0 = time.perf_counter()
+            try:
+                if timer is not None:
+                    with timer.phase(f"warmup {name}"):
+                        status, detail = fn()
+                else:
+                    status, detail = fn()
+            except Exception as e:
+                status, detail = ERROR, f"{type(e).__name__}: {e}"
+            res = WarmupResult(name, status, (time.perf_counter() - t0) * 1000.0, detail)
+            log = logger.info if status == OK else logger.warning
+            log(f"Warm-up {name}: {status} in {res.ms:.0f} ms ({detail})")
+            with self._lock:
+                self._results[name] = res
+                if name in self._pending:
+                    self._pending.remove(name)
+        if on_done:
+            try:
+                on_done(self.results())
+            except Exception as e:
+                logger.error(f"Warm-up callback failed: {e}")
+
+    def results(self) -> List[WarmupResult]:
+        with self._lock:
+            return list(self._results.values())
+
+    def pending(self) -> List[str]:
+        with self._lock:
+            return list(self._pending)
+
+    def summary(self) -> Tuple[Optional[str], str]:
+        """
+        Overall (status, text) for the status panel.
+
+        status is None before any warm-up has started; while tasks are
+        still pending it is the worst status so far with text "AVVIO...".
+        """
+        results = self.results()
+        pending = self.pending()
+        if not results and not pending:
+            return None, "-"
+        worst = max((r.status for r in results), key=lambda s: _SEVERITY.get(s, 2), default=OK)
+        if pending:
+            return worst, "AVVIO..."
+        return worst, {OK: "OK", WARN: "AVVISI", ERROR: "ERRORI"}.get(worst, "ERRORI")
+
+    def describe(self) -> str:
+        """Multi-line report (one line per task) used as tooltip."""
+        lines = [f"{r.name}: {r.status.upper()} ({r.ms:.0f} ms) {r.detail}".rstrip() for r in self.results()]
+        lines += [f"{n}: in corso" for n in self.pending()]
+        return "\n".join(lines)
+
+
+_runner: Optional[WarmupRunner] = None
+
+
+def get_warmup() -> WarmupRunner:
+    """Process-wide runner shared by main_qt and StatusPanel."""
+    global _runner
+    if _runner is None:
+        _runner = WarmupRunner()
+    return _runner
+
+
+def start_warmup(machine: Any = None, timer: Any = None,
+                 on_done: Optional[Callable[[List[WarmupResult]], None]] = None) -> WarmupRunner:
+    runner = get_warmup()
+    runner.start(default_tasks(machine), on_done=on_done, timer=timer)
+    return runner
@@ -3,6 +3,8 @@ from typing import Any, Dict
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QFrame, QGridLayout, QSizePolicy
 from PySide6.QtCore import Qt
 
+from ..utils.warmup import get_warmup, OK as H_OK, WARN as H_WARN
+
 OK = "#27ae60"
 WARN = "#f39c12"
 ERR = "#c0392b"
@@ -34,6 +36,7 @@ class StatusPanel(QWidget):
     - FRIZIONE
     - TESTA SX/DX (inibizione lama)
     - MORSA SX/DX (left_morse_locked / right_morse_locked)
+    - SISTEMA (esito del warm-up: solver, DB, font etichette, hardware)
     Supporta sia oggetto 'raw' con attributi legacy sia adapter con get_state().
     """
     def __init__(self, machine_state: Any, title="STATO", parent=None):
@@ -80,6 +83,8 @@ class StatusPanel(QWidget):
         self.w_head_dx = _pill("-", MUTED)
         self.w_morse_sx = _pill("-", MUTED)
         self.w_morse_dx = _pill("-", MUTED)
+        self.w_system = _pill("-", MUTED)
+        self._system_key = None
 
         add_row(0, "EMG", self.w_emg)
         add_row(1, "HOMED", self.w_homed)
@@ -89,6 +94,7 @@ class StatusPanel(QWidget):
         add_row(5, "TESTA DX", self.w_head_dx)
         add_row(6, "Morsa SX", self.w_morse_sx)
         add_row(7, "Morsa DX", self.w_morse_dx)
+        add_row(8, "SISTEMA", self.w_system)
 
         root.addStretch(1)
 
@@ -173,6 +179,23 @@ class StatusPanel(QWidget):
         self.w_morse_dx.setText("BLOCCATO" if morse_dx else "SBLOCCATO")
         self.w_morse_dx.setStyleSheet(self._style(morse_dx))
 
+        self._refresh_system()
+
+    def _refresh_system(self):
+        runner = get_warmup()
+        status, text = runner.summary()
+        bg = MUTED if status is None else {H_OK: OK, H_WARN: WARN}.get(status, ERR)
+        key = (text, bg, runner.describe())
+        if key == self._system_key:
+            return
+        self._system_key = key
+        self.w_system.setText(text)
+        self.w_system.setToolTip(key[2])
+        self.w_system.setStyleSheet(
+            f"font-weight:800; font-size:9pt; color:white; background:{bg}; "
+            "border-radius:10px; padding:4px 10px; min-height:22px;"
+        )
+
     @staticmethod
     def _style(active: bool, err_on: bool = False) -> str:
         if err_on:
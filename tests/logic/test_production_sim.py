@@ -0,0 +1,68 @@
+"""Unit tests for the headless production-run simulator."""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'qt6_app'))
+
+from ui_qt.logic.production_sim import (
+    PHASES,
+    RunParams,
+    cuts_to_pieces,
+    expand_grid,
+    format_report,
+    load_cutlist_json,
+    run_sweep,
+    simulate_order,
+)
+
+CUTS = [
+    {"profile": "P1", "element": "Traverso", "length_mm": 1200, "ang_sx": 0, "ang_dx": 0, "qty": 4},
+    {"profile": "P1", "element": "Fermavetro", "length_mm": 180, "ang_sx": 0, "ang_dx": 0, "qty": 1},
+    {"profile": "P2", "element": "Corto", "length_mm": 100, "ang_sx": 0, "ang_dx": 0, "qty": 1},
+    {"profile": "P2", "element": "Lungo", "length_mm": 4800, "ang_sx": 0, "ang_dx": 0, "qty": 1},
+]
+
+
+def test_cuts_to_pieces_expands_quantities():
+    """Test cuts are expanded per profile with optimizer keys."""
+    pieces = cuts_to_pieces(CUTS)
+    assert len(pieces["P1"]) == 5
+    assert pieces["P2"][1]["len"] == 4800.0
+    assert set(pieces["P1"][0]) >= {"len", "ax", "ad", "profile", "element"}
+
+
+def test_simulate_order_runs_all_modes():
+    """Test every piece runs through its mode handler on the simulated machine."""
+    report = simulate_order(CUTS, RunParams(solver="BFD"))
+    assert report.failed_pieces == 0
+    assert report.pieces == 7
+    assert report.modes == {"normal": 4, "out_of_quota": 1, "ultra_short": 1, "extra_long": 1}
+    assert set(report.phases_s) == set(PHASES)
+    assert report.phases_s["positioning"] > 0
+    assert report.phases_s["step_pause"] == pytest.approx(5 * 0.3)
+    assert report.total_time_s == pytest.approx(sum(report.phases_s.values()), abs=0.05)
+
+
+def test_longer_stock_changes_scrap():
+    """Test a sweep over stock length reports one result per variant."""
+    variants = expand_grid(RunParams(solver="BFD"), {"stock_mm": [6500.0, 7000.0]})
+    reports = run_sweep(CUTS, variants, processes=1)
+    assert [r["params"]["stock_mm"] for r in reports] == [6500.0, 7000.0]
+    assert reports[1]["scrap_mm"] > reports[0]["scrap_mm"]
+    table = format_report(reports, ["stock_mm"])
+    assert "7000.0" in table
+
+
+def test_load_cutlist_json(tmp_path):
+    """Test cutlist JSON files saved by Quote Vani are accepted, orders are not."""
+    path = tmp_path / "cutlist.json"
+    path.write_text(json.dumps({"type": "cutlist", "cuts": CUTS}), encoding="utf-8")
+    assert load_cutlist_json(str(path)) == CUTS
+
+    path.write_text(json.dumps({"type": "blitz-order", "rows": []}), encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_cutlist_json(str(path))
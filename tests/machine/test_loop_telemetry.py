@@ -0,0 +1,45 @@
+"""Unit tests for control loop telemetry."""
+
+import json
+from qt6_app.ui_qt.hardware.loop_telemetry import LoopTelemetry
+
+MS = 1_000_000
+
+
+def test_period_and_jitter_statistics():
+    """Test period, jitter and histogram from synthetic iterations."""
+    telemetry = LoopTelemetry("test", 50.0)
+    starts = [0, 20 * MS, 40 * MS, 63 * MS, 83 * MS]
+    for start in starts:
+        telemetry.record(start, 1 * MS, lock_ns=MS // 2)
+
+    snap = telemetry.snapshot()
+    assert snap["iterations"] == 5
+    assert snap["period_ms"]["min"] == 20.0
+    assert snap["period_ms"]["max"] == 23.0
+    assert snap["jitter_ms"]["max"] == 3.0
+    assert snap["lock_hold_ms"]["max"] == 0.5
+    assert snap["missed_deadlines"] == 0
+    assert sum(b["count"] for b in snap["period_histogram"]) == 4
+
+
+def test_missed_deadlines():
+    """Test overruns and late wake-ups count as missed deadlines."""
+    telemetry = LoopTelemetry("test", 50.0)
+    telemetry.record(0, 25 * MS)                       # work longer than period
+    telemetry.record(60 * MS, 1 * MS, scheduled_ns=30 * MS)  # woke 30ms late
+    telemetry.record(80 * MS, 1 * MS, scheduled_ns=80 * MS)
+    snap = telemetry.snapshot()
+    assert snap["missed_deadlines"] == 2
+    assert snap["late_max_ms"] == 30.0
+
+
+def test_reset_and_export(tmp_path):
+    """Test export writes JSON and reset clears counters."""
+    telemetry = LoopTelemetry("test", 50.0)
+    telemetry.record(0, MS)
+    path = telemetry.export_json(tmp_path / "loop.json")
+    assert json.loads(path.read_text())["iterations"] == 1
+
+    telemetry.reset()
+    assert telemetry.snapshot()["iterations"] == 0
@@ -0,0 +1,92 @@
+"""Unit tests for pulse train planning and wave chain construction."""
+
+import itertools
+import pytest
+from unittest.mock import MagicMock
+from qt6_app.ui_qt.machine import pulse_generator
+from qt6_app.ui_qt.machine.pulse_generator import PulseGenerator, plan_pulse_train
+
+
+@pytest.mark.parametrize("shape", ["trapezoidal", "s_curve"])
+@pytest.mark.parametrize("pulses", [1, 7, 500, 13262, 84880])
+def test_plan_exact_pulse_count(shape, pulses):
+    """Test planned segments always sum to the requested pulses."""
+    segments = plan_pulse_train(pulses, 53050.0, 106100.0, shape=shape)
+    assert sum(seg.pulses for seg in segments) == pulses
+    assert all(seg.pulses > 0 for seg in segments)
+
+
+def test_plan_trapezoid_reaches_cruise():
+    """Test long moves cruise at the requested frequency."""
+    segments = plan_pulse_train(80000, 50000.0, 100000.0)
+    peak = max(segments, key=lambda seg: seg.freq_hz)
+    assert peak.freq_hz == pytest.approx(50000.0)
+    # Accel + decel ramps take 2 * v / a = 1s, cruise covers the rest
+    total_s = sum(seg.duration_s for seg in segments)
+    assert total_s == pytest.approx(80000 / 50000.0 + 0.5, rel=0.02)
+
+
+def test_plan_short_move_is_triangular():
+    """Test short moves lower the peak frequency instead of overshooting."""
+    segments = plan_pulse_train(1000, 50000.0, 100000.0)
+    assert max(seg.freq_hz for seg in segments) < 50000.0
+    assert sum(seg.pulses for seg in segments) == 1000
+
+
+def test_plan_ramp_is_monotonic():
+    """Test frequency rises then falls."""
+    freqs = [seg.freq_hz for seg in plan_pulse_train(40000, 40000.0, 80000.0)]
+    top = freqs.index(max(freqs))
+    assert freqs[:top + 1] == sorted(freqs[:top + 1])
+    assert freqs[top:] == sorted(freqs[top:], reverse=True)
+
+
+def test_estimate_uses_configured_limits():
+    """Test defaults come from hardware_config limits."""
+    config = {
+        "transmission": {"mm_per_pulse_calculated": 0.05, "correction_factor": 1.0},
+        "limits": {"max_speed_mm_s": 2500.0, "acceleration_mm_s2": 5000.0},
+    }
+    gen = PulseGenerator.from_hardware_config(config)
+    assert gen.max_speed_mm_s == 2500.0
+    # 3000mm: 0.5s accel + 0.5s decel (1250mm) + 1750mm cruise at 2500mm/s
+    assert gen.estimate_move_time_s(3000.0) == pytest.approx(1.7, rel=0.02)
+
+
+def test_wave_chain_emits_exact_pulses(monkeypatch):
+    """Test the wave_chain script replays exactly the planned pulses."""
+    monkeypatch.setattr(pulse_generator, "pigpio", MagicMock(), raising=False)
+    gen = PulseGenerator(mm_per_pulse=0.047125)
+    gen._pi = MagicMock()
+    wave_pulses = {}
+    created = []
+    ids = itertools.count()
+
+    def add_generic(pulses):
+        created.append(len(pulses) // 2)
+
+    def wave_create():
+        wid = next(ids)
+        wave_pulses[wid] = created[-1]
+        return wid
+
+    gen._pi.wave_add_generic.side_effect = add_generic
+    gen._pi.wave_create.side_effect = wave_create
+
+    segments = gen.plan(3000.0, 2500.0, 5000.0)
+    chain = gen._build_wave_chain(segments)
+
+    total = 0
+    i = 0
+    while i < len(chain):
+        if chain[i] == 255 and chain[i + 1] == 0:
+            wid = chain[i + 2]
+            count = chain[i + 5] + 256 * chain[i + 6]
+            total += wave_pulses[wid] * count
+            i += 7
+        else:
+            total += wave_pulses[chain[i]]
+            i += 1
+
+    assert total == sum(seg.pulses for seg in segments) == gen._mm_to_pulses(3000.0)
+    assert len(chain) <= 600
@@ -0,0 +1,98 @@
+"""Unit tests for machine session record and replay."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'qt6_app'))
+
+from ui_qt.machine.session_recorder import (
+    RecordingMachine,
+    ReplayMachine,
+    read_session,
+    session_summary,
+)
+from ui_qt.machine.sim_dynamics import ManualClock
+from ui_qt.machine.simulation_machine import SimulationMachine
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    """Record a short session on the simulated machine."""
+    path = tmp_path / "session.blzses"
+    sim = SimulationMachine(clock=ManualClock())
+    rec = RecordingMachine(sim, path)
+    homed = []
+    rec.do_homing(callback=lambda **kw: homed.append(kw))
+    sim.run_until_idle()
+    rec.command_move(1200.0, 45.0, 0.0, profile="P1", element="Traverso")
+    while rec.is_positioning_active():
+        rec.get_position()
+        sim.advance(0.05)
+    rec.get_position()
+    rec.command_lock_brake()
+    rec.command_sim_cut_pulse()
+    rec.get_input("blade_pulse")
+    rec.get_state()
+    rec.machine_homed = True
+    rec.close()
+    assert homed and homed[0]["success"]
+    return path, sim
+
+
+def test_roundtrip_events(recorded):
+    """Test commands, samples and homing are decoded in order."""
+    path, sim = recorded
+    events = read_session(path)
+    commands = [e for e in events if e.kind == "command"]
+    assert [c.name for c in commands] == [
+        "do_homing", "command_move", "command_lock_brake", "command_sim_cut_pulse"]
+    args, result = commands[1].value
+    assert args == (1200.0, 45.0, 0.0, "P1", "Traverso") and result is True
+    assert any(e.kind == "homing" and e.value == (True, "HOMING OK") for e in events)
+    assert [e.value for e in events if e.kind == "moving"] == [True, False]
+    assert any(e.kind == "input" and e.name == "blade_pulse" and e.value for e in events)
+    assert all(b.t >= a.t for a, b in zip(events, events[1:]))
+    # Attribute writes reach the wrapped machine
+    assert sim.machine_homed
+
+
+def test_truncated_file_is_tolerated(recorded):
+    """Test a session cut mid-record (power loss) still reads."""
+    path, _sim = recorded
+    full = read_session(path)
+    data = path.read_bytes()
+    path.write_bytes(data[:-3])
+    assert len(read_session(path)) == len(full) - 1
+
+
+def test_replay_follows_recording(recorded):
+    """Test replay returns recorded samples at replay time and logs commands."""
+    path, _sim = recorded
+    events = read_session(path)
+    clock = ManualClock()
+    replay = ReplayMachine(path, clock=clock)
+    assert replay.get_position() is None
+    t_done = [e.t for e in events if e.kind == "moving" and not e.value][0]
+    clock.advance(t_done)
+    assert not replay.is_positioning_active()
+    assert replay.get_input("blade_pulse") is False
+    clock.advance(replay.duration_s)
+    assert replay.get_position() == pytest.approx(1200.0, abs=0.5)
+    assert replay.get_input("blade_pulse")
+    assert replay.get_state()["homed"] is True
+    assert replay.finished
+
+    replay.command_lock_brake()
+    assert replay.issued[-1][1] == "command_lock_brake"
+    report = replay.latency_report()
+    assert report["move_done"]["count"] == 1
+
+
+def test_summary_latency(recorded):
+    """Test the recorded reaction latency of the cycle logic."""
+    path, _sim = recorded
+    summary = session_summary(read_session(path))
+    assert summary["counts"]["command:command_move"] == 1
+    assert summary["latency"]["move_done"]["first_command"] == {"command_lock_brake": 1}
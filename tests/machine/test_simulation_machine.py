@@ -0,0 +1,110 @@
+"""Unit tests for the physics-based SimulationMachine."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'qt6_app'))
+
+from ui_qt.machine.simulation_machine import SimulationMachine
+from ui_qt.machine.sim_dynamics import CarriageModel, ManualClock, SimDynamics
+
+
+@pytest.fixture
+def machine():
+    """Homed simulated machine driven by a manual clock."""
+    m = SimulationMachine(clock=ManualClock())
+    m.do_homing()
+    assert m.run_until_idle(timeout_s=5.0)
+    assert m.machine_homed
+    return m
+
+
+def test_homing_completes_in_sim_time():
+    """Test homing completes after homing_time_s of simulated time."""
+    m = SimulationMachine(clock=ManualClock())
+    results = []
+    m.do_homing(callback=lambda **kw: results.append(kw))
+    m.advance(0.3)
+    assert m.homing_in_progress
+    m.advance(0.4)
+    assert m.machine_homed
+    assert results == [{"success": True, "msg": "HOMING OK"}]
+
+
+def test_move_reaches_target_with_realistic_time(machine):
+    """Test a move settles on target and takes trajectory + brake time."""
+    assert machine.command_move(2250.0)
+    assert machine.is_positioning_active()
+    assert machine.run_until_idle(timeout_s=10.0)
+
+    state = machine.get_state()
+    assert state["position_mm"] == pytest.approx(2250.0, abs=0.5)
+    # 2000 mm at 2000 mm/s, 5000 mm/s^2: 1.0 s cruise + 0.4 s ramps
+    assert 1.3 < state["last_move_time_s"] < 1.8
+    assert state["velocity_mm_s"] == pytest.approx(0.0, abs=5.0)
+
+
+def test_move_waits_for_brake_release(machine):
+    """Test the carriage does not move until the brake has released."""
+    machine.command_lock_brake()
+    machine.advance(0.2)
+    machine.command_move(1000.0)
+    machine.advance(machine.dynamics.brake_release_s * 0.5)
+    assert machine.get_position() == pytest.approx(250.0, abs=0.1)
+    machine.run_until_idle()
+    assert machine.get_position() == pytest.approx(1000.0, abs=0.5)
+
+
+def test_clutch_disengaged_blocks_motion(machine):
+    """Test a move with the clutch out never reaches the target."""
+    machine.command_set_clutch(False)
+    machine.advance(0.2)
+    carriage = machine._carriage
+    carriage.command_move(1500.0, machine.clock.now())
+    carriage.set_clutch(False, machine.clock.now())
+    machine.advance(1.0)
+    assert machine.get_position() == pytest.approx(250.0, abs=0.1)
+    assert machine.is_positioning_active()
+
+
+def test_encoder_quantization(machine):
+    """Test reported position is a multiple of mm_per_pulse."""
+    machine.command_move(1234.567)
+    machine.run_until_idle()
+    pos = machine.get_position()
+    q = machine.dynamics.mm_per_pulse
+    assert pos / q == pytest.approx(round(pos / q), abs=1e-6)
+
+
+def test_pulse_inputs_clear_but_levels_persist(machine):
+    """Test momentary inputs clear after being read, dx_blade_out is a level."""
+    machine.command_sim_cut_pulse()
+    machine.command_sim_dx_blade_out(True)
+    assert machine.get_input("blade_pulse")
+    machine.tick()
+    assert not machine.get_input("blade_pulse")
+    assert machine.get_input("dx_blade_out")
+    machine.command_sim_dx_blade_out(False)
+    assert not machine.get_input("dx_blade_out")
+
+
+def test_unread_pulse_survives_one_tick(machine):
+    """Test a pulse set between two reads is not lost by an intermediate tick."""
+    machine.command_sim_start_pulse()
+    machine.tick()
+    assert machine.get_input("start_pressed")
+    machine.tick()
+    assert not machine.get_input("start_pressed")
+
+
+def test_idle_time_is_skipped():
+    """Test long idle intervals do not integrate step by step."""
+    model = CarriageModel(SimDynamics(), 250.0)
+    model.advance(3600.0)
+    assert model.position_mm == 250.0
+    model.command_move(500.0, 3600.0)
+    model.advance(3602.0)
+    assert not model.moving
+    assert model.position_mm == pytest.approx(500.0, abs=0.5)
@@ -0,0 +1,128 @@
+"""Unit tests for trajectory planning and trajectory-tracking control."""
+
+import pytest
+from qt6_app.ui_qt.hardware.trajectory import plan_trajectory
+from qt6_app.ui_qt.hardware.motion_controller import MotionController, PID_AVAILABLE
+
+
+def _samples(traj, n=4000):
+    step = traj.duration_s / n
+    return [(i * step,) + traj.sample(i * step) for i in range(n + 1)]
+
+
+@pytest.mark.parametrize("jerk", [None, 50000.0])
+@pytest.mark.parametrize("distance", [0.5, 100.0, 600.0, 3000.0])
+def test_trajectory_respects_limits(jerk, distance):
+    """Test trajectory ends at target and never exceeds the speed limit."""
+    traj = plan_trajectory(250.0, 250.0 + distance, 2500.0, 5000.0, jerk)
+    samples = _samples(traj)
+    assert samples[0][1] == pytest.approx(250.0)
+    assert samples[-1][1] == pytest.approx(250.0 + distance)
+    assert max(abs(v) for _t, _p, v in samples) <= 2500.0 + 1e-6
+    positions = [p for _t, p, _v in samples]
+    assert positions == sorted(positions)
+
+
+def test_trapezoid_duration():
+    """Test long trapezoidal moves take d/v + v/a."""
+    traj = plan_trajectory(250.0, 3250.0, 2500.0, 5000.0)
+    assert traj.duration_s == pytest.approx(3000.0 / 2500.0 + 2500.0 / 5000.0)
+    assert traj.peak_velocity_mm_s == pytest.approx(2500.0)
+
+
+def test_reverse_move_velocity_sign():
+    """Test reverse moves report negative reference velocity."""
+    traj = plan_trajectory(1000.0, 400.0, 2500.0, 5000.0, 50000.0)
+    _pos, vel = traj.sample(traj.duration_s / 2)
+    assert vel < 0
+
+
+def test_jerk_limited_is_slower_but_continuous():
+    """Test the jerk limit lengthens the move and keeps velocity continuous."""
+    trap = plan_trajectory(0.0, 1000.0, 2500.0, 5000.0)
+    scurve = plan_trajectory(0.0, 1000.0, 2500.0, 5000.0, 50000.0)
+    assert scurve.duration_s > trap.duration_s
+    samples = _samples(scurve)
+    assert max(abs(b[2] - a[2]) for a, b in zip(samples, samples[1:])) < 5.0
+
+
+class _FakeMotor:
+    """Ideal motor: speed percent maps linearly to velocity."""
+
+    def __init__(self):
+        self.speed = 0.0
+        self.enabled = False
+
+    def is_connected(self):
+        return True
+
+    def get_state(self):
+        return {"current_speed": abs(self.speed), "enabled": self.enabled}
+
+    def enable(self):
+        self.enabled = True
+
+    def set_speed(self, speed, smooth=True):
+        self.speed = speed
+
+    def stop(self, immediate=False):
+        self.speed = 0.0
+
+    def emergency_stop(self):
+        self.speed = 0.0
+
+
+class _FakeEncoder:
+    enable_index = False
+
+    def __init__(self, position):
+        self.position = position
+
+    def is_connected(self):
+        return True
+
+    def get_position_mm(self):
+        return self.position
+
+    def get_state(self):
+        return {"position_mm": self.position}
+
+
+@pytest.mark.skipif(not PID_AVAILABLE, reason="simple-pid not installed")
+def test_control_step_tracks_trajectory():
+    """Test feed-forward tracking reaches the target at the planned time."""
+    motor = _FakeMotor()
+    encoder = _FakeEncoder(250.0)
+    controller = MotionController(motor, encoder, pid_kp=2.0, pid_ki=0.0, pid_kd=0.0,
+                                  max_speed_percent=100.0, max_speed_mm_s=2500.0,
+                                  acceleration_mm_s2=5000.0, jerk_mm_s3=50000.0)
+    controller._pid.sample_time = None
+    controller._control_running = True
+    assert controller.move_to(1250.0)
+    planned = controller.predict_move_time(1250.0, from_mm=250.0)
+
+    t0 = controller._trajectory_t0
+    dt = 1.0 / 200.0
+    t = 0.0
+    done_at = None
+    while t < planned + 1.0:
+        controller._control_step(t0 + t)
+        if not controller._moving:
+            done_at = t
+            break
+        encoder.position += motor.speed / controller.velocity_ff_gain * dt
+        t += dt
+    controller._control_running = False
+
+    assert done_at is not None
+    assert done_at == pytest.approx(planned, abs=0.05)
+    assert encoder.position == pytest.approx(1250.0, abs=controller.position_tolerance_mm)
+
+
+def test_set_loop_rate_rejects_invalid():
+    """Test the loop rate must be positive."""
+    controller = MotionController(_FakeMotor(), _FakeEncoder(250.0))
+    controller.set_loop_rate(100.0)
+    assert controller.control_loop_hz == 100.0
+    with pytest.raises(ValueError):
+        controller.set_loop_rate(0)
@@ -0,0 +1,104 @@
+"""Replay benchmark for the quadrature decoder."""
+
+import pytest
+import time
+from qt6_app.ui_qt.hardware.quadrature_decoder import QuadratureDecoder, TRANSITIONS
+
+GPIO_A = 17
+GPIO_B = 27
+
+# Forward sequence of (A, B) levels, one channel changes per step
+_FORWARD_STATES = [(1, 0), (1, 1), (0, 1), (0, 0)]
+
+
+def _record_edges(counts, rate_hz=200000):
+    """
+    Build a recorded edge stream as pigpio would deliver it.
+
+    Args:
+        counts: List of signed edge counts (positive = forward)
+        rate_hz: Edge rate used for the tick timestamps
+    """
+    edges = []
+    a, b = 0, 0
+    idx = 0
+    tick = 0
+    period_us = 1_000_000 / rate_hz
+    for n in counts:
+        step = 1 if n > 0 else -1
+        for _ in range(abs(n)):
+            idx = (idx + step) % 4
+            na, nb = _FORWARD_STATES[idx - 1]
+            gpio, level = (GPIO_A, na) if na != a else (GPIO_B, nb)
+            a, b = na, nb
+            tick += period_us
+            edges.append((gpio, level, int(tick)))
+    return edges
+
+
+def test_transition_table_is_antisymmetric():
+    """Test every forward transition has a matching reverse transition."""
+    for prev in range(4):
+        for new in range(4):
+            assert TRANSITIONS[(prev << 2) | new] == -TRANSITIONS[(new << 2) | prev]
+    assert sum(1 for d in TRANSITIONS if d == 1) == 4
+
+
+def test_decoder_counts_direction():
+    """Test forward and reverse edges are counted with sign."""
+    decoder = QuadratureDecoder(GPIO_A, GPIO_B)
+    decoder.replay(_record_edges([1000, -250]))
+    assert decoder.count == 750
+    assert decoder.missed == 0
+
+
+def test_decoder_detects_missed_edge():
+    """Test a repeated level on the same channel is reported as missed."""
+    decoder = QuadratureDecoder(GPIO_A, GPIO_B)
+    decoder.edge(GPIO_A, 1, 0)
+    decoder.edge(GPIO_A, 1, 5)
+    assert decoder.count == 1
+    assert decoder.missed == 1
+
+
+def test_decoder_ignores_watchdog_level():
+    """Test pigpio watchdog reports (level 2) do not change the count."""
+    decoder = QuadratureDecoder(GPIO_A, GPIO_B)
+    decoder.edge(GPIO_A, 2, 0)
+    assert decoder.count == 0
+    assert decoder.missed == 0
+
+
+def test_feed_levels_matches_edge_decoding():
+    """Test notification level words decode like per-edge callbacks."""
+    edges = _record_edges([400, -100, 50])
+    words = []
+    a = b = 0
+    for gpio, level, _tick in edges:
+        if gpio == GPIO_A:
+            a = level
+        else:
+            b = level
+        words.append((a << GPIO_A) | (b << GPIO_B))
+
+    decoder = QuadratureDecoder(GPIO_A, GPIO_B)
+    assert decoder.feed_levels(words) == 350
+    assert decoder.count == 350
+    assert decoder.missed == 0
+
+
+@pytest.mark.performance
+def test_replay_at_rated_frequency():
+    """Test one second of 200kHz edges decodes in under one second."""
+    edges = _record_edges([150000, -50000])
+    assert len(edges) == 200000
+
+    decoder = QuadratureDecoder(GPIO_A, GPIO_B)
+    start = time.perf_counter()
+    decoder.replay(edges)
+    elapsed = time.perf_counter() - start
+
+    assert decoder.count == 100000
+    assert decoder.missed == 0
+    # Decoding must keep up with the rated 200kHz edge rate
+    assert elapsed < 1.0
@@ -0,0 +1,50 @@
+"""Performance tests for formula evaluation."""
+
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'qt6_app'))
+
+from ui_qt.services.legacy_formula import eval_formula
+
+
+@pytest.mark.performance
+def test_repeated_formula_evaluation_speed():
+    """Test 500 rows x 30 components evaluate well under a second."""
+    formulas = [f"(L - 2*SP) / 2 - {i}" if i % 2 else f"H - {i} * SP + C_R1" for i in range(30)]
+    env = {"H": 1500.0, "L": 900.0, "SP": 3.0, "C_R1": 850.0}
+
+    start = time.perf_counter()
+    for row in range(500):
+        env["H"] = 1000.0 + row
+        for expr in formulas:
+            eval_formula(expr, env)
+    elapsed = time.perf_counter() - start
+
+    # Re-parsing every formula took ~0.35 s; compiled formulas take ~20 ms
+    assert elapsed < 0.15, f"15000 evaluations took {elapsed:.3f}s"
+
+
+@pytest.mark.performance
+def test_batch_quote_speed():
+    """Test a 30-component typology over 1000 sizes evaluates in milliseconds."""
+    import numpy as np
+    from ui_qt.services.formula_batch import evaluate_typology_batch
+
+    comps = [{"id_riga": f"R{i}", "nome": f"E{i}", "quantita": 1,
+              "formula_lunghezza": f"C_R{i - 1} - 3*SP" if i % 3 else f"(H - 2*SP) / 2 + {i}"}
+             for i in range(30)]
+    typology = {"componenti": comps, "variabili_locali": {"SP": 3.0}}
+    H = np.linspace(500, 2500, 1000)
+    L = np.linspace(400, 2000, 1000)
+    evaluate_typology_batch(typology, H, L)  # compilazione
+
+    start = time.perf_counter()
+    table = evaluate_typology_batch(typology, H, L)
+    elapsed = time.perf_counter() - start
+
+    assert len(table) == 30000
+    assert elapsed < 0.05, f"Batch evaluation took {elapsed:.3f}s"
@@ -0,0 +1,29 @@
+"""Performance tests for the cached label renderer."""
+
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'qt6_app'))
+
+pytest.importorskip("PIL")
+
+
+@pytest.mark.performance
+def test_label_render_speed_for_one_signature():
+    """Test labels of one signature, differing only in SEQ, render well below a cut cycle."""
+    from PIL import Image, ImageDraw, ImageFont
+    from ui_qt.services.label_renderer import LabelRenderer
+    renderer = LabelRenderer({"Image": Image, "ImageDraw": ImageDraw, "ImageFont": ImageFont})
+    static = ["P60 Montante", "Anta", "L=1234.50 AX=45.0 AD=90.0"]
+    renderer.render(static + ["SEQ:0"], "DK-11201", 0, 32)
+
+    start = time.perf_counter()
+    for i in range(1, 201):
+        renderer.render(static + [f"SEQ:{i}"], "DK-11201", 0, 32)
+    per_label = (time.perf_counter() - start) / 200
+
+    # Drawing every line (plus the font lookup) took ~9 ms with a TrueType font; cached ~2.5 ms
+    assert per_label < 0.01, f"render took {per_label * 1000:.2f} ms per label"
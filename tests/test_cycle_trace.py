@@ -0,0 +1,108 @@
+"""
+Unit tests for the automatic-cycle event trace.
+"""
+
+import json
+
+from qt6_app.ui_qt.utils import cycle_trace as trace
+from qt6_app.ui_qt.utils.cycle_trace import (
+    CycleTracer,
+    load_trace,
+    piece_breakdown,
+    slowest_phases,
+    format_trace_report,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.ns = 0
+
+    def __call__(self):
+        return self.ns
+
+    def advance_ms(self, ms):
+        self.ns += int(ms * 1_000_000)
+
+
+def _run_piece(tracer, clock, idx, move_ms, operator_ms):
+    tracer.begin_piece(idx, len=1000.0)
+    clock.advance_ms(5)
+    tracer.emit(trace.MOVE_COMMANDED)
+    clock.advance_ms(move_ms)
+    tracer.emit(trace.TARGET_REACHED)
+    clock.advance_ms(10)
+    tracer.emit(trace.BRAKE_LOCKED)
+    tracer.emit(trace.PIECE_READY)
+    clock.advance_ms(operator_ms)
+    tracer.emit(trace.BLADE_PULSE)
+    clock.advance_ms(2)
+    tracer.emit(trace.PIECE_COUNTED)
+    clock.advance_ms(50)
+    tracer.emit(trace.BRAKE_RELEASED)
+
+
+def test_breakdown_per_piece():
+    """Test intervals between events are attributed to named phases."""
+    clock = FakeClock()
+    tracer = CycleTracer(clock=clock)
+    _run_piece(tracer, clock, 0, move_ms=800, operator_ms=3000)
+    _run_piece(tracer, clock, 1, move_ms=200, operator_ms=1000)
+
+    rows = piece_breakdown(tracer.snapshot())
+    assert [r["piece"] for r in rows] == [0, 1]
+    assert rows[0]["meta"] == {"len": 1000.0}
+    assert abs(rows[0]["phases"]["positioning"] - 0.8) < 1e-9
+    assert abs(rows[1]["phases"]["operator_wait"] - 1.0) < 1e-9
+    assert abs(rows[0]["total_s"] - (5 + 800 + 10 + 3000 + 2 + 50) / 1000) < 1e-9
+
+    top = slowest_phases(rows, top=2)
+    assert [s["phase"] for s in top] == ["operator_wait", "positioning"]
+    assert top[1]["max_s"] == 0.8
+    assert "operator_wait" in format_trace_report(rows, pieces=True)
+
+
+def test_ring_buffer_and_flush(tmp_path):
+    """Test the ring keeps the newest events and flush reports the overwritten ones."""
+    clock = FakeClock()
+    path = tmp_path / "trace.jsonl"
+    tracer = CycleTracer(capacity=4, path=str(path), clock=clock)
+    for i in range(10):
+        clock.advance_ms(1)
+        tracer.emit(trace.STATE, state=f"s{i}")
+    assert [ev.data["state"] for ev in tracer.snapshot()] == ["s6", "s7", "s8", "s9"]
+
+    assert tracer.flush() == 4
+    assert tracer.dropped == 6
+    assert tracer.flush() == 0
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert lines[0]["ev"] == "session"
+    assert lines[1] == {"ev": "dropped", "t": lines[1]["t"], "count": 6}
+    assert lines[-1]["state"] == "s9"
+
+
+def test_load_trace_roundtrip(tmp_path):
+    """Test a flushed file rebuilds the same breakdown as the live buffer."""
+    clock = FakeClock()
+    path = tmp_path / "trace.jsonl"
+    tracer = CycleTracer(path=str(path), clock=clock)
+    _run_piece(tracer, clock, 0, move_ms=500, operator_ms=700)
+    tracer.start()
+    tracer.stop()
+
+    rows = piece_breakdown(load_trace([str(path)]))
+    assert len(rows) == 1
+    assert abs(rows[0]["phases"]["positioning"] - 0.5) < 1e-6
+    assert abs(rows[0]["phases"]["brake_release_wait"] - 0.05) < 1e-6
+
+
+def test_rotation(tmp_path):
+    """Test the file rolls over once it exceeds max_bytes."""
+    path = tmp_path / "trace.jsonl"
+    tracer = CycleTracer(path=str(path), max_bytes=200, backup_count=2)
+    for _ in range(3):
+        for _ in range(5):
+            tracer.emit(trace.STATE, state="moving")
+        tracer.flush()
+    assert (tmp_path / "trace.jsonl.1").exists()
+    assert json.loads(path.read_text(encoding="utf-8").splitlines()[0])["ev"] == "session"
@@ -0,0 +1,178 @@
+"""
+Unit tests for the unified database: migrations, profile foreign keys and legacy import.
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'qt6_app'))
+
+from ui_qt.services import database
+from ui_qt.services.profiles_store import ProfilesStore
+from ui_qt.services.typologies_store import TypologiesStore
+from ui_qt.utils.db_pool import get_pool
+
+LEGACY_TYPOLOGIES = """
+CREATE TABLE typology (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL UNIQUE, category TEXT, material TEXT,
+    ref_quota TEXT DEFAULT 'esterna', extra_detrazione REAL DEFAULT 0.0, pezzi_totali INTEGER DEFAULT 1, note TEXT,
+    created_at INTEGER, updated_at INTEGER);
+CREATE TABLE typology_component (id INTEGER PRIMARY KEY AUTOINCREMENT, typology_id INTEGER NOT NULL REFERENCES typology(id)
+    ON DELETE CASCADE, ord INTEGER NOT NULL DEFAULT 0, row_id TEXT, name TEXT, profile_name TEXT, quantity INTEGER DEFAULT 0,
+    ang_sx REAL DEFAULT 0.0, ang_dx REAL DEFAULT 0.0, formula TEXT, offset REAL DEFAULT 0.0, note TEXT);
+CREATE TABLE typology_multi_formula (id INTEGER PRIMARY KEY AUTOINCREMENT, typology_id INTEGER NOT NULL, group_name TEXT NOT NULL,
+    label TEXT NOT NULL, formula TEXT NOT NULL, note TEXT, UNIQUE(typology_id, group_name, label));
+CREATE TABLE orders (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, customer TEXT, data_json TEXT NOT NULL,
+    created_at INTEGER, updated_at INTEGER);
+INSERT INTO typology(id, name, created_at, updated_at) VALUES (7, 'Finestra', 1, 1);
+INSERT INTO typology_component(typology_id, ord, row_id, name, profile_name, formula)
+    VALUES (7, 0, 'R1', 'Anta', 'P60', 'H-10'), (7, 1, 'R2', 'Fermavetro', '', 'L');
+INSERT INTO typology_multi_formula(typology_id, group_name, label, formula) VALUES (7, 'G1', 'anta', 'H');
+INSERT INTO orders(id, name, customer, data_json, created_at, updated_at)
+    VALUES (3, 'Ordine', 'Rossi', '{"rows": [{"tid": 7, "qty": 1, "H": 1000, "L": 500}]}', 1, 1);
+"""
+
+
+def _legacy_file(path, script):
+    con = sqlite3.connect(str(path))
+    con.executescript(script)
+    con.commit()
+    con.close()
+    return path
+
+
+def _index_names(pool, table):
+    return {r[1] for r in pool.execute(f"PRAGMA index_list({table})").fetchall()}
+
+
+def test_fresh_database_is_at_latest_version(tmp_path):
+    """Test a new file gets every migration, logged, with profile FKs and hot-query indices."""
+    pool = database.open_database(tmp_path / "blitz.db")
+    assert database.schema_version(pool.connection()) == database.SCHEMA_VERSION
+    logged = [r[0] for r in pool.execute("SELECT version FROM schema_migrations ORDER BY version")]
+    assert logged == [m.version for m in database.MIGRATIONS]
+    fks = pool.execute("PRAGMA foreign_key_list(typology_component)").fetchall()
+    assert any(fk[2] == "profiles" and fk[3] == "profile_name" for fk in fks)
+    assert "idx_typology_comp_profile" in _index_names(pool, "typology_component")
+    assert "idx_orders_updated" in _index_names(pool, "orders")
+    assert database.migrate(pool) == database.SCHEMA_VERSION  # idempotente
+
+
+def test_failed_migration_rolls_back(tmp_path):
+    """Test a migration that fails leaves the file at the previous version."""
+    pool = get_pool(tmp_path / "blitz.db")
+    broken = database.MIGRATIONS + (database.Migration(99, "rotta", ("CREATE TABLE x (a)", "SELECT * FROM missing")),)
+    with pytest.raises(sqlite3.OperationalError):
+        database.migrate(pool, broken)
+    assert database.schema_version(pool.connection()) == database.SCHEMA_VERSION
+    assert not pool.execute("SELECT 1 FROM sqlite_master WHERE name='x'").fetchone()
+
+
+def test_legacy_typologies_file_is_upgraded_in_place(tmp_path):
+    """Test an old typologies.db gains the FK: referenced profiles are created, blanks become NULL."""
+    path = _legacy_file(tmp_path / "typologies.db", LEGACY_TYPOLOGIES)
+    store = TypologiesStore(str(path))
+    typ = store.get_typology_full(7)
+    assert [c["profilo_nome"] for c in typ["componenti"]] == ["P60", ""]
+    assert store.list_multi_formulas(7, "G1")[0]["qty"] == 1  # colonne aggiunte
+    nulls = store._conn.execute("SELECT COUNT(*) FROM typology_component WHERE profile_name IS NULL").fetchone()[0]
+    assert nulls == 1
+    assert store._conn.execute("SELECT thickness FROM profiles WHERE name='P60'").fetchone()[0] == 0
+    store.close()
+
+
+def test_profile_foreign_key_and_thickness_join(tmp_path):
+    """Test components auto-register profiles, read thickness via JOIN and block profile deletion."""
+    path = tmp_path / "blitz.db"
+    profiles = ProfilesStore(path)
+    typologies = TypologiesStore(str(path))
+    profiles.upsert_profile("P60", 62.5)
+    tid = typologies.create_typology({"nome": "T", "componenti": [
+        {"id_riga": "R1", "profilo_nome": "P60", "formula_lunghezza": "H"},
+        {"id_riga": "R2", "profilo_nome": "NUOVO", "formula_lunghezza": "L"},
+    ]})
+    comps = typologies.get_typology_full(tid)["componenti"]
+    assert [c["profilo_spessore"] for c in comps] == [62.5, 0.0]
+    assert profiles.get_profile("NUOVO")["thickness"] == 0
+
+    assert profiles.profile_usage("P60") == ["T"]
+    with pytest.raises(ValueError, match="usato da: T"):
+        profiles.delete_profile("P60")
+    with pytest.raises(sqlite3.IntegrityError):
+        typologies._conn.execute("DELETE FROM profiles WHERE name='P60'")
+    typologies._conn.rollback()
+    typologies.delete_typology(tid)
+    assert profiles.delete_profile("P60") is True
+    profiles.close()
+    typologies.close()
+
+
+def test_import_legacy_keeps_ids(tmp_path):
+    """Test the separate databases are copied into the unified one, parents before children."""
+    prof = _legacy_file(tmp_path / "profiles.db", """
+        CREATE TABLE profiles (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE NOT NULL, thickness REAL NOT NULL DEFAULT 0);
+        INSERT INTO profiles(id, name, thickness) VALUES (4, 'P60', 60.0);""")
+    typ = _legacy_file(tmp_path / "typologies.db", LEGACY_TYPOLOGIES)
+    pool = get_pool(tmp_path / "blitz.db")
+    database.migrate(pool)
+
+    imported = database.import_legacy(pool, [prof, typ, tmp_path / "missing.db"])
+    assert "profiles.db:profiles" in imported and "typologies.db:orders" in imported
+    assert pool.execute("SELECT id, thickness FROM profiles WHERE name='P60'").fetchone() == (4, 60.0)
+    assert pool.execute("SELECT name, kind FROM orders WHERE id=3").fetchone() == ("Ordine", "commessa")
+    assert pool.execute("SELECT typology_id, h_mm FROM order_rows WHERE order_id=3").fetchone() == (7, 1000.0)
+    rows = pool.execute("SELECT c.profile_name, p.thickness FROM typology_component c "
+                        "LEFT JOIN profiles p ON p.name = c.profile_name WHERE c.typology_id=7 ORDER BY c.ord").fetchall()
+    assert rows == [("P60", 60.0), (None, None)]
+    assert database.import_legacy(pool, [prof, typ]) == []  # tabelle già popolate
+
+
+def test_interrupted_legacy_import_is_retried_until_it_succeeds(tmp_path, monkeypatch):
+    """Test the default database keeps retrying the legacy import and stops once it is recorded."""
+    typ = _legacy_file(tmp_path / "typologies.db", LEGACY_TYPOLOGIES)
+    monkeypatch.setattr(database, "default_db_path", lambda: tmp_path / "blitz.db")
+    monkeypatch.setattr(database, "LEGACY_DB_FILES", [typ])
+    real, calls = database.import_legacy, []
+
+    def flaky(pool, sources):
+        calls.append(1)
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return real(pool, sources)
+
+    monkeypatch.setattr(database, "import_legacy", flaky)
+    pool = database.open_database()
+    assert database.get_meta(pool.connection(), database.LEGACY_IMPORT_KEY) is None
+    assert not pool.execute("SELECT 1 FROM orders").fetchone()
+
+    database.open_database()
+    assert pool.execute("SELECT name FROM orders WHERE id=3").fetchone() == ("Ordine",)
+    assert database.get_meta(pool.connection(), database.LEGACY_IMPORT_KEY) == "done"
+    database.open_database()
+    assert len(calls) == 2
+
+
+def test_databases_with_data_skip_the_legacy_import(tmp_path):
+    """Test a database populated before the meta flag existed is marked as imported by the migration."""
+    pool = get_pool(tmp_path / "blitz.db")
+    database.migrate(pool, database.MIGRATIONS[:-1])
+    pool.execute("INSERT INTO profiles(name, thickness) VALUES ('P60', 60)")
+    pool.commit()
+    database.migrate(pool)
+    assert database.get_meta(pool.connection(), database.LEGACY_IMPORT_KEY) == "done"
+
+
+def test_data_connection_reuses_the_opened_pool(tmp_path, monkeypatch):
+    """Test data.db.get_conn opens (migrates) the database once per path, not on every call."""
+    from ui_qt.data import db
+    opened = []
+    real = database.open_database
+    monkeypatch.setattr(database, "open_database", lambda path=None: opened.append(path) or real(path))
+    monkeypatch.setattr(db, "_pool", None)
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "a.db")
+    assert db.get_conn() is db.get_conn()
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "b.db")
+    db.get_conn()
+    assert opened == [tmp_path / "a.db", tmp_path / "b.db"]
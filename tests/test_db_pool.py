@@ -0,0 +1,92 @@
+"""
+Unit tests for the shared SQLite connection pool.
+"""
+
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'qt6_app'))
+
+from ui_qt.utils.db_pool import ConnectionPool, get_pool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    p = ConnectionPool(tmp_path / "test.db")
+    p.execute("CREATE TABLE t (k INTEGER PRIMARY KEY, v TEXT)")
+    p.commit()
+    yield p
+    p.close_all()
+
+
+def test_connection_per_thread_with_pragmas(pool):
+    """Test each thread gets its own configured connection, reused across calls."""
+    con = pool.connection()
+    assert pool.connection() is con
+    assert con.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert con.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+    assert con.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+    other = []
+    t = threading.Thread(target=lambda: other.append(pool.connection()))
+    t.start(); t.join()
+    assert other[0] is not con
+
+    pool.release()
+    assert pool.connection() is not con
+    assert get_pool(pool.path) is get_pool(pool.path)
+
+
+def test_transaction_is_atomic_and_nests(pool):
+    """Test rollback on error, savepoints when nested and commit() deferred inside."""
+    with pytest.raises(sqlite3.IntegrityError):
+        with pool.transaction() as con:
+            con.execute("INSERT INTO t VALUES (1, 'a')")
+            con.execute("INSERT INTO t VALUES (1, 'dup')")
+    assert pool.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+    with pool.transaction() as con:
+        con.execute("INSERT INTO t VALUES (1, 'a')")
+        pool.commit()  # no-op: still inside the transaction
+        assert con.in_transaction
+        with pytest.raises(ValueError):
+            with pool.transaction():
+                con.execute("INSERT INTO t VALUES (2, 'b')")
+                raise ValueError("inner")
+        con.execute("INSERT INTO t VALUES (3, 'c')")
+
+    seen = []
+    t = threading.Thread(target=lambda: seen.extend(r[0] for r in pool.execute("SELECT k FROM t ORDER BY k")))
+    t.start(); t.join()
+    assert seen == [1, 3]
+
+
+def test_store_writes_are_single_transactions(tmp_path):
+    """Test a failing multi-statement store write leaves nothing behind."""
+    from ui_qt.services.typologies_store import TypologiesStore
+    store = TypologiesStore(str(tmp_path / "typologies.db"))
+    try:
+        tid = store.create_typology({"nome": "T", "componenti": [{"id_riga": "R1", "formula_lunghezza": "H"}]})
+        with pytest.raises(Exception):
+            store.create_typology({"nome": "U", "componenti": [{"id_riga": "R1", "quantita": "x"}]})
+        assert [t["name"] for t in store.list_typologies()] == ["T"]
+        assert store.get_typology_full(tid)["componenti"][0]["id_riga"] == "R1"
+    finally:
+        store.close()
+
+
+def test_store_close_keeps_the_shared_connection(tmp_path):
+    """Test closing one store does not close the connection other stores on the file use."""
+    from ui_qt.services.orders_store import OrdersStore
+    from ui_qt.services.profiles_store import ProfilesStore
+    path = tmp_path / "blitz.db"
+    orders = OrdersStore(path)
+    con = orders._conn
+    temp = ProfilesStore(path)
+    temp.close()
+    assert orders._conn is con
+    assert con.execute("SELECT COUNT(*) FROM orders").fetchone()[0] == 0
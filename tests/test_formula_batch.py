@@ -0,0 +1,146 @@
+"""
+Unit tests for vectorized (batch) formula evaluation.
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'qt6_app'))
+
+from ui_qt.services.formula_batch import component_order, evaluate_typology_batch
+from ui_qt.services.formula_compiler import compile_formula
+from ui_qt.services.parametric_engine import ElementDef, Parameter, ParametricEngine, TypologyDef
+from ui_qt.services.typologies_store import TypologiesStore
+from ui_qt.services.typology_cache import TypologyCache
+
+
+@pytest.mark.parametrize("expr", [
+    "H - 2*SP + 10",
+    "max(L, H, 1000) / 2",
+    "1 if H > L else 0",
+    "H > 1000 and L < 1000",
+    "round(L / 7, 1) + floor(H / 3)",
+    "H > L > 0",
+])
+def test_vector_matches_scalar(expr):
+    """Test NumPy evaluation gives the scalar result for every element."""
+    H = np.array([800.0, 1500.0, 2000.0])
+    L = np.array([900.0, 900.0, 1200.0])
+    f = compile_formula(expr)
+    vec = f.vector({"H": H, "L": L, "SP": 3.0})
+    scalar = [float(f({"H": h, "L": l, "SP": 3.0})) for h, l in zip(H, L)]
+    assert vec.tolist() == pytest.approx(scalar)
+
+
+def test_components_follow_references_and_flag_errors():
+    """Test C_<id_riga> forward references, cycles and per-row errors."""
+    comps = [
+        {"id_riga": "A", "nome": "Anta", "formula_lunghezza": "C_T - 20", "quantita": 2},
+        {"id_riga": "T", "nome": "Telaio", "formula_lunghezza": "H - 2*SP", "quantita": 1, "offset_mm": 0.5},
+        {"id_riga": "X", "nome": "Nessuna", "formula_lunghezza": "no", "quantita": 1},
+        {"id_riga": "D", "nome": "Div", "formula_lunghezza": "L / (H - 1000)", "quantita": 1},
+        {"id_riga": "P", "nome": "Ciclo1", "formula_lunghezza": "C_Q", "quantita": 1},
+        {"id_riga": "Q", "nome": "Ciclo2", "formula_lunghezza": "C_P + 1", "quantita": 1},
+    ]
+    order, cyclic = component_order(comps)
+    assert order == [1, 0, 2, 3, 4, 5]
+    assert cyclic == {4, 5}
+
+    table = evaluate_typology_batch({"componenti": comps, "variabili_locali": {"SP": 3.0}},
+                                    H=[1000.0, 1200.0], L=[600.0, 600.0], qty=[1, 3])
+    rows = {(r["row"], r["id_riga"]): r for r in table.to_rows()}
+    assert (0, "X") not in rows
+    assert rows[(1, "T")]["length"] == pytest.approx(1194.5)
+    assert rows[(1, "A")]["length"] == pytest.approx(1174.5)
+    assert rows[(1, "A")]["qty"] == 6
+    assert rows[(0, "D")]["ok"] is False and rows[(0, "D")]["length"] == 0.0
+    assert rows[(1, "D")]["length"] == pytest.approx(3.0)
+    # ciclo: come riga per riga, P legge C_Q non ancora calcolato (0), Q = C_P + 1
+    assert rows[(1, "P")]["ok"] is False and rows[(1, "P")]["length"] == 0.0
+    assert rows[(1, "Q")]["length"] == pytest.approx(1.0)
+
+
+def _cut_lists(store, rows):
+    from ui_qt.pages.quotevani_page import QuoteVaniPage
+
+    def cut_list(batch):
+        page = SimpleNamespace(_rows=rows, _profiles=None, _typologies=TypologyCache(store))
+        page._batch_lengths = ((lambda get_typ, tokens: QuoteVaniPage._batch_lengths(page, get_typ, tokens))
+                               if batch else (lambda get_typ, tokens: {}))
+        return QuoteVaniPage._calc_cutlist(page)
+
+    return cut_list(batch=False), cut_list(batch=True)
+
+
+def test_batch_cut_list_matches_per_row_calculation(tmp_path):
+    """Test failed formulas give 0 without offset and absent pieces are not referenceable, as per row."""
+    store = TypologiesStore(str(tmp_path / "blitz.db"))
+    tid = store.create_typology({"nome": "T", "componenti": [
+        {"id_riga": "D", "nome": "Div", "profilo_nome": "P", "formula_lunghezza": "L / (H - 1000)",
+         "quantita": 1, "offset_mm": 5.0},
+        {"id_riga": "E", "nome": "DaDiv", "profilo_nome": "P", "formula_lunghezza": "C_D + 1", "quantita": 1},
+        {"id_riga": "Z", "nome": "Assente", "profilo_nome": "P", "formula_lunghezza": "H", "quantita": 0},
+        {"id_riga": "F", "nome": "DaAssente", "profilo_nome": "P", "formula_lunghezza": "C_Z + 2",
+         "quantita": 1, "offset_mm": 3.0},
+        {"id_riga": "G", "nome": "Telaio", "profilo_nome": "P", "formula_lunghezza": "H - 10",
+         "quantita": 2, "offset_mm": 0.5},
+    ]})
+    rows = [{"tid": tid, "qty": 1, "H": 1000.0, "L": 600.0, "vars": {}},
+            {"tid": tid, "qty": 2, "H": 1200.0, "L": 600.0, "vars": {}}]
+
+    per_row, batch = _cut_lists(store, rows)
+    assert per_row == batch
+    lengths = {(c["element"], c["length_mm"]) for c in per_row}
+    assert ("Div", 0.0) in lengths and ("DaDiv", 1.0) in lengths  # H=1000: nessun offset sul fallito
+    assert ("DaAssente", 0.0) in lengths
+    assert ("Div", 8.0) in lengths and ("DaDiv", 9.0) in lengths
+    store.close()
+
+
+def test_batch_cut_list_matches_per_row_for_branches_cycles_and_arity(tmp_path):
+    """Test untaken branches, reference cycles and one-argument min/max behave as in the per-row path."""
+    store = TypologiesStore(str(tmp_path / "blitz.db"))
+    comp = lambda rid, formula, qty=1: {"id_riga": rid, "nome": rid, "profilo_nome": "P",
+                                        "formula_lunghezza": formula, "quantita": qty}
+    tid = store.create_typology({"nome": "T", "componenti": [
+        comp("Z", "H", qty=0),
+        comp("R", "C_Z if H > 2000 else H - 10"),
+        comp("A", "C_B + 1"),
+        comp("B", "C_A + 1"),
+        comp("M", "min(H)"),
+        comp("N", "max(H, L) - 1"),
+    ]})
+    rows = [{"tid": tid, "qty": 1, "H": 1000.0, "L": 600.0, "vars": {}},
+            {"tid": tid, "qty": 1, "H": 2500.0, "L": 600.0, "vars": {}}]
+    per_row, batch = _cut_lists(store, rows)
+    assert per_row == batch
+    lengths = {(c["element"], c["length_mm"]) for c in per_row}
+    assert {("R", 990.0), ("R", 0.0), ("A", 0.0), ("B", 1.0), ("M", 0.0), ("N", 999.0)} <= lengths
+    store.close()
+
+
+def test_parametric_engine_batch_matches_single_evaluation():
+    """Test evaluate_batch returns the parts evaluate() gives for each input."""
+    typ = TypologyDef(
+        name="F1", version="1", description="",
+        parameters=[Parameter("H", default=1000.0), Parameter("L", default=800.0),
+                    Parameter("PROF", type="select", default="P70")],
+        derived={"HL": "H - 40"},
+        elements=[
+            ElementDef("T1", "telaio", "PROF", "2", "H", "45", "45"),
+            ElementDef("A1", "anta", "PROF", "2 if L > 900 else 1", "HL - 10", "45", "45"),
+        ])
+    engine = ParametricEngine(typ)
+    Hs, Ls = [1000.0, 1200.0, 1400.0], [800.0, 1000.0, 1100.0]
+    table = engine.evaluate_batch({"H": Hs, "L": Ls})
+
+    expected = []
+    for row, (h, l) in enumerate(zip(Hs, Ls)):
+        parts, _env = engine.evaluate({"H": h, "L": l})
+        expected += [(row, p.id, p.profile, p.qty, p.length) for p in parts]
+    got = [(r["row"], r["id"], r["profile"], r["qty"], r["length"]) for r in table.to_rows()]
+    assert got == expected
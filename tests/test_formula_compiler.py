@@ -0,0 +1,58 @@
+"""
+Unit tests for the cached formula compiler.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'qt6_app'))
+
+from ui_qt.services import formula_compiler
+from ui_qt.services.formula_compiler import compile_formula
+from ui_qt.services.legacy_formula import eval_formula
+from ui_qt.services.parametric_engine import safe_eval
+
+ENV = {"H": 1500.0, "L": 900.0, "C_R1": 850.0, "SP": 3.0}
+
+
+@pytest.mark.parametrize("expr,expected", [
+    ("H - 2*C_R1 + 10", -190.0),
+    ("max(L, H) / 2 - SP", 747.0),
+    ("1 if H > L else 0", 1.0),
+    ("H > L > 0", 1.0),
+    ("H > 1000 and L", 1.0),     # and/or restituiscono bool
+    ("round(L / 7, 1)", 128.6),
+    ("-(H + L) ** 2 % 7", 6.0),
+])
+def test_eval_matches_previous_semantics(expr, expected):
+    """Test arithmetic, calls, comparisons and boolean ops."""
+    assert eval_formula(expr, ENV) == pytest.approx(expected)
+    assert safe_eval(expr, ENV) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("expr,message", [
+    ("__import__('os')", "Funzione non permessa"),
+    ("H.real", "Nodo non permesso"),
+    ("H[0]", "Nodo non permesso"),
+    ("'abc'", "Costante non permessa"),
+    ("Z + 1", "Variabile sconosciuta: Z"),
+    ("abs + 1", "Variabile sconosciuta: abs"),
+])
+def test_whitelist_is_enforced(expr, message):
+    """Test nodes, functions and names outside the whitelist are rejected."""
+    with pytest.raises(ValueError, match=message):
+        eval_formula(expr, ENV)
+
+
+def test_compiled_once_and_not_shadowed():
+    """Test the same text is compiled once and env cannot replace functions."""
+    formula_compiler.clear_cache()
+    f = compile_formula("max(H, L)")
+    assert compile_formula(" max(H, L) ") is f
+    assert f.names == ("H", "L")
+    assert formula_compiler.cache_info().misses == 1
+    assert f({"H": 1.0, "L": 2.0, "max": min}) == 2.0
+    with pytest.raises(SyntaxError):
+        compile_formula("H +")
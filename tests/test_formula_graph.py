@@ -0,0 +1,93 @@
+"""
+Unit tests for the formula dependency graph and incremental preview.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'qt6_app'))
+
+from ui_qt.services import formula_graph
+from ui_qt.services.formula_graph import FormulaGraph, FormulaPreview, effective_formulas
+
+
+def _chain(n):
+    """R0 = H - A, R<i> = C_R<i-1> + 1, plus an independent R99 = L + B."""
+    comps = [{"id_riga": "R0", "formula_lunghezza": "H - A", "offset_mm": 0.0}]
+    comps += [{"id_riga": f"R{i}", "formula_lunghezza": f"C_R{i-1} + 1", "offset_mm": 0.0} for i in range(1, n)]
+    comps.append({"id_riga": "R99", "formula_lunghezza": "L + B", "offset_mm": 2.0})
+    return comps
+
+
+def test_cycles_and_downstream():
+    """Test cycles (including self references) are reported and downstream is ordered."""
+    comps = [
+        {"id_riga": "R1", "formula_lunghezza": "C_R3 - 10"},
+        {"id_riga": "R2", "formula_lunghezza": "C_R1 + SP"},
+        {"id_riga": "R3", "formula_lunghezza": "C_R2"},
+        {"id_riga": "R4", "formula_lunghezza": "C_R4 + 1"},
+        {"id_riga": "R5", "formula_lunghezza": "H"},
+    ]
+    g = FormulaGraph(comps)
+    assert g.describe_cycles() == ["R4 → R4", "R1 → R3 → R2 → R1"]
+    assert g.cyclic == {0, 1, 2}
+    assert g.downstream(["SP"]) == [0, 1, 2]
+    assert FormulaGraph(_chain(4)).downstream(["C_R1"]) == [2, 3]
+    assert FormulaGraph(_chain(4)).find_cycles() == []
+
+
+def test_group_overrides_replace_component_formulas():
+    """Test multi-formula overrides are matched on the normalized component name."""
+    comps = [{"id_riga": "R1", "nome": "Anta SX", "formula_lunghezza": "H"},
+             {"id_riga": "R2", "nome": "Traverso", "formula_lunghezza": "C_R1"}]
+    eff = effective_formulas(comps, {"antasx": "C_R2 / 2"})
+    assert eff == ["C_R2 / 2", "C_R1"]
+    assert FormulaGraph(comps, eff).describe_cycles() == ["R1 → R2 → R1"]
+
+
+def test_preview_recomputes_only_downstream(monkeypatch):
+    """Test a variable edit re-evaluates only its readers and stops when values do not change."""
+    comps = _chain(200)
+    pv = FormulaPreview(comps, {"H": 1000.0, "L": 500.0, "A": 10.0, "B": 1.0})
+    assert pv.values[199] == 1189.0 and pv.values[200] == 503.0
+
+    calls = []
+    real = formula_graph.compile_formula
+    monkeypatch.setattr(formula_graph, "compile_formula", lambda e: calls.append(e) or real(e))
+
+    assert pv.update({"B": 4.0}) == [200]
+    assert pv.values[200] == 506.0 and len(calls) == 1
+    assert pv.update({"B": 4.0}) == []
+
+    assert pv.update({"A": 20.0}) == list(range(200))
+    assert pv.values[199] == 1179.0
+
+    # Same value of R0 with different inputs: the chain is not touched
+    calls.clear()
+    assert pv.update({"H": 1010.0, "A": 30.0}) == [0]
+    assert len(calls) == 1
+
+
+def test_preview_component_edits_and_errors():
+    """Test editing/removing components keeps untouched values and flags errors."""
+    comps = _chain(4)
+    pv = FormulaPreview(comps, {"H": 100.0, "L": 50.0, "A": 0.0, "B": 0.0})
+    edited = [dict(c) for c in comps]
+    edited[2]["formula_lunghezza"] = "C_R1 + 10"
+    assert pv.set_components(edited) == [2, 3]
+    assert pv.values[3] == 112.0
+
+    del edited[1]  # R2 reads the removed C_R1
+    assert pv.set_components(edited) == [1, 2]
+    assert pv.values[1] == 0.0 and "C_R1" in pv.errors[1]
+
+    edited[0]["formula_lunghezza"] = "C_R3"
+    edited[1]["formula_lunghezza"] = "C_R0 + 1"
+    assert pv.set_components(edited) == [0, 1, 2]
+    assert pv.errors[0] == pv.errors[2] == "Dipendenza circolare"
+    assert pv.values[3] == 52.0  # R99 is independent and keeps its value
+
+    # As in the cut list, a formula that cannot be computed is 0 without its offset
+    edited[3]["formula_lunghezza"] = "L / (H - 100)"
+    assert pv.set_components(edited) == [3]
+    assert pv.values[3] == 0.0 and pv.errors[3]
@@ -0,0 +1,67 @@
+"""
+Unit tests for the cached label renderer.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'qt6_app'))
+
+PIL = pytest.importorskip("PIL")
+from PIL import Image, ImageChops, ImageDraw, ImageFont
+
+from ui_qt.services.label_renderer import KEY_INFO, LabelRenderer, label_size
+
+LINES = ["P60 Montante", "Anta", "L=1234.50 AX=45.0 AD=90.0", "SEQ:17 gjpqy"]
+
+
+def _reference(lines, paper, rotate, fs):
+    # disegno diretto, come faceva LabelPrinter prima della cache
+    img = Image.new("1", label_size(paper), 1)
+    draw = ImageDraw.Draw(img)
+    try:
+        font = ImageFont.truetype("arial.ttf", fs)
+    except Exception:
+        font = ImageFont.load_default()
+    y = 8
+    for line in lines:
+        draw.text((8, y), line, fill=0, font=font)
+        y += int(fs * 1.2)
+    return img.rotate(rotate, expand=True) if rotate in (90, 180, 270) else img
+
+
+@pytest.fixture
+def renderer():
+    return LabelRenderer({"Image": Image, "ImageDraw": ImageDraw, "ImageFont": ImageFont})
+
+
+@pytest.mark.parametrize("paper,rotate,fs", [("DK-11201", 0, 32), ("DK-11209", 90, 24), ("DK-11202", 0, 10)])
+def test_cached_render_matches_direct_drawing(renderer, paper, rotate, fs):
+    """Test compositing cached line masks gives the same pixels as drawing the text directly."""
+    img = renderer.render(LINES, paper, rotate, fs)
+    ref = _reference(LINES, paper, rotate, fs)
+    assert img.size == ref.size
+    assert ImageChops.difference(img.convert("L"), ref.convert("L")).getbbox() is None
+
+
+def test_only_changed_lines_are_drawn(renderer):
+    """Test a label differing in one line reuses the other line masks and whole labels are memoized."""
+    first = renderer.render(LINES, "DK-11201", 0, 32)
+    assert renderer.render(list(LINES), "DK-11201", 0, 32) is first
+    assert first.info[KEY_INFO] == (tuple(LINES), "DK-11201", 0, 32)
+
+    lines_before = len(renderer._lines)
+    renderer.render(LINES[:3] + ["SEQ:18 gjpqy"], "DK-11201", 0, 32)
+    assert len(renderer._lines) == lines_before + 1
+    assert len(renderer._labels) == 2
+
+
+def test_instructions_are_built_once(renderer):
+    """Test raster instructions are memoized per key."""
+    calls = []
+    build = lambda: calls.append(1) or b"raster"
+    assert renderer.instructions(("QL-800", "DK-11201", True, ("k",)), build) == b"raster"
+    assert renderer.instructions(("QL-800", "DK-11201", True, ("k",)), build) == b"raster"
+    assert len(calls) == 1
@@ -0,0 +1,169 @@
+"""
+Unit tests for the asynchronous label print spooler.
+"""
+
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'qt6_app'))
+
+from ui_qt.services.label_spooler import LabelSpooler
+
+
+class FakePrinter:
+    """Records jobs; can be held on a gate or fail a number of times."""
+
+    def __init__(self, failures=0):
+        self.jobs = []
+        self.failures = failures
+        self.gate = threading.Event(); self.gate.set()
+        self.entered = threading.Event()
+
+    def render_label(self, lines, paper=None, rotate=None, font_size=None):
+        return tuple(lines)
+
+    def send_labels(self, images, paper=None, cut=None):
+        self.entered.set()
+        self.gate.wait(5)
+        if self.failures:
+            self.failures -= 1
+            raise OSError("stampante offline")
+        self.jobs.append((paper, cut, [img[0] for img in images]))
+        return "printed"
+
+
+def _rows(spooler):
+    return spooler._db.execute("SELECT status, attempts FROM label_jobs ORDER BY id").fetchall()
+
+
+def test_labels_queued_during_a_job_print_in_one_batch(tmp_path):
+    """Test submit returns at once and labels piling up behind a slow job go out together, in order."""
+    printer = FakePrinter()
+    printer.gate.clear()
+    spooler = LabelSpooler(printer, tmp_path / "blitz.db", batch_max=3)
+    try:
+        spooler.submit(["1"], paper="DK-11201")
+        assert printer.entered.wait(2)
+        for i in range(2, 6):
+            spooler.submit([str(i)], paper="DK-11201")
+        spooler.submit(["6"], paper="DK-11209")
+        assert spooler.pending() == 6
+        printer.gate.set()
+        assert spooler.wait_idle(5)
+    finally:
+        spooler.stop()
+    assert [j[2] for j in printer.jobs] == [["1"], ["2", "3", "4"], ["5"], ["6"]]
+    assert printer.jobs[-1][0] == "DK-11209"
+    assert _rows(spooler) == []
+
+
+def test_failed_job_is_retried_with_backoff(tmp_path):
+    """Test a transient printer error is retried and later labels wait behind it."""
+    events = []
+    printer = FakePrinter(failures=2)
+    spooler = LabelSpooler(printer, tmp_path / "blitz.db", backoff_s=0.01, on_event=lambda *e: events.append(e))
+    try:
+        spooler.submit(["A"])
+        spooler.submit(["B"])
+        assert spooler.wait_idle(5)
+    finally:
+        spooler.stop()
+    assert [lbl for j in printer.jobs for lbl in j[2]] == ["A", "B"]
+    assert events[0][0] == "warn" and "offline" in events[0][1]
+
+
+def test_exhausted_retries_mark_jobs_failed_until_requeued(tmp_path):
+    """Test jobs that keep failing stay in the table as failed and retry_failed prints them."""
+    printer = FakePrinter(failures=99)
+    spooler = LabelSpooler(printer, tmp_path / "blitz.db", max_attempts=2, backoff_s=0.01)
+    try:
+        spooler.submit(["A"])
+        assert spooler.wait_idle(5)
+        assert _rows(spooler) == [("failed", 2)]
+        printer.failures = 0
+        assert spooler.retry_failed() == 1
+        assert spooler.wait_idle(5)
+    finally:
+        spooler.stop()
+    assert printer.jobs == [(None, True, ["A"])]
+    assert spooler.failed_count() == 0
+
+
+def test_pending_jobs_survive_restart_and_queue_is_bounded(tmp_path):
+    """Test unprinted labels are reloaded by the next spooler and a full queue refuses new ones."""
+    path = tmp_path / "blitz.db"
+    first = LabelSpooler(FakePrinter(), path, max_pending=2, autostart=False)
+    assert first.submit(["1"]) and first.submit(["2"])
+    assert first.submit(["3"]) is False
+    first.stop()
+
+    printer = FakePrinter()
+    second = LabelSpooler(printer, path)
+    try:
+        assert second.wait_idle(5)
+    finally:
+        second.stop()
+    assert printer.jobs == [(None, True, ["1", "2"])]
+
+
+def test_attempts_are_counted_per_label(tmp_path):
+    """Test a batch joining a retried label and a new one fails only the label out of attempts."""
+    printer = FakePrinter(failures=2)
+    printer.gate.clear()
+    spooler = LabelSpooler(printer, tmp_path / "blitz.db", max_attempts=2, backoff_s=0.01)
+    try:
+        spooler.submit(["A"])
+        assert printer.entered.wait(2)
+        spooler.submit(["B"])
+        printer.gate.set()
+        assert spooler.wait_idle(5)
+    finally:
+        spooler.shutdown()
+    assert printer.jobs == [(None, True, ["B"])]
+    assert _rows(spooler) == [("failed", 2)]
+
+
+def test_locked_database_is_retried_without_stopping_the_spooler(tmp_path, monkeypatch):
+    """Test a 'database is locked' on the post-print DELETE is retried and the thread keeps serving."""
+    printer = FakePrinter()
+    spooler = LabelSpooler(printer, tmp_path / "blitz.db", backoff_s=0.01, autostart=False)
+    spooler.submit(["A"])
+    real = spooler._db.transaction
+    locked = [2]
+
+    @contextmanager
+    def flaky():
+        if locked[0]:
+            locked[0] -= 1
+            raise sqlite3.OperationalError("database is locked")
+        with real() as con:
+            yield con
+
+    monkeypatch.setattr(spooler._db, "transaction", flaky)
+    spooler.start()
+    try:
+        assert spooler.wait_idle(5)
+        assert _rows(spooler) == []
+        spooler.submit(["B"])
+        assert spooler.wait_idle(5)
+    finally:
+        spooler.shutdown()
+    assert [j[2] for j in printer.jobs] == [["A"], ["B"]]
+
+
+def test_shutdown_drains_the_queue_and_keeps_the_shared_connection(tmp_path):
+    """Test shutdown prints what is queued and leaves the caller's pooled connection open."""
+    printer = FakePrinter()
+    spooler = LabelSpooler(printer, tmp_path / "blitz.db", autostart=False)
+    spooler.submit(["A"])
+    con = spooler._db.connection()
+    spooler.start()
+    spooler.shutdown(5)
+    assert printer.jobs == [(None, True, ["A"])]
+    assert con.execute("SELECT COUNT(*) FROM label_jobs").fetchone()[0] == 0
+    assert _rows(spooler) == []
@@ -7,9 +7,15 @@ import logging
 import json
 import tempfile
 from pathlib import Path
+from qt6_app.ui_qt.utils import logger as logger_module
 from qt6_app.ui_qt.utils.logger import (
     StructuredFormatter,
+    RateLimitFilter,
+    NonBlockingQueueHandler,
     setup_logging,
+    shutdown_logging,
+    flush_logging,
+    get_logging_stats,
     get_logger
 )
 
@@ -110,12 +116,13 @@ def test_setup_logging_creates_handlers():
         assert (log_dir / 'blitz.log').exists()
         assert (log_dir / 'errors.log').exists()
         
-        # Check root logger has handlers
+        # Root logger only enqueues; the listener owns the real handlers
         root = logging.getLogger()
-        assert len(root.handlers) >= 3  # Console, main file, error file
+        assert any(isinstance(h, NonBlockingQueueHandler) for h in root.handlers)
+        assert len(logger_module._listener.handlers) >= 3  # Console, main file, error file
         
         # Cleanup handlers to avoid interference with other tests
-        root.handlers.clear()
+        shutdown_logging()
 
 
 def test_setup_logging_default_directory():
@@ -155,6 +162,7 @@ def test_logging_levels():
         logger.warning("Warning message")
         logger.error("Error message")
         logger.critical("Critical message")
+        assert flush_logging()
         
         # Check that logs were written
         assert (log_dir / 'blitz.log').exists()
@@ -175,11 +183,9 @@ def test_rotating_file_handler_config():
         log_dir = Path(tmpdir) / 'test_logs'
         setup_logging(log_dir=log_dir)
         
-        root = logging.getLogger()
-        
         # Find rotating file handlers
         rotating_handlers = [
-            h for h in root.handlers 
+            h for h in logger_module._listener.handlers 
             if isinstance(h, logging.handlers.RotatingFileHandler)
         ]
         
@@ -204,4 +210,57 @@ def test_rotating_file_handler_config():
         assert error_handler.backupCount == 3
         
         # Cleanup
-        root.handlers.clear()
+        shutdown_logging()
+
+
+def test_hot_path_rate_limit():
+    """Test hot-path loggers are rate limited per logger, warnings always pass."""
+    now = [0.0]
+    flt = RateLimitFilter({'blitz.motion_controller': (10.0, 2)}, clock=lambda: now[0])
+    log = logging.getLogger("blitz.motion_controller.loop")
+
+    def rec(level=logging.INFO, name="blitz.motion_controller.loop"):
+        return log.makeRecord(name, level, "f.py", 1, "tick", (), None)
+
+    assert [flt.filter(rec()) for _ in range(4)] == [True, True, False, False]
+    assert flt.filter(rec(logging.WARNING))
+    assert flt.filter(rec(name="other"))
+    now[0] = 0.1  # one token refilled
+    assert flt.filter(rec())
+    assert not flt.filter(rec())
+    assert flt.suppressed == {"blitz.motion_controller.loop": 3}
+
+
+def test_queue_full_drops_without_blocking():
+    """Test a full queue drops records and counts them instead of blocking."""
+    import queue
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=2))
+    log = logging.getLogger("drop_test")
+    for i in range(5):
+        handler.handle(log.makeRecord("drop_test", logging.INFO, "f.py", 1, "msg %d", (i,), None))
+    assert handler.enqueued == 2
+    assert handler.dropped == 3
+    assert handler.queue.get_nowait().msg == "msg 0"
+
+
+def test_async_pipeline_writes_structured_exceptions():
+    """Test records reach the file via the listener with exception details intact."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_dir = Path(tmpdir) / 'test_logs'
+        setup_logging(log_dir=log_dir, console_level=logging.CRITICAL)
+        log = get_logger("async_test")
+        try:
+            raise KeyError("boom")
+        except KeyError:
+            log.exception("failed %s", "op")
+        assert flush_logging()
+
+        lines = (log_dir / 'errors.log').read_text(encoding='utf-8').splitlines()
+        data = json.loads(lines[-1])
+        assert data['message'] == 'failed op'
+        assert data['exception']['type'] == 'KeyError'
+        stats = get_logging_stats()
+        assert stats['dropped'] == 0
+        assert stats['written'] >= 2
+
+        shutdown_logging()
@@ -67,6 +67,29 @@ class TestBlitzMainWindowInit:
                 assert idx >= 0
                 assert page_widget is not None
     
+    def test_pages_built_on_first_show(self, qtbot):
+        """Test only the home page is built at startup, others on first show_page."""
+        from qt6_app.main_qt import BlitzMainWindow
+        
+        window = BlitzMainWindow()
+        qtbot.addWidget(window)
+        
+        if "home" not in window._pages:
+            pytest.skip("Page modules not importable in this environment")
+        assert "manuale" not in window._pages
+        assert window.resolve_page_key("manuale") == "manuale"
+        
+        window.show_page("manuale")
+        if "manuale" in window._pages:
+            _, idx, _ = window._pages["manuale"]
+            assert window.stack.currentIndex() == idx
+            phases = [p["name"] for p in window.startup_timer.phases]
+            assert "import manuale" in phases and "build manuale" in phases
+        
+        # Unknown keys still fall back to home
+        window.show_page("does_not_exist")
+        assert window.stack.currentIndex() == window._pages["home"][1]
+    
     def test_statistics_page_not_loaded(self, qtbot):
         """Test that the non-existent StatisticsPage is not in the pages list."""
         from qt6_app.main_qt import BlitzMainWindow
@@ -0,0 +1,94 @@
+"""
+Unit tests for the in-process metrics registry and exporters.
+"""
+
+import json
+import sys
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'qt6_app'))
+
+from ui_qt.utils.metrics import MetricsExporter, MetricsRegistry, REGISTRY
+
+
+def test_counter_gauge_labels():
+    """Test counters and gauges keep one series per label set."""
+    reg = MetricsRegistry()
+    moves = reg.counter("moves_total", "Moves")
+    moves.inc(result="ok")
+    moves.inc(2, result="ok")
+    moves.inc(result="error")
+    assert moves.value(result="ok") == 3
+    assert reg.counter("moves_total") is moves
+    with pytest.raises(ValueError):
+        moves.inc(-1)
+    with pytest.raises(TypeError):
+        reg.gauge("moves_total")
+
+    g = reg.gauge("queue_depth")
+    g.set(5)
+    g.dec(2)
+    assert g.value() == 3
+
+
+def test_histogram_prometheus_text():
+    """Test histogram buckets are exported cumulatively with sum and count."""
+    reg = MetricsRegistry()
+    h = reg.histogram("positioning_seconds", "Positioning", buckets=(0.5, 1.0, 2.0))
+    for v in (0.2, 0.7, 0.9, 5.0):
+        h.observe(v)
+    assert h.count() == 4
+    assert h.sum() == pytest.approx(6.8)
+
+    text = reg.to_prometheus()
+    assert "# TYPE blitz_positioning_seconds histogram" in text
+    assert 'blitz_positioning_seconds_bucket{le="0.5"} 1' in text
+    assert 'blitz_positioning_seconds_bucket{le="1"} 3' in text
+    assert 'blitz_positioning_seconds_bucket{le="+Inf"} 4' in text
+    assert "blitz_positioning_seconds_count 4" in text
+
+    data = reg.to_dict()["metrics"]["blitz_positioning_seconds"]["values"][0]
+    assert data["buckets"] == {"0.5": 1, "1": 2, "2": 0, "+Inf": 1}
+
+
+def test_http_and_json_export(tmp_path):
+    """Test the exporter serves /metrics and writes the JSON snapshot."""
+    reg = MetricsRegistry()
+    reg.counter("pieces_cut_total").inc(mode="plan")
+    json_path = tmp_path / "metrics.json"
+    exporter = MetricsExporter(reg, http_port=0, json_path=str(json_path), json_interval_s=60)
+    exporter.start()
+    try:
+        host, port = exporter.server_address
+        body = urllib.request.urlopen(f"http://{host}:{port}/metrics", timeout=5).read().decode()
+        assert 'blitz_pieces_cut_total{mode="plan"} 1' in body
+        snap = json.loads(urllib.request.urlopen(f"http://{host}:{port}/metrics.json", timeout=5).read())
+        assert "blitz_pieces_cut_total" in snap["metrics"]
+    finally:
+        exporter.stop()
+    assert json.loads(json_path.read_text())["metrics"]["blitz_pieces_cut_total"]["values"][0]["value"] == 1
+
+
+def test_machine_adapter_records_positioning_time():
+    """Test MachineAdapter instruments moves and positioning completion."""
+    from ui_qt.machine.machine_adapter import MachineAdapter
+    from ui_qt.machine.sim_dynamics import ManualClock
+    from ui_qt.machine.simulation_machine import SimulationMachine
+
+    raw = SimulationMachine(clock=ManualClock())
+    raw.do_homing()
+    raw.run_until_idle(timeout_s=5.0)
+    adapter = MachineAdapter(raw)
+    moves = REGISTRY.counter("moves_total")
+    positioning = REGISTRY.histogram("positioning_seconds")
+    ok_before, done_before = moves.value(result="ok"), positioning.count()
+
+    assert adapter.command_move(1000.0)
+    assert adapter.is_positioning_active()
+    raw.run_until_idle()
+    assert not adapter.is_positioning_active()
+    assert moves.value(result="ok") == ok_before + 1
+    assert positioning.count() == done_before + 1
@@ -0,0 +1,103 @@
+"""
+Unit tests for the normalized orders store (order_rows / order_cuts).
+"""
+
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'qt6_app'))
+
+from ui_qt.services import database
+from ui_qt.services.orders_store import OrdersStore
+from ui_qt.services.profiles_store import ProfilesStore
+
+ROWS = [
+    {"tid": 1, "qty": 2, "H": 1200.0, "L": 800.0, "vars": {"A": 5.0}, "formula_group": "G1"},
+    {"tid": 2, "qty": 1, "H": 900.0, "L": 600.0, "vars": {}, "formula_group": None, "colore": "RAL9010"},
+]
+
+
+def _cuts(profile, *lengths):
+    return [{"profile": profile, "element": f"E{i}", "length_mm": L, "ang_sx": 45.0, "ang_dx": 90.0, "qty": 2, "note": ""}
+            for i, L in enumerate(lengths)]
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = OrdersStore(str(tmp_path / "blitz.db"))
+    yield s
+    s.close()
+
+
+def test_orders_round_trip_through_tables(store):
+    """Test rows, cuts and metadata are stored in columns and rebuilt by get_order."""
+    commessa = {"rows": ROWS, "saved_at": "2024-01-01Z", "customer": "Rossi"}
+    oid = store.create_order("C1", "Rossi", commessa)
+    got = store.get_order(oid)
+    assert got["data"]["rows"][0] == ROWS[0]
+    assert got["data"]["rows"][1] == {k: v for k, v in ROWS[1].items() if v is not None}
+    assert got["data"]["saved_at"] == "2024-01-01Z"
+    assert (got["kind"], got["status"]) == ("commessa", "pending")
+    assert store._conn.execute("SELECT h_mm, extra_json FROM order_rows WHERE order_id=? AND ord=1",
+                               (oid,)).fetchone() == (900.0, '{"colore": "RAL9010"}')
+
+    cutlist = {"type": "cutlist", "cuts": _cuts("P60", 1000.0, 500.5)}
+    cid = store.create_order("L1", "Rossi", cutlist)
+    assert store.get_order(cid)["data"] == cutlist
+    store.update_order(cid, "L1", "Rossi", {"type": "cutlist", "cuts": _cuts("P60", 10.0)})
+    assert [c["length_mm"] for c in store.get_order(cid)["data"]["cuts"]] == [10.0]
+
+    store.delete_order(cid)
+    assert store._conn.execute("SELECT COUNT(*) FROM order_cuts").fetchone()[0] == 0
+
+
+def test_material_requirements_and_streaming(tmp_path, store):
+    """Test per-profile totals over pending orders come from one query and cuts stream in batches."""
+    ProfilesStore(tmp_path / "blitz.db").upsert_profile("P60", 62.0)
+    a = store.create_order("A", "", {"type": "cutlist", "cuts": _cuts("P60", 1000.0, 500.0) + _cuts("P80", 300.0)})
+    b = store.create_order("B", "", {"type": "cutlist", "cuts": _cuts("P60", 250.0)})
+    done = store.create_order("C", "", {"type": "cutlist", "cuts": _cuts("P60", 9999.0)})
+    store.set_status(done, "done")
+    with pytest.raises(ValueError):
+        store.set_status(a, "boh")
+
+    queries = []
+    store._conn.set_trace_callback(queries.append)
+    req = store.material_requirements()
+    store._conn.set_trace_callback(None)
+    assert len(queries) == 1
+    assert req == [
+        {"profile": "P60", "pieces": 6, "total_mm": 3500.0, "orders": 2, "thickness": 62.0},
+        {"profile": "P80", "pieces": 2, "total_mm": 600.0, "orders": 1, "thickness": 0.0},
+    ]
+
+    cuts = list(store.iter_cuts(statuses=["pending"], batch=2))
+    assert [(c["order_id"], c["length_mm"]) for c in cuts] == [(a, 1000.0), (a, 500.0), (a, 300.0), (b, 250.0)]
+    assert cuts[0]["thickness"] == 62.0
+    assert [o["id"] for o in store.list_orders(status="done")] == [done]
+
+
+def test_legacy_data_json_is_split_by_migration(tmp_path):
+    """Test orders saved as data_json by the previous schema are moved into the new tables."""
+    path = tmp_path / "blitz.db"
+    pool = database.get_pool(path)
+    database.migrate(pool, database.MIGRATIONS[:3])
+    data = {"type": "cutlist", "cuts": _cuts("P60", 700.0), "saved_at": "x"}
+    pool.execute("INSERT INTO orders(id, name, customer, data_json, created_at, updated_at) VALUES (5, 'Old', '', ?, 1, 1)",
+                 (json.dumps(data),))
+    pool.execute("INSERT INTO orders(id, name, customer, data_json, created_at, updated_at) VALUES (6, 'Bad', '', '{', 1, 1)")
+    pool.commit()
+
+    store = OrdersStore(str(path))
+    assert database.schema_version(store._conn) == database.SCHEMA_VERSION
+    assert store.get_order(5)["data"] == data
+    assert store.get_order(5)["kind"] == "cutlist"
+    assert store.get_order(6)["data"]["data_json"] == "{"
+    assert "data_json" not in database.table_columns(store._conn, "orders")
+    with pytest.raises(sqlite3.IntegrityError):
+        store._conn.execute("INSERT INTO order_cuts(order_id) VALUES (999)")
+    store.close()
@@ -0,0 +1,40 @@
+"""
+Unit tests for the quadrature decoder notification pump.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'qt6_app'))
+
+from ui_qt.hardware import quadrature_decoder
+from ui_qt.hardware.quadrature_decoder import NotifyEdgePump, QuadratureDecoder, _REPORT
+
+
+class FakePi:
+    def notify_open(self):
+        return 0
+
+    def notify_begin(self, handle, mask):
+        pass
+
+    def notify_close(self, handle):
+        pass
+
+
+def test_pump_stops_on_pipe_eof(monkeypatch):
+    """Test the reader thread decodes what was sent and exits when pigpio closes the pipe."""
+    r, w = os.pipe()
+    monkeypatch.setattr(quadrature_decoder.os, "open", lambda path, flags: r)
+    decoder = QuadratureDecoder(17, 27)
+    pump = NotifyEdgePump(FakePi(), decoder)
+    assert pump.start()
+    # A rises, then B rises: two forward edges
+    os.write(w, _REPORT.pack(0, 0, 10, 1 << 17) + _REPORT.pack(1, 0, 20, (1 << 17) | (1 << 27)))
+    os.close(w)
+    pump._thread.join(2.0)
+    assert not pump._thread.is_alive()
+    assert not pump.running
+    assert decoder.count == 2
+    pump.stop()
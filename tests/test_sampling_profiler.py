@@ -0,0 +1,87 @@
+"""
+Unit tests for the sampling profiler.
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+from qt6_app.ui_qt.utils.sampling_profiler import SamplingProfiler
+
+
+def _busy_worker(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(2000))
+
+
+def test_profiler_samples_other_threads(tmp_path):
+    """Test stacks of a busy worker thread are captured and saved."""
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_worker, args=(stop,), name="BusyWorker", daemon=True)
+    worker.start()
+    prof = SamplingProfiler(interval_s=0.002)
+    try:
+        assert prof.start()
+        assert not prof.start()  # already running
+        time.sleep(0.3)
+        result = prof.stop(save=True, out_dir=tmp_path)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert result.samples > 10
+    assert "BusyWorker" in result.thread_samples()
+    assert any("_busy_worker" in row["function"] for row in result.top_functions(10))
+
+    collapsed, top = prof.last_paths
+    lines = collapsed.read_text(encoding="utf-8").splitlines()
+    assert any(line.startswith("BusyWorker;") and "_busy_worker" in line for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert "self %" in top.read_text(encoding="utf-8")
+
+
+def test_profiler_stops_after_duration(tmp_path):
+    """Test a timed session stops by itself and reports the written files."""
+    done = threading.Event()
+    received = []
+
+    def on_finished(result, paths):
+        received.append((result, paths))
+        done.set()
+
+    prof = SamplingProfiler(interval_s=0.005)
+    prof.start(duration_s=0.1, out_dir=tmp_path, on_finished=on_finished)
+    assert done.wait(5.0)
+    assert not prof.running
+    result, paths = received[0]
+    assert 0.1 <= result.duration_s < 2.0
+    assert paths[0].exists() and paths[1].exists()
+
+
+class _RefusingProfiler:
+    """Profiler whose start() fails (already running, or raises)."""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.running = False
+
+    def start(self, **kwargs):
+        if self.error:
+            raise self.error
+        return False
+
+
+def test_diagnostics_page_stays_idle_when_start_fails(qapp, monkeypatch):
+    """Test the Utility diagnostics buttons only switch to running when the profiler really started."""
+    sys.path.insert(0, str(Path(__file__).parent.parent / 'qt6_app'))
+    from ui_qt.pages import utility_page
+
+    page = utility_page.DiagnosticsSubPage(appwin=None)
+    for prof, status in ((_RefusingProfiler(), "già in esecuzione"),
+                         (_RefusingProfiler(RuntimeError("can't start new thread")), "non avviato")):
+        monkeypatch.setattr(utility_page, "get_profiler", lambda prof=prof: prof)
+        page._start()
+        assert page.btn_start.isEnabled() and not page.btn_stop.isEnabled()
+        assert status in page.lbl_status.text()
+    page.deleteLater()
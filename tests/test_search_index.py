@@ -0,0 +1,149 @@
+"""
+Unit tests for the FTS5 search index over orders, typologies and profiles.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'qt6_app'))
+
+from ui_qt.services import database, search_index
+from ui_qt.services.orders_store import OrdersStore
+from ui_qt.services.profiles_store import ProfilesStore
+from ui_qt.services.typologies_store import TypologiesStore
+
+
+def _cut(profile, element, length=1000.0):
+    return {"profile": profile, "element": element, "length_mm": length, "ang_sx": 90.0, "ang_dx": 90.0, "qty": 1, "note": ""}
+
+
+@pytest.fixture
+def stores(tmp_path):
+    path = str(tmp_path / "blitz.db")
+    orders, typologies, profiles = OrdersStore(path), TypologiesStore(path), ProfilesStore(path)
+    yield orders, typologies, profiles
+    for s in (orders, typologies, profiles):
+        s.close()
+
+
+def test_match_query_quotes_prefix_tokens():
+    """Test user text becomes quoted prefix tokens and punctuation cannot break the MATCH syntax."""
+    assert search_index.match_query("ros  fin") == '"ros"* "fin"*'
+    assert search_index.match_query('a"b OR') == '"a"* "b"* "OR"*'
+    assert search_index.match_query("  ") is None
+
+
+def test_order_search_prefix_and_filters(stores):
+    """Test prefix matching on name, customer, cut profiles and elements, combined with facet filters."""
+    orders, _, _ = stores
+    a = orders.create_order("Villa Bianchi", "Rossi Serramenti", {"type": "cutlist", "cuts": [_cut("P60", "Traverso")]})
+    b = orders.create_order("Capannone", "Verdi", {"type": "cutlist", "cuts": [_cut("P80", "Montante")]})
+    c = orders.create_order("Ufficio", "Rossi Serramenti", {"type": "cutlist", "cuts": [_cut("P80", "Fermavetro")]})
+    orders._conn.execute("UPDATE orders SET created_at=? WHERE id=?", (1_700_000_000, a))
+    orders._conn.commit()
+
+    ids = lambda rows: [r["id"] for r in rows]
+    assert ids(orders.search("ross")) == [c, a]
+    assert ids(orders.search("vil bia")) == [a]
+    assert ids(orders.search("mont")) == [b]
+    assert ids(orders.search("p80")) == [c, b]
+    assert ids(orders.search(customer="Rossi Serramenti", profile="P80")) == [c]
+    assert ids(orders.search(date_to=1_700_000_000)) == [a]
+    assert ids(orders.search("ross", limit=1, offset=1)) == [a]
+
+    facets = orders.facets()
+    assert facets["customer"] == [("Rossi Serramenti", 2), ("Verdi", 1)]
+    assert facets["profile"] == [("P80", 2), ("P60", 1)]
+    assert orders.facets("ufficio", fields=("customer",)) == {"customer": [("Rossi Serramenti", 1)]}
+
+
+def test_listing_puts_last_modified_first(stores):
+    """Test the listing keeps list_orders' order, with or without text, so a re-saved old order comes first."""
+    orders, _, _ = stores
+    old = orders.create_order("Vecchia", "Rossi", {"type": "cutlist", "cuts": [_cut("P60", "Anta")]})
+    new = orders.create_order("Nuova", "Rossi", {"type": "cutlist", "cuts": [_cut("P60", "Anta")]})
+    orders._conn.execute("UPDATE orders SET created_at=1, updated_at=1 WHERE id=?", (old,))
+    orders._conn.execute("UPDATE orders SET updated_at=2 WHERE id=?", (new,))
+    orders._conn.commit()
+    orders.update_order(old, "Vecchia", "Rossi", {"type": "cutlist", "cuts": [_cut("P60", "Anta")]})
+
+    assert [r["id"] for r in orders.search()] == [old, new]
+    assert [r["id"] for r in orders.search()] == [r["id"] for r in orders.list_orders()]
+    assert [r["id"] for r in orders.search(customer="Rossi")] == [old, new]
+    assert [r["id"] for r in orders.search("anta")] == [old, new]
+
+
+def test_text_search_puts_last_modified_first(stores):
+    """Test text results follow updated_at (then id) like the listing, also across pages."""
+    orders, _, _ = stores
+    ids = [orders.create_order(f"Villa {i}", "Rossi", {"type": "cutlist", "cuts": [_cut("P60", "Anta")]})
+           for i in range(4)]
+    for ts, oid in zip((40, 10, 30, 30), ids):
+        orders._conn.execute("UPDATE orders SET updated_at=? WHERE id=?", (ts, oid))
+    orders._conn.commit()
+
+    expected = [ids[0], ids[3], ids[2], ids[1]]
+    assert [r["id"] for r in orders.search("villa")] == expected
+    assert [r["id"] for r in orders.search("anta", customer="Rossi")] == expected
+    assert [r["id"] for r in orders.search("villa", limit=2, offset=1)] == expected[1:3]
+
+
+def test_index_follows_store_changes(stores):
+    """Test rename, update, delete and typology renames keep the order index in sync."""
+    orders, typologies, _ = stores
+    tid = typologies.create_typology({"nome": "Scorrevole", "componenti": [
+        {"id_riga": "R1", "nome": "Binario", "profilo_nome": "S70", "formula_lunghezza": "L"}]})
+    oid = orders.create_order("Casa", "Neri", {"rows": [{"tid": tid, "qty": 1, "H": 2000.0, "L": 1500.0}]})
+    assert [r["id"] for r in orders.search("scorr")] == [oid]
+    assert [r["id"] for r in orders.search(profile="S70")] == [oid]
+
+    orders.rename_order(oid, "Villetta")
+    assert orders.search("casa") == [] and len(orders.search("villet")) == 1
+
+    typologies.update_typology(tid, {"nome": "Alzante", "componenti": [
+        {"id_riga": "R1", "nome": "Binario", "profilo_nome": "S70", "formula_lunghezza": "L"}]})
+    assert orders.search("scorr") == [] and len(orders.search("alzan")) == 1
+
+    orders.update_order(oid, "Villetta", "Bruni", {"type": "cutlist", "cuts": [_cut("P60", "Anta")]})
+    assert orders.search("neri") == [] and len(orders.search("brun anta")) == 1
+
+    orders.delete_order(oid)
+    assert orders.search("villet") == []
+    assert orders._conn.execute("SELECT COUNT(*) FROM orders_fts").fetchone()[0] == 0
+
+
+def test_typology_and_profile_search(stores):
+    """Test typologies match on name, category and component profiles; profiles follow the table via triggers."""
+    _, typologies, profiles = stores
+    profiles.upsert_profile("Perimetrale 60", 60.0)
+    profiles.upsert_profile("Perimetrale 80", 80.0)
+    tid = typologies.create_typology({"nome": "Finestra 2 ante", "categoria": "Finestre", "componenti": [
+        {"id_riga": "R1", "nome": "Telaio", "profilo_nome": "Perimetrale 60", "formula_lunghezza": "H"}]})
+    typologies.create_typology({"nome": "Porta", "categoria": "Porte"})
+
+    assert [t["id"] for t in typologies.search_typologies("perim")] == [tid]
+    assert [t["name"] for t in typologies.search_typologies("fin 2")] == ["Finestra 2 ante"]
+    assert len(typologies.search_typologies("port")) == 1
+    typologies.delete_typology(tid)
+    assert typologies.search_typologies("finestra") == []
+
+    assert [p["name"] for p in profiles.search_profiles("perim")] == ["Perimetrale 60", "Perimetrale 80"]
+    profiles.delete_profile("Perimetrale 80")
+    assert [p["name"] for p in profiles.search_profiles("80")] == []
+
+
+def test_migration_indexes_existing_data(tmp_path):
+    """Test upgrading a file from the previous schema version fills the index from the existing rows."""
+    path = tmp_path / "blitz.db"
+    pool = database.get_pool(path)
+    database.migrate(pool, database.MIGRATIONS[:4])
+    pool.execute("INSERT INTO orders(id, name, customer, kind, created_at, updated_at) VALUES (9, 'Storico', 'Gialli', 'cutlist', 1, 1)")
+    pool.execute("INSERT INTO order_cuts(order_id, ord, profile_name, element, length_mm, qty) VALUES (9, 0, 'P90', 'Zoccolo', 500, 1)")
+    pool.commit()
+
+    store = OrdersStore(str(path))
+    assert database.schema_version(store._conn) == database.SCHEMA_VERSION
+    assert [r["id"] for r in store.search("gial zocc")] == [9]
+    store.close()
@@ -0,0 +1,92 @@
+"""
+Unit tests for the in-memory settings service.
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'qt6_app'))
+
+from ui_qt.utils import settings
+
+
+@pytest.fixture
+def settings_file(tmp_path, monkeypatch):
+    path = tmp_path / "settings.json"
+    monkeypatch.setattr(settings, "SETTINGS_DIR", tmp_path)
+    monkeypatch.setattr(settings, "SETTINGS_FILE", path)
+    # dopo il cambio di percorso: nessuna lettura può rimettere in cache il file reale
+    settings.invalidate_settings_cache()
+    yield path
+    settings.invalidate_settings_cache()
+
+
+def _touch_external(path, data):
+    """Simulate another process rewriting the file (new mtime)."""
+    path.write_text(json.dumps(data), encoding="utf-8")
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10_000_000))
+
+
+def test_reads_are_cached_until_file_changes(settings_file, monkeypatch):
+    """Test the file is parsed once and reloaded (with notification) on mtime change."""
+    _touch_external(settings_file, {"opt_kerf_mm": 4.0})
+    loads = []
+    real_load = settings._load_from_disk
+    monkeypatch.setattr(settings, "_load_from_disk", lambda: loads.append(1) or real_load())
+    changes = []
+    unsubscribe = settings.subscribe(changes.append, keys=["opt_kerf_mm"])
+    try:
+        assert settings.read_settings()["opt_kerf_mm"] == 4.0
+        cfg = settings.read_settings()
+        cfg["opt_kerf_mm"] = 99.0  # copies: the cache is not mutated
+        assert settings.get_float("opt_kerf_mm") == 4.0
+        assert len(loads) == 1
+
+        _touch_external(settings_file, {"opt_kerf_mm": 5.5, "opt_solver": "BFD"})
+        assert settings.get_float("opt_kerf_mm") == 5.5
+        assert len(loads) == 2
+        assert changes == [{"opt_kerf_mm": 5.5}]
+    finally:
+        unsubscribe()
+
+
+def test_write_is_debounced_and_atomic(settings_file, monkeypatch):
+    """Test write_settings updates memory at once and the file on flush."""
+    monkeypatch.setattr(settings, "WRITE_DEBOUNCE_S", 60.0)
+    changes = []
+    unsubscribe = settings.subscribe(changes.append)
+    try:
+        settings.write_settings({"opt_time_limit_s": "30", "label_enabled": "on"})
+        assert settings.get_int("opt_time_limit_s") == 30
+        assert settings.get_bool("label_enabled") is True
+        assert not settings_file.exists()
+        assert changes == [{"opt_time_limit_s": "30", "label_enabled": "on"}]
+
+        # Same values again: no notification
+        settings.write_settings({"opt_time_limit_s": "30"})
+        assert len(changes) == 1
+
+        assert settings.flush_settings()
+        on_disk = json.loads(settings_file.read_text(encoding="utf-8"))
+        assert on_disk["opt_time_limit_s"] == "30"
+        assert not settings_file.with_suffix(".json.tmp").exists()
+    finally:
+        unsubscribe()
+
+
+def test_notifier_emits_qt_signal(qapp, settings_file):
+    """Test settings_notifier().changed carries the changed keys."""
+    received = []
+    notifier = settings.settings_notifier()
+    notifier.changed.connect(received.append)
+    try:
+        settings.save_settings({"opt_stock_mm": 7000.0})
+        qapp.processEvents()
+        assert {"opt_stock_mm": 7000.0} in received
+    finally:
+        notifier.changed.disconnect(received.append)
@@ -0,0 +1,115 @@
+"""
+Unit tests for the typology snapshot cache and var rule intervals.
+"""
+
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'qt6_app'))
+
+from ui_qt.services.typologies_store import TypologiesStore
+from ui_qt.services.rule_intervals import IntervalIndex, check_rule_intervals
+from ui_qt.services.typology_cache import TypologyCache
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = TypologiesStore(str(tmp_path / "typologies.db"))
+    yield s
+    s.close()
+
+
+def _create(store, name):
+    tid = store.create_typology({
+        "nome": name, "variabili_locali": {"A": 10.0},
+        "componenti": [{"id_riga": "R1", "nome": "Anta", "formula_lunghezza": "H - A", "quantita": 1},
+                       {"id_riga": "R2", "nome": "Traverso", "formula_lunghezza": "C_R1 / 2", "quantita": 1}],
+    })
+    store.upsert_multi_formula(tid, "G1", "anta", "H - braccio")
+    store.replace_multi_var_rules(tid, "G1", [
+        {"var_name": "braccio", "l_min": 0, "l_max": 9999, "value": 150, "variant": "tipo0"},
+        {"var_name": "braccio", "l_min": 500, "l_max": 800, "value": 200, "variant": "tipo1"},
+    ])
+    return tid
+
+
+def test_snapshot_contents_and_single_stamp_query(store):
+    """Test snapshots expose components, groups and rules, and warm lookups cost one query."""
+    tids = [_create(store, f"T{i}") for i in range(3)]
+    cache = TypologyCache(store)
+    snaps = cache.get_many(tids + [999])
+    assert sorted(snaps) == tids
+
+    snap = snaps[tids[0]]
+    assert [c["id_riga"] for c in snap.components] == ["R1", "R2"]
+    assert snap.data["variabili_locali"]["A"] == 10.0
+    with pytest.raises(TypeError):
+        snap.data["variabili_locali"]["A"] = 1.0  # read-only
+    group = snap.group("G1")
+    assert group.formulas["anta"]["formula"] == "H - braccio"
+    assert group.resolve_vars(600.0) == ({"braccio": 200.0, "braccio_variant": "tipo1"}, {"braccio": "tipo1"})
+    assert snap.graph("G1") is snap.graph("G1")
+    assert snap.graph("G1").exprs[0] == "H - braccio"
+
+    queries = []
+    store._conn.set_trace_callback(queries.append)
+    again = cache.get_many(tids * 50)
+    assert len(queries) == 1
+    assert all(again[t] is snaps[t] for t in tids)
+
+
+def test_snapshot_reloaded_when_typology_changes(store):
+    """Test edits to rules, formulas or the typology bump updated_at and refresh the snapshot."""
+    tid = _create(store, "T")
+    cache = TypologyCache(store)
+    first = cache.get(tid)
+
+    store.replace_multi_var_rules(tid, "G1", [{"var_name": "braccio", "l_min": 0, "l_max": 9999, "value": 99}])
+    second = cache.get(tid)
+    assert second is not first
+    assert second.group("G1").resolve_vars(600.0)[0] == {"braccio": 99.0}
+
+    store.delete_multi_formula(tid, "G1", "anta")
+    third = cache.get(tid)
+    assert third.updated_at > second.updated_at
+    assert third.group("G1").formulas == {}
+
+    store.delete_typology(tid)
+    assert cache.get(tid) is None
+
+
+def test_interval_index_matches_linear_scan():
+    """Test bisect lookup gives the narrowest (then first) matching rule at every point."""
+    random.seed(7)
+    rules = sorted(({"l_min": float(random.randrange(0, 2000, 50)), "value": float(k)} for k in range(40)),
+                   key=lambda r: r["l_min"])
+    for r in rules:
+        r["l_max"] = r["l_min"] + float(random.randrange(0, 800, 50))
+    index = IntervalIndex(rules)
+    for L in [x * 12.5 for x in range(-4, 240)]:
+        matches = [r for r in rules if r["l_min"] <= L <= r["l_max"]]
+        matches.sort(key=lambda r: r["l_max"] - r["l_min"])
+        assert index.find(L) is (matches[0] if matches else None)
+
+
+def test_check_rule_intervals_reports_overlaps_and_gaps():
+    """Test crossing or equal-width overlaps and holes are reported; nesting and shared bounds are not."""
+    def rule(var, lo, hi):
+        return {"var_name": var, "l_min": lo, "l_max": hi, "value": 0}
+
+    ok = [rule("braccio", 0, 9999), rule("braccio", 500, 800), rule("braccio", 800, 1200)]
+    assert check_rule_intervals(ok) == []
+    issues = check_rule_intervals([
+        rule("braccio", 0, 600), rule("braccio", 500, 800),      # incrocio
+        rule("braccio", 900, 1000),                              # buco 800-900
+        rule("x", 0, 100), rule("x", 0, 100), rule("x", 10, 5),  # doppione e intervallo invertito
+    ])
+    assert issues == [
+        "braccio: sovrapposizione 0–600 / 500–800",
+        "braccio: L non coperta tra 800 e 900",
+        "x: intervallo non valido 10–5",
+        "x: sovrapposizione 0–100 / 0–100",
+    ]
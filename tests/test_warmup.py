@@ -0,0 +1,81 @@
+"""
+Unit tests for the background warm-up runner.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'qt6_app'))
+
+from ui_qt.utils import warmup
+from ui_qt.utils.startup_timing import StartupTimer
+from ui_qt.utils.warmup import WarmupRunner, make_hardware_probe
+
+
+def _boom():
+    raise RuntimeError("disk full")
+
+
+def test_runner_collects_results_and_summary():
+    """Test task results, worst-status summary and exception capture."""
+    runner = WarmupRunner()
+    assert runner.summary() == (None, "-")
+    done = []
+    tasks = [
+        ("a", lambda: (warmup.OK, "fine")),
+        ("b", lambda: (warmup.WARN, "slow")),
+        ("c", _boom),
+    ]
+    assert runner.start(tasks, on_done=done.append)
+    assert runner.join(timeout=5.0)
+
+    by_name = {r.name: r for r in runner.results()}
+    assert by_name["a"].status == warmup.OK
+    assert by_name["b"].status == warmup.WARN
+    assert by_name["c"].status == warmup.ERROR
+    assert "disk full" in by_name["c"].detail
+    assert runner.summary() == (warmup.ERROR, "ERRORI")
+    assert "b: WARN" in runner.describe()
+    assert len(done) == 1 and len(done[0]) == 3
+
+
+def test_timer_shared_with_the_gui_thread():
+    """Test warm-up phases and GUI marks/reports on the same timer do not race."""
+    timer = StartupTimer()
+    runner = WarmupRunner()
+    tasks = [(f"t{i}", lambda: (warmup.OK, "")) for i in range(50)]
+    assert runner.start(tasks, timer=timer)
+    for i in range(200):
+        timer.mark(f"m{i}")
+        timer.format_report()
+        timer.to_dict()
+    assert runner.join(timeout=5.0)
+    snap = timer.to_dict()
+    assert len(snap["marks"]) == 200
+    assert sorted(p["name"] for p in snap["phases"]) == sorted(f"warmup t{i}" for i in range(50))
+
+
+def test_hardware_probe_reports_failed_checks():
+    """Test probe_hardware() results map to ok/error and plain machines to simulation."""
+    class _Machine:
+        def probe_hardware(self):
+            return {"modbus_a": (True, "addr 1 ok"), "encoder": (False, "non connesso")}
+
+    status, detail = make_hardware_probe(_Machine())()
+    assert status == warmup.ERROR
+    assert "encoder: non connesso" in detail
+    assert make_hardware_probe(object())() == (warmup.OK, "simulazione")
+
+
+def test_warm_databases_creates_schemas(tmp_path, monkeypatch):
+    """Test the stores are opened (schema created) and quick_check passes."""
+    from ui_qt.services import typologies_store, orders_store, profiles_store
+    monkeypatch.setattr(typologies_store, "default_db_path", lambda: tmp_path / "typologies.db")
+    monkeypatch.setattr(orders_store, "default_db_path", lambda: tmp_path / "typologies.db")
+    monkeypatch.setattr(profiles_store, "DB_PATH", tmp_path / "profiles.db")
+
+    status, detail = warmup.warm_databases()
+    assert status == warmup.OK
+    assert (tmp_path / "typologies.db").exists()
+    assert (tmp_path / "profiles.db").exists()
+    assert "profiles.db" in detail
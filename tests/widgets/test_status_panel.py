@@ -120,3 +120,16 @@ def test_status_panel_morse_state(qapp, mock_machine):
     
     assert "BLOCC" in panel.w_morse_sx.text().upper()
     assert "SBLOCC" in panel.w_morse_dx.text().upper()
+
+
+def test_status_panel_system_pill(qapp, mock_machine):
+    """Test SISTEMA pill shows the warm-up summary."""
+    from qt6_app.ui_qt.utils import warmup
+    runner = warmup.get_warmup()
+    runner.start([("db", lambda: (warmup.WARN, "slow"))])
+    assert runner.join(timeout=5.0)
+
+    panel = StatusPanel(mock_machine)
+    panel.refresh()
+    assert panel.w_system.text() == "AVVISI"
+    assert "db: WARN" in panel.w_system.toolTip()
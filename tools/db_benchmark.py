@@ -0,0 +1,151 @@
+"""
+SQLite access benchmark: per-call connections vs the shared pool.
+
+Runs the typical store operations on throw-away databases, once the way
+the stores used to work and once through ui_qt.utils.db_pool (one WAL
+connection per thread, cached statements, one transaction per write).
+The "before" cases replay the pre-pool store code: ProfilesStore opened
+a connection per call (rollback journal, commit per write), while
+TypologiesStore.create_typology kept one connection and committed once
+after the typology row and all its components.
+
+Usage:
+    python tools/db_benchmark.py
+    python tools/db_benchmark.py --n 2000 --json bench.json
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'qt6_app'))
+
+from ui_qt.utils.db_pool import get_pool  # noqa: E402
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE NOT NULL, thickness REAL NOT NULL DEFAULT 0);
+CREATE TABLE IF NOT EXISTS typology (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL UNIQUE, category TEXT,
+    material TEXT, ref_quota TEXT DEFAULT 'esterna', extra_detrazione REAL DEFAULT 0.0, pezzi_totali INTEGER DEFAULT 1,
+    note TEXT, created_at INTEGER, updated_at INTEGER);
+CREATE TABLE IF NOT EXISTS typology_component (id INTEGER PRIMARY KEY AUTOINCREMENT,
+    typology_id INTEGER NOT NULL REFERENCES typology(id) ON DELETE CASCADE, ord INTEGER NOT NULL DEFAULT 0, row_id TEXT,
+    name TEXT, profile_name TEXT, quantity INTEGER DEFAULT 0, ang_sx REAL DEFAULT 0.0, ang_dx REAL DEFAULT 0.0,
+    formula TEXT, offset REAL DEFAULT 0.0, note TEXT);
+"""
+
+INSERT_TYPOLOGY = ("INSERT INTO typology(name, category, material, ref_quota, extra_detrazione, pezzi_totali, note, "
+                   "created_at, updated_at) VALUES(?,?,?,?,?,?,?,?,?)")
+INSERT_COMPONENT = ("INSERT INTO typology_component(typology_id,ord,row_id,name,profile_name,quantity,ang_sx,ang_dx,"
+                    "formula,offset,note) VALUES(?,?,?,?,?,?,?,?,?,?,?)")
+
+
+
+def _legacy_connect(path):
+    return sqlite3.connect(path)
+
+
+def _timeit(fn, n):
+    start = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    return (time.perf_counter() - start) / n * 1e6  # us/op
+
+
+def _typology_rows(prefix, i):
+    ts = int(time.time())
+    typ = (f"{prefix}{i}", "", "", "esterna", 0.0, 1, "", ts, ts)
+    comps = [(k, f"R{k}", f"C{k}", "P60", 1, 45.0, 45.0, "H-10", 0.0, "") for k in range(30)]
+    return typ, comps
+
+
+def run(n=500, tmpdir=None):
+    """Return {operation: {"before": us/op, "after": us/op}}."""
+    if tmpdir is None:
+        with tempfile.TemporaryDirectory(prefix="blitz-db-bench-") as tmp:
+            return run(n, tmp)
+    before_path = os.path.join(tmpdir, "before.db")
+    after_path = os.path.join(tmpdir, "after.db")
+    for path in (before_path, after_path):
+        con = sqlite3.connect(path)
+        con.executescript(SCHEMA)
+        con.executemany("INSERT INTO profiles(name, thickness) VALUES(?, ?)", [(f"P{i}", i / 10) for i in range(200)])
+        con.commit()
+        con.close()
+    pool = get_pool(after_path)
+    pool.execute("PRAGMA quick_check").fetchone()
+
+    # get_profile: previously one connect() per call
+    def get_before(i):
+        con = _legacy_connect(before_path)
+        con.execute("SELECT id, name, thickness FROM profiles WHERE name=?", (f"P{i % 200}",)).fetchone()
+        con.close()
+
+    def get_after(i):
+        pool.execute("SELECT id, name, thickness FROM profiles WHERE name=?", (f"P{i % 200}",)).fetchone()
+
+    def upsert_before(i):
+        con = _legacy_connect(before_path)
+        con.execute("INSERT INTO profiles(name, thickness) VALUES(?, ?) ON CONFLICT(name) DO UPDATE SET thickness=excluded.thickness",
+                    (f"P{i % 200}", float(i)))
+        con.commit()
+        con.close()
+
+    def upsert_after(i):
+        pool.execute("INSERT INTO profiles(name, thickness) VALUES(?, ?) ON CONFLICT(name) DO UPDATE SET thickness=excluded.thickness",
+                     (f"P{i % 200}", float(i)))
+        pool.commit()
+
+    # create_typology with 30 components: previously one long-lived connection
+    # (rollback journal, foreign_keys=ON) and a single commit at the end
+    legacy = _legacy_connect(before_path)
+    legacy.execute("PRAGMA foreign_keys=ON")
+
+    def save_before(i):
+        typ, comps = _typology_rows("before", i)
+        tid = legacy.execute(INSERT_TYPOLOGY, typ).lastrowid
+        for c in comps:
+            legacy.execute(INSERT_COMPONENT, (tid,) + c)
+        legacy.commit()
+
+    def save_after(i):
+        typ, comps = _typology_rows("after", i)
+        with pool.transaction() as con:
+            tid = con.execute(INSERT_TYPOLOGY, typ).lastrowid
+            for c in comps:
+                con.execute(INSERT_COMPONENT, (tid,) + c)
+
+    results = {}
+    for name, before, after, count in (
+        ("get_profile", get_before, get_after, n),
+        ("upsert_profile", upsert_before, upsert_after, max(n // 5, 1)),
+        ("save_typology_30_components", save_before, save_after, max(n // 25, 1)),
+    ):
+        results[name] = {"before": _timeit(before, count), "after": _timeit(after, count)}
+    legacy.close()
+    pool.close_all()
+    return results
+
+
+def main(argv=None):
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Compare per-call SQLite connections with the shared pool.")
+    parser.add_argument("--n", type=int, default=500, help="Read operations per measurement")
+    parser.add_argument("--json", dest="json_out", help="Write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = run(args.n)
+    print(f"{'operation':32} {'before us/op':>14} {'after us/op':>14} {'speed-up':>9}")
+    for name, r in results.items():
+        print(f"{name:32} {r['before']:14.1f} {r['after']:14.1f} {r['before'] / max(r['after'], 1e-9):8.1f}x")
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
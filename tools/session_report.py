@@ -0,0 +1,61 @@
+"""
+Machine session report.
+
+Summarizes a session recorded with BLITZ_RECORD_SESSION=<file> (see
+qt6_app/ui_qt/machine/session_recorder.py): duration, event counts and the
+reaction latency of the cycle logic, i.e. the time from each input edge or
+end of positioning to the next command sent to the machine.
+
+Usage:
+    python tools/session_report.py shift.blzses
+    python tools/session_report.py shift.blzses --events 50
+    python tools/session_report.py shift.blzses --json report.json
+
+Replay the same session in the GUI with:
+    BLITZ_REPLAY_SESSION=shift.blzses BLITZ_REPLAY_SPEED=10 python qt6_app/main_qt.py
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'qt6_app'))
+
+from ui_qt.machine.session_recorder import read_session, session_summary  # noqa: E402
+
+
+def main(argv=None):
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Summarize a recorded machine session.")
+    parser.add_argument("session", help="Session file")
+    parser.add_argument("--events", type=int, default=0, help="Print the first N events")
+    parser.add_argument("--json", dest="json_out", help="Write the summary to this JSON file")
+    args = parser.parse_args(argv)
+
+    try:
+        events = read_session(args.session)
+    except Exception as e:
+        print(f"Error: {e}")
+        return 1
+
+    summary = session_summary(events)
+    print(f"Duration: {summary['duration_s']:.1f} s, events: {summary['events']}")
+    for key, count in sorted(summary["counts"].items()):
+        print(f"  {key:40s} {count:8d}")
+    print("\nReaction latency (trigger -> next command):")
+    for label, lat in sorted(summary["latency"].items()):
+        print(f"  {label:20s} n={lat['count']:6d}  mean={lat['mean_ms']:8.1f} ms  "
+              f"p95={lat['p95_ms']:8.1f} ms  max={lat['max_ms']:8.1f} ms")
+
+    for ev in events[:args.events]:
+        print(f"{ev.t:10.3f}  {ev.kind:8s} {ev.name:28s} {ev.value!r}")
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Headless production-run simulator.
+
+Answers "how long will this order take?" without the Qt GUI: runs the
+optimizer and the cutting-mode handlers against the simulated machine and
+reports total time, bars, scrap and a per-phase breakdown. Comma-separated
+values turn into a parameter sweep executed in parallel processes.
+
+Usage:
+    python tools/simulate_production.py --cutlist order.json
+    python tools/simulate_production.py --order 12 --stock 6500,7000 --kerf 3,4
+    python tools/simulate_production.py --cutlist order.json --solver ILP_KNAP,BFD --json out.json
+
+Settings (opt_*, machine_*) are read from the application settings unless
+--no-settings is given; command-line values override them.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'qt6_app'))
+
+from ui_qt.logic.production_sim import (  # noqa: E402
+    RunParams,
+    expand_grid,
+    format_report,
+    load_cutlist_json,
+    load_order_cuts,
+    run_sweep,
+)
+
+# CLI option -> (RunParams field, type)
+SWEEP_OPTIONS = {
+    "stock": ("stock_mm", float),
+    "kerf": ("kerf_mm", float),
+    "solver": ("solver", str.upper),
+    "time_limit": ("per_bar_time_s", int),
+    "tail_bars": ("tail_bars", int),
+    "speed": ("max_speed_mm_s", float),
+    "accel": ("acceleration_mm_s2", float),
+    "cut_time": ("cut_time_s", float),
+    "bar_load_time": ("bar_load_time_s", float),
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate a production run without the GUI.")
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument("--cutlist", help="Cutlist JSON file ({'type': 'cutlist', 'cuts': [...]})")
+    src.add_argument("--order", type=int, help="Order id in OrdersStore (cutlist type)")
+    parser.add_argument("--db", help="Orders database path (default: application DB)")
+    for opt, (field_name, _type) in SWEEP_OPTIONS.items():
+        parser.add_argument(f"--{opt.replace('_', '-')}", dest=opt,
+                            help=f"{field_name}; comma-separated values for a sweep")
+    parser.add_argument("--no-tail-refine", action="store_true", help="Disable tail refinement")
+    parser.add_argument("--no-settings", action="store_true", help="Ignore application settings")
+    parser.add_argument("--jobs", type=int, default=None, help="Parallel processes (default: CPU count)")
+    parser.add_argument("--json", dest="json_out", help="Write full reports to this JSON file")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show optimizer/handler logs")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Main entry point."""
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+
+    try:
+        cuts = load_cutlist_json(args.cutlist) if args.cutlist else load_order_cuts(args.order, args.db)
+    except Exception as e:
+        print(f"Error: {e}")
+        return 1
+    if not cuts:
+        print("Error: empty cutlist")
+        return 1
+
+    settings = {}
+    if not args.no_settings:
+        try:
+            from ui_qt.utils.settings import read_settings
+            settings = read_settings()
+        except Exception:
+            settings = {}
+    base = RunParams.from_settings(settings)
+    if args.no_tail_refine:
+        base = RunParams.from_settings(settings, tail_refine=False)
+
+    grid = {}
+    for opt, (field_name, conv) in SWEEP_OPTIONS.items():
+        raw = getattr(args, opt)
+        if raw:
+            grid[field_name] = [conv(v.strip()) for v in raw.split(",") if v.strip()]
+    variants = expand_grid(base, grid)
+    sweep_keys = [k for k, values in grid.items() if len(values) > 1]
+
+    reports = run_sweep(cuts, variants, processes=args.jobs)
+    print(format_report(reports, sweep_keys))
+    if len(reports) == 1:
+        r = reports[0]
+        if r["modes"]:
+            print("modes: " + ", ".join(f"{k}={v}" for k, v in sorted(r["modes"].items())))
+        if r["failed_pieces"]:
+            print(f"failed pieces: {r['failed_pieces']}")
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""
+Automatic-cycle trace viewer.
+
+Reads the cycle trace written by the Automatico page (JSON lines under
+~/.blitz/traces) and prints the slowest phases of the cut cycle and,
+optionally, the latency breakdown of every piece.
+
+Usage:
+    python tools/trace_report.py
+    python tools/trace_report.py ~/.blitz/traces/cycle_trace.jsonl --pieces
+    python tools/trace_report.py --top 5 --json breakdown.json
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'qt6_app'))
+
+from ui_qt.utils.cycle_trace import (  # noqa: E402
+    DEFAULT_TRACE_DIR,
+    TRACE_FILENAME,
+    format_trace_report,
+    load_trace,
+    piece_breakdown,
+    slowest_phases,
+)
+
+
+def trace_files(path: Path):
+    """Rotated files first (oldest to newest), then the live file."""
+    rotated = sorted(path.parent.glob(f"{path.name}.*"),
+                     key=lambda p: int(p.suffix[1:]) if p.suffix[1:].isdigit() else 0,
+                     reverse=True)
+    return [str(p) for p in rotated] + ([str(path)] if path.exists() else [])
+
+
+def main(argv=None):
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Report on the automatic cut cycle trace.")
+    parser.add_argument("trace", nargs="?", default=str(DEFAULT_TRACE_DIR / TRACE_FILENAME),
+                        help="Trace file (rotated siblings are included)")
+    parser.add_argument("--top", type=int, default=10, help="Number of phases to list")
+    parser.add_argument("--pieces", action="store_true", help="Print the breakdown of every piece")
+    parser.add_argument("--json", dest="json_out", help="Write the breakdown to this JSON file")
+    args = parser.parse_args(argv)
+
+    files = trace_files(Path(args.trace).expanduser())
+    if not files:
+        print(f"Error: no trace found at {args.trace}")
+        return 1
+    breakdown = piece_breakdown(load_trace(files))
+    print(format_trace_report(breakdown, top=args.top, pieces=args.pieces))
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump({"pieces": breakdown, "phases": slowest_phases(breakdown, top=args.top)},
+                      f, indent=2, ensure_ascii=False, default=str)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())